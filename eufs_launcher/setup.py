@@ -26,5 +26,9 @@ setup(
     description='Configures and launches eufs_sim.',
     license='MIT',
     tests_require=['pytest'],
-    scripts=['scripts/eufs_launcher'],
+    scripts=[
+        'scripts/eufs_launcher',
+        'scripts/eufs_launcher_headless',
+        'scripts/eufs_launcher_matrix'
+    ],
 )
@@ -1,13 +1,7 @@
 import yaml
-from collections import OrderedDict
 from os import listdir
-from os import path
 from os.path import join
-from os.path import isfile
 from os.path import expandvars
-from os import walk, getenv
-from subprocess import Popen
-from glob import glob
 
 from ament_index_python.packages import get_package_share_directory
 from python_qt_binding import loadUi
@@ -18,8 +12,15 @@ from python_qt_binding.QtWidgets import QCheckBox
 from python_qt_binding.QtWidgets import QLabel
 from python_qt_binding.QtWidgets import QApplication
 from python_qt_binding.QtGui import QFont
+from python_qt_binding.QtCore import QTimer
 from qt_gui.plugin import Plugin
 
+from eufs_launcher.launch_planner import LaunchPlanner
+from eufs_launcher.launch_planner import launch
+from eufs_tracks.track_index import get_track_index
+from eufs_tracks.track_index import get_launch_file_index
+from eufs_profiling import profiler
+
 
 class EUFSLauncher(Plugin):
     def __init__(self, context):
@@ -28,6 +29,7 @@ class EUFSLauncher(Plugin):
         and all the setting-up of the values and buttons displayed.
         """
 
+        profiler.start("EUFSLauncher")
         super(EUFSLauncher, self).__init__(context)
 
         # Give QObjects reasonable names
@@ -52,6 +54,14 @@ class EUFSLauncher(Plugin):
             except yaml.YAMLError as exc:
                 print(exc)
                 return
+        self.planner = LaunchPlanner(self.default_config["eufs_launcher"])
+        profiler.checkpoint("EUFSLauncher", "load config")
+
+        # If use_gui is false, we jump straight into launching the track
+        # without building any widgets
+        if not use_gui:
+            self.launch_selection(self.planner.default_selection())
+            return
 
         # Create QWidget
         self._widget = QWidget()
@@ -61,6 +71,7 @@ class EUFSLauncher(Plugin):
         # Extend the widget with all attributes and children from UI file
         self.main_ui_file = join(self.LAUNCHER_SHARE, "resource", "launcher.ui")
         loadUi(self.main_ui_file, self._widget)
+        profiler.checkpoint("EUFSLauncher", "load ui")
 
         # Show _widget.windowTitle on left-top of each plugin (when it's set
         # in _widget). This is useful when you open multiple plugins at once.
@@ -88,6 +99,7 @@ class EUFSLauncher(Plugin):
         # Hook up buttons to onclick functions
         self.LAUNCH_BUTTON.clicked.connect(self.launch_button_pressed)
         self.REFRESH_TRACK_BUTTON.clicked.connect(self.load_track_dropdowns)
+        profiler.checkpoint("EUFSLauncher", "track index")
 
         # Setup Vehicle Models menu
         models_filepath = join(
@@ -102,17 +114,14 @@ class EUFSLauncher(Plugin):
 
         # Setup Command Modes menu
         default_mode = self.default_config["eufs_launcher"]["default_command_mode"]
-        modes = ["acceleration", "velocity"]
-        EUFSLauncher.setup_q_combo_box(self.COMMAND_MODE_MENU, default_mode, modes)
+        EUFSLauncher.setup_q_combo_box(
+            self.COMMAND_MODE_MENU, default_mode, LaunchPlanner.COMMAND_MODES
+        )
 
         # Setup Conditions menu
         default_mode = self.default_config["eufs_launcher"]["default_vehicle_preset"]
-        self.MODEL_CONFIGS = {
-            "DryTrack": "configDry.yaml",
-            "WetTrack": "configWet.yaml",
-        }
         EUFSLauncher.setup_q_combo_box(
-            self.MODEL_PRESET_MENU, default_mode, self.MODEL_CONFIGS.keys()
+            self.MODEL_PRESET_MENU, default_mode, LaunchPlanner.MODEL_CONFIGS.keys()
         )
 
         # Setup Robot Name menu
@@ -122,89 +131,33 @@ class EUFSLauncher(Plugin):
         EUFSLauncher.setup_q_combo_box(self.ROBOT_NAME_MENU, default_mode, modes)
 
         # Setup launch file options
-        launch_directory_path = self.default_config["eufs_launcher"][
-            "default_launch_directory"
-        ]
-        launch_directory_path = join(expandvars(launch_directory_path),'*.launch.py')
-        all_files = glob(launch_directory_path, recursive=True)
-
-        # Filter launch files found within install or build directory
-        launch_files = [file for file in all_files if not ('install' in file or 'build' in file)]
-
-        default_launch_file = self.default_config["eufs_launcher"][
-            "default_launch_file"
-        ]
-        default_launch_file = expandvars(default_launch_file)
+        # Only the default is shown at first, searching the launch directory
+        # can take a while so it is left until the plugin has been drawn
+        self.default_launch_file = expandvars(
+            self.default_config["eufs_launcher"]["default_launch_file"]
+        )
         EUFSLauncher.setup_q_combo_box(
-            self.LAUNCH_FILE_SELECTOR, default_launch_file, launch_files
+            self.LAUNCH_FILE_SELECTOR, self.default_launch_file, []
         )
+        QTimer.singleShot(0, self.load_launch_files)
+        profiler.checkpoint("EUFSLauncher", "vehicle menus")
 
         # Add buttons from yaml file
-        checkboxes = OrderedDict(
-            sorted(
-                self.default_config["eufs_launcher"]["checkboxes"].items(),
-                key=lambda x: x[1]["priority"],
-            )
-        )
-        self.checkbox_effect_mapping = []
-        self.checkbox_parameter_mapping = []
+        # What each checkbox launches or passes to `simulation.launch.py` is
+        # handled by the launch planner, here we only lay them out
+        self.checkbox_widgets = {}
         starting_xpos = 170
         starting_ypos = 257
-        counter = 0
-        for key, value in checkboxes.items():
+        for counter, (key, checkbox) in enumerate(self.planner.checkboxes.items()):
             cur_xpos = starting_xpos + 100 * (counter % 2)
             cur_ypos = starting_ypos + 15 * (counter // 2)
-            cur_cbox = QCheckBox(checkboxes[key]["label"], self._widget)
-            cur_cbox.setChecked(checkboxes[key]["checked_on_default"])
+            cur_cbox = QCheckBox(checkbox["label"], self._widget)
+            cur_cbox.setChecked(checkbox["checked_on_default"])
             cur_cbox.setGeometry(cur_xpos, cur_ypos, 300, 30)
             cur_cbox.setFont(QFont("Sans Serif", 7))
-            if "package" in checkboxes[key] and "launch_file" in checkboxes[key]:
-                # This handles any launch files that the checkbox will launch
-                # if selected.
-                if "args" in checkboxes[key]:
-                    cur_cbox_args = checkboxes[key]["args"].keys()
-                else:
-                    cur_cbox_args = []
-                # The weird double-lambda thing is because python
-                # lambda-captures
-                # by reference, not value, and so consequently since the `key`
-                # variable is used every loop, at the end of the loops all of
-                # these lambda functions would actually be refering to the
-                # *last*
-                # loop's key, not each individual loop's key.
-                # To solve that, we force key into a local variable by wrapping
-                # our contents with a lambda taking it as a parameter, then
-                # immediately passing it in.
-                # We do the same for all other changing variables.
-                self.checkbox_effect_mapping.append(
-                    (
-                        cur_cbox,
-                        (
-                            lambda key, cur_cbox_args: (
-                                lambda: self.launch_with_args(
-                                    checkboxes[key]["package"],
-                                    checkboxes[key]["launch_file"],
-                                    cur_cbox_args,
-                                )
-                            )
-                        )(key, cur_cbox_args),
-                        (lambda key: lambda: None)(key),
-                    )
-                )
-            if "parameter_triggering" in checkboxes[key]:
-                # This handles parameter details that will be passed to the
-                # `simulation.launch.py` backbone file depending on whether the
-                # checkbox is on or off
-                self.checkbox_parameter_mapping.append(
-                    (
-                        cur_cbox,
-                        checkboxes[key]["parameter_triggering"]["if_on"].keys(),
-                        checkboxes[key]["parameter_triggering"]["if_off"].keys(),
-                    )
-                )
 
-            setattr(self, checkboxes[key]["name"].upper(), cur_cbox)
-            counter += 1
+            self.checkbox_widgets[key] = cur_cbox
+            setattr(self, checkbox["name"].upper(), cur_cbox)
 
         # Looping over all widget to fix scaling issue via manual scaling
         # Scaling done via magically comparing the width to the 'default'
@@ -224,10 +177,8 @@ class EUFSLauncher(Plugin):
                     new_width,
                     geom.height() * (scalar_multiplier),
                 )
-
-        # If use_gui is false, we jump straight into launching the track
-        if not use_gui:
-            self.launch_button_pressed()
+        profiler.checkpoint("EUFSLauncher", "checkboxes and scaling")
+        profiler.report("EUFSLauncher", log=self.logger.info)
 
     @staticmethod
     def setup_q_combo_box(q_combo_box, default_mode, modes):
@@ -249,119 +200,69 @@ class EUFSLauncher(Plugin):
 
         # Clear the dropdowns
         self.TRACK_SELECTOR.clear()
-        # Get tracks from eufs_tracks package
-        launch_dir_path = join(self.TRACKS_SHARE, "launch")
-        launch_files = [
-            f for f in listdir(launch_dir_path) if isfile(join(launch_dir_path, f))
-        ]
-
-        # Remove "blacklisted" files (ones that don't define tracks)
-        blacklist_filepath = join(self.TRACKS_SHARE, "launch/blacklist.txt")
-        with open(blacklist_filepath, "r") as f:
-            blacklist = [f.strip() for f in f.readlines()]  # remove \n
-            launch_files = [f for f in launch_files if f not in blacklist]
 
-        # Add Tracks to Track Selector
+        # Get tracks from eufs_tracks package, without "blacklisted" files
+        # (ones that don't define tracks) and with the base track first
         base_track = self.default_config["eufs_launcher"]["base_track"]
-        if base_track in launch_files:
-            self.TRACK_SELECTOR.addItem(base_track.split(".")[0])
-        for f in launch_files:
-            if f != base_track:
-                self.TRACK_SELECTOR.addItem(f.split(".")[0])
+        for track in get_track_index(self.TRACKS_SHARE).track_names(base_track):
+            self.TRACK_SELECTOR.addItem(track)
 
-    def launch_button_pressed(self):
-        """
-        Launches Gazebo.
-
-        Here is our pre-launch process:
-          1: Create csv from track_to_launch
-          2: Kill random noise tiles in accordance with the noise value
-          3: Shuffle cone positions slightly in accordance with cone noise
-             value
-          4: Convert that to "LAST_LAUNCH.launch"
-        """
-        self.logger.info("Launching Nodes...")
-
-        # Calculate parameters to pass
-        track_layout = f"track:={self.TRACK_SELECTOR.currentText()}"
-        vehicle_model = f"vehicleModel:={self.VEHICLE_MODEL_MENU.currentText()}"
-        command_mode = f"commandMode:={self.COMMAND_MODE_MENU.currentText()}"
-        model_config = self.MODEL_CONFIGS[self.MODEL_PRESET_MENU.currentText()]
-        vehicle_model_config = f"vehicleModelConfig:={model_config}"
-        robot_name = f"robot_name:={self.ROBOT_NAME_MENU.currentText()}"
-        parameters_to_pass = [
-            track_layout,
-            vehicle_model,
-            command_mode,
-            vehicle_model_config,
-            robot_name,
+    def load_launch_files(self):
+        """Fills the launch file drop-down menu from the launch file index."""
+        launch_directory_path = self.default_config["eufs_launcher"][
+            "default_launch_directory"
         ]
+        # Launch files found within install or build directories are filtered out
+        launch_files = get_launch_file_index(launch_directory_path).files()
 
-        # Get vehicle model information
-        self.logger.info(f"Vehicle model: {self.VEHICLE_MODEL_MENU.currentText()}")
-        self.logger.info(f"Command mode: {self.COMMAND_MODE_MENU.currentText()}")
-        self.logger.info(f"Preset: {model_config}")
-        self.logger.info(
-            f"Robot description file: {self.ROBOT_NAME_MENU.currentText()}"
-        )
-        self.logger.info(f"Launch file: {self.LAUNCH_FILE_SELECTOR.currentText()}")
-
-        # Get checkbox parameter information
-        for (
-            checkbox,
-            param_if_on,
-            param_if_off,
-        ) in self.checkbox_parameter_mapping:
-            if checkbox.isChecked():
-                self.logger.info(f"Checkbox enabled: {param_if_on}")
-                parameters_to_pass.extend(param_if_on)
-            else:
-                self.logger.info(f"Checkbox disabled: {param_if_off}")
-                parameters_to_pass.extend(param_if_off)
-
-        # Here we launch `simulation.launch.py` and custom launch files
-        # if it is not None.
-        self.launch_with_args(
-            "eufs_launcher", "simulation.launch.py", parameters_to_pass
+        # Keep whatever the user picked while the search was running
+        selected = self.LAUNCH_FILE_SELECTOR.currentText()
+        EUFSLauncher.setup_q_combo_box(
+            self.LAUNCH_FILE_SELECTOR, self.default_launch_file, launch_files
         )
+        index = self.LAUNCH_FILE_SELECTOR.findText(selected)
+        if index >= 0:
+            self.LAUNCH_FILE_SELECTOR.setCurrentIndex(index)
 
-        self.roslaunch_launch_file(self.LAUNCH_FILE_SELECTOR.currentText())
-
-        # Trigger launch files hooked to checkboxes
-        for checkbox, effect_on, effect_off in self.checkbox_effect_mapping:
-            if checkbox.isChecked():
-                effect_on()
-            else:
-                effect_off()
+    def launch_button_pressed(self):
+        """Launches Gazebo with the configuration currently selected in the GUI."""
+        self.launch_selection({
+            "track": self.TRACK_SELECTOR.currentText(),
+            "vehicle_model": self.VEHICLE_MODEL_MENU.currentText(),
+            "command_mode": self.COMMAND_MODE_MENU.currentText(),
+            "preset": self.MODEL_PRESET_MENU.currentText(),
+            "robot_name": self.ROBOT_NAME_MENU.currentText(),
+            "launch_file": self.LAUNCH_FILE_SELECTOR.currentText(),
+            "checkboxes": {
+                key: checkbox.isChecked()
+                for key, checkbox in self.checkbox_widgets.items()
+            },
+        })
 
         self.LAUNCH_BUTTON.setEnabled(False)
 
-    def launch_with_args(self, package, launch_file, args):
-        """Launches ros node."""
-        command = [
-            "ros2",
-            "launch",
-            package,
-            launch_file,
-            "use_sim_time:=true",
-        ] + args
-        self.logger.info(f"Command: {' '.join(command)}")
-        process = Popen(command)
-        self.popens.append(process)
-
-    def roslaunch_launch_file(self, launch_file_description):
+    def launch_selection(self, selection):
         """
-        Launches custom launch file
+        Launches `simulation.launch.py`, the custom launch file (if it is not
+        None) and any launch files hooked to selected checkboxes.
         """
-        # Process launch file description
- 
-        if "none" in launch_file_description.lower():
+        self.logger.info("Launching Nodes...")
+
+        self.logger.info(f"Vehicle model: {selection['vehicle_model']}")
+        self.logger.info(f"Command mode: {selection['command_mode']}")
+        self.logger.info(f"Preset: {LaunchPlanner.MODEL_CONFIGS[selection['preset']]}")
+        self.logger.info(f"Robot description file: {selection['robot_name']}")
+        self.logger.info(f"Launch file: {selection['launch_file']}")
+        if "none" in selection["launch_file"].lower():
             self.logger.info("No additional launch file will be launched.")
-        else:
-            command = ["ros2", "launch", launch_file_description]
-            self.logger.info(f"Command: {' '.join(command)}")
-            process = Popen(command)
-            self.popens.append(process)
+
+        for key, checked in selection["checkboxes"].items():
+            state = "enabled" if checked else "disabled"
+            params = self.planner.checkbox_parameters(key, checked)
+            self.logger.info(f"Checkbox {state}: {params}")
+
+        commands = self.planner.plan(**selection)
+        self.popens.extend(launch(commands, log=self.logger.info))
 
     def shutdown_plugin(self):
         """Kill all nodes."""
@@ -0,0 +1,207 @@
+import argparse
+import sys
+from collections import OrderedDict
+from os.path import join
+from os.path import expandvars
+from subprocess import Popen
+
+import yaml
+
+from ament_index_python.packages import get_package_share_directory
+
+
+class LaunchPlanner:
+    """
+    Qt-free description of what the launcher starts.
+
+    Reads the `eufs_launcher` section of `eufs_launcher.yaml` and turns a
+    launcher selection (track, vehicle model, command mode, preset, robot and
+    checkbox states) into the `ros2 launch` command lines that the GUI would
+    run. Both the rqt plugin and the headless CLI use this class so the two
+    can never disagree about what gets launched.
+    """
+
+    COMMAND_MODES = ["acceleration", "velocity"]
+    MODEL_CONFIGS = OrderedDict([
+        ("DryTrack", "configDry.yaml"),
+        ("WetTrack", "configWet.yaml"),
+    ])
+
+    def __init__(self, config):
+        self.config = config
+
+        # Checkboxes ordered by priority, as laid out in the GUI
+        self.checkboxes = OrderedDict(
+            sorted(
+                self.config["checkboxes"].items(),
+                key=lambda x: x[1]["priority"],
+            )
+        )
+
+    @classmethod
+    def from_yaml(cls, yaml_path):
+        """Creates a planner from an `eufs_launcher.yaml` style file."""
+        with open(yaml_path, "r") as stream:
+            return cls(yaml.safe_load(stream)["eufs_launcher"])
+
+    @staticmethod
+    def default_config_path():
+        launcher_share = get_package_share_directory("eufs_launcher")
+        return join(launcher_share, "config", "eufs_launcher.yaml")
+
+    def default_selection(self):
+        """Returns the selection the GUI shows before the user touches anything."""
+        return {
+            "track": self.config["base_track"].split(".")[0],
+            "vehicle_model": self.config["default_vehicle_model"],
+            "command_mode": self.config["default_command_mode"],
+            "preset": self.config["default_vehicle_preset"],
+            "robot_name": self.config["default_robot_name"],
+            "launch_file": expandvars(self.config["default_launch_file"]),
+            "checkboxes": self.default_checkbox_states(),
+        }
+
+    def default_checkbox_states(self):
+        return OrderedDict(
+            (key, bool(value["checked_on_default"]))
+            for key, value in self.checkboxes.items()
+        )
+
+    def checkbox_parameters(self, key, checked):
+        """Parameters passed to `simulation.launch.py` for a checkbox state."""
+        checkbox = self.checkboxes[key]
+        if "parameter_triggering" not in checkbox:
+            return []
+        triggering = checkbox["parameter_triggering"]
+        return list(triggering["if_on" if checked else "if_off"].keys())
+
+    def checkbox_command(self, key):
+        """The command a checkbox launches when selected, or None."""
+        checkbox = self.checkboxes[key]
+        if "package" not in checkbox or "launch_file" not in checkbox:
+            return None
+        args = list(checkbox["args"].keys()) if "args" in checkbox else []
+        return self.launch_command(checkbox["package"], checkbox["launch_file"], args)
+
+    def simulation_parameters(self, track, vehicle_model, command_mode, preset, robot_name,
+                              checkboxes):
+        """Builds the argument list for `simulation.launch.py`."""
+        if preset not in self.MODEL_CONFIGS:
+            raise ValueError(
+                f"Unknown vehicle preset '{preset}', "
+                f"must be one of {list(self.MODEL_CONFIGS.keys())}")
+
+        parameters = [
+            f"track:={track}",
+            f"vehicleModel:={vehicle_model}",
+            f"commandMode:={command_mode}",
+            f"vehicleModelConfig:={self.MODEL_CONFIGS[preset]}",
+            f"robot_name:={robot_name}",
+        ]
+        for key in self.checkboxes:
+            parameters.extend(self.checkbox_parameters(key, checkboxes[key]))
+        return parameters
+
+    @staticmethod
+    def launch_command(package, launch_file, args):
+        return [
+            "ros2",
+            "launch",
+            package,
+            launch_file,
+            "use_sim_time:=true",
+        ] + list(args)
+
+    def plan(self, track, vehicle_model, command_mode, preset, robot_name, checkboxes,
+             launch_file="None"):
+        """
+        Returns every command the launcher runs for a selection, in launch order:
+        `simulation.launch.py`, the custom launch file (if any) and the launch
+        files hooked to selected checkboxes.
+        """
+        checkboxes = {**self.default_checkbox_states(), **checkboxes}
+
+        parameters = self.simulation_parameters(
+            track, vehicle_model, command_mode, preset, robot_name, checkboxes)
+        commands = [self.launch_command("eufs_launcher", "simulation.launch.py", parameters)]
+
+        if launch_file and "none" not in launch_file.lower():
+            commands.append(["ros2", "launch", launch_file])
+
+        for key, checked in checkboxes.items():
+            command = self.checkbox_command(key)
+            if checked and command is not None:
+                commands.append(command)
+
+        return commands
+
+
+def launch(commands, log=print):
+    """Starts every command and returns the Popen handles."""
+    processes = []
+    for command in commands:
+        log(f"Command: {' '.join(command)}")
+        processes.append(Popen(command))
+    return processes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Launches eufs_sim without the launcher GUI")
+    parser.add_argument("-c", "--config", default=None,
+                        help="launcher config file (default: eufs_launcher.yaml)")
+    parser.add_argument("-t", "--track", help="track to launch (default: base_track)")
+    parser.add_argument("-m", "--vehicle-model", help="vehicle model class")
+    parser.add_argument("--command-mode", choices=LaunchPlanner.COMMAND_MODES,
+                        help="vehicle command mode")
+    parser.add_argument("-p", "--preset", choices=list(LaunchPlanner.MODEL_CONFIGS.keys()),
+                        help="vehicle model config preset")
+    parser.add_argument("-r", "--robot-name", help="robot in eufs_racecar/robots")
+    parser.add_argument("-l", "--launch-file", help="additional launch file to run")
+    parser.add_argument("--enable", action="append", default=[], metavar="CHECKBOX",
+                        help="turn a config checkbox on (may be repeated)")
+    parser.add_argument("--disable", action="append", default=[], metavar="CHECKBOX",
+                        help="turn a config checkbox off (may be repeated)")
+    parser.add_argument("-n", "--dry-run", action="store_true",
+                        help="print the commands without running them")
+    if argv is None:
+        argv = sys.argv[1:]
+    # Ignore arguments added when started through a launch file `Node`
+    if "--ros-args" in argv:
+        argv = argv[:argv.index("--ros-args")]
+    args = parser.parse_args(argv)
+
+    planner = LaunchPlanner.from_yaml(args.config or LaunchPlanner.default_config_path())
+    selection = planner.default_selection()
+    for key in ["track", "vehicle_model", "command_mode", "preset", "robot_name",
+                "launch_file"]:
+        if getattr(args, key) is not None:
+            selection[key] = getattr(args, key)
+
+    for key, checked in [(k, True) for k in args.enable] + [(k, False) for k in args.disable]:
+        if key not in planner.checkboxes:
+            parser.error(f"unknown checkbox '{key}', must be one of "
+                         f"{list(planner.checkboxes.keys())}")
+        selection["checkboxes"][key] = checked
+
+    commands = planner.plan(**selection)
+
+    if args.dry_run:
+        for command in commands:
+            print(" ".join(command))
+        return 0
+
+    processes = launch(commands)
+    try:
+        for process in processes:
+            process.wait()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+    return max((process.returncode or 0 for process in processes), default=0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
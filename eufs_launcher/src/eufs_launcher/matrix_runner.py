@@ -0,0 +1,250 @@
+import argparse
+import itertools
+import json
+import os
+import queue
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from os.path import join
+from os.path import expanduser
+from os.path import expandvars
+from subprocess import Popen
+from subprocess import STDOUT
+from subprocess import TimeoutExpired
+
+import yaml
+
+from ament_index_python.packages import get_package_share_directory
+
+from eufs_launcher.launch_planner import LaunchPlanner
+
+
+class SimulationMatrix:
+    """
+    Expands a grid of launcher selections and runs every cell of it.
+
+    A matrix spec is a yaml file of the form:
+
+        matrix:
+          tracks: [small_track, acceleration]
+          vehicle_models: [DynamicBicycle, PointMass]  # default: models.txt
+          presets: [DryTrack, WetTrack]                # default: all presets
+          command_modes: [acceleration]                # default: all modes
+          robot_names: [eufs]                          # default: default_robot_name
+        launch_file: $EUFS_MASTER/launch/planner.launch.py
+        checkboxes: {rviz: false, gazebo_gui: false}
+        jobs: 4
+        timeout: 300
+        log_dir: ~/.ros/eufs_matrix
+
+    Each cell is launched through `simulation.launch.py` by the LaunchPlanner,
+    with its own `ROS_DOMAIN_ID` and `GAZEBO_MASTER_URI` so that concurrent
+    cells do not see each other. A cell finishes when its `launch_file` exits
+    or when it reaches `timeout` seconds, whichever comes first.
+    """
+
+    AXES = [
+        ("track", "tracks"),
+        ("vehicle_model", "vehicle_models"),
+        ("preset", "presets"),
+        ("command_mode", "command_modes"),
+        ("robot_name", "robot_names"),
+    ]
+
+    def __init__(self, spec, planner):
+        self.spec = spec
+        self.planner = planner
+
+        self.jobs = int(spec.get("jobs", os.cpu_count() or 1))
+        self.timeout = float(spec.get("timeout", 300))
+        self.grace_period = float(spec.get("grace_period", 10))
+        self.log_dir = expanduser(expandvars(spec.get("log_dir", "~/.ros/eufs_matrix")))
+        self.domain_id_base = int(spec.get("domain_id_base", 10))
+        self.gazebo_port_base = int(spec.get("gazebo_port_base", 11345))
+
+    @classmethod
+    def from_yaml(cls, spec_path, config_path=None):
+        with open(spec_path, "r") as stream:
+            spec = yaml.safe_load(stream)
+        planner = LaunchPlanner.from_yaml(config_path or LaunchPlanner.default_config_path())
+        return cls(spec, planner)
+
+    @staticmethod
+    def available_vehicle_models():
+        models_filepath = join(get_package_share_directory("eufs_models"), "models/models.txt")
+        with open(models_filepath, "r") as f:
+            return [model.strip() for model in f if model.strip()]
+
+    def cells(self):
+        """Returns the launcher selection of every cell in the matrix."""
+        matrix = self.spec.get("matrix", {})
+        defaults = self.planner.default_selection()
+        choices = {
+            "tracks": [defaults["track"]],
+            "vehicle_models": None,
+            "presets": list(LaunchPlanner.MODEL_CONFIGS.keys()),
+            "command_modes": LaunchPlanner.COMMAND_MODES,
+            "robot_names": [defaults["robot_name"]],
+        }
+
+        axes = []
+        for key, plural in self.AXES:
+            values = matrix.get(plural, choices[plural])
+            if values is None:
+                values = self.available_vehicle_models()
+            axes.append(values if isinstance(values, list) else [values])
+
+        checkboxes = {**defaults["checkboxes"], **self.spec.get("checkboxes", {})}
+        launch_file = expandvars(self.spec.get("launch_file", "None"))
+
+        cells = []
+        for values in itertools.product(*axes):
+            cell = dict(zip([key for key, _ in self.AXES], values))
+            cell["checkboxes"] = dict(checkboxes)
+            cell["launch_file"] = launch_file
+            cells.append(cell)
+        return cells
+
+    @staticmethod
+    def cell_name(index, cell):
+        return "{:03d}_{}_{}_{}_{}_{}".format(
+            index, cell["track"], cell["vehicle_model"], cell["preset"],
+            cell["command_mode"], cell["robot_name"])
+
+    def cell_environment(self, slot):
+        env = dict(os.environ)
+        env["ROS_DOMAIN_ID"] = str(self.domain_id_base + slot)
+        env["GAZEBO_MASTER_URI"] = f"http://localhost:{self.gazebo_port_base + slot}"
+        return env
+
+    def run_cell(self, index, cell, slots):
+        """Runs a single cell on a free slot and returns its result."""
+        name = self.cell_name(index, cell)
+        commands = self.planner.plan(**cell)
+        # The planner puts the custom launch file straight after the simulation
+        has_launch_file = "none" not in cell["launch_file"].lower()
+
+        slot = slots.get()
+        log_path = join(self.log_dir, name + ".log")
+        start = time.monotonic()
+        processes = []
+        try:
+            with open(log_path, "w") as log:
+                env = self.cell_environment(slot)
+                log.write(f"ROS_DOMAIN_ID={env['ROS_DOMAIN_ID']}\n")
+                log.write(f"GAZEBO_MASTER_URI={env['GAZEBO_MASTER_URI']}\n")
+                for command in commands:
+                    log.write(f"Command: {' '.join(command)}\n")
+                log.flush()
+
+                for command in commands:
+                    # Each command gets its own process group so the whole
+                    # launch tree can be stopped at once
+                    processes.append(Popen(command, stdout=log, stderr=STDOUT, env=env,
+                                           start_new_session=True))
+
+                timed_out = not self._wait(processes[1] if has_launch_file else None, start)
+                returncode = processes[1].returncode if has_launch_file else None
+        finally:
+            self._stop(processes)
+            slots.put(slot)
+
+        return {
+            "name": name,
+            "cell": cell,
+            "slot": slot,
+            "log": log_path,
+            "duration": time.monotonic() - start,
+            "timed_out": timed_out,
+            "returncode": returncode,
+        }
+
+    def _wait(self, process, start):
+        """Waits for the process to exit. Returns False if the timeout was reached."""
+        remaining = self.timeout - (time.monotonic() - start)
+        if process is None:
+            time.sleep(max(0.0, remaining))
+            return False
+        try:
+            process.wait(timeout=max(0.0, remaining))
+            return True
+        except TimeoutExpired:
+            return False
+
+    def _stop(self, processes):
+        for process in processes:
+            if process.poll() is None:
+                os.killpg(process.pid, signal.SIGINT)
+        deadline = time.monotonic() + self.grace_period
+        for process in processes:
+            try:
+                process.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+
+    def run(self, log=print):
+        """Runs every cell, at most `jobs` at a time, and returns the results."""
+        if self.domain_id_base + self.jobs - 1 > 232:
+            raise ValueError("ROS_DOMAIN_ID must not exceed 232, reduce jobs or domain_id_base")
+
+        os.makedirs(self.log_dir, exist_ok=True)
+        cells = self.cells()
+
+        slots = queue.Queue()
+        for slot in range(self.jobs):
+            slots.put(slot)
+
+        log(f"Running {len(cells)} cells with {self.jobs} jobs, logging to {self.log_dir}")
+        results = []
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            futures = [executor.submit(self.run_cell, index, cell, slots)
+                       for index, cell in enumerate(cells)]
+            for future in futures:
+                result = future.result()
+                status = "timed out" if result["timed_out"] else f"exit {result['returncode']}"
+                log(f"{result['name']}: {status} after {result['duration']:.1f}s")
+                results.append(result)
+
+        with open(join(self.log_dir, "summary.json"), "w") as f:
+            json.dump(results, f, indent=2)
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Runs eufs_sim over a matrix of tracks, models, presets and command modes")
+    parser.add_argument("spec", help="matrix spec yaml file")
+    parser.add_argument("-c", "--config", default=None,
+                        help="launcher config file (default: eufs_launcher.yaml)")
+    parser.add_argument("-j", "--jobs", type=int, help="number of cells to run at once")
+    parser.add_argument("-t", "--timeout", type=float, help="per-cell timeout in seconds")
+    parser.add_argument("-o", "--log-dir", help="directory for per-cell logs")
+    parser.add_argument("-n", "--dry-run", action="store_true",
+                        help="list the cells without running them")
+    args = parser.parse_args(argv)
+
+    matrix = SimulationMatrix.from_yaml(args.spec, args.config)
+    if args.jobs is not None:
+        matrix.jobs = args.jobs
+    if args.timeout is not None:
+        matrix.timeout = args.timeout
+    if args.log_dir is not None:
+        matrix.log_dir = args.log_dir
+
+    if args.dry_run:
+        for index, cell in enumerate(matrix.cells()):
+            print(SimulationMatrix.cell_name(index, cell))
+            for command in matrix.planner.plan(**cell):
+                print("  " + " ".join(command))
+        return 0
+
+    results = matrix.run()
+    failed = [r for r in results if not r["timed_out"] and r["returncode"] not in (0, None)]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+// Compares the accuracy and CPU time of the DynamicBicycle integrators.
+//
+// Every integrator drives the same scripted run (accelerate, then a slalom)
+// at a range of update rates. The error is the distance from a reference
+// run, integrated with RK4 in 10 us steps, sampled every 20 ms.
+//
+// Usage: integrator_benchmark <vehicle yaml file> [duration in s]
+
+#include <chrono>
+#include <cmath>
+#include <cstdio>
+#include <cstdlib>
+#include <string>
+#include <vector>
+
+#include "eufs_models/dynamic_bicycle.hpp"
+
+using eufs::models::DynamicBicycle;
+using eufs::models::Input;
+using eufs::models::Param;
+using eufs::models::State;
+
+namespace {
+
+// Inputs change every 20 ms, so every update rate sees the same inputs
+const double INPUT_PERIOD = 0.02;
+
+Input scriptedInput(const double t) {
+  Input input;
+  if (t < 4.0) {
+    input.acc = 3.0;
+  } else {
+    input.acc = 0.5;
+    input.delta = 0.3 * std::sin(M_PI * (t - 4.0));
+  }
+  return input;
+}
+
+// Runs the script and returns the state at the end of every input period
+std::vector<State> run(DynamicBicycle &model, const double update_rate, const double duration) {
+  const int periods = static_cast<int>(std::round(duration / INPUT_PERIOD));
+  const int updates = static_cast<int>(std::round(update_rate * INPUT_PERIOD));
+  const double dt = INPUT_PERIOD / updates;
+
+  std::vector<State> samples;
+  samples.reserve(periods);
+  State state;
+  for (int period = 0; period < periods; period++) {
+    const Input command = scriptedInput(period * INPUT_PERIOD);
+    for (int update = 0; update < updates; update++) {
+      Input input = command;
+      model.updateState(state, input, dt);
+    }
+    samples.push_back(state);
+  }
+  return samples;
+}
+
+struct Config {
+  std::string name;
+  Param::Integrator::Method method;
+  double max_step;
+};
+
+}  // namespace
+
+int main(int argc, char **argv) {
+  if (argc < 2) {
+    std::fprintf(stderr, "Usage: %s <vehicle yaml file> [duration in s]\n", argv[0]);
+    return 1;
+  }
+  const double duration = argc > 2 ? std::atof(argv[2]) : 20.0;
+
+  DynamicBicycle model(argv[1]);
+  Param::Integrator &integrator = model.getParam().integrator;
+
+  integrator.method = Param::Integrator::RK4;
+  integrator.max_step = 1e-5;
+  const std::vector<State> reference = run(model, 1000.0, duration);
+
+  const std::vector<Config> configs = {
+      {"euler", Param::Integrator::EULER, 0.0},
+      {"rk2", Param::Integrator::RK2, 0.0},
+      {"rk4", Param::Integrator::RK4, 0.0},
+      {"adaptive", Param::Integrator::ADAPTIVE, 0.0},
+  };
+  const std::vector<double> update_rates = {1000.0, 500.0, 250.0, 100.0, 50.0};
+
+  std::printf("%-10s %8s %14s %14s %14s %12s\n", "method", "rate Hz", "max error m",
+              "final error m", "us per sim s", "real time x");
+  for (const Config &config : configs) {
+    for (const double update_rate : update_rates) {
+      integrator.method = config.method;
+      integrator.max_step = config.max_step;
+
+      // Repeat short runs so the timing is not lost in the clock's resolution
+      int repeats = 0;
+      std::vector<State> samples;
+      const auto start = std::chrono::steady_clock::now();
+      double elapsed = 0.0;
+      do {
+        samples = run(model, update_rate, duration);
+        repeats++;
+        elapsed = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+      } while (elapsed < 0.2);
+      const double cpu_per_sim_second = elapsed / repeats / duration;
+
+      double max_error = 0.0;
+      for (size_t i = 0; i < samples.size(); i++) {
+        const double error =
+            std::hypot(samples[i].x - reference[i].x, samples[i].y - reference[i].y);
+        max_error = std::fmax(max_error, error);
+      }
+      const double final_error = std::hypot(samples.back().x - reference.back().x,
+                                            samples.back().y - reference.back().y);
+
+      std::printf("%-10s %8.0f %14.6f %14.6f %14.1f %12.0f\n", config.name.c_str(), update_rate,
+                  max_error, final_error, cpu_per_sim_second * 1e6, 1.0 / cpu_per_sim_second);
+    }
+  }
+  return 0;
+}
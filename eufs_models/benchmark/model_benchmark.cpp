@@ -0,0 +1,199 @@
+// Measures the throughput of a vehicle model and prints it as JSON.
+//
+// Every method the race car model plugin calls is timed on its own, along
+// with a simulated second of a car as the plugin runs it: `update_rate`
+// model updates, and wheel speeds (and noise, if a noise config is given)
+// at `publish_rate`. Use benchmark/model_benchmark.py to run it over every
+// model and configuration.
+//
+// Usage: model_benchmark <model> <vehicle yaml file> [noise yaml file]
+//            [min time per measurement in s] [update rate] [publish rate]
+
+#include <chrono>
+#include <cmath>
+#include <cstdio>
+#include <cstdlib>
+#include <functional>
+#include <memory>
+#include <string>
+#include <vector>
+
+#include "eufs_models/eufs_models.hpp"
+
+using eufs::models::DynamicBicycle;
+using eufs::models::Input;
+using eufs::models::Noise;
+using eufs::models::PointMass;
+using eufs::models::State;
+using eufs::models::VehicleModel;
+
+namespace {
+
+// Keeps the compiler from optimising the measured calls away
+volatile double sink = 0.0;
+
+struct Measurement {
+  std::string name;
+  double ns_per_call;
+  double calls_per_second;
+};
+
+// Calls `batch` (which makes `calls` calls) until `min_time` has passed
+Measurement measure(const std::string &name, const std::function<void()> &batch, const int calls,
+                    const double min_time) {
+  batch();  // Warm up
+  int batches = 0;
+  double elapsed = 0.0;
+  const auto start = std::chrono::steady_clock::now();
+  do {
+    batch();
+    batches++;
+    elapsed = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+  } while (elapsed < min_time);
+  const double seconds_per_call = elapsed / (static_cast<double>(batches) * calls);
+  return {name, seconds_per_call * 1e9, 1.0 / seconds_per_call};
+}
+
+// Accelerates through a slalom, so the states cover a range of speeds and slip angles
+Input scriptedInput(const int step, const double dt) {
+  Input input;
+  input.acc = 2.0;
+  input.vel = 10.0;
+  input.delta = 0.4 * std::sin(step * dt * M_PI);
+  return input;
+}
+
+}  // namespace
+
+int main(int argc, char **argv) {
+  if (argc < 3) {
+    std::fprintf(stderr,
+                 "Usage: %s <model> <vehicle yaml file> [noise yaml file] [min time in s] "
+                 "[update rate] [publish rate]\n",
+                 argv[0]);
+    return 1;
+  }
+  const std::string model_name = argv[1];
+  const std::string vehicle_yaml = argv[2];
+  const std::string noise_yaml = argc > 3 ? argv[3] : "none";
+  const double min_time = argc > 4 ? std::atof(argv[4]) : 0.5;
+  const double update_rate = argc > 5 ? std::atof(argv[5]) : 1000.0;
+  const double publish_rate = argc > 6 ? std::atof(argv[6]) : 200.0;
+  const double dt = 1.0 / update_rate;
+
+  std::unique_ptr<VehicleModel> model;
+  if (model_name == "PointMass") {
+    model = std::make_unique<PointMass>(vehicle_yaml);
+  } else if (model_name == "DynamicBicycle") {
+    model = std::make_unique<DynamicBicycle>(vehicle_yaml);
+  } else {
+    std::fprintf(stderr, "Unknown vehicle model '%s'\n", model_name.c_str());
+    return 1;
+  }
+  std::unique_ptr<Noise> noise;
+  if (noise_yaml != "none") {
+    noise = std::make_unique<Noise>(noise_yaml);
+  }
+
+  // States and inputs of a 20 s drive, shared by the measurements
+  const int samples = static_cast<int>(20.0 * update_rate);
+  std::vector<State> states(samples);
+  std::vector<Input> inputs(samples);
+  State state;
+  for (int i = 0; i < samples; i++) {
+    inputs[i] = scriptedInput(i, dt);
+    model->updateState(state, inputs[i], dt);
+    states[i] = state;
+  }
+
+  std::vector<Measurement> measurements;
+  measurements.push_back(measure(
+      "updateState",
+      [&]() {
+        for (int i = 0; i < samples; i++) {
+          State s = states[i];
+          Input u = inputs[i];
+          model->updateState(s, u, dt);
+          sink = sink + s.x;
+        }
+      },
+      samples, min_time));
+  measurements.push_back(measure(
+      "getSlipAngle",
+      [&]() {
+        for (int i = 0; i < samples; i++) {
+          sink = sink + model->getSlipAngle(states[i], inputs[i], i % 2 == 0);
+        }
+      },
+      samples, min_time));
+  measurements.push_back(measure(
+      "getWheelSpeeds",
+      [&]() {
+        for (int i = 0; i < samples; i++) {
+          sink = sink + model->getWheelSpeeds(states[i], inputs[i]).lb_speed;
+        }
+      },
+      samples, min_time));
+  if (noise) {
+    measurements.push_back(measure(
+        "applyNoise",
+        [&]() {
+          for (int i = 0; i < samples; i++) {
+            sink = sink + noise->applyNoise(states[i]).x;
+          }
+        },
+        samples, min_time));
+    measurements.push_back(measure(
+        "applyNoiseToWheelSpeeds",
+        [&]() {
+          eufs_msgs::msg::WheelSpeeds wheel_speeds;
+          for (int i = 0; i < samples; i++) {
+            wheel_speeds.lb_speed = states[i].v_x;
+            sink = sink + noise->applyNoiseToWheelSpeeds(wheel_speeds).lb_speed;
+          }
+        },
+        samples, min_time));
+  }
+
+  // One simulated second of a car, as the plugin steps it
+  const int updates = static_cast<int>(std::round(update_rate));
+  const int publish_every = std::max(1, static_cast<int>(std::round(update_rate / publish_rate)));
+  const Measurement simulated_second = measure(
+      "simulatedSecond",
+      [&]() {
+        State s;
+        for (int i = 0; i < updates; i++) {
+          Input u = inputs[i];
+          model->updateState(s, u, dt);
+          if (i % publish_every == 0) {
+            eufs_msgs::msg::WheelSpeeds wheel_speeds = model->getWheelSpeeds(s, u);
+            if (noise) {
+              sink = sink + noise->applyNoise(s).x;
+              wheel_speeds = noise->applyNoiseToWheelSpeeds(wheel_speeds);
+            }
+            sink = sink + wheel_speeds.lb_speed;
+          }
+        }
+      },
+      1, min_time);
+
+  std::printf("{\n");
+  std::printf("  \"model\": \"%s\",\n", model_name.c_str());
+  std::printf("  \"vehicle_config\": \"%s\",\n", vehicle_yaml.c_str());
+  std::printf("  \"noise_config\": %s,\n",
+              noise ? ("\"" + noise_yaml + "\"").c_str() : "null");
+  std::printf("  \"update_rate\": %g,\n", update_rate);
+  std::printf("  \"publish_rate\": %g,\n", publish_rate);
+  std::printf("  \"methods\": {\n");
+  for (size_t i = 0; i < measurements.size(); i++) {
+    std::printf("    \"%s\": {\"ns_per_call\": %.3f, \"calls_per_second\": %.0f}%s\n",
+                measurements[i].name.c_str(), measurements[i].ns_per_call,
+                measurements[i].calls_per_second, i + 1 < measurements.size() ? "," : "");
+  }
+  std::printf("  },\n");
+  // Cars that fit on one core in real time, ignoring Gazebo and ROS
+  std::printf("  \"ns_per_simulated_second\": %.0f,\n", simulated_second.ns_per_call);
+  std::printf("  \"real_time_cars_per_core\": %.0f\n", simulated_second.calls_per_second);
+  std::printf("}\n");
+  return 0;
+}
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from glob import glob
+from os.path import abspath, basename, dirname, exists, join, splitext
+
+
+def share_directory(package):
+    from ament_index_python.packages import get_package_share_directory
+    return get_package_share_directory(package)
+
+
+def cpu_model():
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def run_benchmark(executable, model, vehicle_config, noise_config, min_time, update_rate,
+                  publish_rate):
+    command = [executable, model, vehicle_config, noise_config or "none", str(min_time),
+               str(update_rate), str(publish_rate)]
+    output = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measures how many vehicle model steps per second fit on one core, "
+                    "for every model, vehicle config and with and without noise")
+    parser.add_argument("-m", "--models", nargs="+",
+                        help="vehicle models (default: every model in models.txt)")
+    parser.add_argument("-c", "--configs", nargs="+",
+                        help="vehicle yaml files (default: every config of --robot)")
+    parser.add_argument("-r", "--robot", default="eufs",
+                        help="eufs_racecar robot whose configs to use (default: eufs)")
+    parser.add_argument("-n", "--noise-config",
+                        help="noise yaml file (default: eufs_models config/noise.yaml)")
+    parser.add_argument("-t", "--min-time", type=float, default=0.5,
+                        help="minimum time spent on each measurement in seconds")
+    parser.add_argument("--update-rate", type=float, default=1000.0)
+    parser.add_argument("--publish-rate", type=float, default=200.0)
+    parser.add_argument("-e", "--executable",
+                        default=join(dirname(abspath(__file__)), "model_benchmark"),
+                        help="model_benchmark executable")
+    parser.add_argument("-o", "--output", help="json file to write the results to")
+    args = parser.parse_args(argv)
+
+    if not exists(args.executable):
+        parser.error(f"{args.executable} does not exist, build eufs_models or pass --executable")
+
+    models = args.models
+    if models is None:
+        with open(join(share_directory("eufs_models"), "models", "models.txt"), "r") as f:
+            models = [model.strip() for model in f if model.strip()]
+    configs = args.configs
+    if configs is None:
+        robot_dir = join(share_directory("eufs_racecar"), "robots", args.robot)
+        configs = sorted(glob(join(robot_dir, "config*.yaml")))
+    noise_config = args.noise_config
+    if noise_config is None:
+        noise_config = join(share_directory("eufs_models"), "config", "noise.yaml")
+
+    results = []
+    print(f"{'model':<16} {'config':<12} {'noise':<6} {'updateState ns':>15} "
+          f"{'steps/s':>12} {'cars/core':>10}")
+    for model in models:
+        for config in configs:
+            for noise in (None, noise_config):
+                result = run_benchmark(args.executable, model, config, noise, args.min_time,
+                                       args.update_rate, args.publish_rate)
+                result["config"] = splitext(basename(config))[0]
+                results.append(result)
+
+                update = result["methods"]["updateState"]
+                print(f"{model:<16} {result['config']:<12} {'yes' if noise else 'no':<6} "
+                      f"{update['ns_per_call']:>15.1f} {update['calls_per_second']:>12.0f} "
+                      f"{result['real_time_cars_per_core']:>10.0f}")
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": platform.node(),
+        "cpu": cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
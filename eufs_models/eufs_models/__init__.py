@@ -0,0 +1,26 @@
+from .vehicle_state import *  # noqa: F401,F403
+from .vehicle_param import Param  # noqa: F401
+from .vehicle_model import VehicleModel  # noqa: F401
+from .dynamic_bicycle import DynamicBicycle  # noqa: F401
+from .point_mass import PointMass  # noqa: F401
+from .tire_table import TireTable  # noqa: F401
+from .noise import Noise, WHEEL_SPEEDS_SIZE  # noqa: F401
+
+# The C++ library itself, only built when pybind11 was found at build time
+try:
+    from . import _eufs_models as native
+except ImportError:
+    native = None
+
+# Vehicle models by the names listed in models.txt
+MODELS = {
+    "DynamicBicycle": DynamicBicycle,
+    "PointMass": PointMass,
+}
+
+
+def make_model(name, yaml_file):
+    """Creates a vehicle model by name, as the race car model plugin does."""
+    if name not in MODELS:
+        raise ValueError(f"Unknown vehicle model '{name}', must be one of {list(MODELS)}")
+    return MODELS[name](yaml_file)
@@ -0,0 +1,263 @@
+import math
+
+import numpy as np
+
+from .tire_table import TireTable, pacejka_mu
+from .vehicle_model import VehicleModel
+from .vehicle_state import A_X, A_Y, ACC, DELTA, R_Z, V_X, V_Y, X, Y, YAW
+
+# State columns compared when estimating the error of an adaptive step
+ERROR_COLUMNS = [X, Y, YAW, V_X, V_Y, R_Z]
+
+
+class DynamicBicycle(VehicleModel):
+    """NumPy port of `DynamicBicycle` in dynamic_bicycle.cpp."""
+
+    def __init__(self, yaml_file):
+        super().__init__(yaml_file)
+
+        self._tire_table = None
+        if self._param.tire_table.enabled:
+            # Slip angles are the angle of the tire's velocity, less the
+            # steering angle for the front tires
+            delta = self._param.input_ranges.delta
+            max_delta = max(abs(delta.min), abs(delta.max))
+            self._tire_table = TireTable(
+                self._param.tire, self._param.tire_table, math.pi / 2 + max_delta)
+
+    def get_tire_table(self):
+        return self._tire_table
+
+    def update_state(self, state, input, dt):
+        self._check_shapes(state, input)
+        self.validate_input(input)
+
+        integrator = self._param.integrator
+        if integrator.method == "adaptive":
+            self._update_state_adaptive(state, input, dt)
+            return
+
+        # Split dt into equal sub-steps no longer than max_step
+        steps = 1
+        if integrator.max_step > 0.0:
+            steps = max(1, math.ceil(dt / integrator.max_step - 1e-9))
+        h = dt / steps
+        for _ in range(steps):
+            k1 = self._get_x_dot(state, input)
+            self._step(state, input, h, self._get_slope(state, input, h, k1))
+
+    def _update_state_adaptive(self, state, input, dt):
+        # Heun's method with the difference to an Euler step as its error
+        # estimate. Every vehicle takes its own steps, as it would in C++.
+        integrator = self._param.integrator
+        max_step = min(dt, integrator.max_step) if integrator.max_step > 0.0 else dt
+
+        remaining = np.full(state.shape[0], float(dt))
+        h = np.full(state.shape[0], float(max_step))
+        active = np.arange(state.shape[0])
+        while active.size:
+            x, u = state[active], input[active]
+            h_active = np.where(remaining[active] - h[active] < 1e-12, remaining[active], h[active])
+
+            k1 = self._get_x_dot(x, u)
+            k2 = self._get_x_dot(x + k1 * h_active[:, None], u)
+            error = 0.5 * h_active * np.max(np.abs(k2 - k1)[:, ERROR_COLUMNS], axis=1)
+
+            scale = np.full_like(error, 5.0)
+            np.divide(integrator.tolerance, error, out=scale, where=error > 0.0)
+            np.sqrt(scale, out=scale, where=error > 0.0)
+            scale[error > 0.0] *= 0.9
+
+            # Retry steps that were too inaccurate with shorter ones
+            retry = (error > integrator.tolerance) & (h_active > integrator.min_step)
+            h[active[retry]] = np.maximum(
+                integrator.min_step, h_active[retry] * np.maximum(0.2, scale[retry]))
+
+            done = ~retry
+            stepped = x[done]
+            self._step(stepped, u[done], h_active[done], 0.5 * (k1[done] + k2[done]))
+            state[active[done]] = stepped
+            remaining[active[done]] -= h_active[done]
+            h[active[done]] = np.minimum(max_step, h_active[done] * np.minimum(5.0, scale[done]))
+
+            active = active[remaining[active] > 0.0]
+
+    def _step(self, state, input, dt, x_dot):
+        # `dt` is either a float or one step length per vehicle
+        # Drivetrain Model
+        Fx = self._get_Fx(state, input)
+        # Dynamics
+        x_next_dyn = state + x_dot * np.asarray(dt)[..., None]
+        state[:] = self._f_kin_correction(x_next_dyn, state, input, Fx, dt)
+
+        # Set the acceleration based on the change in velocity
+        state[:, A_X] = x_dot[:, V_X]
+        state[:, A_Y] = x_dot[:, V_Y]
+
+        self.validate_state(state)
+
+    def _get_x_dot(self, x, u):
+        Fz = self._get_normal_force(x)
+
+        slip_angle_front = self.get_slip_angle(x, u, True)
+        FyF = self._get_Fy(Fz, True, slip_angle_front)
+
+        slip_angle_back = self.get_slip_angle(x, u, False)
+        FyR = self._get_Fy(Fz, False, slip_angle_back)
+
+        return self._f(x, u, self._get_Fx(x, u), FyF, FyR)
+
+    def _get_slope(self, x, u, dt, k1):
+        # The derivative to step with, given the derivative k1 at the start of the step
+        method = self._param.integrator.method
+        if method == "rk2":
+            # Midpoint method
+            return self._get_x_dot(x + k1 * (0.5 * dt), u)
+        if method == "rk4":
+            k2 = self._get_x_dot(x + k1 * (0.5 * dt), u)
+            k3 = self._get_x_dot(x + k2 * (0.5 * dt), u)
+            k4 = self._get_x_dot(x + k3 * dt, u)
+            return (k1 + (k2 + k3) * 2.0 + k4) * (1.0 / 6.0)
+        return k1
+
+    def update_single_state(self, state, input, dt):
+        integrator = self._param.integrator
+        if integrator.method != "euler" or integrator.max_step > 0.0:
+            # Only a single Euler step is written out with scalars
+            states, inputs = np.array([state], dtype=float), np.array([input], dtype=float)
+            self.update_state(states, inputs, dt)
+            state[:] = states[0].tolist()
+            input[:] = inputs[0].tolist()
+            return
+
+        # The same steps as `update_state`, written out with scalars
+        self.validate_single_input(input)
+        inertia = self._param.inertia
+        kinematic = self._param.kinematic
+        tire = self._param.tire
+        aero = self._param.aero
+
+        yaw, v_x, v_y, r_z = state[YAW], state[V_X], state[V_Y], state[R_Z]
+        delta = input[DELTA]
+
+        Fz = inertia.g * inertia.m + aero.c_down * v_x * v_x
+
+        lever_arm_length = kinematic.l * kinematic.w_front
+        slip_v_x = max(1.0, v_x)
+        denominator = slip_v_x - 0.5 * kinematic.axle_width * r_z
+        slip_angle_front = math.atan((v_y + lever_arm_length * r_z) / denominator) - delta
+        slip_angle_back = math.atan((v_y - lever_arm_length * r_z) / denominator)
+
+        if self._tire_table is not None:
+            mu_front = self._tire_table.get_single_mu(slip_angle_front)
+            mu_back = self._tire_table.get_single_mu(slip_angle_back)
+        else:
+            B, C, D, E = tire.B, tire.C, tire.D, tire.E
+            mu_front = D * math.sin(C * math.atan(B * (1.0 - E) * slip_angle_front
+                                                  + E * math.atan(B * slip_angle_front)))
+            mu_back = D * math.sin(C * math.atan(B * (1.0 - E) * slip_angle_back
+                                                 + E * math.atan(B * slip_angle_back)))
+        FyF = 0.5 * kinematic.w_front * Fz * mu_front
+        FyR = 0.5 * (1 - kinematic.w_front) * Fz * mu_back
+
+        acc = 0.0 if v_x <= 0.0 and input[ACC] < 0.0 else input[ACC]
+        Fx = acc * inertia.m - aero.c_drag * v_x * v_x
+
+        # Dynamics
+        FyF_tot = 2 * FyF
+        FyR_tot = 2 * FyR
+        cos_yaw, sin_yaw = math.cos(yaw), math.sin(yaw)
+        cos_delta, sin_delta = math.cos(delta), math.sin(delta)
+        v_x_dot = (r_z * v_y) + (Fx - sin_delta * FyF_tot) / inertia.m
+        v_y_dot = ((cos_delta * FyF_tot) + FyR_tot) / inertia.m - (r_z * v_x)
+        r_z_dot = (cos_delta * FyF_tot * kinematic.l_F - FyR_tot * kinematic.l_R) / inertia.I_z
+
+        state[X] += (cos_yaw * v_x - sin_yaw * v_y) * dt
+        state[Y] += (sin_yaw * v_x + cos_yaw * v_y) * dt
+        state[YAW] = yaw + r_z * dt
+
+        # Kinematic correction
+        blend = min(max(0.5 * (math.hypot(v_x, v_y) - 1.5), 0.0), 1.0)
+        next_v_x = blend * (v_x + v_x_dot * dt) + (1.0 - blend) * (v_x + dt * Fx / inertia.m)
+        tan_delta = math.tan(delta)
+        state[V_X] = max(0.0, next_v_x)
+        state[V_Y] = (blend * (v_y + v_y_dot * dt)
+                      + (1.0 - blend) * tan_delta * next_v_x * kinematic.l_R / kinematic.l)
+        state[R_Z] = (blend * (r_z + r_z_dot * dt)
+                      + (1.0 - blend) * tan_delta * next_v_x / kinematic.l)
+
+        state[A_X] = v_x_dot
+        state[A_Y] = v_y_dot
+
+    def _f(self, x, u, Fx, FyF, FyR):
+        inertia = self._param.inertia
+        kinematic = self._param.kinematic
+
+        FyF_tot = 2 * FyF
+        FyR_tot = 2 * FyR
+
+        cos_yaw, sin_yaw = np.cos(x[:, YAW]), np.sin(x[:, YAW])
+        cos_delta, sin_delta = np.cos(u[:, DELTA]), np.sin(u[:, DELTA])
+        v_x, v_y, r_z = x[:, V_X], x[:, V_Y], x[:, R_Z]
+
+        x_dot = np.zeros_like(x)
+
+        x_dot[:, X] = cos_yaw * v_x - sin_yaw * v_y
+        x_dot[:, Y] = sin_yaw * v_x + cos_yaw * v_y
+
+        x_dot[:, YAW] = r_z
+
+        x_dot[:, V_X] = (r_z * v_y) + (Fx - sin_delta * FyF_tot) / inertia.m
+        x_dot[:, V_Y] = ((cos_delta * FyF_tot) + FyR_tot) / inertia.m - (r_z * v_x)
+
+        x_dot[:, R_Z] = ((cos_delta * FyF_tot * kinematic.l_F - FyR_tot * kinematic.l_R)
+                         / inertia.I_z)
+
+        return x_dot
+
+    def _f_kin_correction(self, x_in, x_state, u, Fx, dt):
+        kinematic = self._param.kinematic
+
+        x = x_in
+        v_x_dot = Fx / self._param.inertia.m
+        v = np.hypot(x_state[:, V_X], x_state[:, V_Y])
+        v_blend = 0.5 * (v - 1.5)
+        blend = np.clip(v_blend, 0.0, 1.0)
+
+        x[:, V_X] = blend * x[:, V_X] + (1.0 - blend) * (x_state[:, V_X] + dt * v_x_dot)
+
+        tan_delta = np.tan(u[:, DELTA])
+        v_y = tan_delta * x[:, V_X] * kinematic.l_R / kinematic.l
+        r = tan_delta * x[:, V_X] / kinematic.l
+
+        x[:, V_Y] = blend * x[:, V_Y] + (1.0 - blend) * v_y
+        x[:, R_Z] = blend * x[:, R_Z] + (1.0 - blend) * r
+        return x
+
+    def _get_Fx(self, x, u):
+        acc = np.where((x[:, V_X] <= 0.0) & (u[:, ACC] < 0.0), 0.0, u[:, ACC])
+        return acc * self._param.inertia.m - self._get_Fdrag(x)
+
+    def _get_normal_force(self, x):
+        return self._param.inertia.g * self._param.inertia.m + self._get_Fdown(x)
+
+    def _get_Fdown(self, x):
+        return self._param.aero.c_down * x[:, V_X] * x[:, V_X]
+
+    def _get_Fdrag(self, x):
+        return self._param.aero.c_drag * x[:, V_X] * x[:, V_X]
+
+    def _get_Fy(self, Fz, front, slip_angle):
+        Fz_axle = self._get_down_force_front(Fz) if front else self._get_down_force_rear(Fz)
+
+        if self._tire_table is not None:
+            mu_y = self._tire_table.get_mu(slip_angle)
+        else:
+            mu_y = pacejka_mu(self._param.tire, slip_angle)
+        return Fz_axle * mu_y
+
+    def _get_down_force_front(self, Fz):
+        return 0.5 * self._param.kinematic.w_front * Fz
+
+    def _get_down_force_rear(self, Fz):
+        return 0.5 * (1 - self._param.kinematic.w_front) * Fz
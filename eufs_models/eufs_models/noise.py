@@ -0,0 +1,124 @@
+from types import SimpleNamespace
+
+import numpy as np
+import yaml
+
+from .vehicle_state import STATE_SIZE
+
+# Columns of a batch of wheel speeds, as returned by `get_wheel_speeds`
+WHEEL_SPEEDS_SIZE = 5
+
+# Keys of noise.yaml and the number of values of each
+_NOISE_KEYS = (
+    ("position", "positionNoise", 3),
+    ("orientation", "orientationNoise", 3),
+    ("linear_velocity", "linearVelocityNoise", 3),
+    ("angular_velocity", "angularVelocityNoise", 3),
+    ("linear_acceleration", "linearAccelerationNoise", 3),
+    ("wheel_speed", "wheelSpeedNoise", 4),
+)
+
+# Streams of a vehicle, so its states and wheel speeds get independent noise
+_STATE_STREAM, _WHEEL_SPEEDS_STREAM = range(2)
+
+
+class Noise:
+    """
+    NumPy port of `Noise` in noise.hpp, adding Gaussian noise to batches of
+    states and wheel speeds with the standard deviations of a noise yaml file
+    (e.g. eufs_models/config/noise.yaml).
+
+    Every vehicle has its own stream of random numbers, made from `seed` and
+    the vehicle's id, which carries on between calls. The noise of a vehicle
+    therefore only depends on the seed and the order of its own states, not on
+    how the states of all vehicles are split into batches, so a large log can
+    be processed in chunks and still give the same dataset.
+
+    The streams are NumPy generators rather than `rand_r`, so the noise has
+    the same distribution as in the C++ library but not the same values.
+    """
+
+    def __init__(self, yaml_file, seed=0):
+        with open(yaml_file, "r") as f:
+            config = yaml.safe_load(f)["noise"]
+
+        self._noise_param = SimpleNamespace(**{
+            name: [float(value) for value in config.get(key, [0.0] * size)]
+            for name, key, size in _NOISE_KEYS
+        })
+
+        # Standard deviation of every column, only the yaw of the orientation
+        # is in a state and the steering angle gets no noise
+        param = self._noise_param
+        self.state_sigma = np.array(param.position + param.orientation[:1] + param.linear_velocity
+                                    + param.angular_velocity + param.linear_acceleration)
+        self.wheel_speed_sigma = np.array([0.0] + param.wheel_speed)
+
+        self.set_seed(seed)
+
+    def set_seed(self, seed):
+        """Restarts the streams of every vehicle from `seed`."""
+        self._seed = int(seed)
+        self._streams = {}
+
+    def get_seed(self):
+        return self._seed
+
+    def get_noise_param(self):
+        return self._noise_param
+
+    def apply_noise(self, state, vehicles=None):
+        """
+        Returns a noisy copy of an (N, STATE_SIZE) state array. Row i is a
+        state of vehicle `vehicles[i]`, or of vehicle 0 if `vehicles` is None.
+        """
+        return self._apply_noise(state, vehicles, self.state_sigma, STATE_SIZE, _STATE_STREAM,
+                                 "state")
+
+    def apply_noise_to_wheel_speeds(self, wheel_speeds, vehicles=None):
+        """
+        Returns a noisy copy of an (N, 5) wheel speeds array (see
+        `VehicleModel.get_wheel_speeds`), with the vehicles as `apply_noise`.
+        """
+        return self._apply_noise(wheel_speeds, vehicles, self.wheel_speed_sigma,
+                                 WHEEL_SPEEDS_SIZE, _WHEEL_SPEEDS_STREAM, "wheel_speeds")
+
+    def get_string(self):
+        param = self._noise_param
+        return " ".join(f"{name}: {getattr(param, name)}\n" for name, _, _ in _NOISE_KEYS)
+
+    def _apply_noise(self, rows, vehicles, sigma, columns, stream, name):
+        noisy = np.array(rows, dtype=float)
+        if noisy.ndim != 2 or noisy.shape[1] != columns:
+            raise ValueError(f"{name} must be an (N, {columns}) array, got {noisy.shape}")
+        n = noisy.shape[0]
+
+        if vehicles is None:
+            noisy += self._generator(0, stream).standard_normal((n, columns)) * sigma
+            return noisy
+
+        vehicles = np.asarray(vehicles)
+        if vehicles.shape != (n,) or not np.issubdtype(vehicles.dtype, np.integer):
+            raise ValueError("vehicles must be an (N,) integer array with a vehicle per row")
+        if n > 0 and vehicles.min() < 0:
+            raise ValueError("vehicle ids must not be negative")
+
+        # Draw the noise of every vehicle at once, for its rows in order
+        ids, inverse = np.unique(vehicles, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        ends = np.cumsum(np.bincount(inverse, minlength=len(ids)))
+        noise = np.empty((n, columns))
+        start = 0
+        for vehicle, end in zip(ids, ends):
+            rows_of_vehicle = order[start:end]
+            noise[rows_of_vehicle] = self._generator(int(vehicle), stream).standard_normal(
+                (end - start, columns))
+            start = end
+        noisy += noise * sigma
+        return noisy
+
+    def _generator(self, vehicle, stream):
+        key = (vehicle, stream)
+        if key not in self._streams:
+            self._streams[key] = np.random.default_rng([self._seed, vehicle, stream])
+        return self._streams[key]
@@ -0,0 +1,43 @@
+import math
+
+import numpy as np
+
+from .vehicle_model import VehicleModel
+from .vehicle_state import A_X, A_Y, ACC, DELTA, V_X, V_Y, X, Y, YAW
+
+
+class PointMass(VehicleModel):
+    """NumPy port of `PointMass` in point_mass.cpp."""
+
+    def update_state(self, state, input, dt):
+        self._check_shapes(state, input)
+        self.validate_input(input)
+
+        state[:, A_X] = input[:, ACC] * np.cos(input[:, DELTA])
+        state[:, A_Y] = input[:, ACC] * np.sin(input[:, DELTA])
+
+        # Only the position and velocity have non-zero derivatives, the
+        # positions use the velocities from before the update
+        state[:, X] += state[:, V_X] * dt
+        state[:, Y] += state[:, V_Y] * dt
+        state[:, V_X] += state[:, A_X] * dt
+        state[:, V_Y] += state[:, A_Y] * dt
+
+        state[:, YAW] = np.arctan2(state[:, V_Y], state[:, V_X])
+
+        self.validate_state(state)
+
+    def update_single_state(self, state, input, dt):
+        self.validate_single_input(input)
+
+        state[A_X] = input[ACC] * math.cos(input[DELTA])
+        state[A_Y] = input[ACC] * math.sin(input[DELTA])
+
+        state[X] += state[V_X] * dt
+        state[Y] += state[V_Y] * dt
+        state[V_X] += state[A_X] * dt
+        state[V_Y] += state[A_Y] * dt
+
+        state[YAW] = math.atan2(state[V_Y], state[V_X])
+
+        state[V_X] = max(0.0, state[V_X])
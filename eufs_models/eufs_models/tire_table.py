@@ -0,0 +1,110 @@
+import math
+
+import numpy as np
+
+# Refining the resolution for max_error stops at this many entries
+MAX_TABLE_SIZE = 1 << 20
+
+
+def pacejka_mu(tire, slip_angle):
+    """The Pacejka lateral friction coefficient mu_y, for arrays of slip angles."""
+    B, C, D, E = tire.B, tire.C, tire.D, tire.E
+    return D * np.sin(C * np.arctan(B * (1.0 - E) * slip_angle + E * np.arctan(B * slip_angle)))
+
+
+def pacejka_mu_derivative(tire, slip_angle):
+    B, C, D, E = tire.B, tire.C, tire.D, tire.E
+    B_slip = B * slip_angle
+    u = B * (1.0 - E) * slip_angle + E * np.arctan(B_slip)
+    du = B * (1.0 - E) + E * B / (1.0 + B_slip * B_slip)
+    return D * np.cos(C * np.arctan(u)) * C * du / (1.0 + u * u)
+
+
+class TireTable:
+    """
+    NumPy port of `TireTable` in tire_table.hpp: mu_y of the Pacejka tire
+    model precomputed over slip angles in [-max_slip_angle, max_slip_angle].
+
+    `param` is the `tire_table` group of `Param`. Slip angles outside the
+    table are evaluated exactly.
+    """
+
+    def __init__(self, tire, param, max_slip_angle):
+        self._tire = tire
+        self._cubic = param.interpolation == "cubic"
+        self._max_slip_angle = max_slip_angle
+
+        step = param.resolution
+        self._build(step)
+        self.max_error = self._measure_error()
+        while (param.max_error > 0.0 and self.max_error > param.max_error
+               and 2 * len(self._values) <= MAX_TABLE_SIZE):
+            step /= 2
+            self._build(step)
+            self.max_error = self._measure_error()
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def step(self):
+        return self._step
+
+    def get_mu(self, slip_angle):
+        """Interpolated mu_y for an array of slip angles."""
+        x = (slip_angle + self._max_slip_angle) / self._step
+        inside = (x >= 0.0) & (x < self._last)
+        i = np.where(inside, x, 0.0).astype(np.intp)
+        t = x - i
+        v0, v1 = self._values[i], self._values[i + 1]
+        if not self._cubic:
+            mu = v0 + t * (v1 - v0)
+        else:
+            # Cubic Hermite spline, with slopes scaled to the step length
+            t2 = t * t
+            t3 = t2 * t
+            mu = ((2 * t3 - 3 * t2 + 1) * v0 + (t3 - 2 * t2 + t) * self._slopes[i]
+                  + (-2 * t3 + 3 * t2) * v1 + (t3 - t2) * self._slopes[i + 1])
+        if not inside.all():
+            mu = np.where(inside, mu, pacejka_mu(self._tire, slip_angle))
+        return mu
+
+    def get_single_mu(self, slip_angle):
+        """`get_mu` for a single float slip angle."""
+        x = (slip_angle + self._max_slip_angle) / self._step
+        if not (0.0 <= x < self._last):
+            tire = self._tire
+            return tire.D * math.sin(tire.C * math.atan(
+                tire.B * (1.0 - tire.E) * slip_angle + tire.E * math.atan(tire.B * slip_angle)))
+        i = int(x)
+        t = x - i
+        v0, v1 = self._value_list[i], self._value_list[i + 1]
+        if not self._cubic:
+            return v0 + t * (v1 - v0)
+        t2 = t * t
+        t3 = t2 * t
+        return ((2 * t3 - 3 * t2 + 1) * v0 + (t3 - 2 * t2 + t) * self._slope_list[i]
+                + (-2 * t3 + 3 * t2) * v1 + (t3 - t2) * self._slope_list[i + 1])
+
+    def _build(self, step):
+        intervals = max(1, math.ceil(2 * self._max_slip_angle / step))
+        self._step = 2 * self._max_slip_angle / intervals
+        self._last = intervals
+
+        slip_angles = np.arange(intervals + 1) * self._step - self._max_slip_angle
+        self._values = pacejka_mu(self._tire, slip_angles)
+        self._slopes = None
+        if self._cubic:
+            self._slopes = pacejka_mu_derivative(self._tire, slip_angles) * self._step
+
+        # Indexing lists is faster than indexing arrays for single lookups
+        self._value_list = self._values.tolist()
+        self._slope_list = self._slopes.tolist() if self._cubic else None
+
+    def _measure_error(self):
+        # The error of both interpolations peaks within each interval, so it
+        # is sampled at the quarter points of every interval
+        starts = np.arange(len(self._values) - 1)
+        slip_angles = np.concatenate(
+            [(starts + t) * self._step - self._max_slip_angle for t in (0.25, 0.5, 0.75)])
+        return float(np.max(np.abs(self.get_mu(slip_angles) - pacejka_mu(self._tire, slip_angles))))
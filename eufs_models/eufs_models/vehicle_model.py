@@ -0,0 +1,98 @@
+import numpy as np
+
+from .vehicle_param import Param
+from .vehicle_state import ACC, DELTA, R_Z, STATE_SIZE, VEL, V_X, V_Y
+
+
+class VehicleModel:
+    """
+    NumPy port of `VehicleModel` in vehicle_model.hpp, stepping N vehicles at once.
+
+    States are (N, STATE_SIZE) arrays and inputs (N, INPUT_SIZE) arrays, see
+    vehicle_state.py for the column layout. As in the C++ library,
+    `update_state` updates `state` and clips `input` in place.
+    """
+
+    def __init__(self, yaml_file):
+        self._param = Param(yaml_file)
+
+    def get_param(self):
+        return self._param
+
+    def update_state(self, state, input, dt):
+        raise NotImplementedError
+
+    def update_single_state(self, state, input, dt):
+        """
+        `update_state` for a single vehicle, with `state` and `input` given as
+        lists of floats in the same order as the array columns.
+
+        Uses `math` rather than NumPy, as for a single vehicle the per-call
+        overhead of NumPy is many times the cost of the arithmetic.
+        """
+        raise NotImplementedError
+
+    def validate_single_input(self, input):
+        ranges = self._param.input_ranges
+        input[ACC] = min(max(input[ACC], ranges.acc.min), ranges.acc.max)
+        input[VEL] = min(max(input[VEL], ranges.vel.min), ranges.vel.max)
+        input[DELTA] = min(max(input[DELTA], ranges.delta.min), ranges.delta.max)
+
+    def validate_state(self, state):
+        np.maximum(state[:, V_X], 0.0, out=state[:, V_X])
+
+    def validate_input(self, input):
+        ranges = self._param.input_ranges
+        np.clip(input[:, ACC], ranges.acc.min, ranges.acc.max, out=input[:, ACC])
+        np.clip(input[:, VEL], ranges.vel.min, ranges.vel.max, out=input[:, VEL])
+        np.clip(input[:, DELTA], ranges.delta.min, ranges.delta.max, out=input[:, DELTA])
+
+    def get_slip_angle(self, state, input, is_front):
+        kinematic = self._param.kinematic
+        lever_arm_length = kinematic.l * kinematic.w_front
+
+        v_x = np.maximum(1.0, state[:, V_X])
+        denominator = v_x - 0.5 * kinematic.axle_width * state[:, R_Z]
+        if not is_front:
+            return np.arctan((state[:, V_Y] - lever_arm_length * state[:, R_Z]) / denominator)
+
+        return (np.arctan((state[:, V_Y] + lever_arm_length * state[:, R_Z]) / denominator)
+                - input[:, DELTA])
+
+    def get_wheel_speeds(self, state, input):
+        """
+        Wheel speeds (rpm) as an (N, 5) array with the columns of
+        eufs_msgs/WheelSpeeds: steering, lf_speed, rf_speed, lb_speed, rb_speed.
+        """
+        wheel_circumference = 2 * np.pi * self._param.tire.radius
+        rear_speed = (state[:, V_X] / wheel_circumference) * 60
+
+        wheel_speeds = np.empty((state.shape[0], 5))
+        wheel_speeds[:, 0] = input[:, DELTA]
+        wheel_speeds[:, 1:3] = 999
+        wheel_speeds[:, 3] = rear_speed
+        wheel_speeds[:, 4] = rear_speed
+        return wheel_speeds
+
+    def rollout(self, state, inputs, dt):
+        """
+        Applies a sequence of (T, N, INPUT_SIZE) inputs to a copy of `state`.
+
+        Returns the (T + 1, N, STATE_SIZE) trajectory, starting with `state`.
+        """
+        inputs = np.array(inputs, dtype=float)
+        trajectory = np.empty((inputs.shape[0] + 1,) + state.shape)
+        trajectory[0] = state
+        current = np.array(state, dtype=float)
+        for step, input in enumerate(inputs):
+            self.update_state(current, input, dt)
+            trajectory[step + 1] = current
+        return trajectory
+
+    @staticmethod
+    def _check_shapes(state, input):
+        if state.ndim != 2 or state.shape[1] != STATE_SIZE:
+            raise ValueError(f"state must be an (N, {STATE_SIZE}) array, got {state.shape}")
+        if input.shape[0] != state.shape[0]:
+            raise ValueError(
+                f"input has {input.shape[0]} rows but state has {state.shape[0]}")
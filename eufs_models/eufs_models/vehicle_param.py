@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+import yaml
+
+
+class Param:
+    """
+    Vehicle parameters, read from the same yaml files as `Param` in
+    vehicle_param.hpp (e.g. eufs_racecar/robots/eufs/configDry.yaml).
+
+    Parameters are grouped as in the C++ struct, e.g. `param.inertia.m` or
+    `param.input_ranges.acc.max`, and derived values (`l_F`, `l_R` and the
+    tire coefficient scaling of `B` and `D`) are computed the same way.
+    """
+
+    INTEGRATORS = ("euler", "rk2", "rk4", "adaptive")
+    TIRE_TABLE_INTERPOLATIONS = ("linear", "cubic")
+
+    def __init__(self, yaml_file):
+        with open(yaml_file, "r") as f:
+            config = yaml.safe_load(f)
+
+        inertia = config["inertia"]
+        self.inertia = SimpleNamespace(
+            m=float(inertia["m"]),
+            g=float(inertia["g"]),
+            I_z=float(inertia["I_z"]),
+        )
+
+        kinematics = config["kinematics"]
+        l, w_front = float(kinematics["l"]), float(kinematics["w_front"])
+        self.kinematic = SimpleNamespace(
+            l=l,
+            b_F=float(kinematics["b_F"]),
+            b_R=float(kinematics["b_R"]),
+            w_front=w_front,
+            l_F=l * (1 - w_front),
+            l_R=l * w_front,
+            axle_width=float(kinematics["axle_width"]),
+        )
+
+        tire = config["tire"]
+        tire_coefficient = float(tire["tire_coefficient"])
+        self.tire = SimpleNamespace(
+            tire_coefficient=tire_coefficient,
+            B=float(tire["B"]) / tire_coefficient,
+            C=float(tire["C"]),
+            D=float(tire["D"]) * tire_coefficient,
+            E=float(tire["E"]),
+            radius=float(tire["radius"]),
+        )
+
+        aero = config["aero"]
+        self.aero = SimpleNamespace(
+            c_down=float(aero["C_Down"]),
+            c_drag=float(aero["C_drag"]),
+        )
+
+        ranges = config["input_ranges"]
+        self.input_ranges = SimpleNamespace(
+            acc=SimpleNamespace(min=float(ranges["acceleration"]["min"]),
+                                max=float(ranges["acceleration"]["max"])),
+            vel=SimpleNamespace(min=float(ranges["velocity"]["min"]),
+                                max=float(ranges["velocity"]["max"])),
+            delta=SimpleNamespace(min=float(ranges["steering"]["min"]),
+                                  max=float(ranges["steering"]["max"])),
+        )
+
+        integrator = config.get("integrator") or {}
+        self.integrator = SimpleNamespace(
+            method=str(integrator.get("method", "euler")),
+            max_step=float(integrator.get("max_step", 0.0)),
+            tolerance=float(integrator.get("tolerance", 1e-3)),
+            min_step=float(integrator.get("min_step", 1e-5)),
+        )
+        if self.integrator.method not in self.INTEGRATORS:
+            raise ValueError(f"Unknown integrator '{self.integrator.method}', "
+                             f"must be one of {', '.join(self.INTEGRATORS)}")
+
+        tire_table = config.get("tire_table") or {}
+        self.tire_table = SimpleNamespace(
+            enabled=bool(tire_table.get("enabled", False)),
+            interpolation=str(tire_table.get("interpolation", "linear")),
+            resolution=float(tire_table.get("resolution", 0.001)),
+            max_error=float(tire_table.get("max_error", 0.0)),
+        )
+        if self.tire_table.interpolation not in self.TIRE_TABLE_INTERPOLATIONS:
+            raise ValueError(f"Unknown tire table interpolation "
+                             f"'{self.tire_table.interpolation}', must be linear or cubic")
+        if not self.tire_table.resolution > 0.0:
+            raise ValueError(f"Tire table resolution must be positive, "
+                             f"got {self.tire_table.resolution}")
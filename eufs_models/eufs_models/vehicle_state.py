@@ -0,0 +1,30 @@
+import numpy as np
+
+__all__ = [
+    "STATE_FIELDS", "STATE_SIZE", "X", "Y", "Z", "YAW", "V_X", "V_Y", "V_Z",
+    "R_X", "R_Y", "R_Z", "A_X", "A_Y", "A_Z",
+    "INPUT_FIELDS", "INPUT_SIZE", "ACC", "VEL", "DELTA",
+    "zero_states", "zero_inputs",
+]
+
+# Columns of a batch of states, in the order of the fields of `State` in
+# vehicle_state.hpp. A batch of N states is an (N, STATE_SIZE) float array.
+STATE_FIELDS = ("x", "y", "z", "yaw", "v_x", "v_y", "v_z",
+                "r_x", "r_y", "r_z", "a_x", "a_y", "a_z")
+X, Y, Z, YAW, V_X, V_Y, V_Z, R_X, R_Y, R_Z, A_X, A_Y, A_Z = range(len(STATE_FIELDS))
+STATE_SIZE = len(STATE_FIELDS)
+
+# Columns of a batch of inputs, in the order of the fields of `Input` in
+# vehicle_input.hpp. A batch of N inputs is an (N, INPUT_SIZE) float array.
+INPUT_FIELDS = ("acc", "vel", "delta")
+ACC, VEL, DELTA = range(len(INPUT_FIELDS))
+INPUT_SIZE = len(INPUT_FIELDS)
+
+
+def zero_states(n):
+    """N vehicles at rest at the origin."""
+    return np.zeros((n, STATE_SIZE))
+
+
+def zero_inputs(n):
+    return np.zeros((n, INPUT_SIZE))
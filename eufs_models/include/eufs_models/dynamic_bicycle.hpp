@@ -2,6 +2,7 @@
 #define EUFS_MODELS_INCLUDE_EUFS_MODELS_DYNAMIC_BICYCLE_HPP_
 
 #include <string>
+#include "eufs_models/tire_table.hpp"
 #include "eufs_models/vehicle_model.hpp"
 
 namespace eufs {
@@ -13,7 +14,15 @@ class DynamicBicycle : public VehicleModel {
 
   void updateState(State &state, Input &input, const double dt);
 
+  const TireTable &getTireTable() { return _tire_table; }
+
  private:
+  TireTable _tire_table;
+
+  void _updateStateAdaptive(State &state, const Input &input, const double dt);
+  void _step(State &state, const Input &input, const double dt, const State &x_dot);
+  State _getXDot(const State &x, const Input &u);
+  State _getSlope(const State &x, const Input &u, const double dt, const State &k1);
   State _f(const State &x, const Input &u, const double Fx, const double FyF, const double FyR);
   State _fKinCorrection(const State &x_in, const State &x_state, const Input &u, const double Fx,
                         const double dt);
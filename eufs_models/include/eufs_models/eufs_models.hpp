@@ -4,6 +4,7 @@
 #include "eufs_models/dynamic_bicycle.hpp"
 #include "eufs_models/noise.hpp"
 #include "eufs_models/point_mass.hpp"
+#include "eufs_models/tire_table.hpp"
 #include "eufs_models/vehicle_input.hpp"
 #include "eufs_models/vehicle_model.hpp"
 #include "eufs_models/vehicle_param.hpp"
@@ -2,7 +2,11 @@
 #define EUFS_MODELS_INCLUDE_EUFS_MODELS_NOISE_HPP_
 
 #include <math.h>
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
 #include <string>
+#include <unordered_map>
 #include "eufs_models/vehicle_state.hpp"
 #include "eufs_msgs/msg/wheel_speeds.hpp"
 #include "yaml-cpp/yaml.h"
@@ -40,9 +44,25 @@ struct NoiseParam {
 
 class Noise {
  public:
-  explicit Noise(const std::string &yaml_file) {
+  // Values per row of the arrays of the batched methods: the fields of State, in order, and
+  // steering, lf_speed, rf_speed, lb_speed, rb_speed of eufs_msgs/WheelSpeeds
+  static constexpr size_t STATE_SIZE = 13;
+  static constexpr size_t WHEEL_SPEEDS_SIZE = 5;
+
+  explicit Noise(const std::string &yaml_file, unsigned seed = 0) : seed(seed), _seed(seed) {
     YAML::Node config = YAML::LoadFile(yaml_file);
     _noise_param = config["noise"].as<NoiseParam>();
+
+    // Standard deviations of the columns of the batched methods, as applyNoise and
+    // applyNoiseToWheelSpeeds add noise (only the yaw of the orientation is in State)
+    const NoiseParam &p = _noise_param;
+    std::copy(p.position, p.position + 3, _state_sigma);
+    _state_sigma[3] = p.orientation[0];
+    std::copy(p.linear_velocity, p.linear_velocity + 3, _state_sigma + 4);
+    std::copy(p.angular_velocity, p.angular_velocity + 3, _state_sigma + 7);
+    std::copy(p.linear_acceleration, p.linear_acceleration + 3, _state_sigma + 10);
+    _wheel_speed_sigma[0] = 0.0;
+    std::copy(p.wheel_speed, p.wheel_speed + 4, _wheel_speed_sigma + 1);
   }
 
   State applyNoise(const State &state) {
@@ -87,6 +107,31 @@ class Noise {
     return new_wheel_speeds;
   }
 
+  // Batched applyNoise, adding noise in place to `n` states stored row after row (n * STATE_SIZE
+  // values). Every vehicle has its own stream of random numbers, made from the seed of the Noise
+  // object and the vehicle's id: row i is a state of vehicle `vehicles[i]`, or of vehicle 0 if
+  // `vehicles` is null. The streams carry on between calls, so the noise of a vehicle only
+  // depends on the seed and on the order of its own states, whichever batches they come in.
+  void applyNoise(double *states, size_t n, const int64_t *vehicles = nullptr) {
+    _applyNoise(states, n, vehicles, _state_sigma, STATE_SIZE, 0, &Streams::state);
+  }
+
+  // Batched applyNoiseToWheelSpeeds, as the batched applyNoise, for `n` rows of WHEEL_SPEEDS_SIZE
+  // values. The wheel speeds of a vehicle have their own stream, apart from its states.
+  void applyNoiseToWheelSpeeds(double *wheel_speeds, size_t n, const int64_t *vehicles = nullptr) {
+    // No noise on the steering angle
+    _applyNoise(wheel_speeds, n, vehicles, _wheel_speed_sigma, WHEEL_SPEEDS_SIZE, 1,
+                &Streams::wheel_speeds);
+  }
+
+  // Restarts the streams of the batched methods from `seed`
+  void setSeed(unsigned new_seed) {
+    _seed = new_seed;
+    _streams.clear();
+  }
+
+  unsigned getSeed() const { return _seed; }
+
   const NoiseParam &getNoiseParam() { return _noise_param; }
 
   std::string getString() { return _noise_param.to_str(); }
@@ -97,15 +142,74 @@ class Noise {
   // Initialise seed for pseudo-random number generator
   unsigned seed = 0.0;
 
-  double _gaussianKernel(double mu, double sigma) {
+  // State of the random number generators of one vehicle, for the batched methods
+  struct Streams {
+    unsigned state;
+    unsigned wheel_speeds;
+  };
+
+  unsigned _seed;
+  std::unordered_map<int64_t, Streams> _streams;
+  double _state_sigma[STATE_SIZE];
+  double _wheel_speed_sigma[WHEEL_SPEEDS_SIZE];
+
+  // Adds noise to columns `first` to `size` - 1 of `n` rows of `size` values
+  void _applyNoise(double *rows, size_t n, const int64_t *vehicles, const double *sigma,
+                   size_t size, size_t first, unsigned Streams::*member) {
+    // Rows of the same vehicle usually come one after another, so only look up the vehicle when it
+    // changes. Nothing is added to the map while `generator` is in use.
+    int64_t vehicle = vehicles == nullptr ? 0 : vehicles[0];
+    unsigned *generator = n > 0 ? &(_getStreams(vehicle).*member) : nullptr;
+    for (size_t i = 0; i < n; i++) {
+      if (vehicles != nullptr && vehicles[i] != vehicle) {
+        vehicle = vehicles[i];
+        generator = &(_getStreams(vehicle).*member);
+      }
+      double *row = rows + i * size;
+      // Every value takes its draws from the stream, even without noise, so changing the noise of
+      // one value doesn't change the others
+      for (size_t j = first; j < size; j++) {
+        row[j] += _gaussianKernel(0, sigma[j], *generator);
+      }
+    }
+  }
+
+  Streams &_getStreams(int64_t vehicle) {
+    auto it = _streams.find(vehicle);
+    if (it == _streams.end()) {
+      it = _streams.emplace(vehicle, Streams{_mixSeed(vehicle, 0), _mixSeed(vehicle, 1)}).first;
+    }
+    return it->second;
+  }
+
+  // Seed of one stream of a vehicle, scrambled (splitmix64) so that the streams of vehicles with
+  // consecutive ids are unrelated
+  unsigned _mixSeed(int64_t vehicle, unsigned stream) const {
+    uint64_t z = (static_cast<uint64_t>(_seed) << 32 | stream) +
+                 static_cast<uint64_t>(vehicle) * 0x9E3779B97F4A7C15ULL;
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ULL;
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EBULL;
+    return static_cast<unsigned>(z ^ (z >> 31));
+  }
+
+  double _gaussianKernel(double mu, double sigma) { return _gaussianKernel(mu, sigma, seed); }
+
+  double _gaussianKernel(double mu, double sigma, unsigned &generator) {
     // using Box-Muller transform to generate two independent standard
     // normally distributed normal variables see wikipedia
 
     // normalized uniform random variable
-    double U = static_cast<double>(rand_r(&seed)) / static_cast<double>(RAND_MAX);
+    double U = static_cast<double>(rand_r(&generator)) / static_cast<double>(RAND_MAX);
 
     // normalized uniform random variable
-    double V = static_cast<double>(rand_r(&seed)) / static_cast<double>(RAND_MAX);
+    double V = static_cast<double>(rand_r(&generator)) / static_cast<double>(RAND_MAX);
+
+    // Nothing to add, skip the transform
+    if (sigma == 0) {
+      return mu;
+    }
+    // log(0) would make the sample infinite
+    U = std::max(U, 1.0 / static_cast<double>(RAND_MAX));
 
     double X = sqrt(-2.0 * ::log(U)) * cos(2.0 * M_PI * V);
     // double Y = sqrt(-2.0 * ::log(U)) * sin(2.0*M_PI * V);
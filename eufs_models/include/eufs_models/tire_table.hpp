@@ -0,0 +1,76 @@
+#ifndef EUFS_MODELS_INCLUDE_EUFS_MODELS_TIRE_TABLE_HPP_
+#define EUFS_MODELS_INCLUDE_EUFS_MODELS_TIRE_TABLE_HPP_
+
+#include <cmath>
+#include <vector>
+
+#include "eufs_models/vehicle_param.hpp"
+
+namespace eufs {
+namespace models {
+
+// Precomputed lateral friction coefficient mu_y of the Pacejka tire model,
+// mu_y = D * sin(C * atan(B * (1 - E) * slip_angle + E * atan(B * slip_angle))),
+// over slip angles in [-max_slip_angle, max_slip_angle].
+class TireTable {
+ public:
+  TireTable() = default;
+  TireTable(const Param::Tire &tire, const Param::TireTable &param, const double max_slip_angle);
+
+  // Interpolated mu_y, or the exact value outside the table
+  double getMu(const double slip_angle) const {
+    const double x = (slip_angle + _max_slip_angle) / _step;
+    if (!(x >= 0.0 && x < _last)) {
+      return evaluate(_tire, slip_angle);
+    }
+    const int i = static_cast<int>(x);
+    const double t = x - i;
+    const double v0 = _values[i];
+    const double v1 = _values[i + 1];
+    if (_interpolation == Param::TireTable::LINEAR) {
+      return v0 + t * (v1 - v0);
+    }
+
+    // Cubic Hermite spline, with slopes scaled to the step length
+    const double t2 = t * t;
+    const double t3 = t2 * t;
+    return (2 * t3 - 3 * t2 + 1) * v0 + (t3 - 2 * t2 + t) * _slopes[i] +
+           (-2 * t3 + 3 * t2) * v1 + (t3 - t2) * _slopes[i + 1];
+  }
+
+  bool empty() const { return _values.empty(); }
+  size_t size() const { return _values.size(); }
+  double getStep() const { return _step; }
+  // Largest difference to the exact mu_y, measured when the table was built
+  double getMaxError() const { return _max_error; }
+
+  static double evaluate(const Param::Tire &tire, const double slip_angle) {
+    return tire.D * std::sin(tire.C * std::atan(tire.B * (1.0 - tire.E) * slip_angle +
+                                                tire.E * std::atan(tire.B * slip_angle)));
+  }
+
+  static double derivative(const Param::Tire &tire, const double slip_angle) {
+    const double B_slip = tire.B * slip_angle;
+    const double u = tire.B * (1.0 - tire.E) * slip_angle + tire.E * std::atan(B_slip);
+    const double du = tire.B * (1.0 - tire.E) + tire.E * tire.B / (1.0 + B_slip * B_slip);
+    return tire.D * std::cos(tire.C * std::atan(u)) * tire.C * du / (1.0 + u * u);
+  }
+
+ private:
+  void _build(const double step);
+  double _measureError() const;
+
+  Param::Tire _tire{};
+  Param::TireTable::Interpolation _interpolation = Param::TireTable::LINEAR;
+  double _max_slip_angle = 0.0;
+  double _step = 1.0;
+  double _last = 0.0;  // Index of the last entry
+  double _max_error = 0.0;
+  std::vector<double> _values;
+  std::vector<double> _slopes;
+};
+
+}  // namespace models
+}  // namespace eufs
+
+#endif  // EUFS_MODELS_INCLUDE_EUFS_MODELS_TIRE_TABLE_HPP_
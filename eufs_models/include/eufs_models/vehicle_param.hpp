@@ -25,6 +25,7 @@
 #ifndef EUFS_MODELS_INCLUDE_EUFS_MODELS_VEHICLE_PARAM_HPP_
 #define EUFS_MODELS_INCLUDE_EUFS_MODELS_VEHICLE_PARAM_HPP_
 
+#include <stdexcept>
 #include <string>
 #include "yaml-cpp/yaml.h"
 
@@ -40,6 +41,12 @@ struct Param {
     tire = config["tire"].as<Param::Tire>();
     aero = config["aero"].as<Param::Aero>();
     input_ranges = config["input_ranges"].as<Param::InputRanges>();
+    if (config["integrator"]) {
+      integrator = config["integrator"].as<Param::Integrator>();
+    }
+    if (config["tire_table"]) {
+      tire_table = config["tire_table"].as<Param::TireTable>();
+    }
   }
 
   struct Inertia {
@@ -83,11 +90,52 @@ struct Param {
     Range delta;
   };
 
+  // How DynamicBicycle integrates its dynamics over one call to updateState.
+  // Defaults to a single explicit Euler step when the yaml file has no
+  // integrator block.
+  struct Integrator {
+    enum Method { EULER, RK2, RK4, ADAPTIVE };
+
+    static Method toMethod(const std::string &name) {
+      if (name == "euler") return EULER;
+      if (name == "rk2") return RK2;
+      if (name == "rk4") return RK4;
+      if (name == "adaptive") return ADAPTIVE;
+      throw std::invalid_argument("Unknown integrator '" + name +
+                                  "', must be one of euler, rk2, rk4 or adaptive");
+    }
+
+    Method method = EULER;
+    double max_step = 0.0;    // Longest (sub-)step, 0 for a single step [s]
+    double tolerance = 1e-3;  // Largest error of an adaptive step
+    double min_step = 1e-5;   // Adaptive steps never get shorter than this [s]
+  };
+
+  // Lookup table of the tire model over the slip angle, used by
+  // DynamicBicycle instead of evaluating the Pacejka formula when enabled
+  struct TireTable {
+    enum Interpolation { LINEAR, CUBIC };
+
+    static Interpolation toInterpolation(const std::string &name) {
+      if (name == "linear") return LINEAR;
+      if (name == "cubic") return CUBIC;
+      throw std::invalid_argument("Unknown tire table interpolation '" + name +
+                                  "', must be linear or cubic");
+    }
+
+    bool enabled = false;
+    Interpolation interpolation = LINEAR;
+    double resolution = 0.001;  // Slip angle between table entries [rad]
+    double max_error = 0.0;     // If set, resolution is refined until mu_y is within max_error
+  };
+
   Inertia inertia;
   Kinematic kinematic;
   Tire tire;
   Aero aero;
   InputRanges input_ranges;
+  Integrator integrator;
+  TireTable tire_table;
 };
 
 }  // namespace models
@@ -153,6 +201,49 @@ struct convert<eufs::models::Param::InputRanges> {
   }
 };
 
+template <>
+struct convert<eufs::models::Param::Integrator> {
+  static bool decode(const Node &node, eufs::models::Param::Integrator &cType) {
+    if (node["method"]) {
+      cType.method = eufs::models::Param::Integrator::toMethod(node["method"].as<std::string>());
+    }
+    if (node["max_step"]) {
+      cType.max_step = node["max_step"].as<double>();
+    }
+    if (node["tolerance"]) {
+      cType.tolerance = node["tolerance"].as<double>();
+    }
+    if (node["min_step"]) {
+      cType.min_step = node["min_step"].as<double>();
+    }
+    return true;
+  }
+};
+
+template <>
+struct convert<eufs::models::Param::TireTable> {
+  static bool decode(const Node &node, eufs::models::Param::TireTable &cType) {
+    if (node["enabled"]) {
+      cType.enabled = node["enabled"].as<bool>();
+    }
+    if (node["interpolation"]) {
+      cType.interpolation =
+          eufs::models::Param::TireTable::toInterpolation(node["interpolation"].as<std::string>());
+    }
+    if (node["resolution"]) {
+      cType.resolution = node["resolution"].as<double>();
+      if (!(cType.resolution > 0.0)) {
+        throw std::invalid_argument("Tire table resolution must be positive, got " +
+                                    node["resolution"].as<std::string>());
+      }
+    }
+    if (node["max_error"]) {
+      cType.max_error = node["max_error"].as<double>();
+    }
+    return true;
+  }
+};
+
 }  // namespace YAML
 
 #endif  // EUFS_MODELS_INCLUDE_EUFS_MODELS_VEHICLE_PARAM_HPP_
@@ -1,35 +1,121 @@
 #include "eufs_models/dynamic_bicycle.hpp"
 
+#include <algorithm>
+#include <cmath>
+
 namespace eufs {
 namespace models {
 
-DynamicBicycle::DynamicBicycle(const std::string &yaml_file) : VehicleModel(yaml_file) {}
+DynamicBicycle::DynamicBicycle(const std::string &yaml_file) : VehicleModel(yaml_file) {
+  if (_param.tire_table.enabled) {
+    // Slip angles are the angle of the tire's velocity, less the steering
+    // angle for the front tires
+    const Param::InputRanges::Range &delta = _param.input_ranges.delta;
+    const double max_delta = std::fmax(std::fabs(delta.min), std::fabs(delta.max));
+    _tire_table = TireTable(_param.tire, _param.tire_table, M_PI_2 + max_delta);
+  }
+}
 
 void DynamicBicycle::updateState(State &state, Input &input, const double dt) {
   validateInput(input);
 
-  double Fz = _getNormalForce(state);
-
-  double slip_angle_front = getSlipAngle(state, input, true);
-  double FyF = _getFy(Fz, true, slip_angle_front);
+  const Param::Integrator &integrator = _param.integrator;
+  if (integrator.method == Param::Integrator::ADAPTIVE) {
+    _updateStateAdaptive(state, input, dt);
+    return;
+  }
+
+  // Split dt into equal sub-steps no longer than max_step
+  int steps = 1;
+  if (integrator.max_step > 0.0) {
+    steps = std::max(1, static_cast<int>(std::ceil(dt / integrator.max_step - 1e-9)));
+  }
+  const double h = dt / steps;
+  for (int i = 0; i < steps; i++) {
+    const State k1 = _getXDot(state, input);
+    _step(state, input, h, _getSlope(state, input, h, k1));
+  }
+}
 
-  double slip_angle_back = getSlipAngle(state, input, false);
-  double FyR = _getFy(Fz, false, slip_angle_back);
+void DynamicBicycle::_updateStateAdaptive(State &state, const Input &input, const double dt) {
+  const Param::Integrator &integrator = _param.integrator;
+  const double max_step = integrator.max_step > 0.0 ? std::fmin(dt, integrator.max_step) : dt;
+
+  // Heun's method with the difference to an Euler step as its error estimate
+  double remaining = dt;
+  double h = max_step;
+  while (remaining > 0.0) {
+    if (remaining - h < 1e-12) {
+      h = remaining;
+    }
+
+    const State k1 = _getXDot(state, input);
+    const State k2 = _getXDot(state + k1 * h, input);
+
+    double error = 0.0;
+    const double k1_values[] = {k1.x, k1.y, k1.yaw, k1.v_x, k1.v_y, k1.r_z};
+    const double k2_values[] = {k2.x, k2.y, k2.yaw, k2.v_x, k2.v_y, k2.r_z};
+    for (int i = 0; i < 6; i++) {
+      error = std::fmax(error, 0.5 * h * std::fabs(k2_values[i] - k1_values[i]));
+    }
+
+    // Retry a step that was too inaccurate with a shorter one
+    const double scale = error > 0.0 ? 0.9 * std::sqrt(integrator.tolerance / error) : 5.0;
+    if (error > integrator.tolerance && h > integrator.min_step) {
+      h = std::fmax(integrator.min_step, h * std::fmax(0.2, scale));
+      continue;
+    }
+
+    _step(state, input, h, (k1 + k2) * 0.5);
+    remaining -= h;
+    h = std::fmin(max_step, h * std::fmin(5.0, scale));
+  }
+}
 
+void DynamicBicycle::_step(State &state, const Input &input, const double dt, const State &x_dot) {
   // Drivetrain Model
   const double Fx = _getFx(state, input);
   // Dynamics
-  const auto x_dot_dyn = _f(state, input, Fx, FyF, FyR);
-  const auto x_next_dyn = state + x_dot_dyn * dt;
+  const auto x_next_dyn = state + x_dot * dt;
   state = _fKinCorrection(x_next_dyn, state, input, Fx, dt);
 
   // Set the acceleration based on the change in velocity
-  state.a_x = x_dot_dyn.v_x;
-  state.a_y = x_dot_dyn.v_y;
+  state.a_x = x_dot.v_x;
+  state.a_y = x_dot.v_y;
 
   validateState(state);
 }
 
+State DynamicBicycle::_getXDot(const State &x, const Input &u) {
+  double Fz = _getNormalForce(x);
+
+  double slip_angle_front = getSlipAngle(x, u, true);
+  double FyF = _getFy(Fz, true, slip_angle_front);
+
+  double slip_angle_back = getSlipAngle(x, u, false);
+  double FyR = _getFy(Fz, false, slip_angle_back);
+
+  return _f(x, u, _getFx(x, u), FyF, FyR);
+}
+
+// The derivative to step with, given the derivative k1 at the start of the step
+State DynamicBicycle::_getSlope(const State &x, const Input &u, const double dt,
+                                const State &k1) {
+  switch (_param.integrator.method) {
+    case Param::Integrator::RK2:
+      // Midpoint method
+      return _getXDot(x + k1 * (0.5 * dt), u);
+    case Param::Integrator::RK4: {
+      const State k2 = _getXDot(x + k1 * (0.5 * dt), u);
+      const State k3 = _getXDot(x + k2 * (0.5 * dt), u);
+      const State k4 = _getXDot(x + k3 * dt, u);
+      return (k1 + (k2 + k3) * 2.0 + k4) * (1.0 / 6.0);
+    }
+    default:
+      return k1;
+  }
+}
+
 State DynamicBicycle::_f(const State &x, const Input &u, const double Fx, const double FyF,
                          const double FyR) {
   const double FyF_tot = 2 * FyF;
@@ -87,12 +173,8 @@ double DynamicBicycle::_getFdrag(const State &x) { return _param.aero.c_drag * x
 double DynamicBicycle::_getFy(const double Fz, bool front, double slip_angle) {
   const double Fz_axle = front ? _getDownForceFront(Fz) : _getDownForceRear(Fz);
 
-  const double B = _param.tire.B;
-  const double C = _param.tire.C;
-  const double D = _param.tire.D;
-  const double E = _param.tire.E;
-  const double mu_y =
-      D * std::sin(C * std::atan(B * (1.0 - E) * slip_angle + E * std::atan(B * slip_angle)));
+  const double mu_y = _tire_table.empty() ? TireTable::evaluate(_param.tire, slip_angle)
+                                           : _tire_table.getMu(slip_angle);
   const double Fy = Fz_axle * mu_y;
   return Fy;
 }
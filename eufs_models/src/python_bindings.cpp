@@ -0,0 +1,432 @@
+#include <pybind11/numpy.h>
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+#include <algorithm>
+#include <array>
+#include <cstdint>
+#include <memory>
+#include <stdexcept>
+#include <string>
+
+#include "eufs_models/eufs_models.hpp"
+
+namespace py = pybind11;
+
+namespace eufs {
+namespace models {
+namespace {
+
+// Batches of states and inputs are (N, 13) and (N, 3) float64 arrays, with
+// columns in the order of the fields of State and Input, as in the NumPy port
+constexpr py::ssize_t STATE_SIZE = 13;
+constexpr py::ssize_t INPUT_SIZE = 3;
+constexpr py::ssize_t WHEEL_SPEEDS_SIZE = 5;
+
+typedef py::array_t<double, py::array::c_style | py::array::forcecast> DoubleArray;
+typedef py::array_t<int64_t, py::array::c_style | py::array::forcecast> IdArray;
+
+State toState(const double *row) {
+  State state;
+  state.x = row[0];
+  state.y = row[1];
+  state.z = row[2];
+  state.yaw = row[3];
+  state.v_x = row[4];
+  state.v_y = row[5];
+  state.v_z = row[6];
+  state.r_x = row[7];
+  state.r_y = row[8];
+  state.r_z = row[9];
+  state.a_x = row[10];
+  state.a_y = row[11];
+  state.a_z = row[12];
+  return state;
+}
+
+void fromState(const State &state, double *row) {
+  row[0] = state.x;
+  row[1] = state.y;
+  row[2] = state.z;
+  row[3] = state.yaw;
+  row[4] = state.v_x;
+  row[5] = state.v_y;
+  row[6] = state.v_z;
+  row[7] = state.r_x;
+  row[8] = state.r_y;
+  row[9] = state.r_z;
+  row[10] = state.a_x;
+  row[11] = state.a_y;
+  row[12] = state.a_z;
+}
+
+Input toInput(const double *row) {
+  Input input;
+  input.acc = row[0];
+  input.vel = row[1];
+  input.delta = row[2];
+  return input;
+}
+
+void fromInput(const Input &input, double *row) {
+  row[0] = input.acc;
+  row[1] = input.vel;
+  row[2] = input.delta;
+}
+
+std::array<double, WHEEL_SPEEDS_SIZE> fromWheelSpeeds(const eufs_msgs::msg::WheelSpeeds &msg) {
+  return {msg.steering, msg.lf_speed, msg.rf_speed, msg.lb_speed, msg.rb_speed};
+}
+
+std::string shapeString(const py::array &array) {
+  std::string shape;
+  for (py::ssize_t i = 0; i < array.ndim(); i++) {
+    shape += std::to_string(array.shape(i));
+    shape += (i < array.ndim() - 1) ? ", " : "";
+  }
+  return "(" + shape + ")";
+}
+
+// Arrays that are updated in place can't be converted, as the caller would
+// never see the update
+py::array_t<double> inPlaceArray(py::object object, py::ssize_t columns,
+                                 const std::string &name) {
+  if (!py::isinstance<py::array_t<double>>(object) ||
+      !(py::array(object).flags() & py::array::c_style) || !py::array(object).writeable()) {
+    throw std::invalid_argument(name +
+                                " must be a writeable C-contiguous float64 array to be "
+                                "updated in place");
+  }
+  py::array array(object);
+  if (array.ndim() != 2 || array.shape(1) != columns) {
+    throw std::invalid_argument(name + " must be an (N, " + std::to_string(columns) +
+                                ") array, got " + shapeString(array));
+  }
+  return py::array_t<double>::ensure(array);
+}
+
+void checkRows(const py::array &states, const py::array &inputs) {
+  if (inputs.ndim() != 2 || inputs.shape(1) != INPUT_SIZE) {
+    throw std::invalid_argument("input must be an (N, 3) array, got " + shapeString(inputs));
+  }
+  if (inputs.shape(0) != states.shape(0)) {
+    throw std::invalid_argument("input has " + std::to_string(inputs.shape(0)) +
+                                " rows but state has " + std::to_string(states.shape(0)));
+  }
+}
+
+// Steps every vehicle in place, clipping the inputs as updateState does
+void updateStates(VehicleModel &model, py::object states_in, py::object inputs_in,
+                  const double dt) {
+  auto states = inPlaceArray(states_in, STATE_SIZE, "state");
+  auto inputs = inPlaceArray(inputs_in, INPUT_SIZE, "input");
+  checkRows(states, inputs);
+
+  double *state_data = states.mutable_data();
+  double *input_data = inputs.mutable_data();
+  const py::ssize_t n = states.shape(0);
+
+  py::gil_scoped_release release;
+  for (py::ssize_t i = 0; i < n; i++) {
+    State state = toState(state_data + i * STATE_SIZE);
+    Input input = toInput(input_data + i * INPUT_SIZE);
+    model.updateState(state, input, dt);
+    fromState(state, state_data + i * STATE_SIZE);
+    fromInput(input, input_data + i * INPUT_SIZE);
+  }
+}
+
+// Runs the whole rollout in C++ without the GIL. `inputs` is either an
+// (N, 3) array held for `steps` steps or a (T, N, 3) sequence of inputs.
+py::array_t<double> rollout(VehicleModel &model, DoubleArray states, DoubleArray inputs,
+                            const double dt, py::ssize_t steps) {
+  if (states.ndim() != 2 || states.shape(1) != STATE_SIZE) {
+    throw std::invalid_argument("state must be an (N, 13) array, got " + shapeString(states));
+  }
+  const py::ssize_t n = states.shape(0);
+
+  bool sequence = inputs.ndim() == 3;
+  if (sequence) {
+    if (inputs.shape(1) != n || inputs.shape(2) != INPUT_SIZE) {
+      throw std::invalid_argument("inputs must be a (T, " + std::to_string(n) +
+                                  ", 3) array, got " + shapeString(inputs));
+    }
+    if (steps >= 0 && steps != inputs.shape(0)) {
+      throw std::invalid_argument("steps does not match the length of the input sequence");
+    }
+    steps = inputs.shape(0);
+  } else {
+    checkRows(states, inputs);
+    if (steps < 0) {
+      throw std::invalid_argument("steps must be given when the inputs are held constant");
+    }
+  }
+
+  py::array_t<double> trajectory({steps + 1, n, STATE_SIZE});
+  double *out = trajectory.mutable_data();
+  const double *state_data = states.data();
+  const double *input_data = inputs.data();
+
+  {
+    py::gil_scoped_release release;
+    std::copy(state_data, state_data + n * STATE_SIZE, out);
+    for (py::ssize_t i = 0; i < n; i++) {
+      State state = toState(state_data + i * STATE_SIZE);
+      for (py::ssize_t step = 0; step < steps; step++) {
+        const py::ssize_t row = sequence ? step * n + i : i;
+        Input input = toInput(input_data + row * INPUT_SIZE);
+        model.updateState(state, input, dt);
+        fromState(state, out + ((step + 1) * n + i) * STATE_SIZE);
+      }
+    }
+  }
+  return trajectory;
+}
+
+// Vehicle of every row of an (N, columns) array, all vehicle 0 if `vehicles` is None
+const int64_t *vehicleIds(const py::object &vehicles_in, IdArray &vehicles, py::ssize_t n) {
+  if (vehicles_in.is_none()) {
+    return nullptr;
+  }
+  vehicles = IdArray::ensure(vehicles_in);
+  if (!vehicles || vehicles.ndim() != 1 || vehicles.shape(0) != n) {
+    throw std::invalid_argument("vehicles must be an (N,) integer array with a vehicle per row");
+  }
+  const int64_t *ids = vehicles.data();
+  if (std::any_of(ids, ids + n, [](int64_t id) { return id < 0; })) {
+    throw std::invalid_argument("vehicle ids must not be negative");
+  }
+  return ids;
+}
+
+// Noise is applied to a copy, as with Noise::applyNoise
+py::array_t<double> applyNoiseToRows(Noise &noise, DoubleArray rows, py::object vehicles_in,
+                                     py::ssize_t columns, const std::string &name) {
+  if (rows.ndim() != 2 || rows.shape(1) != columns) {
+    throw std::invalid_argument(name + " must be an (N, " + std::to_string(columns) +
+                                ") array, got " + shapeString(rows));
+  }
+  const py::ssize_t n = rows.shape(0);
+  IdArray vehicles;
+  const int64_t *ids = vehicleIds(vehicles_in, vehicles, n);
+
+  py::array_t<double> noisy({n, columns});
+  double *out = noisy.mutable_data();
+  std::copy(rows.data(), rows.data() + n * columns, out);
+  {
+    py::gil_scoped_release release;
+    if (columns == STATE_SIZE) {
+      noise.applyNoise(out, n, ids);
+    } else {
+      noise.applyNoiseToWheelSpeeds(out, n, ids);
+    }
+  }
+  return noisy;
+}
+
+template <typename Model>
+py::class_<Model, VehicleModel> bindModel(py::module &m, const char *name) {
+  return py::class_<Model, VehicleModel>(m, name)
+      .def(py::init<const std::string &>(), py::arg("yaml_file"));
+}
+
+}  // namespace
+
+PYBIND11_MODULE(_eufs_models, m) {
+  m.doc() = "Python bindings for the eufs_models vehicle model library";
+
+  py::class_<State>(m, "State")
+      .def(py::init<>())
+      .def_readwrite("x", &State::x)
+      .def_readwrite("y", &State::y)
+      .def_readwrite("z", &State::z)
+      .def_readwrite("yaw", &State::yaw)
+      .def_readwrite("v_x", &State::v_x)
+      .def_readwrite("v_y", &State::v_y)
+      .def_readwrite("v_z", &State::v_z)
+      .def_readwrite("r_x", &State::r_x)
+      .def_readwrite("r_y", &State::r_y)
+      .def_readwrite("r_z", &State::r_z)
+      .def_readwrite("a_x", &State::a_x)
+      .def_readwrite("a_y", &State::a_y)
+      .def_readwrite("a_z", &State::a_z)
+      .def("to_array",
+           [](const State &state) {
+             py::array_t<double> row(STATE_SIZE);
+             fromState(state, row.mutable_data());
+             return row;
+           })
+      .def_static("from_array",
+                  [](DoubleArray row) {
+                    if (row.size() != STATE_SIZE) {
+                      throw std::invalid_argument("a state has 13 values");
+                    }
+                    return toState(row.data());
+                  })
+      .def("__repr__", &State::getString);
+
+  py::class_<Input>(m, "Input")
+      .def(py::init<>())
+      .def(py::init([](double acc, double vel, double delta) {
+             Input input;
+             input.acc = acc;
+             input.vel = vel;
+             input.delta = delta;
+             return input;
+           }),
+           py::arg("acc") = 0.0, py::arg("vel") = 0.0, py::arg("delta") = 0.0)
+      .def_readwrite("acc", &Input::acc)
+      .def_readwrite("vel", &Input::vel)
+      .def_readwrite("delta", &Input::delta)
+      .def("to_array",
+           [](const Input &input) {
+             py::array_t<double> row(INPUT_SIZE);
+             fromInput(input, row.mutable_data());
+             return row;
+           })
+      .def_static("from_array",
+                  [](DoubleArray row) {
+                    if (row.size() != INPUT_SIZE) {
+                      throw std::invalid_argument("an input has 3 values");
+                    }
+                    return toInput(row.data());
+                  })
+      .def("__repr__", &Input::getString);
+
+  py::class_<Param> param(m, "Param");
+  py::class_<Param::Inertia>(param, "Inertia")
+      .def_readonly("m", &Param::Inertia::m)
+      .def_readonly("g", &Param::Inertia::g)
+      .def_readonly("I_z", &Param::Inertia::I_z);
+  py::class_<Param::Kinematic>(param, "Kinematic")
+      .def_readonly("l", &Param::Kinematic::l)
+      .def_readonly("b_F", &Param::Kinematic::b_F)
+      .def_readonly("b_R", &Param::Kinematic::b_R)
+      .def_readonly("w_front", &Param::Kinematic::w_front)
+      .def_readonly("l_F", &Param::Kinematic::l_F)
+      .def_readonly("l_R", &Param::Kinematic::l_R)
+      .def_readonly("axle_width", &Param::Kinematic::axle_width);
+  py::class_<Param::Tire>(param, "Tire")
+      .def_readonly("tire_coefficient", &Param::Tire::tire_coefficient)
+      .def_readonly("B", &Param::Tire::B)
+      .def_readonly("C", &Param::Tire::C)
+      .def_readonly("D", &Param::Tire::D)
+      .def_readonly("E", &Param::Tire::E)
+      .def_readonly("radius", &Param::Tire::radius);
+  py::class_<Param::Aero>(param, "Aero")
+      .def_readonly("c_down", &Param::Aero::c_down)
+      .def_readonly("c_drag", &Param::Aero::c_drag);
+  py::class_<Param::InputRanges> input_ranges(param, "InputRanges");
+  py::class_<Param::InputRanges::Range>(input_ranges, "Range")
+      .def_readonly("min", &Param::InputRanges::Range::min)
+      .def_readonly("max", &Param::InputRanges::Range::max);
+  input_ranges.def_readonly("acc", &Param::InputRanges::acc)
+      .def_readonly("vel", &Param::InputRanges::vel)
+      .def_readonly("delta", &Param::InputRanges::delta);
+  py::class_<Param::Integrator> integrator(param, "Integrator");
+  py::enum_<Param::Integrator::Method>(integrator, "Method")
+      .value("EULER", Param::Integrator::EULER)
+      .value("RK2", Param::Integrator::RK2)
+      .value("RK4", Param::Integrator::RK4)
+      .value("ADAPTIVE", Param::Integrator::ADAPTIVE);
+  integrator.def_readwrite("method", &Param::Integrator::method)
+      .def_readwrite("max_step", &Param::Integrator::max_step)
+      .def_readwrite("tolerance", &Param::Integrator::tolerance)
+      .def_readwrite("min_step", &Param::Integrator::min_step);
+  py::class_<Param::TireTable> tire_table(param, "TireTable");
+  py::enum_<Param::TireTable::Interpolation>(tire_table, "Interpolation")
+      .value("LINEAR", Param::TireTable::LINEAR)
+      .value("CUBIC", Param::TireTable::CUBIC);
+  tire_table.def_readonly("enabled", &Param::TireTable::enabled)
+      .def_readonly("interpolation", &Param::TireTable::interpolation)
+      .def_readonly("resolution", &Param::TireTable::resolution)
+      .def_readonly("max_error", &Param::TireTable::max_error);
+  param.def_readonly("inertia", &Param::inertia)
+      .def_readonly("kinematic", &Param::kinematic)
+      .def_readonly("tire", &Param::tire)
+      .def_readonly("aero", &Param::aero)
+      .def_readonly("input_ranges", &Param::input_ranges)
+      .def_readonly("integrator", &Param::integrator)
+      .def_readonly("tire_table", &Param::tire_table);
+
+  py::class_<VehicleModel>(m, "VehicleModel")
+      .def("get_param", &VehicleModel::getParam, py::return_value_policy::reference_internal)
+      .def("update_state", &VehicleModel::updateState, py::arg("state"), py::arg("input"),
+           py::arg("dt"), "Updates the State and clips the Input in place.")
+      .def("update_state", &updateStates, py::arg("state"), py::arg("input"), py::arg("dt"),
+           "Updates an (N, 13) state array and clips an (N, 3) input array in place.")
+      .def("validate_state", &VehicleModel::validateState, py::arg("state"))
+      .def("validate_input", &VehicleModel::validateInput, py::arg("input"))
+      .def("get_slip_angle", &VehicleModel::getSlipAngle, py::arg("state"), py::arg("input"),
+           py::arg("is_front"))
+      .def(
+          "get_wheel_speeds",
+          [](VehicleModel &model, const State &state, const Input &input) {
+            return fromWheelSpeeds(model.getWheelSpeeds(state, input));
+          },
+          py::arg("state"), py::arg("input"),
+          "Wheel speeds as [steering, lf_speed, rf_speed, lb_speed, rb_speed].")
+      .def("rollout", &rollout, py::arg("state"), py::arg("inputs"), py::arg("dt"),
+           py::arg("steps") = -1,
+           "Returns the (T + 1, N, 13) trajectory of an (N, 13) state array, for an (N, 3) "
+           "input array held for `steps` steps or a (T, N, 3) input sequence.");
+
+  py::class_<TireTable>(m, "TireTable")
+      .def("get_mu", &TireTable::getMu, py::arg("slip_angle"))
+      .def("__len__", &TireTable::size)
+      .def_property_readonly("step", &TireTable::getStep)
+      .def_property_readonly("max_error", &TireTable::getMaxError);
+
+  bindModel<DynamicBicycle>(m, "DynamicBicycle")
+      .def(
+          "get_tire_table",
+          [](DynamicBicycle &model) -> py::object {
+            if (model.getTireTable().empty()) {
+              return py::none();
+            }
+            return py::cast(model.getTireTable(), py::return_value_policy::reference);
+          },
+          py::keep_alive<0, 1>());
+  bindModel<PointMass>(m, "PointMass");
+
+  py::class_<Noise>(m, "Noise")
+      .def(py::init<const std::string &, unsigned>(), py::arg("yaml_file"), py::arg("seed") = 0)
+      .def("apply_noise", py::overload_cast<const State &>(&Noise::applyNoise), py::arg("state"))
+      .def(
+          "apply_noise",
+          [](Noise &noise, DoubleArray states, py::object vehicles) {
+            return applyNoiseToRows(noise, states, vehicles, STATE_SIZE, "state");
+          },
+          py::arg("state"), py::arg("vehicles") = py::none(),
+          "Returns a noisy copy of an (N, 13) state array. Row i is a state of vehicle "
+          "vehicles[i] (all vehicle 0 if None), every vehicle has its own seeded stream.")
+      .def(
+          "apply_noise_to_wheel_speeds",
+          [](Noise &noise, const std::array<double, WHEEL_SPEEDS_SIZE> &wheel_speeds) {
+            eufs_msgs::msg::WheelSpeeds msg;
+            msg.steering = wheel_speeds[0];
+            msg.lf_speed = wheel_speeds[1];
+            msg.rf_speed = wheel_speeds[2];
+            msg.lb_speed = wheel_speeds[3];
+            msg.rb_speed = wheel_speeds[4];
+            return fromWheelSpeeds(noise.applyNoiseToWheelSpeeds(msg));
+          },
+          py::arg("wheel_speeds"),
+          "Takes and returns [steering, lf_speed, rf_speed, lb_speed, rb_speed].")
+      .def(
+          "apply_noise_to_wheel_speeds",
+          [](Noise &noise, DoubleArray wheel_speeds, py::object vehicles) {
+            return applyNoiseToRows(noise, wheel_speeds, vehicles, WHEEL_SPEEDS_SIZE,
+                                    "wheel_speeds");
+          },
+          py::arg("wheel_speeds"), py::arg("vehicles") = py::none(),
+          "Returns a noisy copy of an (N, 5) wheel speeds array, with streams per vehicle as "
+          "apply_noise.")
+      .def("set_seed", &Noise::setSeed, py::arg("seed"),
+           "Restarts the streams of the array methods from `seed`.")
+      .def("get_seed", &Noise::getSeed)
+      .def("get_string", &Noise::getString);
+}
+
+}  // namespace models
+}  // namespace eufs
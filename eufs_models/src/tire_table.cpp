@@ -0,0 +1,59 @@
+#include "eufs_models/tire_table.hpp"
+
+#include <algorithm>
+
+namespace eufs {
+namespace models {
+
+namespace {
+// Refining the resolution for max_error stops at this many entries
+const size_t MAX_TABLE_SIZE = 1 << 20;
+}  // namespace
+
+TireTable::TireTable(const Param::Tire &tire, const Param::TireTable &param,
+                     const double max_slip_angle)
+    : _tire(tire), _interpolation(param.interpolation), _max_slip_angle(max_slip_angle) {
+  double step = param.resolution;
+  _build(step);
+  _max_error = _measureError();
+  while (param.max_error > 0.0 && _max_error > param.max_error &&
+         2 * _values.size() <= MAX_TABLE_SIZE) {
+    step /= 2;
+    _build(step);
+    _max_error = _measureError();
+  }
+}
+
+void TireTable::_build(const double step) {
+  const int intervals = std::max(1, static_cast<int>(std::ceil(2 * _max_slip_angle / step)));
+  _step = 2 * _max_slip_angle / intervals;
+  _last = intervals;
+
+  _values.resize(intervals + 1);
+  _slopes.clear();
+  for (int i = 0; i <= intervals; i++) {
+    _values[i] = evaluate(_tire, i * _step - _max_slip_angle);
+  }
+  if (_interpolation == Param::TireTable::CUBIC) {
+    _slopes.resize(intervals + 1);
+    for (int i = 0; i <= intervals; i++) {
+      _slopes[i] = derivative(_tire, i * _step - _max_slip_angle) * _step;
+    }
+  }
+}
+
+double TireTable::_measureError() const {
+  // The error of both interpolations peaks within each interval, so it is
+  // sampled at the quarter points of every interval
+  double max_error = 0.0;
+  for (size_t i = 0; i + 1 < _values.size(); i++) {
+    for (const double t : {0.25, 0.5, 0.75}) {
+      const double slip_angle = (i + t) * _step - _max_slip_angle;
+      max_error = std::fmax(max_error, std::fabs(getMu(slip_angle) - evaluate(_tire, slip_angle)));
+    }
+  }
+  return max_error;
+}
+
+}  // namespace models
+}  // namespace eufs
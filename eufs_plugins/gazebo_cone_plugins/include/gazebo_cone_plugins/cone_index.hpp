@@ -0,0 +1,161 @@
+#ifndef EUFS_PLUGINS_GAZEBO_CONE_PLUGINS_INCLUDE_GAZEBO_CONE_PLUGINS_CONE_INDEX_HPP_
+#define EUFS_PLUGINS_GAZEBO_CONE_PLUGINS_INCLUDE_GAZEBO_CONE_PLUGINS_CONE_INDEX_HPP_
+
+#include <algorithm>
+#include <cmath>
+#include <vector>
+
+#include <gazebo/physics/Link.hh>
+#include <gazebo/physics/Model.hh>
+
+
+namespace gazebo_plugins {
+namespace eufs_plugins {
+namespace cone_helpers {
+
+// Uniform grid over the cones (links) of the track model.
+//
+// Lets the cone plugins look only at the cones around the car instead of every cone in the world.
+// Cones can be knocked over, so the grid holds their positions as of the last `build` or `update`
+// and callers pad their queries by how far a cone may have moved since. The grid covers the track
+// as it was built, cones that end up outside of it are kept in the cells along its edge.
+class ConeIndex {
+ public:
+  // Upper bound on the number of cells along each axis, the cells are made larger if the track
+  // is spread over a larger area
+  static constexpr int MAX_CELLS_PER_AXIS = 1024;
+
+  explicit ConeIndex(double cell_size = 5.0) : _cell_size(cell_size) {}
+
+  void setCellSize(double cell_size) { _cell_size = cell_size; }
+
+  // Indexes every link of the track model at its current position
+  void build(gazebo::physics::ModelPtr track_model) {
+    _links.clear();
+    if (track_model != nullptr) {
+      _links = track_model->GetLinks();
+    }
+    _readPositions();
+    _sizeGrid();
+    _fillGrid();
+  }
+
+  // Re-reads the positions of the indexed links and puts them in their new cells
+  void update() {
+    _readPositions();
+    _fillGrid();
+  }
+
+  // Puts the links indexed within `min_range` to `max_range` of (x, y) into `candidates`
+  void query(double x, double y, double min_range, double max_range,
+             gazebo::physics::Link_V &candidates) const {
+    candidates.clear();
+    if (_links.empty() || max_range < 0) {
+      return;
+    }
+
+    const int x_begin = _cellIndex(x - max_range, _min_x, _num_x);
+    const int x_end = _cellIndex(x + max_range, _min_x, _num_x);
+    const int y_begin = _cellIndex(y - max_range, _min_y, _num_y);
+    const int y_end = _cellIndex(y + max_range, _min_y, _num_y);
+
+    const double min_sq = min_range > 0 ? min_range * min_range : 0.0;
+    const double max_sq = max_range * max_range;
+    for (int cell_y = y_begin; cell_y <= y_end; cell_y++) {
+      for (int cell_x = x_begin; cell_x <= x_end; cell_x++) {
+        const int cell = cell_y * _num_x + cell_x;
+        for (size_t j = _cell_start[cell]; j < _cell_start[cell + 1]; j++) {
+          const size_t i = _cell_items[j];
+          const double dx = _x[i] - x;
+          const double dy = _y[i] - y;
+          const double dist_sq = dx * dx + dy * dy;
+          if (min_sq <= dist_sq && dist_sq <= max_sq) {
+            candidates.push_back(_links[i]);
+          }
+        }
+      }
+    }
+  }
+
+  size_t size() const { return _links.size(); }
+
+  const gazebo::physics::Link_V &links() const { return _links; }
+
+ private:
+  void _readPositions() {
+    _x.resize(_links.size());
+    _y.resize(_links.size());
+    for (size_t i = 0; i < _links.size(); i++) {
+      const ignition::math::Vector3d pos = _links[i]->WorldPose().Pos();
+      _x[i] = pos.X();
+      _y[i] = pos.Y();
+    }
+  }
+
+  void _sizeGrid() {
+    if (_links.empty()) {
+      _num_x = _num_y = 0;
+      return;
+    }
+    _min_x = *std::min_element(_x.begin(), _x.end());
+    _min_y = *std::min_element(_y.begin(), _y.end());
+    const double width = *std::max_element(_x.begin(), _x.end()) - _min_x;
+    const double height = *std::max_element(_y.begin(), _y.end()) - _min_y;
+    _cell = std::max(_cell_size, std::max(width, height) / MAX_CELLS_PER_AXIS);
+    _num_x = static_cast<int>(width / _cell) + 1;
+    _num_y = static_cast<int>(height / _cell) + 1;
+  }
+
+  void _fillGrid() {
+    _cell_start.clear();
+    _cell_items.clear();
+    if (_links.empty()) {
+      return;
+    }
+
+    // Cells are stored contiguously: the cones of cell c are
+    // _cell_items[_cell_start[c]] to _cell_items[_cell_start[c + 1] - 1]
+    std::vector<int> cell_of(_links.size());
+    _cell_start.assign(static_cast<size_t>(_num_x) * _num_y + 1, 0);
+    for (size_t i = 0; i < _links.size(); i++) {
+      cell_of[i] = _cellIndex(_y[i], _min_y, _num_y) * _num_x +
+                   _cellIndex(_x[i], _min_x, _num_x);
+      _cell_start[cell_of[i] + 1]++;
+    }
+    for (size_t c = 1; c < _cell_start.size(); c++) {
+      _cell_start[c] += _cell_start[c - 1];
+    }
+    std::vector<size_t> next(_cell_start.begin(), _cell_start.end() - 1);
+    _cell_items.resize(_links.size());
+    for (size_t i = 0; i < _links.size(); i++) {
+      _cell_items[next[cell_of[i]]++] = i;
+    }
+  }
+
+  // Cell along one axis containing `value`, clamped to the grid
+  int _cellIndex(double value, double min, int num_cells) const {
+    const double cell = std::floor((value - min) / _cell);
+    return static_cast<int>(std::clamp(cell, 0.0, static_cast<double>(num_cells - 1)));
+  }
+
+  double _cell_size;
+
+  gazebo::physics::Link_V _links;
+  std::vector<double> _x;
+  std::vector<double> _y;
+
+  // Grid
+  double _cell = 0;
+  double _min_x = 0;
+  double _min_y = 0;
+  int _num_x = 0;
+  int _num_y = 0;
+  std::vector<size_t> _cell_start;
+  std::vector<size_t> _cell_items;
+};
+
+}  // namespace cone_helpers
+}  // namespace eufs_plugins
+}  // namespace gazebo_plugins
+
+#endif  // EUFS_PLUGINS_GAZEBO_CONE_PLUGINS_INCLUDE_GAZEBO_CONE_PLUGINS_CONE_INDEX_HPP_
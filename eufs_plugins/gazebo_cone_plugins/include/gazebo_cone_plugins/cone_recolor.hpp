@@ -0,0 +1,142 @@
+#ifndef EUFS_PLUGINS_GAZEBO_CONE_PLUGINS_INCLUDE_GAZEBO_CONE_PLUGINS_CONE_RECOLOR_HPP_
+#define EUFS_PLUGINS_GAZEBO_CONE_PLUGINS_INCLUDE_GAZEBO_CONE_PLUGINS_CONE_RECOLOR_HPP_
+
+#include <array>
+#include <cstdlib>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "rclcpp/rclcpp.hpp"
+#include "yaml-cpp/yaml.h"
+
+#include <eufs_msgs/msg/cone_with_covariance.hpp>
+#include <eufs_msgs/msg/cone_array_with_covariance.hpp>
+
+
+namespace gazebo_plugins {
+namespace eufs_plugins {
+namespace cone_helpers {
+
+// Randomly changes the colours of cones with the probabilities of a recolor config
+// (see config/cone_recolor.yaml).
+//
+// The config is read once in `load`. `recolor` picks the new colour of every cone, then moves the
+// cones between the arrays of the message, reusing the storage of the arrays between calls.
+class ConeRecolor {
+ public:
+  // Colours in the order their cones are recoloured in
+  enum Color { big_orange, blue, orange, unknown_color, yellow, NUM_COLORS };
+
+  // New colour of cones which are not detected (or have an invalid colour in the config)
+  static constexpr int UNDETECTED = -1;
+
+  static const char *colorName(int color) {
+    static const std::array<const char *, NUM_COLORS> names = {
+        "big_orange", "blue", "orange", "unknown_color", "yellow"};
+    return color >= 0 && color < NUM_COLORS ? names[color] : "undetected";
+  }
+
+  static int toColor(const std::string &name) {
+    for (int color = 0; color < NUM_COLORS; color++) {
+      if (name == colorName(color)) {
+        return color;
+      }
+    }
+    return UNDETECTED;
+  }
+
+  static std::vector<eufs_msgs::msg::ConeWithCovariance> &coneArray(
+      eufs_msgs::msg::ConeArrayWithCovariance &cones, int color) {
+    switch (color) {
+      case big_orange:
+        return cones.big_orange_cones;
+      case blue:
+        return cones.blue_cones;
+      case orange:
+        return cones.orange_cones;
+      case yellow:
+        return cones.yellow_cones;
+      default:
+        return cones.unknown_color_cones;
+    }
+  }
+
+  void load(const YAML::Node &config, rclcpp::Logger logger) {
+    for (int color = 0; color < NUM_COLORS; color++) {
+      _choices[color].clear();
+
+      float sum = 0.0;
+      const YAML::Node weights = config[colorName(color)];
+      for (YAML::const_iterator it = weights.begin(); it != weights.end(); it++) {
+        sum += it->second.as<float>();
+        _choices[color].push_back({toColor(it->first.as<std::string>()), sum});
+      }
+      if (sum != 1.0f) {
+        RCLCPP_WARN(logger, "Cone mis-coloring config invalid, total probability for %s is %f",
+                    colorName(color), sum);
+      }
+    }
+  }
+
+  void recolor(eufs_msgs::msg::ConeArrayWithCovariance &cones, unsigned int &seed,
+               rclcpp::Logger logger) {
+    // Pick the new colours
+    bool recolored = false;
+    for (int color = 0; color < NUM_COLORS; color++) {
+      const size_t num_cones = coneArray(cones, color).size();
+      _new_colors[color].resize(num_cones);
+      for (size_t i = 0; i < num_cones; i++) {
+        _new_colors[color][i] = _pickColor(color, seed, logger);
+        recolored |= _new_colors[color][i] != color;
+      }
+    }
+    if (!recolored) {
+      return;
+    }
+
+    // Move the cones to their new arrays, in the order of their old colours
+    for (int color = 0; color < NUM_COLORS; color++) {
+      coneArray(cones, color).swap(coneArray(_old_cones, color));
+      coneArray(cones, color).clear();
+    }
+    for (int color = 0; color < NUM_COLORS; color++) {
+      std::vector<eufs_msgs::msg::ConeWithCovariance> &old_cones = coneArray(_old_cones, color);
+      for (size_t i = 0; i < old_cones.size(); i++) {
+        if (_new_colors[color][i] != UNDETECTED) {
+          coneArray(cones, _new_colors[color][i]).push_back(std::move(old_cones[i]));
+        }
+      }
+    }
+  }
+
+ private:
+  struct Choice {
+    int color;
+    float cumulative_probability;
+  };
+
+  int _pickColor(int color, unsigned int &seed, rclcpp::Logger logger) const {
+    double rand = static_cast<double>(rand_r(&seed)) / static_cast<double>(RAND_MAX);
+    for (const Choice &choice : _choices[color]) {
+      if (rand <= choice.cumulative_probability) {
+        return choice.color;
+      }
+    }
+    RCLCPP_WARN_ONCE(logger, "Cone mis-coloring config invalid, no colour picked for %s cone",
+                     colorName(color));
+    return UNDETECTED;
+  }
+
+  std::array<std::vector<Choice>, NUM_COLORS> _choices;
+
+  // Reused by every call to `recolor`
+  std::array<std::vector<int>, NUM_COLORS> _new_colors;
+  eufs_msgs::msg::ConeArrayWithCovariance _old_cones;
+};
+
+}  // namespace cone_helpers
+}  // namespace eufs_plugins
+}  // namespace gazebo_plugins
+
+#endif  // EUFS_PLUGINS_GAZEBO_CONE_PLUGINS_INCLUDE_GAZEBO_CONE_PLUGINS_CONE_RECOLOR_HPP_
@@ -57,6 +57,9 @@
 #include "rclcpp/rclcpp.hpp"
 #include "yaml-cpp/yaml.h"
 
+#include "gazebo_cone_plugins/cone_index.hpp"
+#include "gazebo_cone_plugins/cone_recolor.hpp"
+
 namespace gazebo_plugins {
 namespace eufs_plugins {
 class GazeboCameraCones : public gazebo::ModelPlugin {
@@ -70,23 +73,15 @@ class GazeboCameraCones : public gazebo::ModelPlugin {
 
   void UpdateChild();
 
-  eufs_msgs::msg::ConeArrayWithCovariance processCones(
-      eufs_msgs::msg::ConeArrayWithCovariance cones_to_process);
-
-  std::vector<eufs_msgs::msg::ConeWithCovariance>
-  fovCones(std::vector<eufs_msgs::msg::ConeWithCovariance> conesToCheck);
+  // Removes the cones out of view of the camera (in place)
+  void processCones(eufs_msgs::msg::ConeArrayWithCovariance &cones);
+  void fovCones(std::vector<eufs_msgs::msg::ConeWithCovariance> &cones);
 
-  // Add noise to the cone arrays
-  eufs_msgs::msg::ConeArrayWithCovariance addConeNoise(
-      eufs_msgs::msg::ConeArrayWithCovariance &cones_message);
+  // Add noise to the cone arrays (in place)
+  void addConeNoise(eufs_msgs::msg::ConeArrayWithCovariance &cones_message);
   void addNoiseToConeArray(std::vector<eufs_msgs::msg::ConeWithCovariance> &cone_array);
   double GaussianKernel(double mu, double sigma);
 
-  // Returns random cone colour with probability `weights`
-  std::string pickColorWithProbability(const YAML::Node weights);
-  std::map<std::string, std::vector<eufs_msgs::msg::ConeWithCovariance>> swapConeColors(
-    std::map<std::string, std::vector<eufs_msgs::msg::ConeWithCovariance>> color_map);
-
   // Helper function for parameters
   bool getBoolParameter(sdf::ElementPtr _sdf, const char *element, bool default_value,
                         const char *default_description);
@@ -100,8 +95,8 @@ class GazeboCameraCones : public gazebo::ModelPlugin {
 
 
   // Helper functions for determining whether a cone is in range
-  bool inRangeOfCamera(eufs_msgs::msg::ConeWithCovariance cone);
-  bool inFOVOfCamera(eufs_msgs::msg::ConeWithCovariance cone);
+  bool inRangeOfCamera(const eufs_msgs::msg::ConeWithCovariance &cone);
+  bool inFOVOfCamera(const eufs_msgs::msg::ConeWithCovariance &cone);
 
   // Publishers
   rclcpp::Publisher<eufs_msgs::msg::ConeArrayWithCovariance>::SharedPtr camera_cones_pub_;
@@ -113,6 +108,12 @@ class GazeboCameraCones : public gazebo::ModelPlugin {
   ignition::math::Pose3d car_pos;
   ignition::math::Pose3d camera_pos;
 
+  // Spatial index of the cones, so only cones near the car are checked against the camera
+  cone_helpers::ConeIndex cone_index;
+  gazebo::physics::Link_V cone_candidates;
+  gazebo::common::Time cone_index_last_updated;
+  double cone_index_update_period;
+  double cone_index_margin;
 
   // Parameters
 
@@ -122,6 +123,10 @@ class GazeboCameraCones : public gazebo::ModelPlugin {
   double camera_a;
   double camera_b;
   YAML::Node recolor_config;
+  cone_helpers::ConeRecolor cone_recolor;
+
+  // Reused by every update, so the cone arrays keep their storage
+  eufs_msgs::msg::ConeArrayWithCovariance camera_cones_msg;
 
   double update_rate_;
   gazebo::common::Time time_last_published;
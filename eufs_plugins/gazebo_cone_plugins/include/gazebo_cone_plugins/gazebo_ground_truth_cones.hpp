@@ -59,6 +59,9 @@
 #include "rclcpp/rclcpp.hpp"
 #include "yaml-cpp/yaml.h"
 
+#include "gazebo_cone_plugins/cone_index.hpp"
+#include "gazebo_cone_plugins/cone_recolor.hpp"
+
 // ROS  srvs
 #include <std_srvs/srv/trigger.hpp>
 
@@ -77,34 +80,29 @@ class GazeboGroundTruthCones : public gazebo::ModelPlugin {
 
   // Getting the cone array message
   eufs_msgs::msg::ConeArrayWithCovariance getConeArraysMessage();
+  void getConeArraysMessage(const gazebo::physics::Link_V &links,
+                            eufs_msgs::msg::ConeArrayWithCovariance &cone_arrays_message);
 
   void addConeToConeArray(eufs_msgs::msg::ConeArrayWithCovariance &ground_truth_cone_array,
-                          gazebo::physics::LinkPtr link);
-
-  eufs_msgs::msg::ConeArrayWithCovariance processCones(
-      eufs_msgs::msg::ConeArrayWithCovariance cones_to_process);
+                          const gazebo::physics::LinkPtr &link);
 
-  std::pair<std::vector<eufs_msgs::msg::ConeWithCovariance>,
-            std::vector<eufs_msgs::msg::ConeWithCovariance>>
-  fovCones(std::vector<eufs_msgs::msg::ConeWithCovariance> conesToCheck);
+  // Translates the cones to the car frame and removes the cones out of view (in place)
+  void processCones(eufs_msgs::msg::ConeArrayWithCovariance &cones);
+  void fovCones(std::vector<eufs_msgs::msg::ConeWithCovariance> &cones,
+                std::vector<eufs_msgs::msg::ConeWithCovariance> &cones_without_color);
 
-  GazeboGroundTruthCones::ConeType getConeType(gazebo::physics::LinkPtr link);
+  GazeboGroundTruthCones::ConeType getConeType(const gazebo::physics::LinkPtr &link);
 
   // Storing initial Track
   eufs_msgs::msg::ConeArrayWithCovariance initial_track;
 
-  // Add noise to the cone arrays
-  eufs_msgs::msg::ConeArrayWithCovariance addNoisePerception(
-      eufs_msgs::msg::ConeArrayWithCovariance &cones_message, ignition::math::Vector3d noise);
+  // Add noise to the cone arrays (in place)
+  void addNoisePerception(eufs_msgs::msg::ConeArrayWithCovariance &cones_message,
+                          ignition::math::Vector3d noise);
   void addNoiseToConeArray(std::vector<eufs_msgs::msg::ConeWithCovariance> &cone_array,
                            ignition::math::Vector3d noise);
   double GaussianKernel(double mu, double sigma);
 
-  // Returns pointer to cone array at random given weights
-  std::string pickColorWithProbability(const YAML::Node weights);
-  std::map<std::string, std::vector<eufs_msgs::msg::ConeWithCovariance>> swapConeColors(
-    std::map<std::string, std::vector<eufs_msgs::msg::ConeWithCovariance>> color_map);
-
   // Helper function for parameters
   bool getBoolParameter(sdf::ElementPtr _sdf, const char *element, bool default_value,
                         const char *default_description);
@@ -120,17 +118,20 @@ class GazeboGroundTruthCones : public gazebo::ModelPlugin {
   eufs_msgs::msg::ConeArray stripCovariance(eufs_msgs::msg::ConeArrayWithCovariance msg);
 
   // Helper functions for determining whether a cone is in range
-  bool inRangeOfCamera(eufs_msgs::msg::ConeWithCovariance cone);
-  bool inFOVOfCamera(eufs_msgs::msg::ConeWithCovariance cone);
-  bool inRangeOfLidar(eufs_msgs::msg::ConeWithCovariance cone);
-  bool inFOVOfLidar(eufs_msgs::msg::ConeWithCovariance cone);
-
-  std::vector<eufs_msgs::msg::ConeWithCovariance> translateCones(
-      std::vector<eufs_msgs::msg::ConeWithCovariance> cones, ignition::math::Pose3d frame);
-  eufs_msgs::msg::ConeArrayWithCovariance translateMapFrame(
-      eufs_msgs::msg::ConeArrayWithCovariance cones);
-  eufs_msgs::msg::ConeArrayWithCovariance translateBaseFootprintFrame(
-      eufs_msgs::msg::ConeArrayWithCovariance cones);
+  bool inRangeOfCamera(const eufs_msgs::msg::ConeWithCovariance &cone);
+  bool inFOVOfCamera(const eufs_msgs::msg::ConeWithCovariance &cone);
+  bool inRangeOfLidar(const eufs_msgs::msg::ConeWithCovariance &cone);
+  bool inFOVOfLidar(const eufs_msgs::msg::ConeWithCovariance &cone);
+
+  // Distances from the car between which cones can be seen by the lidar or camera
+  double minViewDistance();
+  double maxViewDistance();
+
+  // Translate the cones in place
+  void translateCones(std::vector<eufs_msgs::msg::ConeWithCovariance> &cones,
+                      const ignition::math::Pose3d &frame);
+  void translateMapFrame(eufs_msgs::msg::ConeArrayWithCovariance &cones);
+  void translateBaseFootprintFrame(eufs_msgs::msg::ConeArrayWithCovariance &cones);
 
   // Publishers
   rclcpp::Publisher<eufs_msgs::msg::ConeArrayWithCovariance>::SharedPtr ground_truth_cone_pub_;
@@ -151,6 +152,12 @@ class GazeboGroundTruthCones : public gazebo::ModelPlugin {
   ignition::math::Pose3d initial_car_pos_;
   ignition::math::Pose3d car_pos;
 
+  // Spatial index of the cones, so only cones near the car are checked against the sensors
+  cone_helpers::ConeIndex cone_index;
+  gazebo::physics::Link_V cone_candidates;
+  gazebo::common::Time cone_index_last_updated;
+  double cone_index_update_period;
+  double cone_index_margin;
   // Parameters
 
   double lidar_total_view_distance;
@@ -167,6 +174,12 @@ class GazeboGroundTruthCones : public gazebo::ModelPlugin {
   bool lidar_on;
   bool pub_ground_truth;
   YAML::Node recolor_config;
+  cone_helpers::ConeRecolor cone_recolor;
+
+  // Reused by every update, so the cone arrays keep their storage
+  eufs_msgs::msg::ConeArrayWithCovariance track_message_;
+  eufs_msgs::msg::ConeArrayWithCovariance ground_truth_cones_message_;
+  eufs_msgs::msg::ConeArrayWithCovariance perception_cones_message_;
 
   double update_rate_;
   gazebo::common::Time time_last_published;
@@ -3,6 +3,7 @@
 
 #include <vector>
 #include <string>
+#include <utility>
 
 #include "rclcpp/rclcpp.hpp"
 #include "rclcpp/logger.hpp"
@@ -20,8 +21,8 @@ namespace internal {
 
 enum ConeType {blue, yellow, orange, big_orange};
 
-ConeType getConeType(gazebo::physics::LinkPtr link, rclcpp::Logger logger) {
-  std::string link_name = link->GetName();
+ConeType getConeType(const gazebo::physics::LinkPtr &link, rclcpp::Logger logger) {
+  const std::string &link_name = link->GetName();
 
   if (link_name.substr(0, 9) == "blue_cone") {
     return ConeType::blue;
@@ -40,11 +41,12 @@ ConeType getConeType(gazebo::physics::LinkPtr link, rclcpp::Logger logger) {
 }
 
 void addConeToConeArray(eufs_msgs::msg::ConeArrayWithCovariance &cone_array,
-                        gazebo::physics::LinkPtr link,
+                        const gazebo::physics::LinkPtr &link,
                         rclcpp::Logger logger) {
+  const ignition::math::Vector3d pos = link->WorldPose().Pos();
   geometry_msgs::msg::Point point;
-  point.x = link->WorldPose().Pos().X();
-  point.y = link->WorldPose().Pos().Y();
+  point.x = pos.X();
+  point.y = pos.Y();
   point.z = 0;
 
   ConeType cone_type = getConeType(link, logger);
@@ -69,25 +71,19 @@ void addConeToConeArray(eufs_msgs::msg::ConeArrayWithCovariance &cone_array,
   }
 }
 
-std::vector<eufs_msgs::msg::ConeWithCovariance> translateCones(
-    std::vector<eufs_msgs::msg::ConeWithCovariance> cones, ignition::math::Pose3d frame) {
-  std::vector<eufs_msgs::msg::ConeWithCovariance> translated_cones;
-  for (auto const &cone : cones) {
+// Translates the cones in place
+void translateCones(std::vector<eufs_msgs::msg::ConeWithCovariance> &cones,
+                    const ignition::math::Pose3d &frame) {
+  float yaw = frame.Rot().Yaw();
+  for (auto &cone : cones) {
     // Translate the position of the cone to be based on the car
     float x = cone.point.x - frame.Pos().X();
     float y = cone.point.y - frame.Pos().Y();
 
-    // If the cone is withing viewing distance of lidar
-    float yaw = frame.Rot().Yaw();
-
     // Rotate the points using the yaw of the car (x and y are the other way around)
-    eufs_msgs::msg::ConeWithCovariance translated_cone;
-    translated_cone.point.y = (cos(yaw) * y) - (sin(yaw) * x);
-    translated_cone.point.x = (sin(yaw) * y) + (cos(yaw) * x);
-
-    translated_cones.push_back(translated_cone);
+    cone.point.y = (cos(yaw) * y) - (sin(yaw) * x);
+    cone.point.x = (sin(yaw) * y) + (cos(yaw) * x);
   }
-  return translated_cones;
 }
 
 }  // namespace internal
@@ -97,31 +93,56 @@ namespace gazebo_plugins {
 namespace eufs_plugins {
 namespace cone_helpers {
 
+// Fills the message with the cones of `links`, reusing the storage of its cone arrays
+// IMPORTANT: This doesn't timestamp the ConeArray message, this is the responsibility of the plugin
+void getGroundTruthCones(const gazebo::physics::Link_V &links, rclcpp::Logger logger,
+                         eufs_msgs::msg::ConeArrayWithCovariance &cone_arrays_message) {
+  cone_arrays_message.header.frame_id = "gazebo";  // Gets cone coordinates in gazebo global FoV
+  cone_arrays_message.blue_cones.clear();
+  cone_arrays_message.yellow_cones.clear();
+  cone_arrays_message.orange_cones.clear();
+  cone_arrays_message.big_orange_cones.clear();
+  cone_arrays_message.unknown_color_cones.clear();
+
+  for (auto const &link : links) {
+    internal::addConeToConeArray(cone_arrays_message, link, logger);
+  }
+}
+
 // IMPORTANT: This doesn't timestamp the ConeArray message, this is the responsibility of the plugin
 eufs_msgs::msg::ConeArrayWithCovariance getGroundTruthCones(gazebo::physics::ModelPtr track_model,
                                                             rclcpp::Logger logger) {
   eufs_msgs::msg::ConeArrayWithCovariance cone_arrays_message;
-  cone_arrays_message.header.frame_id = "gazebo";  // Gets cone coordinates in gazebo global FoV
-
-  if (track_model != nullptr) {
-    gazebo::physics::Link_V links = track_model->GetLinks();
-    for (unsigned int i = 0; i < links.size(); i++) {
-      internal::addConeToConeArray(cone_arrays_message, links[i], logger);
-    }
+  if (track_model == nullptr) {
+    getGroundTruthCones(gazebo::physics::Link_V(), logger, cone_arrays_message);
+  } else {
+    getGroundTruthCones(track_model->GetLinks(), logger, cone_arrays_message);
   }
   return cone_arrays_message;
 }
 
-eufs_msgs::msg::ConeArrayWithCovariance translateToFrame(
-    eufs_msgs::msg::ConeArrayWithCovariance cones,
-    ignition::math::Pose3d frame_origin, std::string frame_id) {
+// Translates the cones in place
+void translateToFrame(eufs_msgs::msg::ConeArrayWithCovariance &cones,
+                      const ignition::math::Pose3d &frame_origin, const std::string &frame_id) {
   cones.header.frame_id = frame_id;
-  cones.blue_cones = internal::translateCones(cones.blue_cones, frame_origin);
-  cones.yellow_cones = internal::translateCones(cones.yellow_cones, frame_origin);
-  cones.orange_cones = internal::translateCones(cones.orange_cones, frame_origin);
-  cones.big_orange_cones = internal::translateCones(cones.big_orange_cones, frame_origin);
-  cones.unknown_color_cones = internal::translateCones(cones.unknown_color_cones, frame_origin);
-  return cones;
+  internal::translateCones(cones.blue_cones, frame_origin);
+  internal::translateCones(cones.yellow_cones, frame_origin);
+  internal::translateCones(cones.orange_cones, frame_origin);
+  internal::translateCones(cones.big_orange_cones, frame_origin);
+  internal::translateCones(cones.unknown_color_cones, frame_origin);
+}
+
+// Publishes the cones through a loaned message if the middleware supports loaning them
+void publishConeArray(
+    const rclcpp::Publisher<eufs_msgs::msg::ConeArrayWithCovariance>::SharedPtr &publisher,
+    const eufs_msgs::msg::ConeArrayWithCovariance &cones) {
+  if (publisher->can_loan_messages()) {
+    auto loaned_cones = publisher->borrow_loaned_message();
+    loaned_cones.get() = cones;
+    publisher->publish(std::move(loaned_cones));
+  } else {
+    publisher->publish(cones);
+  }
 }
 
 }  // namespace cone_helpers
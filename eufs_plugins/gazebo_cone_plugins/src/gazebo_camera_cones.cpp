@@ -70,6 +70,11 @@ void GazeboCameraCones::Load(gazebo::physics::ModelPtr _parent, sdf::ElementPtr
                          {0.0, 0.0, 0.0, 0.0, 0.0, 0.0},
                          "0.0, 0.0, 0.0, 0.0, 0.0, 0.0");
 
+  this->cone_index.setCellSize(getDoubleParameter(_sdf, "coneIndexCellSize", 5, "5"));
+  this->cone_index_update_period =
+      getDoubleParameter(_sdf, "coneIndexUpdatePeriod", 1, "1");
+  this->cone_index_margin = getDoubleParameter(_sdf, "coneIndexMargin", 2, "2");
+
   std::string random_cone_color_yaml = "";
   std::filesystem::path config_path;
   if (!_sdf->HasElement("recolorConfig")) {
@@ -85,6 +90,7 @@ void GazeboCameraCones::Load(gazebo::physics::ModelPtr _parent, sdf::ElementPtr
 
   try {
     recolor_config = YAML::LoadFile(config_path);
+    cone_recolor.load(recolor_config, this->rosnode_->get_logger());
   } catch (std::exception &e) {
     RCLCPP_FATAL(this->rosnode_->get_logger(), "Unable to load %s due to %s error.",
                  random_cone_color_yaml.c_str(), e.what());
@@ -109,6 +115,8 @@ void GazeboCameraCones::Load(gazebo::physics::ModelPtr _parent, sdf::ElementPtr
   this->track_model = _parent->GetWorld()->ModelByName("track");
   this->car_frame_id = "base_footprint";
   this->car_link = _parent->GetLink(this->car_frame_id);
+  this->cone_index.build(this->track_model);
+  this->cone_index_last_updated = _world->SimTime();
 
   this->update_connection_ = gazebo::event::Events::ConnectWorldUpdateBegin(
       std::bind(&GazeboCameraCones::UpdateChild, this));
@@ -126,121 +134,90 @@ void GazeboCameraCones::UpdateChild() {
   // Update the time (This is here so that the time to publish all the messages does not affect the
   // update rate)
   this->time_last_published = cur_time;
-  this->car_pos = this->car_link->WorldPose();
 
-  // Get the track message
-  eufs_msgs::msg::ConeArrayWithCovariance gazebo_cone_arrays_msg =
-      cone_helpers::getGroundTruthCones(track_model, this->rosnode_->get_logger());
-  eufs_msgs::msg::ConeArrayWithCovariance cone_arrays_msg =
-      cone_helpers::translateToFrame(gazebo_cone_arrays_msg,
-                                     this->car_pos,
-                                     this->car_frame_id);
-  cone_arrays_msg.header.stamp.sec = cur_time.sec;
-  cone_arrays_msg.header.stamp.nanosec = cur_time.nsec;
-  eufs_msgs::msg::ConeArrayWithCovariance ground_truth_cones_msg =
-      processCones(cone_arrays_msg);
-
-  // Publish the camera cones if it has subscribers
-  if (this->camera_cones_pub_->get_subscription_count() > 0) {
-    eufs_msgs::msg::ConeArrayWithCovariance camera_cones_msg =
-        addConeNoise(ground_truth_cones_msg);
-    this->camera_cones_pub_->publish(camera_cones_msg);
+  // Check if there is a reason to publish the data
+  if (this->camera_cones_pub_->get_subscription_count() == 0) {
+    return;
   }
-}
-
-eufs_msgs::msg::ConeArrayWithCovariance GazeboCameraCones::processCones(
-    eufs_msgs::msg::ConeArrayWithCovariance cones) {
-
-  std::vector<eufs_msgs::msg::ConeWithCovariance> new_blue;
-  std::vector<eufs_msgs::msg::ConeWithCovariance> new_yellow;
-  std::vector<eufs_msgs::msg::ConeWithCovariance> new_orange;
-  std::vector<eufs_msgs::msg::ConeWithCovariance> new_big_orange;
 
-  std::vector<eufs_msgs::msg::ConeWithCovariance> in_view;
-
-  // blue
-  in_view = GazeboCameraCones::fovCones(cones.blue_cones);
-  new_blue.resize(new_blue.size() + in_view.size());
-  copy(in_view.begin(), in_view.end(), new_blue.rbegin());
-
-  // yellow
-  in_view = GazeboCameraCones::fovCones(cones.yellow_cones);
-  new_yellow.resize(new_yellow.size() + in_view.size());
-  copy(in_view.begin(), in_view.end(), new_yellow.rbegin());
-
-  // orange
-  in_view = GazeboCameraCones::fovCones(cones.orange_cones);
-  new_orange.resize(new_orange.size() + in_view.size());
-  copy(in_view.begin(), in_view.end(), new_orange.rbegin());
+  this->car_pos = this->car_link->WorldPose();
 
-  // big_orange
-  in_view = GazeboCameraCones::fovCones(cones.big_orange_cones);
-  new_big_orange.resize(new_big_orange.size() + in_view.size());
-  copy(in_view.begin(), in_view.end(), new_big_orange.rbegin());
+  // Cones get knocked over, so the positions in the index are refreshed every so often
+  if ((cur_time - this->cone_index_last_updated).Double() >= this->cone_index_update_period) {
+    this->cone_index.update();
+    this->cone_index_last_updated = cur_time;
+  }
 
-  cones.blue_cones = new_blue;
-  cones.yellow_cones = new_yellow;
-  cones.orange_cones = new_orange;
-  cones.big_orange_cones = new_big_orange;
+  // Only the cones around the car can be in range of the camera, the margin allows for cones
+  // that have moved since the index was last updated
+  double camera_offset = std::hypot(this->camera_pos.Pos().X(), this->camera_pos.Pos().Y());
+  this->cone_index.query(
+      this->car_pos.Pos().X(), this->car_pos.Pos().Y(),
+      this->camera_min_view_distance - camera_offset - this->cone_index_margin,
+      this->camera_total_view_distance + camera_offset + this->cone_index_margin,
+      this->cone_candidates);
+
+  // Get the track message, the ground truth cones are only used for the camera cones so the noise
+  // is added to the same message
+  cone_helpers::getGroundTruthCones(this->cone_candidates, this->rosnode_->get_logger(),
+                                    this->camera_cones_msg);
+  cone_helpers::translateToFrame(this->camera_cones_msg, this->car_pos, this->car_frame_id);
+  processCones(this->camera_cones_msg);
+  addConeNoise(this->camera_cones_msg);
+
+  // Publish the camera cones
+  cone_helpers::publishConeArray(this->camera_cones_pub_, this->camera_cones_msg);
+}
 
-  return cones;
+void GazeboCameraCones::processCones(eufs_msgs::msg::ConeArrayWithCovariance &cones) {
+  GazeboCameraCones::fovCones(cones.blue_cones);
+  GazeboCameraCones::fovCones(cones.yellow_cones);
+  GazeboCameraCones::fovCones(cones.orange_cones);
+  GazeboCameraCones::fovCones(cones.big_orange_cones);
 }
 
-bool GazeboCameraCones::inRangeOfCamera(eufs_msgs::msg::ConeWithCovariance cone) {
-  auto dist = std::pow(cone.point.x - this->camera_pos.Pos()[0], 2) +
-              std::pow(cone.point.y - this->camera_pos.Pos()[1], 2);
+bool GazeboCameraCones::inRangeOfCamera(const eufs_msgs::msg::ConeWithCovariance &cone) {
+  auto dx = cone.point.x - this->camera_pos.Pos()[0];
+  auto dy = cone.point.y - this->camera_pos.Pos()[1];
+  auto dist = dx * dx + dy * dy;
   return camera_min_view_distance * camera_min_view_distance < dist &&
          dist < camera_total_view_distance * camera_total_view_distance;
 }
 
-bool GazeboCameraCones::inFOVOfCamera(eufs_msgs::msg::ConeWithCovariance cone) {
+bool GazeboCameraCones::inFOVOfCamera(const eufs_msgs::msg::ConeWithCovariance &cone) {
   float angle = atan2(cone.point.y - this->camera_pos.Pos()[1], cone.point.x -
                                                                     this->camera_pos.Pos()[0]);
   return abs(angle - this->camera_pos.Rot().Yaw()) < (this->camera_fov / 2);
 }
 
-std::vector<eufs_msgs::msg::ConeWithCovariance>
-GazeboCameraCones::fovCones(std::vector<eufs_msgs::msg::ConeWithCovariance> conesToCheck) {
-  std::vector<eufs_msgs::msg::ConeWithCovariance> cones_in_view;
-
-  for (auto const &cone : conesToCheck) {
-    bool camera_sees = inRangeOfCamera(cone) && inFOVOfCamera(cone);
-    if (camera_sees) {cones_in_view.push_back(cone);}
+void GazeboCameraCones::fovCones(std::vector<eufs_msgs::msg::ConeWithCovariance> &cones) {
+  // Keep the cones in view at the front of the array
+  size_t num_in_view = 0;
+  for (size_t i = 0; i < cones.size(); i++) {
+    bool camera_sees = inRangeOfCamera(cones[i]) && inFOVOfCamera(cones[i]);
+    if (camera_sees) {
+      if (i != num_in_view) {
+        cones[num_in_view] = std::move(cones[i]);
+      }
+      num_in_view++;
+    }
   }
-  return cones_in_view;
+  cones.resize(num_in_view);
 }
 
 // Add noise to the cone arrays
-eufs_msgs::msg::ConeArrayWithCovariance GazeboCameraCones::addConeNoise(
-    eufs_msgs::msg::ConeArrayWithCovariance &cones_message) {
-  eufs_msgs::msg::ConeArrayWithCovariance cones_message_with_noise = cones_message;
-
-  addNoiseToConeArray(cones_message_with_noise.blue_cones);
-  addNoiseToConeArray(cones_message_with_noise.yellow_cones);
-  addNoiseToConeArray(cones_message_with_noise.orange_cones);
-  addNoiseToConeArray(cones_message_with_noise.big_orange_cones);
-  addNoiseToConeArray(cones_message_with_noise.unknown_color_cones);
-
-  std::map<std::string, std::vector<eufs_msgs::msg::ConeWithCovariance>> color_map = {
-    {"blue", cones_message_with_noise.blue_cones},
-    {"yellow", cones_message_with_noise.yellow_cones},
-    {"orange", cones_message_with_noise.orange_cones},
-    {"big_orange", cones_message_with_noise.big_orange_cones},
-    {"unknown_color", cones_message_with_noise.unknown_color_cones}};
-
-  color_map = swapConeColors(color_map);
-
-  cones_message_with_noise.blue_cones = color_map["blue"];
-  cones_message_with_noise.yellow_cones = color_map["yellow"];
-  cones_message_with_noise.orange_cones = color_map["orange"];
-  cones_message_with_noise.big_orange_cones = color_map["big_orange"];
-  cones_message_with_noise.unknown_color_cones = color_map["unknown_color"];
-
-
-  cones_message_with_noise.header.frame_id = this->car_frame_id;
-  cones_message_with_noise.header.stamp.sec = this->time_last_published.sec;
-  cones_message_with_noise.header.stamp.nanosec = this->time_last_published.nsec;
-  return cones_message_with_noise;
+void GazeboCameraCones::addConeNoise(eufs_msgs::msg::ConeArrayWithCovariance &cones_message) {
+  addNoiseToConeArray(cones_message.blue_cones);
+  addNoiseToConeArray(cones_message.yellow_cones);
+  addNoiseToConeArray(cones_message.orange_cones);
+  addNoiseToConeArray(cones_message.big_orange_cones);
+  addNoiseToConeArray(cones_message.unknown_color_cones);
+
+  cone_recolor.recolor(cones_message, this->seed, this->rosnode_->get_logger());
+
+  cones_message.header.frame_id = this->car_frame_id;
+  cones_message.header.stamp.sec = this->time_last_published.sec;
+  cones_message.header.stamp.nanosec = this->time_last_published.nsec;
 }
 
 void GazeboCameraCones::addNoiseToConeArray(
@@ -294,47 +271,6 @@ double GazeboCameraCones::GaussianKernel(double mu, double sigma) {
   return X;
 }
 
-// Returns pointer to cone array at random given weights
-std::string GazeboCameraCones::pickColorWithProbability(
-  const YAML::Node weights) {
-    double rand = static_cast<double>(rand_r(&this->seed)) / static_cast<double>(RAND_MAX);
-    float sum = 0.0;
-    std::string color = "";
-    for (YAML::const_iterator it = weights.begin(); it != weights.end(); it++) {
-      sum += it->second.as<float>();
-      if (rand <= sum && color.empty()) {
-          color = it->first.as<std::string>();
-        }
-      }
-    if (sum != 1.0f || color.empty()) {
-      RCLCPP_WARN_ONCE(this->rosnode_->get_logger(),
-      "Cone mis-coloring config invalid");
-      RCLCPP_WARN_ONCE(this->rosnode_->get_logger(),
-      "Total probability  %s config is %f", color.c_str(), sum);
-    }
-    return color;
-}
-
-std::map<std::string, std::vector<eufs_msgs::msg::ConeWithCovariance>>
-GazeboCameraCones::swapConeColors(
-  std::map<std::string, std::vector<eufs_msgs::msg::ConeWithCovariance>> color_map) {
-  std::map<std::string, std::vector<eufs_msgs::msg::ConeWithCovariance>> new_map;
-  for (auto const& [color, source] : color_map) {
-    for (auto cone : source) {
-      std::string rand_color = pickColorWithProbability(recolor_config[color]);
-      if (rand_color != "undetected") {
-        if (!new_map.count(rand_color)) {
-          std::vector<eufs_msgs::msg::ConeWithCovariance> new_cones = {cone};
-          new_map.insert({rand_color, new_cones});
-        } else {
-          new_map.find(rand_color)->second.push_back(cone);
-        }
-      }
-    }
-  }
-  return new_map;
-}
-
 double GazeboCameraCones::getDoubleParameter(sdf::ElementPtr _sdf, const char *element,
                                                  double default_value,
                                                  const char *default_description) {
@@ -33,6 +33,7 @@
  **/
 
 #include "gazebo_cone_plugins/gazebo_ground_truth_cones.hpp"
+#include "gazebo_cone_plugins/ground_truth_getter.hpp"
 #include "eigen3/Eigen/Core"
 #include "eigen3/Eigen/Dense"
 
@@ -98,6 +99,11 @@ void GazeboGroundTruthCones::Load(gazebo::physics::ModelPtr _parent, sdf::Elemen
       getVector3dParameter(_sdf, "perceptionNoise",
                            {0.03, 0.03, 0.0}, "0.03, 0.03, 0.0");
 
+  this->cone_index.setCellSize(getDoubleParameter(_sdf, "coneIndexCellSize", 5, "5"));
+  this->cone_index_update_period =
+      getDoubleParameter(_sdf, "coneIndexUpdatePeriod", 1, "1");
+  this->cone_index_margin = getDoubleParameter(_sdf, "coneIndexMargin", 2, "2");
+
   std::string random_cone_color_yaml = "";
   if (!_sdf->HasElement("recolor_config")) {
     RCLCPP_FATAL(this->rosnode_->get_logger(),
@@ -109,6 +115,7 @@ void GazeboGroundTruthCones::Load(gazebo::physics::ModelPtr _parent, sdf::Elemen
 
   try {
     recolor_config = YAML::LoadFile(random_cone_color_yaml);
+    cone_recolor.load(recolor_config, this->rosnode_->get_logger());
   } catch (std::exception &e) {
     RCLCPP_FATAL(this->rosnode_->get_logger(), "Unable to load %s due to %s error.",
                  random_cone_color_yaml.c_str(), e.what());
@@ -181,6 +188,9 @@ void GazeboGroundTruthCones::Load(gazebo::physics::ModelPtr _parent, sdf::Elemen
   //  Store initial track
   this->initial_track = this->getConeArraysMessage();
 
+  this->cone_index.build(this->track_model);
+  this->cone_index_last_updated = _world->SimTime();
+
   RCLCPP_INFO(this->rosnode_->get_logger(), "ConeGroundTruthPlugin Loaded");
 }  // GazeboGroundTruthCones
 
@@ -208,15 +218,7 @@ void GazeboGroundTruthCones::UpdateChild() {
 
   this->car_pos = this->car_link->WorldPose();
 
-  // Get the track message
-  eufs_msgs::msg::ConeArrayWithCovariance cone_arrays_message = getConeArraysMessage();
-
-  eufs_msgs::msg::ConeArrayWithCovariance ground_truth_track_message;
-  if (this->track_frame_ == "map") {
-    ground_truth_track_message = translateMapFrame(cone_arrays_message);
-  } else if (this->track_frame_ == "base_footprint") {
-    ground_truth_track_message = translateBaseFootprintFrame(cone_arrays_message);
-  } else {
+  if (this->track_frame_ != "map" && this->track_frame_ != "base_footprint") {
     RCLCPP_WARN(this->rosnode_->get_logger(),
                 "Can only publish track to \"map\" or \"base_footprint\" "
                 "frame and not: \"%s\"",
@@ -226,49 +228,84 @@ void GazeboGroundTruthCones::UpdateChild() {
 
   // Publish the ground truth track if it has subscribers and is allowed to publish
   if (this->ground_truth_track_pub_->get_subscription_count() > 0 && pub_ground_truth) {
-    this->ground_truth_track_pub_->publish(ground_truth_track_message);
+    getConeArraysMessage(this->track_model == nullptr ? gazebo::physics::Link_V()
+                                                      : this->track_model->GetLinks(),
+                         this->track_message_);
+    if (this->track_frame_ == "map") {
+      translateMapFrame(this->track_message_);
+    } else {
+      translateBaseFootprintFrame(this->track_message_);
+    }
+    cone_helpers::publishConeArray(this->ground_truth_track_pub_, this->track_message_);
   }
 
-  eufs_msgs::msg::ConeArrayWithCovariance ground_truth_cones_message =
-      processCones(cone_arrays_message);
+  // Cones get knocked over, so the positions in the index are refreshed every so often
+  if ((cur_time - this->cone_index_last_updated).Double() >= this->cone_index_update_period) {
+    this->cone_index.update();
+    this->cone_index_last_updated = cur_time;
+  }
+
+  // Only the cones around the car can be seen by the sensors, the margin allows for cones that
+  // have moved since the index was last updated
+  this->cone_index.query(this->car_pos.Pos().X(), this->car_pos.Pos().Y(),
+                         minViewDistance() - this->cone_index_margin,
+                         maxViewDistance() + this->cone_index_margin,
+                         this->cone_candidates);
+  getConeArraysMessage(this->cone_candidates, this->ground_truth_cones_message_);
+  processCones(this->ground_truth_cones_message_);
 
   // Publish the ground truth cones if it has subscribers and is allowed to publish
   if (this->ground_truth_cone_pub_->get_subscription_count() > 0 && pub_ground_truth) {
-    this->ground_truth_cone_pub_->publish(ground_truth_cones_message);
+    cone_helpers::publishConeArray(this->ground_truth_cone_pub_,
+                                   this->ground_truth_cones_message_);
   }
 
   // Publish the simulated perception cones if it has subscribers
   if (this->simulate_perception_ &&
       this->perception_cone_pub_->get_subscription_count() > 0) {
-    eufs_msgs::msg::ConeArrayWithCovariance perception_cones_message =
-        addNoisePerception(ground_truth_cones_message, perception_lidar_noise_);
-    this->perception_cone_pub_->publish(perception_cones_message);
+    // Copy assignment reuses the storage of the perception cone arrays
+    this->perception_cones_message_ = this->ground_truth_cones_message_;
+    addNoisePerception(this->perception_cones_message_, perception_lidar_noise_);
+    cone_helpers::publishConeArray(this->perception_cone_pub_, this->perception_cones_message_);
   }
 }
 
 // Getting the track
 eufs_msgs::msg::ConeArrayWithCovariance GazeboGroundTruthCones::getConeArraysMessage() {
   eufs_msgs::msg::ConeArrayWithCovariance cone_arrays_message;
+  if (this->track_model == nullptr) {
+    getConeArraysMessage(gazebo::physics::Link_V(), cone_arrays_message);
+  } else {
+    getConeArraysMessage(this->track_model->GetLinks(), cone_arrays_message);
+  }
+  return cone_arrays_message;
+}
+
+// Getting some of the cones of the track, reusing the storage of the message's cone arrays
+void GazeboGroundTruthCones::getConeArraysMessage(
+    const gazebo::physics::Link_V &links,
+    eufs_msgs::msg::ConeArrayWithCovariance &cone_arrays_message) {
   cone_arrays_message.header.frame_id = "map";
   cone_arrays_message.header.stamp.sec = this->time_last_published.sec;
   cone_arrays_message.header.stamp.nanosec = this->time_last_published.nsec;
+  cone_arrays_message.blue_cones.clear();
+  cone_arrays_message.yellow_cones.clear();
+  cone_arrays_message.orange_cones.clear();
+  cone_arrays_message.big_orange_cones.clear();
+  cone_arrays_message.unknown_color_cones.clear();
 
-  if (this->track_model != nullptr) {
-    gazebo::physics::Link_V links = this->track_model->GetLinks();
-    for (unsigned int i = 0; i < links.size(); i++) {
-      addConeToConeArray(cone_arrays_message, links[i]);
-    }
+  for (auto const &link : links) {
+    addConeToConeArray(cone_arrays_message, link);
   }
-
-  return cone_arrays_message;
 }
 
 void GazeboGroundTruthCones::addConeToConeArray(
     eufs_msgs::msg::ConeArrayWithCovariance & ground_truth_cone_array,
-    gazebo::physics::LinkPtr link) {
+    const gazebo::physics::LinkPtr &link) {
+  const ignition::math::Vector3d pos = link->WorldPose().Pos();
   geometry_msgs::msg::Point point;
-  point.x = link->WorldPose().Pos().X();
-  point.y = link->WorldPose().Pos().Y();
+  point.x = pos.X();
+  point.y = pos.Y();
   point.z = 0;
 
   ConeType cone_type = this->getConeType(link);
@@ -297,65 +334,15 @@ void GazeboGroundTruthCones::addConeToConeArray(
   }
 }
 
-eufs_msgs::msg::ConeArrayWithCovariance GazeboGroundTruthCones::processCones(
-    eufs_msgs::msg::ConeArrayWithCovariance cones_to_process) {
-  eufs_msgs::msg::ConeArrayWithCovariance cones =
-      translateBaseFootprintFrame(cones_to_process);
-
-  std::vector<eufs_msgs::msg::ConeWithCovariance> new_blue;
-  std::vector<eufs_msgs::msg::ConeWithCovariance> new_yellow;
-  std::vector<eufs_msgs::msg::ConeWithCovariance> new_orange;
-  std::vector<eufs_msgs::msg::ConeWithCovariance> new_big_orange;
-  std::vector<eufs_msgs::msg::ConeWithCovariance> new_unknown;
-
-  std::vector<eufs_msgs::msg::ConeWithCovariance> color, no_color;
-
-  // blue
-  std::tie(color, no_color) = GazeboGroundTruthCones::fovCones(cones.blue_cones);
-  new_blue.resize(new_blue.size() + color.size());
-  copy(color.begin(), color.end(), new_blue.rbegin());
-  new_unknown.resize(new_unknown.size() + no_color.size());
-  copy(no_color.begin(), no_color.end(), new_unknown.rbegin());
-
-  // yellow
-  std::tie(color, no_color) =
-      GazeboGroundTruthCones::fovCones(cones.yellow_cones);
-  new_yellow.resize(new_yellow.size() + color.size());
-  copy(color.begin(), color.end(), new_yellow.rbegin());
-  new_unknown.resize(new_unknown.size() + no_color.size());
-  copy(no_color.begin(), no_color.end(), new_unknown.rbegin());
-
-  // orange
-  std::tie(color, no_color) =
-      GazeboGroundTruthCones::fovCones(cones.orange_cones);
-  new_orange.resize(new_orange.size() + color.size());
-  copy(color.begin(), color.end(), new_orange.rbegin());
-  new_unknown.resize(new_unknown.size() + no_color.size());
-  copy(no_color.begin(), no_color.end(), new_unknown.rbegin());
-
-  // big_orange
-  std::tie(color, no_color) =
-      GazeboGroundTruthCones::fovCones(cones.big_orange_cones);
-  new_big_orange.resize(new_big_orange.size() + color.size());
-  copy(color.begin(), color.end(), new_big_orange.rbegin());
-  new_unknown.resize(new_unknown.size() + no_color.size());
-  copy(no_color.begin(), no_color.end(), new_unknown.rbegin());
-
-  // unknown
-  std::tie(color, no_color) =
-      GazeboGroundTruthCones::fovCones(cones.unknown_color_cones);
-  new_unknown.resize(new_unknown.size() + color.size());
-  copy(color.begin(), color.end(), new_unknown.rbegin());
-  new_unknown.resize(new_unknown.size() + no_color.size());
-  copy(no_color.begin(), no_color.end(), new_unknown.rbegin());
-
-  cones.blue_cones = new_blue;
-  cones.yellow_cones = new_yellow;
-  cones.orange_cones = new_orange;
-  cones.big_orange_cones = new_big_orange;
-  cones.unknown_color_cones = new_unknown;
-
-  return cones;
+void GazeboGroundTruthCones::processCones(eufs_msgs::msg::ConeArrayWithCovariance &cones) {
+  translateBaseFootprintFrame(cones);
+
+  // Cones only seen by the lidar have no colour, so they are moved to the unknown cones
+  fovCones(cones.unknown_color_cones, cones.unknown_color_cones);
+  fovCones(cones.blue_cones, cones.unknown_color_cones);
+  fovCones(cones.yellow_cones, cones.unknown_color_cones);
+  fovCones(cones.orange_cones, cones.unknown_color_cones);
+  fovCones(cones.big_orange_cones, cones.unknown_color_cones);
 }
 
 // Resets the position of cones to initial track model
@@ -415,21 +402,24 @@ bool GazeboGroundTruthCones::resetConePosition(
     links[i]->SetLinearVel(angular);
   }
 
+  // The cones are back where they started, the index doesn't need to wait for its next update
+  this->cone_index.update();
+
   return response->success;
 }
 
-bool GazeboGroundTruthCones::inRangeOfCamera(eufs_msgs::msg::ConeWithCovariance cone) {
+bool GazeboGroundTruthCones::inRangeOfCamera(const eufs_msgs::msg::ConeWithCovariance &cone) {
   auto dist = (cone.point.x * cone.point.x) + (cone.point.y * cone.point.y);
   return camera_min_view_distance * camera_min_view_distance < dist &&
          dist < camera_total_view_distance * camera_total_view_distance;
 }
 
-bool GazeboGroundTruthCones::inFOVOfCamera(eufs_msgs::msg::ConeWithCovariance cone) {
+bool GazeboGroundTruthCones::inFOVOfCamera(const eufs_msgs::msg::ConeWithCovariance &cone) {
   float angle = atan2(cone.point.y, cone.point.x);
   return abs(angle) < (this->camera_fov / 2);
 }
 
-bool GazeboGroundTruthCones::inRangeOfLidar(eufs_msgs::msg::ConeWithCovariance cone) {
+bool GazeboGroundTruthCones::inRangeOfLidar(const eufs_msgs::msg::ConeWithCovariance &cone) {
   auto dist = (cone.point.x * cone.point.x) + (cone.point.y * cone.point.y);
   return lidar_min_view_distance * lidar_min_view_distance < dist &&
          dist < lidar_total_view_distance * lidar_total_view_distance &&
@@ -437,78 +427,90 @@ bool GazeboGroundTruthCones::inRangeOfLidar(eufs_msgs::msg::ConeWithCovariance c
                                                           lidar_y_view_distance && this->lidar_on;
 }
 
-bool GazeboGroundTruthCones::inFOVOfLidar(eufs_msgs::msg::ConeWithCovariance cone) {
+bool GazeboGroundTruthCones::inFOVOfLidar(const eufs_msgs::msg::ConeWithCovariance &cone) {
   float angle = atan2(cone.point.y, cone.point.x);
   return abs(angle) < (this->lidar_fov / 2) && this->lidar_on;
 }
 
-std::vector<eufs_msgs::msg::ConeWithCovariance> GazeboGroundTruthCones::translateCones(
-    std::vector<eufs_msgs::msg::ConeWithCovariance> cones, ignition::math::Pose3d frame) {
-  std::vector<eufs_msgs::msg::ConeWithCovariance> translated_cones;
-  for (auto const &cone : cones) {
+double GazeboGroundTruthCones::minViewDistance() {
+  if (!this->lidar_on) {
+    return this->camera_min_view_distance;
+  }
+  return std::min(this->camera_min_view_distance, this->lidar_min_view_distance);
+}
+
+double GazeboGroundTruthCones::maxViewDistance() {
+  if (!this->lidar_on) {
+    return this->camera_total_view_distance;
+  }
+  // The lidar range is also limited by the lidarXViewDistance x lidarYViewDistance rectangle
+  double lidar_max_view_distance = std::min(
+      this->lidar_total_view_distance,
+      std::hypot(this->lidar_x_view_distance, this->lidar_y_view_distance));
+  return std::max(this->camera_total_view_distance, lidar_max_view_distance);
+}
+
+void GazeboGroundTruthCones::translateCones(
+    std::vector<eufs_msgs::msg::ConeWithCovariance> &cones, const ignition::math::Pose3d &frame) {
+  float yaw = frame.Rot().Yaw();
+  for (auto &cone : cones) {
     // Translate the position of the cone to be based on the car
     float x = cone.point.x - frame.Pos().X();
     float y = cone.point.y - frame.Pos().Y();
 
-    // If the cone is withing viewing distance of lidar
-    float yaw = frame.Rot().Yaw();
-
     // Rotate the points using the yaw of the car (x and y are the other way around)
-    eufs_msgs::msg::ConeWithCovariance translated_cone;
-    translated_cone.point.y = (cos(yaw) * y) - (sin(yaw) * x);
-    translated_cone.point.x = (sin(yaw) * y) + (cos(yaw) * x);
-
-    translated_cones.push_back(translated_cone);
+    cone.point.y = (cos(yaw) * y) - (sin(yaw) * x);
+    cone.point.x = (sin(yaw) * y) + (cos(yaw) * x);
   }
-  return translated_cones;
 }
 
-eufs_msgs::msg::ConeArrayWithCovariance GazeboGroundTruthCones::translateMapFrame(
-    eufs_msgs::msg::ConeArrayWithCovariance cones) {
+void GazeboGroundTruthCones::translateMapFrame(eufs_msgs::msg::ConeArrayWithCovariance &cones) {
   cones.header.frame_id = "map";
-  cones.blue_cones = translateCones(cones.blue_cones, this->initial_car_pos_);
-  cones.yellow_cones = translateCones(cones.yellow_cones, this->initial_car_pos_);
-  cones.orange_cones = translateCones(cones.orange_cones, this->initial_car_pos_);
-  cones.big_orange_cones = translateCones(cones.big_orange_cones,
-                                          this->initial_car_pos_);
-  cones.unknown_color_cones = translateCones(cones.unknown_color_cones,
-                                             this->initial_car_pos_);
-  return cones;
+  translateCones(cones.blue_cones, this->initial_car_pos_);
+  translateCones(cones.yellow_cones, this->initial_car_pos_);
+  translateCones(cones.orange_cones, this->initial_car_pos_);
+  translateCones(cones.big_orange_cones, this->initial_car_pos_);
+  translateCones(cones.unknown_color_cones, this->initial_car_pos_);
 }
 
-eufs_msgs::msg::ConeArrayWithCovariance GazeboGroundTruthCones::translateBaseFootprintFrame(
-    eufs_msgs::msg::ConeArrayWithCovariance cones) {
+void GazeboGroundTruthCones::translateBaseFootprintFrame(
+    eufs_msgs::msg::ConeArrayWithCovariance &cones) {
   cones.header.frame_id = "base_footprint";
-  cones.blue_cones = translateCones(cones.blue_cones, this->car_pos);
-  cones.yellow_cones = translateCones(cones.yellow_cones, this->car_pos);
-  cones.orange_cones = translateCones(cones.orange_cones, this->car_pos);
-  cones.big_orange_cones = translateCones(cones.big_orange_cones, this->car_pos);
-  cones.unknown_color_cones = translateCones(cones.unknown_color_cones, this->car_pos);
-  return cones;
+  translateCones(cones.blue_cones, this->car_pos);
+  translateCones(cones.yellow_cones, this->car_pos);
+  translateCones(cones.orange_cones, this->car_pos);
+  translateCones(cones.big_orange_cones, this->car_pos);
+  translateCones(cones.unknown_color_cones, this->car_pos);
 }
 
-std::pair<std::vector<eufs_msgs::msg::ConeWithCovariance>,
-          std::vector<eufs_msgs::msg::ConeWithCovariance>>
-GazeboGroundTruthCones::fovCones(std::vector<eufs_msgs::msg::ConeWithCovariance> conesToCheck) {
-  std::vector<eufs_msgs::msg::ConeWithCovariance> cones_in_view;
-  std::vector<eufs_msgs::msg::ConeWithCovariance> cones_in_view_without_color;
-
-  for (auto const &cone : conesToCheck) {
-    bool lidar_sees = inRangeOfLidar(cone) && inFOVOfLidar(cone);
-    bool camera_sees = inRangeOfCamera(cone) && inFOVOfCamera(cone);
-
-    if ((lidar_sees && !camera_sees)) {
-      cones_in_view_without_color.push_back(cone);
-    } else if (camera_sees) {
-      cones_in_view.push_back(cone);
+// Keeps the cones seen by the camera in `cones` and moves the cones only seen by the lidar to the
+// end of `cones_without_color`, which can be `cones` itself
+void GazeboGroundTruthCones::fovCones(
+    std::vector<eufs_msgs::msg::ConeWithCovariance> &cones,
+    std::vector<eufs_msgs::msg::ConeWithCovariance> &cones_without_color) {
+  const bool same_array = &cones == &cones_without_color;
+  const size_t num_cones = cones.size();
+  size_t num_in_view = 0;
+
+  for (size_t i = 0; i < num_cones; i++) {
+    bool lidar_sees = inRangeOfLidar(cones[i]) && inFOVOfLidar(cones[i]);
+    bool camera_sees = inRangeOfCamera(cones[i]) && inFOVOfCamera(cones[i]);
+
+    if (camera_sees || (lidar_sees && same_array)) {
+      if (i != num_in_view) {
+        cones[num_in_view] = std::move(cones[i]);
+      }
+      num_in_view++;
+    } else if (lidar_sees) {
+      cones_without_color.push_back(std::move(cones[i]));
     }
   }
-  return std::make_pair(cones_in_view, cones_in_view_without_color);
+  cones.resize(num_in_view);
 }
 
 GazeboGroundTruthCones::ConeType
-GazeboGroundTruthCones::getConeType(gazebo::physics::LinkPtr link) {
-  std::string link_name = link->GetName();
+GazeboGroundTruthCones::getConeType(const gazebo::physics::LinkPtr &link) {
+  const std::string &link_name = link->GetName();
 
   if (link_name.substr(0, 9) == "blue_cone") {
     return ConeType::blue;
@@ -530,37 +532,19 @@ GazeboGroundTruthCones::getConeType(gazebo::physics::LinkPtr link) {
 }
 
 // Add noise to the cone arrays
-eufs_msgs::msg::ConeArrayWithCovariance GazeboGroundTruthCones::addNoisePerception(
+void GazeboGroundTruthCones::addNoisePerception(
     eufs_msgs::msg::ConeArrayWithCovariance &cones_message, ignition::math::Vector3d noise) {
-  eufs_msgs::msg::ConeArrayWithCovariance cones_message_with_noise = cones_message;
-
-
-  addNoiseToConeArray(cones_message_with_noise.blue_cones, noise);
-  addNoiseToConeArray(cones_message_with_noise.yellow_cones, noise);
-  addNoiseToConeArray(cones_message_with_noise.orange_cones, noise);
-  addNoiseToConeArray(cones_message_with_noise.big_orange_cones, noise);
-  addNoiseToConeArray(cones_message_with_noise.unknown_color_cones, noise);
-
-  std::map<std::string, std::vector<eufs_msgs::msg::ConeWithCovariance>> color_map = {
-    {"blue", cones_message_with_noise.blue_cones},
-    {"yellow", cones_message_with_noise.yellow_cones},
-    {"orange", cones_message_with_noise.orange_cones},
-    {"big_orange", cones_message_with_noise.big_orange_cones},
-    {"unknown_color", cones_message_with_noise.unknown_color_cones}};
-
-  color_map = swapConeColors(color_map);
+  addNoiseToConeArray(cones_message.blue_cones, noise);
+  addNoiseToConeArray(cones_message.yellow_cones, noise);
+  addNoiseToConeArray(cones_message.orange_cones, noise);
+  addNoiseToConeArray(cones_message.big_orange_cones, noise);
+  addNoiseToConeArray(cones_message.unknown_color_cones, noise);
 
-  cones_message_with_noise.blue_cones = color_map["blue"];
-  cones_message_with_noise.yellow_cones = color_map["yellow"];
-  cones_message_with_noise.orange_cones = color_map["orange"];
-  cones_message_with_noise.big_orange_cones = color_map["big_orange"];
-  cones_message_with_noise.unknown_color_cones = color_map["unknown_color"];
+  cone_recolor.recolor(cones_message, this->seed, this->rosnode_->get_logger());
 
-
-  cones_message_with_noise.header.frame_id = this->cone_frame_;
-  cones_message_with_noise.header.stamp.sec = this->time_last_published.sec;
-  cones_message_with_noise.header.stamp.nanosec = this->time_last_published.nsec;
-  return cones_message_with_noise;
+  cones_message.header.frame_id = this->cone_frame_;
+  cones_message.header.stamp.sec = this->time_last_published.sec;
+  cones_message.header.stamp.nanosec = this->time_last_published.nsec;
 }
 
 void GazeboGroundTruthCones::addNoiseToConeArray(
@@ -652,47 +636,6 @@ double GazeboGroundTruthCones::GaussianKernel(double mu, double sigma) {
   return X;
 }
 
-// Returns pointer to cone array at random given weights
-std::string GazeboGroundTruthCones::pickColorWithProbability(
-  const YAML::Node weights) {
-    double rand = static_cast<double>(rand_r(&this->seed)) / static_cast<double>(RAND_MAX);
-    float sum = 0.0;
-    std::string color = "";
-    for (YAML::const_iterator it = weights.begin(); it != weights.end(); it++) {
-      sum += it->second.as<float>();
-      if (rand <= sum && color.empty()) {
-          color = it->first.as<std::string>();
-        }
-      }
-    if (sum != 1.0f || color.empty()) {
-      RCLCPP_WARN_ONCE(this->rosnode_->get_logger(),
-      "Cone mis-coloring config invalid");
-      RCLCPP_WARN_ONCE(this->rosnode_->get_logger(),
-      "Total probability  %s config is %f", color.c_str(), sum);
-    }
-    return color;
-}
-
-std::map<std::string, std::vector<eufs_msgs::msg::ConeWithCovariance>>
-GazeboGroundTruthCones::swapConeColors(
-  std::map<std::string, std::vector<eufs_msgs::msg::ConeWithCovariance>> color_map) {
-  std::map<std::string, std::vector<eufs_msgs::msg::ConeWithCovariance>> new_map;
-  for (auto const& [color, source] : color_map) {
-    for (auto cone : source) {
-      std::string rand_color = pickColorWithProbability(recolor_config[color]);
-      if (rand_color != "undetected") {
-        if (!new_map.count(rand_color)) {
-          std::vector<eufs_msgs::msg::ConeWithCovariance> new_cones = {cone};
-          new_map.insert({rand_color, new_cones});
-        } else {
-          new_map.find(rand_color)->second.push_back(cone);
-        }
-      }
-    }
-  }
-  return new_map;
-}
-
 // Helper function for parameters
 bool GazeboGroundTruthCones::getBoolParameter(sdf::ElementPtr _sdf, const char *element,
                                              bool default_value, const char *default_description) {
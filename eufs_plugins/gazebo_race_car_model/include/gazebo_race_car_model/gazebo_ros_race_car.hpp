@@ -31,6 +31,7 @@
 #include <vector>
 // ROS Includes
 #include "rclcpp/rclcpp.hpp"
+#include "yaml-cpp/yaml.h"
 
 // ROS msgs
 #include "ackermann_msgs/msg/ackermann_drive_stamped.hpp"
@@ -59,6 +60,7 @@
 
 // EUFS includes
 #include "eufs_models/eufs_models.hpp"
+#include "gazebo_race_car_model/publish_scheduler.hpp"
 #include "gazebo_race_car_model/state_machine.hpp"
 
 namespace gazebo_plugins {
@@ -91,6 +93,9 @@ class RaceCarModelPlugin : public gazebo::ModelPlugin {
   void initParams(const sdf::ElementPtr &sdf);
   void initModel(const sdf::ElementPtr &sdf);
   void initNoise(const sdf::ElementPtr &sdf);
+  void initPublishScheduler(const sdf::ElementPtr &sdf);
+  double getPublishRate(const sdf::ElementPtr &sdf, const YAML::Node &config,
+                        const std::string &stream);
 
   eufs_msgs::msg::CarState stateToCarStateMsg(const eufs::models::State &state);
 
@@ -99,6 +104,10 @@ class RaceCarModelPlugin : public gazebo::ModelPlugin {
   void publishOdom();
   void publishTf();
 
+  bool carStateHasSubscribers();
+  bool wheelSpeedsHaveSubscribers();
+  bool odomHasSubscribers();
+
   void onCmd(const ackermann_msgs::msg::AckermannDriveStamped::SharedPtr msg);
 
   /// @brief Converts an euler orientation to quaternion
@@ -120,10 +129,10 @@ class RaceCarModelPlugin : public gazebo::ModelPlugin {
   gazebo::event::ConnectionPtr _update_connection;
   gazebo::common::Time _last_sim_time, _last_cmd_time;
 
-  // Rate to publish ros messages
+  // Rate to publish ros messages, each topic can have its own rate (defaults to _publish_rate)
   double _update_rate;
   double _publish_rate;
-  gazebo::common::Time _time_last_published;
+  PublishScheduler _publish_scheduler;
 
   // ROS TF
   bool _publish_tf;
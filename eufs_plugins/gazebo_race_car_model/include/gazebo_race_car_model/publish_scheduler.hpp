@@ -0,0 +1,95 @@
+#ifndef EUFS_PLUGINS_GAZEBO_RACE_CAR_MODEL_INCLUDE_GAZEBO_RACE_CAR_MODEL_PUBLISH_SCHEDULER_HPP_
+#define EUFS_PLUGINS_GAZEBO_RACE_CAR_MODEL_INCLUDE_GAZEBO_RACE_CAR_MODEL_PUBLISH_SCHEDULER_HPP_
+
+#include <functional>
+#include <string>
+#include <utility>
+#include <vector>
+
+namespace gazebo_plugins {
+namespace eufs_plugins {
+
+/// @brief Publishes a number of streams (topics) of the race car model plugin, each at its own rate
+///
+/// Every stream has a deadline. It is published at the first update at or after its deadline,
+/// which then moves on by one period, so a stream keeps its rate even if the update rate is not
+/// a multiple of it. A stream without subscribers is not published at all (its messages are not
+/// built) but its deadline still moves on.
+class PublishScheduler {
+ public:
+  /// @param rate messages per second, the stream is never published if this is not positive
+  /// @param has_subscribers returns whether anyone listens to the stream, if empty it always is
+  void addStream(const std::string &name, double rate, std::function<void()> publish,
+                 std::function<bool()> has_subscribers = nullptr) {
+    Stream stream;
+    stream.name = name;
+    stream.period = rate > 0 ? 1.0 / rate : 0.0;
+    stream.deadline = 0.0;
+    stream.publish = std::move(publish);
+    stream.has_subscribers = std::move(has_subscribers);
+    _streams.push_back(std::move(stream));
+  }
+
+  /// @brief Publishes the streams which are due at `time` (seconds of simulation time)
+  void update(double time) {
+    for (Stream &stream : _streams) {
+      if (stream.period <= 0) {
+        continue;
+      }
+
+      // Time went backwards (e.g. the world was reset)
+      if (stream.deadline - time > stream.period) {
+        stream.deadline = time;
+      }
+      if (time < stream.deadline) {
+        continue;
+      }
+
+      stream.deadline += stream.period;
+      if (stream.deadline <= time) {
+        // Fell more than a period behind, start again from now instead of catching up
+        stream.deadline = time + stream.period;
+      }
+
+      if (!stream.has_subscribers || stream.has_subscribers()) {
+        stream.publish();
+      }
+    }
+  }
+
+  /// @brief Makes every stream due at the next update
+  void reset() {
+    for (Stream &stream : _streams) {
+      stream.deadline = 0.0;
+    }
+  }
+
+  /// @brief Describes the rate of every stream, for logging
+  std::string getString() const {
+    std::string description;
+    for (const Stream &stream : _streams) {
+      if (!description.empty()) {
+        description += ", ";
+      }
+      description += stream.name + ": ";
+      description += stream.period > 0 ? std::to_string(1.0 / stream.period) + " Hz" : "off";
+    }
+    return description;
+  }
+
+ private:
+  struct Stream {
+    std::string name;
+    double period;
+    double deadline;
+    std::function<void()> publish;
+    std::function<bool()> has_subscribers;
+  };
+
+  std::vector<Stream> _streams;
+};
+
+}  // namespace eufs_plugins
+}  // namespace gazebo_plugins
+
+#endif  // EUFS_PLUGINS_GAZEBO_RACE_CAR_MODEL_INCLUDE_GAZEBO_RACE_CAR_MODEL_PUBLISH_SCHEDULER_HPP_
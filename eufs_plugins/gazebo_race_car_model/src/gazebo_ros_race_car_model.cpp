@@ -81,6 +81,9 @@ void RaceCarModelPlugin::Load(gazebo::physics::ModelPtr model, sdf::ElementPtr s
       "/race_car_model/command_mode", std::bind(&RaceCarModelPlugin::returnCommandMode, this,
                                                 std::placeholders::_1, std::placeholders::_2));
 
+  // Publish each topic at its own rate
+  initPublishScheduler(sdf);
+
   // ROS Subscriptions
   _sub_cmd = _rosnode->create_subscription<ackermann_msgs::msg::AckermannDriveStamped>(
       "/cmd", 1, std::bind(&RaceCarModelPlugin::onCmd, this, std::placeholders::_1));
@@ -282,6 +285,58 @@ void RaceCarModelPlugin::initNoise(const sdf::ElementPtr &sdf) {
   _noise = std::make_unique<eufs::models::Noise>(yaml_name);
 }
 
+void RaceCarModelPlugin::initPublishScheduler(const sdf::ElementPtr &sdf) {
+  YAML::Node config;
+  if (sdf->HasElement("publish_rates_config")) {
+    std::string yaml_name = sdf->GetElement("publish_rates_config")->Get<std::string>();
+    if (!yaml_name.empty()) {
+      try {
+        config = YAML::LoadFile(yaml_name)["publish_rates"];
+      } catch (std::exception &e) {
+        RCLCPP_ERROR(_rosnode->get_logger(),
+                     "Unable to load %s due to %s error, publishing every topic at %f Hz",
+                     yaml_name.c_str(), e.what(), _publish_rate);
+      }
+    }
+  }
+
+  _publish_scheduler.addStream(
+      "car_state", getPublishRate(sdf, config, "car_state"),
+      std::bind(&RaceCarModelPlugin::publishCarState, this),
+      std::bind(&RaceCarModelPlugin::carStateHasSubscribers, this));
+  _publish_scheduler.addStream(
+      "wheel_speeds", getPublishRate(sdf, config, "wheel_speeds"),
+      std::bind(&RaceCarModelPlugin::publishWheelSpeeds, this),
+      std::bind(&RaceCarModelPlugin::wheelSpeedsHaveSubscribers, this));
+  _publish_scheduler.addStream(
+      "odom", getPublishRate(sdf, config, "odom"),
+      std::bind(&RaceCarModelPlugin::publishOdom, this),
+      std::bind(&RaceCarModelPlugin::odomHasSubscribers, this));
+  if (_publish_tf) {
+    _publish_scheduler.addStream("tf", getPublishRate(sdf, config, "tf"),
+                                 std::bind(&RaceCarModelPlugin::publishTf, this));
+  }
+  // The state machine publishes its state and reacts to missions whenever it spins
+  _publish_scheduler.addStream("state_machine", _publish_rate,
+                               [this]() { _state_machine->spinOnce(_last_sim_time); });
+
+  RCLCPP_DEBUG(_rosnode->get_logger(), "RaceCarModelPlugin publish rates: %s",
+               _publish_scheduler.getString().c_str());
+}
+
+double RaceCarModelPlugin::getPublishRate(const sdf::ElementPtr &sdf, const YAML::Node &config,
+                                          const std::string &stream) {
+  // <stream>_rate in the sdf, then publish_rates_config, then publish_rate
+  std::string element = stream + "_rate";
+  if (sdf->HasElement(element)) {
+    return sdf->GetElement(element)->Get<double>();
+  }
+  if (config && config[stream]) {
+    return config[stream].as<double>();
+  }
+  return _publish_rate;
+}
+
 void RaceCarModelPlugin::setPositionFromWorld() {
   _offset = _model->WorldPose();
 
@@ -406,14 +461,32 @@ eufs_msgs::msg::CarState RaceCarModelPlugin::stateToCarStateMsg(const eufs::mode
   return car_state;
 }
 
-void RaceCarModelPlugin::publishCarState() {
-  eufs_msgs::msg::CarState car_state = stateToCarStateMsg(_state);
+bool RaceCarModelPlugin::carStateHasSubscribers() {
+  return (_pub_ground_truth_car_state->get_subscription_count() > 0 && _pub_ground_truth) ||
+         _pub_localisation_car_state->get_subscription_count() > 0;
+}
+
+bool RaceCarModelPlugin::wheelSpeedsHaveSubscribers() {
+  return (_pub_ground_truth_wheel_speeds->get_subscription_count() > 0 && _pub_ground_truth) ||
+         _pub_wheel_speeds->get_subscription_count() > 0;
+}
+
+bool RaceCarModelPlugin::odomHasSubscribers() {
+  return _pub_odom->get_subscription_count() > 0 && _pub_ground_truth;
+}
 
+void RaceCarModelPlugin::publishCarState() {
   // Publish the ground truth car state if it has subscribers and is allowed to publish
   if (_pub_ground_truth_car_state->get_subscription_count() > 0 && _pub_ground_truth) {
+    eufs_msgs::msg::CarState car_state = stateToCarStateMsg(_state);
     _pub_ground_truth_car_state->publish(car_state);
   }
 
+  // Only add noise if anyone listens to it
+  if (_pub_localisation_car_state->get_subscription_count() == 0) {
+    return;
+  }
+
   // Add noise
   eufs::models::State state_noisy = _noise->applyNoise(_state);
   eufs_msgs::msg::CarState car_state_noisy = stateToCarStateMsg(state_noisy);
@@ -441,9 +514,7 @@ void RaceCarModelPlugin::publishCarState() {
   car_state_noisy.linear_acceleration_covariance[8] = pow(noise_param.linear_acceleration[2], 2);
 
   // Publish with noise
-  if (_pub_localisation_car_state->get_subscription_count() > 0) {
-    _pub_localisation_car_state->publish(car_state_noisy);
-  }
+  _pub_localisation_car_state->publish(car_state_noisy);
 }
 
 void RaceCarModelPlugin::publishWheelSpeeds() {
@@ -462,13 +533,16 @@ void RaceCarModelPlugin::publishWheelSpeeds() {
     _pub_ground_truth_wheel_speeds->publish(wheel_speeds_stamped);
   }
 
+  // Only add noise if anyone listens to it
+  if (_pub_wheel_speeds->get_subscription_count() == 0) {
+    return;
+  }
+
   wheel_speeds = _noise->applyNoiseToWheelSpeeds(wheel_speeds);
   wheel_speeds_stamped.speeds = wheel_speeds;
 
   // Publish with Noise
-  if (_pub_wheel_speeds->get_subscription_count() > 0) {
-    _pub_wheel_speeds->publish(wheel_speeds_stamped);
-  }
+  _pub_wheel_speeds->publish(wheel_speeds_stamped);
 }
 
 void RaceCarModelPlugin::publishOdom() {
@@ -519,10 +593,8 @@ void RaceCarModelPlugin::publishOdom() {
   odom.twist.covariance[28] = pow(noise_param.angular_velocity[1], 2);
   odom.twist.covariance[35] = pow(noise_param.angular_velocity[2], 2);
 
-  // Publish the ground truth odom if it has subscribers and is allowed to publish
-  if (_pub_odom->get_subscription_count() > 0 && _pub_ground_truth) {
-    _pub_odom->publish(odom);
-  }
+  // Only called if the odom has subscribers and is allowed to publish
+  _pub_odom->publish(odom);
 }
 
 void RaceCarModelPlugin::publishTf() {
@@ -549,7 +621,10 @@ void RaceCarModelPlugin::publishTf() {
   _tf_br->sendTransform(transform_stamped);
 }
 
-void RaceCarModelPlugin::Reset() { _last_sim_time = 0; }
+void RaceCarModelPlugin::Reset() {
+  _last_sim_time = 0;
+  _publish_scheduler.reset();
+}
 
 void RaceCarModelPlugin::update() {
   gazebo::common::Time curTime = _world->SimTime();
@@ -601,22 +676,8 @@ void RaceCarModelPlugin::updateState(const double dt) {
   _right_steering_joint->SetPosition(0, _act_input.delta);
   setModelState();
 
-  double time_since_last_published = (_last_sim_time - _time_last_published).Double();
-  if (time_since_last_published < (1 / _publish_rate)) {
-    return;
-  }
-  _time_last_published = _last_sim_time;
-
-  // Publish Everything
-  publishCarState();
-  publishWheelSpeeds();
-  publishOdom();
-
-  if (_publish_tf) {
-    publishTf();
-  }
-
-  _state_machine->spinOnce(_last_sim_time);
+  // Publish whatever is due
+  _publish_scheduler.update(_last_sim_time.Double());
 }
 
 void RaceCarModelPlugin::onCmd(const ackermann_msgs::msg::AckermannDriveStamped::SharedPtr msg) {
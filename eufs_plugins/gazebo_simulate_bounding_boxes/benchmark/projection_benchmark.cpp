@@ -0,0 +1,202 @@
+// Compares the CPU time of projecting cones to bounding boxes one cone at a time, as the bounding
+// boxes plugin used to, with the batched BoundingBoxProjector.
+//
+// Cones are scattered around the camera, the number of cones in view growing with the number of
+// cones. The per-cone path is the loop of the plugin: it transforms every cone, projects two
+// corners with the pinhole model of image_geometry (written out here so the benchmark doesn't
+// need ROS), seeds new random engines from the clock for the noise of each box and returns the
+// boxes as vectors of vectors by value. Only the culling of the batched path is added, so that
+// both paths must give the same ground truth boxes.
+//
+// Usage: ros2 run eufs_plugins bounding_boxes_benchmark [frames]
+
+#include <algorithm>
+#include <chrono>
+#include <cmath>
+#include <cstdio>
+#include <cstdlib>
+#include <random>
+#include <tuple>
+#include <vector>
+
+#include "gazebo_simulate_bounding_boxes/bounding_box_projector.hpp"
+
+using gazebo_plugins::eufs_plugins::BoundingBoxProjector;
+
+namespace {
+
+// Camera of config/boundingBoxes.yaml
+const int WIDTH = 1280;
+const int HEIGHT = 720;
+const double P[12] = {448.13386274345095, 0.0, 640.5, -53.77606352921411,
+                      0.0, 448.13386274345095, 360.5, 0.0,
+                      0.0, 0.0, 1.0, 0.0};
+
+const double RADIUS = 0.11;
+const double CONE_HEIGHT = 0.31;
+
+struct Point {
+  double x, y, z;
+};
+
+// image_geometry::PinholeCameraModel::project3dToPixel
+void project3dToPixel(const Point &point, double &u, double &v) {
+  u = (P[0] * point.x + P[3]) / point.z + P[2];
+  v = (P[5] * point.y + P[7]) / point.z + P[6];
+}
+
+std::default_random_engine generateSeed() {
+  unsigned seed = std::chrono::steady_clock::now().time_since_epoch().count();
+  std::default_random_engine seed_generator(seed);
+  return seed_generator;
+}
+
+typedef std::vector<std::vector<double>> BoxVector;
+
+// The per-cone projection of the plugin before BoundingBoxProjector, with the same culling
+class PerConeProjector {
+ public:
+  PerConeProjector(const Eigen::Matrix3d &rotation, const Eigen::Vector3d &translation)
+      : _rotation(rotation), _translation(translation) {}
+
+  std::tuple<BoxVector, BoxVector> project(std::vector<Point> &cones) {
+    BoxVector boxes;
+    BoxVector noisy_boxes;
+    for (size_t i = 0; i < cones.size(); i++) {
+      const Eigen::Vector3d p =
+          _rotation * Eigen::Vector3d(cones[i].x, cones[i].y, cones[i].z) + _translation;
+
+      const double y_min = p.y();
+      const double z_min = p.z();
+      const double y_max = p.y() - 2 * RADIUS;
+      const double z_max = p.z() + CONE_HEIGHT;
+
+      double a_u, a_v, b_u, b_v;
+      std::vector<double> box;
+      if (p.y() < 0) {
+        project3dToPixel({-y_min, -z_max, p.x() + RADIUS}, a_u, a_v);
+        project3dToPixel({-y_max, -z_min, p.x() - RADIUS}, b_u, b_v);
+        box = {b_u, a_v, a_u, b_v};
+      } else {
+        project3dToPixel({-y_max, -z_max, p.x() + RADIUS}, a_u, a_v);
+        project3dToPixel({-y_min, -z_min, p.x() - RADIUS}, b_u, b_v);
+        box = {a_u, a_v, b_u, b_v};
+      }
+
+      if (p.x() - RADIUS <= BoundingBoxProjector::MIN_DEPTH ||
+          std::max(box[0], box[2]) <= 0 || std::min(box[0], box[2]) >= WIDTH ||
+          std::max(box[1], box[3]) <= 0 || std::min(box[1], box[3]) >= HEIGHT) {
+        continue;
+      }
+
+      std::normal_distribution<double> width_noise(0.0, 1.0);
+      std::normal_distribution<double> height_noise(0.0, 1.0);
+      std::default_random_engine seed_height = generateSeed();
+      std::default_random_engine seed_width = generateSeed();
+      std::default_random_engine seed_box = generateSeed();
+      const double width = width_noise(seed_width);
+      const double height = height_noise(seed_height);
+      std::vector<double> noisy_box = {box[0] + width, box[1] + height, box[2] - width,
+                                       box[3] - height};
+      std::normal_distribution<double> box_noise(0.0, 1.0);
+      const double offset = box_noise(seed_box);
+      for (double &edge : noisy_box) {
+        edge += offset;
+      }
+
+      boxes.push_back(box);
+      noisy_boxes.push_back(noisy_box);
+    }
+    return {boxes, noisy_boxes};
+  }
+
+ private:
+  Eigen::Matrix3d _rotation;
+  Eigen::Vector3d _translation;
+};
+
+// The plugin passed the boxes of every colour by value to fill its messages
+size_t countBoxes(BoxVector boxes, BoxVector noisy_boxes) {
+  return boxes.size() + noisy_boxes.size();
+}
+
+// Cones on a disc of `radius` m around the camera
+std::vector<Point> scatterCones(size_t n, double radius, std::default_random_engine &generator) {
+  std::uniform_real_distribution<double> coordinate(-radius, radius);
+  std::vector<Point> cones(n);
+  for (Point &cone : cones) {
+    cone = {coordinate(generator), coordinate(generator), 0.0};
+  }
+  return cones;
+}
+
+template <typename F>
+double timeFrames(int frames, F frame) {
+  const auto start = std::chrono::steady_clock::now();
+  for (int i = 0; i < frames; i++) {
+    frame();
+  }
+  const std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - start;
+  return elapsed.count() / frames;
+}
+
+}  // namespace
+
+int main(int argc, char **argv) {
+  const int frames = argc > 1 ? std::atoi(argv[1]) : 200;
+
+  // A camera 1 m above the ground, in the axes the plugin expects of its target frame
+  const Eigen::Matrix3d rotation = Eigen::Matrix3d::Identity();
+  const Eigen::Vector3d translation(0.0, 0.0, -1.0);
+
+  BoundingBoxProjector projector;
+  Eigen::Matrix<double, 3, 4> projection;
+  projection << P[0], P[1], P[2], P[3], P[4], P[5], P[6], P[7], P[8], P[9], P[10], P[11];
+  projector.setCamera(projection, WIDTH, HEIGHT);
+  projector.setTransform(rotation, translation);
+  projector.setNoise(0.0, 1.0, 0.0, 1.0, 0.0, 1.0);
+
+  PerConeProjector per_cone(rotation, translation);
+  std::default_random_engine generator(0);
+
+  std::printf("%8s %8s %14s %14s %10s %12s\n", "cones", "in view", "per cone (us)",
+              "batched (us)", "speedup", "max error");
+  for (size_t n : {10, 100, 1000, 10000, 100000}) {
+    std::vector<Point> cones = scatterCones(n, 50.0, generator);
+
+    BoxVector boxes, noisy_boxes;
+    const double per_cone_time = timeFrames(frames, [&]() {
+      std::tie(boxes, noisy_boxes) = per_cone.project(cones);
+      countBoxes(boxes, noisy_boxes);
+    });
+
+    BoundingBoxProjector::Points points;
+    BoundingBoxProjector::Boxes batched_boxes, batched_noisy_boxes;
+    const double batched_time = timeFrames(frames, [&]() {
+      // The plugin copies the cones out of their message too
+      points.resize(3, cones.size());
+      for (size_t i = 0; i < cones.size(); i++) {
+        points.col(i) << cones[i].x, cones[i].y, cones[i].z;
+      }
+      projector.project(points, RADIUS, CONE_HEIGHT, batched_boxes);
+      projector.addNoise(batched_boxes, batched_noisy_boxes);
+    });
+
+    if (static_cast<size_t>(batched_boxes.cols()) != boxes.size()) {
+      std::fprintf(stderr, "%zu cones: %ld boxes batched, %zu per cone\n", n,
+                   static_cast<long>(batched_boxes.cols()), boxes.size());
+      return 1;
+    }
+    double max_error = 0.0;
+    for (size_t i = 0; i < boxes.size(); i++) {
+      for (int j = 0; j < 4; j++) {
+        max_error = std::max(max_error, std::abs(batched_boxes(j, i) - boxes[i][j]));
+      }
+    }
+
+    std::printf("%8zu %8zu %14.2f %14.2f %9.1fx %12.2e\n", n, boxes.size(),
+                per_cone_time * 1e6, batched_time * 1e6, per_cone_time / batched_time,
+                max_error);
+  }
+  return 0;
+}
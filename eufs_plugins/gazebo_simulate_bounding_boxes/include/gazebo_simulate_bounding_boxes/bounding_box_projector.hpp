@@ -0,0 +1,165 @@
+#ifndef EUFS_PLUGINS_GAZEBO_SIMULATE_BOUNDING_BOXES_INCLUDE_GAZEBO_SIMULATE_BOUNDING_BOXES_BOUNDING_BOX_PROJECTOR_HPP_
+#define EUFS_PLUGINS_GAZEBO_SIMULATE_BOUNDING_BOXES_INCLUDE_GAZEBO_SIMULATE_BOUNDING_BOXES_BOUNDING_BOX_PROJECTOR_HPP_
+
+#include <algorithm>
+#include <random>
+
+#include "eigen3/Eigen/Core"
+#include "eigen3/Eigen/Dense"
+
+namespace gazebo_plugins {
+namespace eufs_plugins {
+
+// Projects batches of cones into the camera image as bounding boxes.
+//
+// The cones of a colour are handled as one 3xN matrix of positions, so moving them into the
+// camera frame and projecting the corners of their boxes are two matrix products rather than a
+// transform and two image_geometry projections per cone. Cones behind the camera or whose box is
+// entirely outside the image are culled, and noise is drawn for all the boxes at once.
+class BoundingBoxProjector {
+ public:
+  // Cone positions, one per column. Matrices are row major, so that every coordinate is a
+  // contiguous array.
+  typedef Eigen::Matrix<double, 3, Eigen::Dynamic, Eigen::RowMajor> Points;
+  // Bounding boxes, one per column: xmax, ymin, xmin, ymax (pixels)
+  typedef Eigen::Matrix<double, 4, Eigen::Dynamic, Eigen::RowMajor> Boxes;
+
+  // Boxes of cones whose near side is closer to the camera than this (m) are culled
+  static constexpr double MIN_DEPTH = 0.1;
+
+  BoundingBoxProjector() : _width(0), _height(0) {
+    _projection.setZero();
+    _rotation.setIdentity();
+    _translation.setZero();
+  }
+
+  // Sets the 3x4 projection matrix (P of the camera info) and the image size (pixels).
+  //
+  // Pixels are P times the homogeneous point, as in image_geometry::PinholeCameraModel for a
+  // camera without skew.
+  void setCamera(const Eigen::Matrix<double, 3, 4> &projection, int width, int height) {
+    _projection = projection;
+    _width = width;
+    _height = height;
+  }
+
+  // Sets the transform from the frame of the cones to the (camera) frame they are projected from
+  void setTransform(const Eigen::Matrix3d &rotation, const Eigen::Vector3d &translation) {
+    _rotation = rotation;
+    _translation = translation;
+  }
+
+  // Sets the Gaussian noise of the noisy boxes (pixels): `box` moves every edge of a box by the
+  // same amount, `width` and `height` move its opposite edges apart
+  void setNoise(double mean_box, double standard_deviation_box, double mean_width,
+                double standard_deviation_width, double mean_height,
+                double standard_deviation_height) {
+    _box_noise = std::normal_distribution<double>(mean_box, standard_deviation_box);
+    _width_noise = std::normal_distribution<double>(mean_width, standard_deviation_width);
+    _height_noise = std::normal_distribution<double>(mean_height, standard_deviation_height);
+  }
+
+  void setSeed(unsigned seed) { _generator.seed(seed); }
+
+  // Projects the cones of a colour, of the given radius and height, into `boxes`, leaving out
+  // the culled cones
+  void project(const Points &cones, double radius, double height, Boxes &boxes) {
+    const Eigen::Index n = cones.cols();
+
+    // Cones in the target frame
+    _points.noalias() = _rotation * cones;
+    _points.colwise() += _translation;
+
+    // Two opposite corners of every box, as homogeneous points in the image axes: corner A
+    // (columns 0 to n - 1) is the top of the far side of the cone, corner B (columns n to 2n - 1)
+    // the bottom of its near side
+    _corners.resize(4, 2 * n);
+    const double *x = _points.row(0).data();
+    const double *y = _points.row(1).data();
+    const double *z = _points.row(2).data();
+    double *corner_x = _corners.row(0).data();
+    double *corner_y = _corners.row(1).data();
+    double *corner_z = _corners.row(2).data();
+    for (Eigen::Index i = 0; i < n; i++) {
+      const bool left = y[i] >= 0;
+      corner_x[i] = left ? -y[i] + 2 * radius : -y[i];
+      corner_y[i] = -(z[i] + height);
+      corner_z[i] = x[i] + radius;
+      corner_x[n + i] = left ? -y[i] : -y[i] + 2 * radius;
+      corner_y[n + i] = -z[i];
+      corner_z[n + i] = x[i] - radius;
+    }
+    _corners.row(3).setOnes();
+
+    _pixels.noalias() = _projection * _corners;
+
+    // Boxes of the cones in view, right cones span from A to B horizontally and left cones from
+    // B to A
+    boxes.resize(4, n);
+    const double *u = _pixels.row(0).data();
+    const double *v = _pixels.row(1).data();
+    const double *w = _pixels.row(2).data();
+    Eigen::Index kept = 0;
+    for (Eigen::Index i = 0; i < n; i++) {
+      const double a_u = u[i] / w[i];
+      const double a_v = v[i] / w[i];
+      const double b_u = u[n + i] / w[n + i];
+      const double b_v = v[n + i] / w[n + i];
+
+      // Frustum culling
+      if (corner_z[n + i] <= MIN_DEPTH || std::max(a_u, b_u) <= 0 ||
+          std::min(a_u, b_u) >= _width || std::max(a_v, b_v) <= 0 ||
+          std::min(a_v, b_v) >= _height) {
+        continue;
+      }
+
+      const bool left = y[i] >= 0;
+      boxes(0, kept) = left ? a_u : b_u;
+      boxes(1, kept) = a_v;
+      boxes(2, kept) = left ? b_u : a_u;
+      boxes(3, kept) = b_v;
+      kept++;
+    }
+    boxes.conservativeResize(Eigen::NoChange, kept);
+  }
+
+  // Writes the boxes with noise added to `noisy`
+  void addNoise(const Boxes &boxes, Boxes &noisy) {
+    const Eigen::Index n = boxes.cols();
+    _noise.resize(3, n);
+    for (Eigen::Index i = 0; i < n; i++) {
+      _noise(0, i) = _width_noise(_generator);
+      _noise(1, i) = _height_noise(_generator);
+      _noise(2, i) = _box_noise(_generator);
+    }
+
+    noisy.resize(4, n);
+    noisy.row(0) = boxes.row(0) + _noise.row(0) + _noise.row(2);
+    noisy.row(1) = boxes.row(1) + _noise.row(1) + _noise.row(2);
+    noisy.row(2) = boxes.row(2) - _noise.row(0) + _noise.row(2);
+    noisy.row(3) = boxes.row(3) - _noise.row(1) + _noise.row(2);
+  }
+
+ private:
+  Eigen::Matrix<double, 3, 4> _projection;
+  int _width;
+  int _height;
+  Eigen::Matrix3d _rotation;
+  Eigen::Vector3d _translation;
+
+  std::default_random_engine _generator;
+  std::normal_distribution<double> _box_noise;
+  std::normal_distribution<double> _width_noise;
+  std::normal_distribution<double> _height_noise;
+
+  // Work space, kept between calls so it is only reallocated when the number of cones changes
+  Points _points;
+  Eigen::Matrix<double, 4, Eigen::Dynamic, Eigen::RowMajor> _corners;
+  Eigen::Matrix<double, 3, Eigen::Dynamic, Eigen::RowMajor> _pixels;
+  Eigen::Matrix<double, 3, Eigen::Dynamic, Eigen::RowMajor> _noise;
+};
+
+}  // namespace eufs_plugins
+}  // namespace gazebo_plugins
+
+#endif  // EUFS_PLUGINS_GAZEBO_SIMULATE_BOUNDING_BOXES_INCLUDE_GAZEBO_SIMULATE_BOUNDING_BOXES_BOUNDING_BOX_PROJECTOR_HPP_
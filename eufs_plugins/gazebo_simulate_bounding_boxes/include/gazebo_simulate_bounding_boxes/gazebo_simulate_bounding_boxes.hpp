@@ -29,6 +29,8 @@
 
 #include <image_geometry/pinhole_camera_model.h>
 
+#include "gazebo_simulate_bounding_boxes/bounding_box_projector.hpp"
+
 struct ConeInfo {
   double radius;
   double height;
@@ -54,29 +56,19 @@ class BoundingBoxesPlugin : public gazebo::ModelPlugin {
  private:
   void cones_callback(const eufs_msgs::msg::ConeArrayWithCovariance::SharedPtr msg);
 
-  void update_msg(eufs_msgs::msg::BoundingBoxes &bounding_boxes_msg, std_msgs::msg::Header header,
-                  std::vector<std::vector<double>> blue_cones,
-                  std::vector<std::vector<double>> yellow_cones,
-                  std::vector<std::vector<double>> orange_cones,
-                  std::vector<std::vector<double>> big_orange_cones);
+  void projectCones(const std::vector<eufs_msgs::msg::ConeWithCovariance> &cones_vector,
+                    const ConeInfo &cone_info_, const std::string &color,
+                    eufs_msgs::msg::BoundingBoxes &ground_truth_bounding_boxes_msg,
+                    eufs_msgs::msg::BoundingBoxes &noisy_bounding_boxes_msg);
 
   void getTransform(std::string target_frame_, std::string source_frame_);
 
   void setCameraInfo(rclcpp::Publisher<sensor_msgs::msg::CameraInfo>::SharedPtr
                       custom_cam_info_pub);
 
-  std::default_random_engine generate_seed();
-
-  void add_gaussian_noise_to_bounding_box(
-              std::vector<double> &bounding_box_vector, std::default_random_engine seed);
-
   void push_back_bounding_boxes_msg(eufs_msgs::msg::BoundingBoxes &bounding_boxes_msg,
-                                      std::vector<std::vector<double>> bounding_boxes_vector,
-                                      std::string color) const;
-
-  std::tuple<std::vector<std::vector<double>>, std::vector<std::vector<double>>>
-      projectToImagePlane(std::vector<eufs_msgs::msg::ConeWithCovariance> &cones_vector,
-                            const ConeInfo cone_info_);
+                                    const BoundingBoxProjector::Boxes &bounding_boxes,
+                                    const std::string &color) const;
 
   std::string getStringParameter(sdf::ElementPtr _sdf, const char *element,
                                     std::string default_value,
@@ -90,6 +82,12 @@ class BoundingBoxesPlugin : public gazebo::ModelPlugin {
 
   image_geometry::PinholeCameraModel camera_model;
 
+  // Projects the cones of a colour at a time, with the transform and camera above
+  BoundingBoxProjector projector_;
+  BoundingBoxProjector::Points cone_points_;
+  BoundingBoxProjector::Boxes ground_truth_boxes_;
+  BoundingBoxProjector::Boxes noisy_boxes_;
+
   struct BoundingBoxes noisy_bounding_boxes_container;
 
   // Gazebo variables
@@ -145,12 +143,6 @@ class BoundingBoxesPlugin : public gazebo::ModelPlugin {
   // Rate to publish ros messages
   double _publish_rate;
   gazebo::common::Time _last_sim_time;
-
-  // Bounding Box Variables
-  cv::Point2d top_left_point;
-  cv::Point2d top_right_point;
-  cv::Point2d bottom_left_point;
-  cv::Point2d bottom_right_point;
 };
 
 }  // namespace eufs_plugins
@@ -33,7 +33,7 @@
 
 #include "gazebo_simulate_bounding_boxes/gazebo_simulate_bounding_boxes.hpp"
 #include "yaml-cpp/yaml.h"
-#include <random>
+#include <chrono>
 
 namespace gazebo_plugins {
 namespace eufs_plugins {
@@ -114,6 +114,29 @@ void BoundingBoxesPlugin::Load(gazebo::physics::ModelPtr _parent, sdf::ElementPt
 
   camera_model.fromCameraInfo(cam_info_);
 
+  // Cones are projected a colour at a time, in batches
+  Eigen::Matrix<double, 3, 4> projection;
+  for (int row = 0; row < 3; row++) {
+    for (int col = 0; col < 4; col++) {
+      projection(row, col) = camera_model.projectionMatrix()(row, col);
+    }
+  }
+  projector_.setCamera(projection, camera_width_, camera_height_);
+
+  Eigen::Matrix3d rotation;
+  for (int row = 0; row < 3; row++) {
+    for (int col = 0; col < 3; col++) {
+      rotation(row, col) = transform.getBasis()[row][col];
+    }
+  }
+  const tf2::Vector3 &origin = transform.getOrigin();
+  projector_.setTransform(rotation, Eigen::Vector3d(origin.x(), origin.y(), origin.z()));
+
+  projector_.setNoise(mean_bb, standard_deviation_bb, mean_width, standard_deviation_width,
+                      mean_height, standard_deviation_height);
+  this->seed = std::chrono::steady_clock::now().time_since_epoch().count();
+  projector_.setSeed(this->seed);
+
   // gt ≡ ground truth
   std::string gt_bounding_boxes_topic = getStringParameter(_sdf, "gtBoundingBoxesTopic",
                                       "ground_truth_bounding_boxes", "Bounding Boxes Publisher");
@@ -162,33 +185,28 @@ void BoundingBoxesPlugin::cones_callback(
   // Reset the last simulation time
   _last_sim_time = curTime;
 
-  std::vector<eufs_msgs::msg::ConeWithCovariance> blue_cones = msg->blue_cones;
-  std::vector<eufs_msgs::msg::ConeWithCovariance> yellow_cones = msg->yellow_cones;
-  std::vector<eufs_msgs::msg::ConeWithCovariance> orange_cones = msg->orange_cones;
-  std::vector<eufs_msgs::msg::ConeWithCovariance> big_orange_cones = msg->big_orange_cones;
-
-  // Get the cone position of each color and find it's bounding boxes position
-  auto [ground_truth_blue_bounding_boxes, noisy_blue_bounding_boxes] =
-      projectToImagePlane(blue_cones, small_cones);
-  auto [ground_truth_yellow_bounding_boxes, noisy_yellow_bounding_boxes] =
-      projectToImagePlane(yellow_cones, small_cones);
-  auto [ground_truth_orange_bounding_boxes, noisy_orange_bounding_boxes] =
-      projectToImagePlane(orange_cones, small_cones);
-  auto [ground_truth_big_orange_bounding_boxes, noisy_big_orange_bounding_boxes] =
-      projectToImagePlane(big_orange_cones, big_cones);
-
   eufs_msgs::msg::BoundingBoxes ground_truth_bounding_boxes_msg;
-  update_msg(ground_truth_bounding_boxes_msg, msg->header,
-          ground_truth_blue_bounding_boxes, ground_truth_yellow_bounding_boxes,
-          ground_truth_orange_bounding_boxes, ground_truth_big_orange_bounding_boxes);
-
   eufs_msgs::msg::BoundingBoxes noisy_bounding_boxes_msg;
+  ground_truth_bounding_boxes_msg.header = msg->header;
+  ground_truth_bounding_boxes_msg.image_header = msg->header;
+  noisy_bounding_boxes_msg.header = msg->header;
+  noisy_bounding_boxes_msg.image_header = msg->header;
 
-  update_msg(noisy_bounding_boxes_msg, msg->header,
-            noisy_blue_bounding_boxes,
-            noisy_yellow_bounding_boxes,
-            noisy_orange_bounding_boxes,
-            noisy_big_orange_bounding_boxes);
+  // At most one bounding box per cone
+  const size_t num_cones = msg->blue_cones.size() + msg->yellow_cones.size() +
+                           msg->orange_cones.size() + msg->big_orange_cones.size();
+  ground_truth_bounding_boxes_msg.bounding_boxes.reserve(num_cones);
+  noisy_bounding_boxes_msg.bounding_boxes.reserve(num_cones);
+
+  // Get the cone position of each color and find it's bounding boxes position
+  projectCones(msg->blue_cones, small_cones, "blue",
+               ground_truth_bounding_boxes_msg, noisy_bounding_boxes_msg);
+  projectCones(msg->yellow_cones, small_cones, "yellow",
+               ground_truth_bounding_boxes_msg, noisy_bounding_boxes_msg);
+  projectCones(msg->orange_cones, small_cones, "orange",
+               ground_truth_bounding_boxes_msg, noisy_bounding_boxes_msg);
+  projectCones(msg->big_orange_cones, big_cones, "big-orange",
+               ground_truth_bounding_boxes_msg, noisy_bounding_boxes_msg);
 
   // Publish camera info
   custom_cam_info_pub->publish(cam_info_);
@@ -198,18 +216,24 @@ void BoundingBoxesPlugin::cones_callback(
   this->bounding_boxes_with_noise_pub->publish(noisy_bounding_boxes_msg);
   }
 
-void BoundingBoxesPlugin::update_msg(
-  eufs_msgs::msg::BoundingBoxes &bounding_boxes_msg, std_msgs::msg::Header header,
-  std::vector<std::vector<double>> blue_cones,
-  std::vector<std::vector<double>> yellow_cones,
-  std::vector<std::vector<double>> orange_cones,
-  std::vector<std::vector<double>> big_orange_cones) {
-  bounding_boxes_msg.header = header;
-  bounding_boxes_msg.image_header = header;
-  push_back_bounding_boxes_msg(bounding_boxes_msg, blue_cones, "blue");
-  push_back_bounding_boxes_msg(bounding_boxes_msg, yellow_cones, "yellow");
-  push_back_bounding_boxes_msg(bounding_boxes_msg, orange_cones, "orange");
-  push_back_bounding_boxes_msg(bounding_boxes_msg, big_orange_cones, "big-orange");
+void BoundingBoxesPlugin::projectCones(
+  const std::vector<eufs_msgs::msg::ConeWithCovariance> &cones_vector,
+  const ConeInfo &cone_info_, const std::string &color,
+  eufs_msgs::msg::BoundingBoxes &ground_truth_bounding_boxes_msg,
+  eufs_msgs::msg::BoundingBoxes &noisy_bounding_boxes_msg) {
+  cone_points_.resize(3, cones_vector.size());
+  for (size_t i = 0; i < cones_vector.size(); i++) {
+    cone_points_(0, i) = cones_vector[i].point.x;
+    cone_points_(1, i) = cones_vector[i].point.y;
+    cone_points_(2, i) = cones_vector[i].point.z;
+  }
+
+  // Ground truth and noisy bounding boxes of the cones in view
+  projector_.project(cone_points_, cone_info_.radius, cone_info_.height, ground_truth_boxes_);
+  projector_.addNoise(ground_truth_boxes_, noisy_boxes_);
+
+  push_back_bounding_boxes_msg(ground_truth_bounding_boxes_msg, ground_truth_boxes_, color);
+  push_back_bounding_boxes_msg(noisy_bounding_boxes_msg, noisy_boxes_, color);
 }
 
 void BoundingBoxesPlugin::getTransform(
@@ -252,118 +276,16 @@ void BoundingBoxesPlugin::setCameraInfo(
   cam_info_.set__distortion_model(distortion_model_);
 }
 
-std::tuple<std::vector<std::vector<double>>, std::vector<std::vector<double>>>
-    BoundingBoxesPlugin::projectToImagePlane(std::vector<eufs_msgs::msg::ConeWithCovariance>
-                  &cones_vector, const ConeInfo cone_info_) {
-  std::vector<std::vector<double>> bounding_boxes_vector;
-  std::vector<std::vector<double>> noisy_bounding_boxes_vector;
-
-  for (size_t i = 0; i  < cones_vector.size(); i++) {
-    double x = cones_vector[i].point.x;
-    double y = cones_vector[i].point.y;
-    double z = cones_vector[i].point.z;
-
-    tf2::Vector3 new_point(x, y, z);
-    new_point = transform * new_point;
-
-    // Ground Truth Bounding Boxes
-    double y_min, y_max, z_min, z_max;
-    y_min = new_point.y();
-    z_min = new_point.z();
-    y_max = new_point.y() - 2 * cone_info_.radius;
-    z_max = new_point.z() + cone_info_.height;
-
-    // For some reason, defining this in the header file messes up the bounding boxes visualizer
-    // but defining it here seems to work.
-    std::vector<double> ground_truth_bounding_box;
-
-    // For right cones
-    if (new_point.y() < 0) {
-    top_left_point = camera_model.project3dToPixel(
-                                  cv::Point3d(-y_min, -z_max, new_point.x() + cone_info_.radius));
-    bottom_right_point = camera_model.project3dToPixel(
-                                  cv::Point3d(-y_max, -z_min, new_point.x() - cone_info_.radius));
-    ground_truth_bounding_box.insert(ground_truth_bounding_box.end(), {bottom_right_point.x,
-                                      top_left_point.y, top_left_point.x, bottom_right_point.y});
-    } else {
-    // For left cones
-    top_right_point = camera_model.project3dToPixel(
-                                  cv::Point3d(-y_max, -z_max, new_point.x() + cone_info_.radius));
-    bottom_left_point = camera_model.project3dToPixel(
-                                  cv::Point3d(-y_min, -z_min, new_point.x() - cone_info_.radius));
-    ground_truth_bounding_box.insert(ground_truth_bounding_box.end(), {top_right_point.x,
-                                     top_right_point.y, bottom_left_point.x, bottom_left_point.y});
-    }
-
-    // Noisy Bounding Boxes
-    // Randomize seed to generate different normal distribution value
-    std::normal_distribution<double> distNRadius(mean_width, standard_deviation_width);
-    std::normal_distribution<double> distNHeight(mean_height, standard_deviation_height);
-    std::default_random_engine seed_height = generate_seed();
-    std::default_random_engine seed_width = generate_seed();
-    std::default_random_engine seed_bounding_box = generate_seed();
-
-    double gaussian_noise_width = static_cast<double>(distNRadius(seed_width));
-    double gaussian_noise_height = static_cast<double>(distNHeight(seed_height));
-
-    std::vector<double> noisy_bounding_box;
-
-    // For right cones
-    if (new_point.y() < 0) {
-      noisy_bounding_box.insert(noisy_bounding_box.end(),
-                                {bottom_right_point.x + gaussian_noise_width,
-                                  top_left_point.y + gaussian_noise_height,
-                                  top_left_point.x - gaussian_noise_width,
-                                  bottom_right_point.y - gaussian_noise_height});
-    } else {
-    // For left cones
-      noisy_bounding_box.insert(noisy_bounding_box.end(),
-                                {top_right_point.x + gaussian_noise_width,
-                                  top_right_point.y + gaussian_noise_height,
-                                  bottom_left_point.x - gaussian_noise_width,
-                                  bottom_left_point.y - gaussian_noise_height});
-    }
-
-    // Add noise to the bounding box
-    add_gaussian_noise_to_bounding_box(noisy_bounding_box, seed_bounding_box);
-
-    bounding_boxes_vector.push_back(ground_truth_bounding_box);
-    noisy_bounding_boxes_vector.push_back(noisy_bounding_box);
-  }
-
-  return {bounding_boxes_vector, noisy_bounding_boxes_vector};
-}
-
-std::default_random_engine BoundingBoxesPlugin::generate_seed() {
-    unsigned seed = std::chrono::steady_clock::now().time_since_epoch().count();
-    std::default_random_engine seed_generator(seed);
-    return seed_generator;
-}
-
-void BoundingBoxesPlugin::add_gaussian_noise_to_bounding_box(
-        std::vector<double> &bounding_box_vector, std::default_random_engine seed) {
-  std::vector<double> bounding_box_with_noise;
-
-  // Define random generator with Gaussian distribution
-  std::normal_distribution<double> distN(mean_bb, standard_deviation_bb);
-
-  double gaussian_noise = static_cast<double>(distN(seed));
-
-  for (size_t i = 0; i < bounding_box_vector.size(); i++) {
-    bounding_box_vector[i] += gaussian_noise;
-  }
-}
-
 void BoundingBoxesPlugin::push_back_bounding_boxes_msg(
   eufs_msgs::msg::BoundingBoxes &bounding_boxes_msg,
-  std::vector<std::vector<double>> bounding_boxes_vector, std::string color) const {
-  for (size_t i = 0; i < bounding_boxes_vector.size(); i++) {
+  const BoundingBoxProjector::Boxes &bounding_boxes, const std::string &color) const {
+  for (Eigen::Index i = 0; i < bounding_boxes.cols(); i++) {
   eufs_msgs::msg::BoundingBox bounding_box_msg;
   bounding_box_msg.color = color;
-  bounding_box_msg.xmax = bounding_boxes_vector[i][0];
-  bounding_box_msg.ymax = bounding_boxes_vector[i][3];
-  bounding_box_msg.xmin = bounding_boxes_vector[i][2];
-  bounding_box_msg.ymin = bounding_boxes_vector[i][1];
+  bounding_box_msg.xmax = bounding_boxes(0, i);
+  bounding_box_msg.ymax = bounding_boxes(3, i);
+  bounding_box_msg.xmin = bounding_boxes(2, i);
+  bounding_box_msg.ymin = bounding_boxes(1, i);
   bounding_boxes_msg.bounding_boxes.push_back(bounding_box_msg);
   }
 }
@@ -0,0 +1 @@
+from .startup_profiler import StartupProfiler, profiler  # noqa: F401
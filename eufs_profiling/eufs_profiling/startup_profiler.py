@@ -0,0 +1,79 @@
+import importlib
+import os
+import sys
+import time
+
+ENV_VAR = "EUFS_PROFILE_STARTUP"
+
+
+class StartupProfiler:
+    """
+    Opt-in timing of rqt plugin startup.
+
+    Set `EUFS_PROFILE_STARTUP=1` before starting rqt and every plugin logs how
+    long its constructor took, split by `checkpoint`, along with each import
+    made through `import_module`. When the variable is unset every method
+    returns straight away, apart from `import_module` which then just imports.
+
+    Heavy dependencies (numpy, pandas, message packages) are imported through
+    `import_module` where they are first needed rather than at the top of the
+    plugin modules, so they show up in the report when they are paid for.
+    `python -X importtime` covers the plugin modules' own imports.
+    """
+
+    def __init__(self, enabled=None):
+        if enabled is None:
+            enabled = os.environ.get(ENV_VAR, "0").lower() not in ("", "0", "false")
+        self.enabled = enabled
+        self._start = {}
+        self._last = {}
+        self._timings = {}
+
+    def start(self, plugin):
+        """Marks the start of a plugin's startup."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._start[plugin] = now
+        self._last[plugin] = now
+        self._timings[plugin] = []
+
+    def checkpoint(self, plugin, name):
+        """Records the time since the previous checkpoint under `name`."""
+        if not self.enabled or plugin not in self._start:
+            return
+        now = time.perf_counter()
+        self._timings[plugin].append((name, now - self._last[plugin]))
+        self._last[plugin] = now
+
+    def import_module(self, plugin, name, log=print):
+        """
+        `importlib.import_module`, timed when profiling is enabled.
+
+        Imports made during startup are part of the plugin's report, later
+        (deferred) imports are logged straight away.
+        """
+        if not self.enabled or name in sys.modules:
+            return importlib.import_module(name)
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        duration = time.perf_counter() - start
+        if plugin in self._start:
+            self._timings[plugin].append((f"import {name}", duration))
+        else:
+            log(f"{plugin} deferred import {name} took {duration * 1000:.1f} ms")
+        return module
+
+    def report(self, plugin, log=print):
+        """Logs every timing recorded for the plugin, then forgets them."""
+        if not self.enabled or plugin not in self._start:
+            return
+        total = time.perf_counter() - self._start.pop(plugin)
+        del self._last[plugin]
+        log(f"{plugin} startup took {total * 1000:.1f} ms")
+        for name, duration in self._timings.pop(plugin):
+            log(f"  {duration * 1000:8.1f} ms  {name}")
+
+
+# Shared by every plugin in the same process
+profiler = StartupProfiler()
@@ -0,0 +1,21 @@
+from setuptools import setup
+
+package_name = 'eufs_profiling'
+
+setup(
+    name=package_name,
+    version='2.0.0',
+    packages=[package_name],
+    data_files=[
+        ('share/ament_index/resource_index/packages',
+            ['resource/' + package_name]),
+        ('share/' + package_name, ['package.xml']),
+    ],
+    install_requires=['setuptools'],
+    zip_safe=True,
+    maintainer='Cameron Matthew',
+    maintainer_email='cambobmat@icloud.com',
+    description='Startup profiling shared by the eufs_sim rqt plugins',
+    license='MIT',
+    tests_require=['pytest'],
+)
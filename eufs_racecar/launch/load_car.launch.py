@@ -1,6 +1,9 @@
+import hashlib
+import json
 import os
 from os.path import join
 from os.path import isfile
+from os.path import expanduser
 
 import xacro
 
@@ -36,35 +39,27 @@ def spawn_car(context, *args, **kwargs):
     noise_file = join(get_package_share_directory('eufs_models'), 'config', 'noise.yaml')
     recolor_config = join(get_package_share_directory('eufs_plugins'), 'config',
                           'cone_recolor.yaml')
+    publish_rates_config = join(get_package_share_directory('eufs_plugins'), 'config',
+                                'publish_rates.yaml')
     bounding_boxes_file = os.path.join(get_package_share_directory('eufs_plugins'),
                                        'config', 'boundingBoxes.yaml')
 
     xacro_path = join(get_package_share_directory('eufs_racecar'),
                       'robots', robot_name, 'robot.urdf.xacro')
-    urdf_path = join(get_package_share_directory('eufs_racecar'),
-                     'robots', robot_name, 'robot.urdf')
-
-    if not isfile(urdf_path):
-        os.mknod(urdf_path)
-
-    doc = xacro.process_file(xacro_path,
-                             mappings={
-                                 'robot_name': robot_name,
-                                 'vehicle_model': vehicle_model,
-                                 'command_mode': command_mode,
-                                 'config_file': config_file,
-                                 'noise_config': noise_file,
-                                 'recolor_config': recolor_config,
-                                 'publish_tf': publish_tf,
-                                 'simulate_perception': simulate_perception,
-                                 'pub_ground_truth': pub_ground_truth,
-                                 'bounding_box_settings': bounding_boxes_file,
-                             })
-    out = xacro.open_output(urdf_path)
-    out.write(doc.toprettyxml(indent='  '))
-
-    with open(urdf_path, 'r') as urdf_file:
-        robot_description = urdf_file.read()
+
+    urdf_path, robot_description = cached_urdf(xacro_path, mappings={
+        'robot_name': robot_name,
+        'vehicle_model': vehicle_model,
+        'command_mode': command_mode,
+        'config_file': config_file,
+        'noise_config': noise_file,
+        'recolor_config': recolor_config,
+        'publish_rates_config': publish_rates_config,
+        'publish_tf': publish_tf,
+        'simulate_perception': simulate_perception,
+        'pub_ground_truth': pub_ground_truth,
+        'bounding_box_settings': bounding_boxes_file,
+    })
 
     return [
         Node(
@@ -114,6 +109,73 @@ def spawn_car(context, *args, **kwargs):
     ]
 
 
+def urdf_cache_dir():
+    cache_home = os.environ.get('XDG_CACHE_HOME', join(expanduser('~'), '.cache'))
+    return join(cache_home, 'eufs_sim', 'urdf')
+
+
+def _inputs_digest(key, inputs):
+    """Hash of the cache key and the contents of every xacro input, or None if one is missing."""
+    digest = hashlib.sha256(key.encode())
+    for path in inputs:
+        try:
+            with open(path, 'rb') as f:
+                digest.update(path.encode() + b'\0' + f.read() + b'\0')
+        except OSError:
+            return None
+    return digest.hexdigest()
+
+
+def _write_atomic(path, content):
+    # Parallel launches may write the same file, each writes its own
+    # temporary file and the last rename wins (with identical contents)
+    tmp_path = f'{path}.{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def cached_urdf(xacro_path, mappings):
+    """
+    Returns the path and contents of the URDF generated from `xacro_path`.
+
+    URDFs are stored in a per-user cache directory under a hash of the xacro
+    path, the mappings and the contents of every file the xacro includes, so
+    launches with the same inputs reuse the same file and launches with
+    different robots or vehicle settings never share one. The files included
+    by the xacro are recorded next to the URDFs, keyed on the xacro path and
+    mappings only, so a hit is found without running xacro.
+    """
+    cache_dir = urdf_cache_dir()
+    key = json.dumps({'xacro': xacro_path, 'mappings': mappings}, sort_keys=True)
+    key_hash = hashlib.sha256(key.encode()).hexdigest()
+    inputs_path = join(cache_dir, key_hash + '.inputs.json')
+
+    try:
+        with open(inputs_path, 'r') as f:
+            inputs = json.load(f)
+    except (OSError, ValueError):
+        inputs = None
+
+    digest = _inputs_digest(key, inputs) if inputs is not None else None
+    if digest is not None and isfile(join(cache_dir, f'{digest}.urdf')):
+        urdf_path = join(cache_dir, f'{digest}.urdf')
+        with open(urdf_path, 'r') as urdf_file:
+            return urdf_path, urdf_file.read()
+
+    # Cache miss, run xacro and record every file it read
+    xacro.all_includes = []
+    doc = xacro.process_file(xacro_path, mappings=mappings)
+    robot_description = doc.toprettyxml(indent='  ')
+    inputs = [xacro_path] + sorted(set(xacro.all_includes))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    urdf_path = join(cache_dir, f'{_inputs_digest(key, inputs)}.urdf')
+    _write_atomic(urdf_path, robot_description)
+    _write_atomic(inputs_path, json.dumps(inputs))
+    return urdf_path, robot_description
+
+
 def generate_launch_description():
     rqt_perspective_file = join(get_package_share_directory('eufs_rqt'),
                                 'config', 'eufs_sim.perspective')
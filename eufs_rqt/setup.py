@@ -27,5 +27,6 @@ setup(
     description='RQT GUIs for eufs_sim',
     license='MIT',
     tests_require=['pytest'],
-    scripts=['scripts/eufs_robot_steering_gui', 'scripts/mission_control_gui'],
+    scripts=['scripts/eufs_robot_steering_gui', 'scripts/mission_control_gui',
+             'scripts/eufs_trial_runner'],
 )
@@ -34,7 +34,7 @@ import time
 # qt
 from qt_gui.plugin import Plugin
 from python_qt_binding import loadUi
-from python_qt_binding.QtCore import Qt, QTimer
+from python_qt_binding.QtCore import Qt, QTimer, Signal
 from python_qt_binding.QtGui import QKeySequence
 from python_qt_binding.QtWidgets import QShortcut, QWidget
 
@@ -42,13 +42,38 @@ from python_qt_binding.QtWidgets import QShortcut, QWidget
 from ament_index_python.packages import get_package_share_directory
 import rclpy
 from std_srvs.srv import Trigger
-from ackermann_msgs.msg import AckermannDriveStamped
+
+from eufs_profiling import profiler
+
+from .command_streamer import CommandStreamer
+from .input_sources import JoystickInput, ScriptedInput
 
 
 class EUFSRobotSteeringGUI(Plugin):
     slider_factor = 1000.0
 
+    # Default range of the linear slider and its units in each command mode
+    default_linear_ranges = {"acceleration": 1.00, "velocity": 5.00}
+    slider_units_of_modes = {"acceleration": "m/s^2", "velocity": "m/s"}
+
+    # Command mode requests the race car model hasn't answered within this
+    # many seconds are sent again
+    command_mode_timeout = 5.0
+    # Milliseconds between checks of the command mode request while waiting
+    # for the race car model
+    command_mode_poll_interval = 500
+
+    # Emitted from the ROS executor thread with the answer to the command mode
+    # request, so that it is handled in the Qt thread
+    command_mode_received = Signal(str)
+
+    # Emitted from the thread of the input source with every command it sends
+    # and when it ends by itself
+    input_received = Signal(float, float)
+    input_finished = Signal()
+
     def __init__(self, context):
+        profiler.start('EUFSRobotSteeringGUI')
         super(EUFSRobotSteeringGUI, self).__init__(context)
         self.setObjectName('EUFSRobotSteeringGUI')
 
@@ -64,6 +89,7 @@ class EUFSRobotSteeringGUI(Plugin):
         # Extend the widget with all attributes and children from UI file
         loadUi(ui_file, self._widget)
         self._widget.setObjectName('EUFSRobotSteeringGUI')
+        profiler.checkpoint('EUFSRobotSteeringGUI', 'load ui')
 
         # Show _widget.windowTitle on left-top of each plugin (when
         # it's set in _widget). This is useful when you open multiple
@@ -79,12 +105,31 @@ class EUFSRobotSteeringGUI(Plugin):
         context.add_widget(self._widget)
 
         self._publisher = None
+        # Message type of the publisher, imported when it is first created
+        self._drive_msg_type = None
+
+        # Joystick or scripted input sending commands instead of the sliders,
+        # (name, path) it was made from and whether it waits for the car
+        self._input_source = None
+        self._input_config = ('Sliders', '')
+        self._input_pending = False
+        # Slider ranges, for scaling joystick inputs in the input's thread
+        self._linear_range = (0.0, 0.0)
+        self._angular_range = (0.0, 0.0)
 
         self._widget.topic_line_edit.textChanged.connect(
             self._on_topic_changed)
         self._widget.topic_line_edit.editingFinished.connect(
             self._on_topic_set)
         self._widget.stop_push_button.pressed.connect(self._on_stop_pressed)
+        self._widget.rate_double_spin_box.valueChanged.connect(
+            self._on_rate_changed)
+        self._widget.input_combo_box.currentIndexChanged.connect(
+            self._on_input_changed)
+        self._widget.input_line_edit.editingFinished.connect(
+            self._on_input_changed)
+        self.input_received.connect(self._on_input_received)
+        self.input_finished.connect(self._on_input_finished)
 
         self._widget.linear_slider.valueChanged.connect(
             self._on_linear_slider_changed)
@@ -195,37 +240,115 @@ class EUFSRobotSteeringGUI(Plugin):
             self._widget.decrease_angular_push_button.toolTip() + ' '
             + self.tr(
                 '([Shift +] D)'))
-
-        # Service to query the race car model for command mode on startup
+        profiler.checkpoint('EUFSRobotSteeringGUI', 'shortcuts')
+
+        # Service to query the race car model for command mode on startup.
+        # The request doesn't block rqt: the GUI waits for the car with the
+        # linear controls disabled and is configured when the answer arrives.
+        self.command_mode = None
+        self.slider_units = ""
+        # Linear ranges of each command mode from the saved settings
+        self._restored_linear_ranges = {}
+        self.command_mode_received.connect(self._on_command_mode_received)
         self.command_mode_srv = self.node.create_client(
             Trigger, "/race_car_model/command_mode")
-        self.command_mode = self.request_command_mode()
+        self._command_mode_future = None
+        self._command_mode_request_time = None
+        self._command_mode_timer = QTimer(self)
+        self._command_mode_timer.timeout.connect(self.request_command_mode)
+        self._set_waiting_for_car(True)
+        self._command_mode_timer.start(
+            EUFSRobotSteeringGUI.command_mode_poll_interval)
+        self.request_command_mode()
+        profiler.checkpoint('EUFSRobotSteeringGUI', 'command mode request')
+
+        # thread to consecutively send AckermannDriveStamped messages at a
+        # fixed rate, started once the publisher is created
+        self._streamer = CommandStreamer(
+            self._send_ackermann_drive_stamped,
+            self._widget.rate_double_spin_box.value())
+        self._update_ranges()
+
+        # timer to show how steadily the messages are sent
+        self._stream_stats_timer = QTimer(self)
+        self._stream_stats_timer.timeout.connect(self._on_stream_stats_timer)
+        self._stream_stats_timer.start(1000)
+        profiler.report('EUFSRobotSteeringGUI', log=self.logger.info)
 
-        # Configure default maximum slider value
-        default_vel_range = 5.00
-        default_acc_range = 1.00
-
-        if self.command_mode == "acceleration":
-            self._widget.max_linear_double_spin_box.setValue(default_acc_range)
-            self._widget.min_linear_double_spin_box.setValue(
-                -default_acc_range)
-            self.slider_units = "m/s^2"
-        elif self.command_mode == "velocity":
-            self._widget.max_linear_double_spin_box.setValue(default_vel_range)
-            self._widget.min_linear_double_spin_box.setValue(
-                -default_vel_range)
-            self.slider_units = "m/s"
-        else:
+    def request_command_mode(self):
+        """Requests command mode from race_car_model without blocking.
+
+        Called by a timer until the command mode is known: sends the request
+        once the service is available and sends it again if it times out.
+        The answer arrives in _on_command_mode_response.
+        """
+        if self.command_mode is not None:
+            self._command_mode_timer.stop()
+            return
+
+        if self._command_mode_future is not None:
+            waited = time.monotonic() - self._command_mode_request_time
+            if waited < EUFSRobotSteeringGUI.command_mode_timeout:
+                return
+            self.logger.warn(
+                "command mode request timed out after %.1f s, "
+                "requesting again" % waited)
+            self._command_mode_future.cancel()
+            self._command_mode_future = None
+
+        if not self.command_mode_srv.service_is_ready():
+            self.logger.debug(
+                'command mode service not available, waiting again...')
+            return
+
+        future = self.command_mode_srv.call_async(Trigger.Request())
+        future.add_done_callback(self._on_command_mode_response)
+        self._command_mode_future = future
+        self._command_mode_request_time = time.monotonic()
+        self.logger.debug("command mode request sent.")
+
+    def _on_command_mode_response(self, future):
+        # Called in the ROS executor thread
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.command_mode_received.emit(future.result().message)
+
+    def _on_command_mode_received(self, command_mode):
+        # Answers to requests that timed out can still arrive
+        if self.command_mode is not None:
+            return
+        self._command_mode_future = None
+
+        if command_mode not in EUFSRobotSteeringGUI.default_linear_ranges:
+            # The timer, still running, requests the command mode again
             self.logger.error(
                 "Invalid command mode: '{}', must be 'acceleration' or "
-                "'velocity'".format(
-                    self.command_mode))
+                "'velocity', requesting again".format(
+                    command_mode))
+            self._widget.current_linear_label.setText("invalid command mode")
+            return
 
-        # Update sliders to use configurable units
-        self._widget.current_linear_label.setText(
-            ('%0.2f ' + self.slider_units) % (
-                self._widget.linear_slider.value()
-                / EUFSRobotSteeringGUI.slider_factor))
+        self.logger.debug("command mode request completed.")
+        self._command_mode_timer.stop()
+
+        self.command_mode = command_mode
+        self._configure_command_mode()
+        self._restore_linear_range()
+        self._set_waiting_for_car(False)
+
+        # Inputs selected while waiting start now, so scripts start with the
+        # car ready
+        if self._input_pending:
+            self._start_input_source()
+
+    def _configure_command_mode(self):
+        # Configure default maximum slider value
+        default_range = EUFSRobotSteeringGUI.default_linear_ranges[
+            self.command_mode]
+        self._widget.max_linear_double_spin_box.setValue(default_range)
+        self._widget.min_linear_double_spin_box.setValue(-default_range)
+        self.slider_units = EUFSRobotSteeringGUI.slider_units_of_modes[
+            self.command_mode]
 
         self._widget.max_linear_double_spin_box.setToolTip(
             "Maximum linear " + self.command_mode)
@@ -238,30 +361,28 @@ class EUFSRobotSteeringGUI(Plugin):
         self._widget.decrease_linear_push_button.setToolTip(
             "Decrease linear " + self.command_mode)
 
-        # timer to consecutively send AckermannDriveStamped messages
-        self._update_parameter_timer = QTimer(self)
-        self._update_parameter_timer.timeout.connect(
-            self._on_parameter_changed)
-        self._update_parameter_timer.start(100)
-        self.zero_cmd_sent = False
-
-    def request_command_mode(self):
-        """Requests command mode from race_car_model"""
-        while not self.command_mode_srv.wait_for_service(timeout_sec=4.0):
-            self.logger.debug(
-                'command mode service not available, waiting again...')
-
-        req = Trigger.Request()
-        future = self.command_mode_srv.call_async(req)
-
-        while not future.done():
-            self.logger.debug(
-                "Waiting for command mode request to complete...")
-            time.sleep(0.1)
+    def _set_waiting_for_car(self, waiting):
+        """Disables the linear controls until the command mode (and so the
+        unit of the linear slider) is known"""
+        for widget in (self._widget.linear_slider,
+                       self._widget.max_linear_double_spin_box,
+                       self._widget.min_linear_double_spin_box,
+                       self._widget.increase_linear_push_button,
+                       self._widget.reset_linear_push_button,
+                       self._widget.decrease_linear_push_button):
+            widget.setEnabled(not waiting)
+        if waiting:
+            self._widget.linear_slider.setValue(0)
+        self._update_linear_label()
 
-        self.logger.debug("command mode request completed.")
-        result = future.result()
-        return result.message
+    def _update_linear_label(self):
+        if self.command_mode is None:
+            self._widget.current_linear_label.setText("waiting for car")
+            return
+        self._widget.current_linear_label.setText(
+            ('%0.2f ' + self.slider_units) % (
+                self._widget.linear_slider.value()
+                / EUFSRobotSteeringGUI.slider_factor))
 
     def _on_topic_changed(self, topic):
         self._unregister_publisher()
@@ -279,11 +400,17 @@ class EUFSRobotSteeringGUI(Plugin):
                 "be empty")
             return
 
+        if self._drive_msg_type is None:
+            ackermann_msgs = profiler.import_module(
+                'EUFSRobotSteeringGUI', 'ackermann_msgs.msg',
+                log=self.logger.info)
+            self._drive_msg_type = ackermann_msgs.AckermannDriveStamped
+
         # Catches "topics can't end in backslash" error
         try:
             self._publisher = self.node.create_publisher(
-                AckermannDriveStamped, self.topic, 10)
-            self._update_parameter_timer.start(100)
+                self._drive_msg_type, self.topic, 10)
+            self._streamer.start()
             if log:
                 self.logger.info(
                     "Set EUFS Robot Steering GUI publisher's topic to: "
@@ -299,29 +426,34 @@ class EUFSRobotSteeringGUI(Plugin):
             return
 
     def _on_stop_pressed(self):
+        # Stopping an input source hands control back to the sliders, which
+        # are reset to zero
+        if self._input_source is not None:
+            self._widget.input_combo_box.setCurrentIndex(0)
+            return
+
         # If the current value of sliders is zero directly send stop
         # AckermannDriveStamped msg
         if self._widget.linear_slider.value() == 0 and \
                 self._widget.angular_slider.value() == 0:
-            self.zero_cmd_sent = False
-            self._on_parameter_changed()
+            self._streamer.send_stop()
         else:
             self._widget.linear_slider.setValue(0)
             self._widget.angular_slider.setValue(0)
 
     def _on_linear_slider_changed(self):
-        self._widget.current_linear_label.setText(
-            ('%0.2f ' + self.slider_units) % (
-                self._widget.linear_slider.value()
-                / EUFSRobotSteeringGUI.slider_factor))
+        self._update_linear_label()
         self._on_parameter_changed()
 
     def _on_angular_slider_changed(self):
+        self._update_angular_label()
+        self._on_parameter_changed()
+
+    def _update_angular_label(self):
         self._widget.current_angular_label.setText(
             '%0.2f rad' % (
                 self._widget.angular_slider.value()
                 / EUFSRobotSteeringGUI.slider_factor))
-        self._on_parameter_changed()
 
     def _on_increase_linear_pressed(self):
         self._widget.linear_slider.setValue(
@@ -352,18 +484,22 @@ class EUFSRobotSteeringGUI(Plugin):
     def _on_max_linear_changed(self, value):
         self._widget.linear_slider.setMaximum(
             value * EUFSRobotSteeringGUI.slider_factor)
+        self._update_ranges()
 
     def _on_min_linear_changed(self, value):
         self._widget.linear_slider.setMinimum(
             value * EUFSRobotSteeringGUI.slider_factor)
+        self._update_ranges()
 
     def _on_max_angular_changed(self, value):
         self._widget.angular_slider.setMaximum(
             value * EUFSRobotSteeringGUI.slider_factor)
+        self._update_ranges()
 
     def _on_min_angular_changed(self, value):
         self._widget.angular_slider.setMinimum(
             value * EUFSRobotSteeringGUI.slider_factor)
+        self._update_ranges()
 
     def _on_strong_increase_linear_pressed(self):
         self._widget.linear_slider.setValue(
@@ -385,18 +521,126 @@ class EUFSRobotSteeringGUI(Plugin):
             self._widget.angular_slider.value()
             - self._widget.angular_slider.pageStep())
 
+    def _update_ranges(self):
+        self._linear_range = (
+            self._widget.min_linear_double_spin_box.value(),
+            self._widget.max_linear_double_spin_box.value())
+        self._angular_range = (
+            self._widget.min_angular_double_spin_box.value(),
+            self._widget.max_angular_double_spin_box.value())
+
+    def _on_input_changed(self, *args):
+        config = (self._widget.input_combo_box.currentText(),
+                  self._widget.input_line_edit.text().strip())
+        if config == self._input_config:
+            return
+        self._stop_input_source()
+        self._input_config = config
+
+        name, path = config
+        if name == 'Joystick':
+            self._input_source = JoystickInput(path)
+        elif name == 'Script' and path:
+            self._input_source = ScriptedInput(path)
+        else:
+            return
+        self._start_input_source()
+
+    def _start_input_source(self):
+        if self.command_mode is None:
+            self._input_pending = True
+            return
+        self._input_pending = False
+
+        source = self._input_source
+        try:
+            source.start(
+                lambda linear, angular, stamp: self._on_input_command(
+                    linear, angular, stamp, source.normalized),
+                self.input_finished.emit)
+        except (OSError, ValueError, RuntimeError) as e:
+            self.logger.error(
+                "Could not start %s input: %s" % (self._input_config[0], e))
+            self._input_source = None
+            self._widget.input_combo_box.setCurrentIndex(0)
+            return
+
+        self._widget.linear_slider.setEnabled(False)
+        self._widget.angular_slider.setEnabled(False)
+        self.logger.info("EUFS Robot Steering GUI input set to: %s %s" %
+                         self._input_config)
+
+    def _stop_input_source(self):
+        self._input_pending = False
+        if self._input_source is None:
+            return
+        self._input_source.stop()
+        self._input_source = None
+
+        # Back to the sliders, from zero
+        self._widget.linear_slider.setEnabled(self.command_mode is not None)
+        self._widget.angular_slider.setEnabled(True)
+        self._widget.linear_slider.setValue(0)
+        self._widget.angular_slider.setValue(0)
+        self._on_parameter_changed()
+
+    def _on_input_command(self, linear, angular, stamp, normalized):
+        # Called in the input source's thread, sends the command through the
+        # streamer straight away and shows it on the sliders in the Qt thread
+        if normalized:
+            linear *= self._linear_range[1] if linear > 0 else -self._linear_range[0]
+            angular *= self._angular_range[1] if angular > 0 else -self._angular_range[0]
+        self._streamer.set_command(linear, angular, stamp)
+        self.input_received.emit(linear, angular)
+
+    def _on_input_received(self, linear, angular):
+        # Commands of an input that was stopped can still arrive
+        if self._input_source is None:
+            return
+        for slider, value in ((self._widget.linear_slider, linear),
+                              (self._widget.angular_slider, angular)):
+            slider.blockSignals(True)
+            slider.setValue(int(round(
+                value * EUFSRobotSteeringGUI.slider_factor)))
+            slider.blockSignals(False)
+        self._update_linear_label()
+        self._update_angular_label()
+
+    def _on_input_finished(self):
+        self.logger.info("EUFS Robot Steering GUI input finished: %s %s" %
+                         self._input_config)
+        self._widget.input_combo_box.setCurrentIndex(0)
+
     def _on_parameter_changed(self):
-        self._send_ackermann_drive_stamped(
+        # The sliders only show the commands of an input source
+        if self._input_source is not None:
+            return
+        # Sent by the streamer at its next deadline
+        self._streamer.set_command(
             self._widget.linear_slider.value()
             / EUFSRobotSteeringGUI.slider_factor,
             self._widget.angular_slider.value()
             / EUFSRobotSteeringGUI.slider_factor)
 
+    def _on_rate_changed(self, value):
+        self._streamer.set_rate(value)
+
+    def _on_stream_stats_timer(self):
+        stats = self._streamer.stats
+        if self._publisher is None or stats.rate == 0:
+            self._widget.stream_stats_label.setText('-')
+            return
+        self._widget.stream_stats_label.setText(
+            '%.1f Hz, jitter %.2f ms, latency %.1f ms' % (
+                stats.rate, stats.jitter * 1000.0, stats.latency * 1000.0))
+
     def _send_ackermann_drive_stamped(self, linear, angular):
-        if self._publisher is None:
+        # Called from the streamer's thread, which only runs while there is a
+        # publisher. Nothing is sent before the command mode is known.
+        if self.command_mode is None:
             return
 
-        drive = AckermannDriveStamped()
+        drive = self._drive_msg_type()
         drive.header.stamp = self.node.get_clock().now().to_msg()
 
         drive.drive.acceleration = 0.0
@@ -409,24 +653,21 @@ class EUFSRobotSteeringGUI(Plugin):
         drive.drive.steering_angle = angular
         drive.drive.steering_angle_velocity = 0.0
 
-        # Only send the zero command once so other devices can take control
-        if linear == 0 and angular == 0:
-            if not self.zero_cmd_sent:
-                self.zero_cmd_sent = True
-                self._publisher.publish(drive)
-        else:
-            self.zero_cmd_sent = False
-            self._publisher.publish(drive)
+        # The streamer only sends the zero command once
+        self._publisher.publish(drive)
 
     def _unregister_publisher(self):
         if self._publisher is not None:
-            self._update_parameter_timer.stop()
+            self._streamer.stop()
             assert (self.node.destroy_publisher(
                 self._publisher)), 'Publisher could not be destroyed.'
             self._publisher = None
 
     def shutdown_plugin(self):
-        self._update_parameter_timer.stop()
+        self._command_mode_timer.stop()
+        self._stream_stats_timer.stop()
+        if self._input_source is not None:
+            self._input_source.stop()
         self._unregister_publisher()
         # Note: do not destroy the node here as it could cause errors for
         # the Mission Control GUI
@@ -435,6 +676,12 @@ class EUFSRobotSteeringGUI(Plugin):
     def save_settings(self, plugin_settings, instance_settings):
         instance_settings.set_value(
             'ackermann_topic', self._widget.topic_line_edit.text())
+        instance_settings.set_value(
+            'rate', self._widget.rate_double_spin_box.value())
+        instance_settings.set_value(
+            'input', self._widget.input_combo_box.currentText())
+        instance_settings.set_value(
+            'input_path', self._widget.input_line_edit.text())
 
         if self.command_mode == "velocity":
             instance_settings.set_value(
@@ -467,25 +714,29 @@ class EUFSRobotSteeringGUI(Plugin):
         # In order to make the topic be set
         self._on_topic_set(log=False)
 
-        if self.command_mode == 'acceleration':
-            value = self.get_param(
-                instance_settings, 'acc_max',
-                self._widget.max_linear_double_spin_box.value())
-            self._widget.max_linear_double_spin_box.setValue(float(value))
-            value = self.get_param(
-                instance_settings, 'acc_min',
-                self._widget.min_linear_double_spin_box.value())
-            self._widget.min_linear_double_spin_box.setValue(float(value))
-
-        elif self.command_mode == 'velocity':
-            value = self.get_param(
-                instance_settings, 'velx_max',
-                self._widget.max_linear_double_spin_box.value())
-            self._widget.max_linear_double_spin_box.setValue(float(value))
-            value = self.get_param(
-                instance_settings, 'velx_min',
-                self._widget.min_linear_double_spin_box.value())
-            self._widget.min_linear_double_spin_box.setValue(float(value))
+        value = self.get_param(instance_settings, 'rate',
+                               self._widget.rate_double_spin_box.value())
+        self._widget.rate_double_spin_box.setValue(float(value))
+
+        # Selecting the input starts it, once the car is ready
+        value = self.get_param(instance_settings, 'input_path', '')
+        self._widget.input_line_edit.setText(str(value))
+        value = self.get_param(instance_settings, 'input', 'Sliders')
+        index = self._widget.input_combo_box.findText(str(value))
+        self._widget.input_combo_box.setCurrentIndex(max(index, 0))
+
+        # The linear range depends on the command mode, which may not be
+        # known yet, so the ranges of both modes are read now and the one of
+        # the command mode is applied once it is known
+        for command_mode, max_name, min_name in (
+                ('acceleration', 'acc_max', 'acc_min'),
+                ('velocity', 'velx_max', 'velx_min')):
+            default = EUFSRobotSteeringGUI.default_linear_ranges[command_mode]
+            self._restored_linear_ranges[command_mode] = (
+                float(self.get_param(instance_settings, max_name, default)),
+                float(self.get_param(instance_settings, min_name, -default)))
+        if self.command_mode is not None:
+            self._restore_linear_range()
 
         value = self.get_param(
             instance_settings, 'w_max',
@@ -495,3 +746,10 @@ class EUFSRobotSteeringGUI(Plugin):
             instance_settings, 'w_min',
             self._widget.min_angular_double_spin_box.value())
         self._widget.min_angular_double_spin_box.setValue(float(value))
+
+    def _restore_linear_range(self):
+        if self.command_mode not in self._restored_linear_ranges:
+            return
+        maximum, minimum = self._restored_linear_ranges[self.command_mode]
+        self._widget.max_linear_double_spin_box.setValue(maximum)
+        self._widget.min_linear_double_spin_box.setValue(minimum)
@@ -4,19 +4,48 @@ import threading
 # qt
 from qt_gui.plugin import Plugin
 from python_qt_binding import loadUi
-from python_qt_binding.QtWidgets import QWidget, QComboBox, QPushButton, QLabel
+from python_qt_binding.QtCore import QTimer, Signal
+from python_qt_binding.QtWidgets import QWidget, QComboBox, QPushButton, QLabel, \
+    QSpinBox, QDoubleSpinBox
 
 # ROS
 from ament_index_python.packages import get_package_share_directory
-import rclpy
+from rclpy.callback_groups import ReentrantCallbackGroup
+from rclpy.executors import MultiThreadedExecutor
 from eufs_msgs.msg import CanState
 from std_srvs.srv import Trigger
 from eufs_msgs.srv import SetCanState
 
+from eufs_profiling import profiler
+
+from .service_caller import ServiceCaller
+from .trial_runner import TrialRunner, format_result, summarize
+
 
 class MissionControlGUI(Plugin):
 
+    # Threads of the executor spinning the node, so service responses are
+    # handled while state messages arrive
+    executor_threads = 2
+    # Most state display updates per second, /ros_can/state can be published
+    # far faster than the display refreshes
+    display_refresh_rate = 30
+
+    # Seconds to wait for a service to become available and for its response
+    service_timeout = 1.0
+
+    # Emitted from the executor's threads when a new state arrives, to update
+    # the display in the Qt thread
+    state_received = Signal()
+    # Emitted from the executor's threads with the ServiceResult of every call
+    service_result_received = Signal(object)
+    # Emitted from the executor's threads with the TrialResult of every trial
+    # and the list of them when all trials are done
+    trial_done = Signal(object)
+    trials_finished = Signal(object)
+
     def __init__(self, context):
+        profiler.start('MissionControlGUI')
         super(MissionControlGUI, self).__init__(context)
         self.setObjectName('MissionControlGUI')
 
@@ -31,6 +60,7 @@ class MissionControlGUI(Plugin):
         # Extend the widget with all attributes and children from UI file
         loadUi(ui_file, self._widget)
         self._widget.setObjectName('MissionControlUi')
+        profiler.checkpoint('MissionControlGUI', 'load ui')
 
         # Show _widget.windowTitle on left-top of each plugin (when
         # it's set in _widget). This is useful when you open multiple
@@ -63,9 +93,21 @@ class MissionControlGUI(Plugin):
                          CanState.AMI_JOYSTICK: "JOYSTICK",
                          }
 
+        # Widgets used after start up, looked up once
+        self._mission_select_menu = self._widget.findChild(
+            QComboBox, "MissionSelectMenu")
+        self._state_display = self._widget.findChild(QLabel, "StateDisplay")
+        self._mission_display = self._widget.findChild(
+            QLabel, "MissionDisplay")
+        self._service_status = self._widget.findChild(QLabel, "ServiceStatus")
+        self._trials_spin_box = self._widget.findChild(QSpinBox, "TrialsSpinBox")
+        self._trial_timeout_spin_box = self._widget.findChild(
+            QDoubleSpinBox, "TrialTimeoutSpinBox")
+        self._run_trials_button = self._widget.findChild(QPushButton, "RunTrialsButton")
+        self._trial_status = self._widget.findChild(QLabel, "TrialStatus")
+
         for mission in self.missions.values():
-            self._widget.findChild(
-                QComboBox, "MissionSelectMenu").addItem(mission)
+            self._mission_select_menu.addItem(mission)
 
         # hook up buttons to callbacks
         self._widget.findChild(
@@ -78,65 +120,108 @@ class MissionControlGUI(Plugin):
             QPushButton, "RequestEBS").clicked.connect(self.requestEBS)
         self._widget.findChild(
             QPushButton, "DriveButton").clicked.connect(self.setManualDriving)
+        self._run_trials_button.clicked.connect(self.runTrials)
+
+        profiler.checkpoint('MissionControlGUI', 'mission menu')
+
+        # Latest (as_state, ami_state) received, replaced by the executor's
+        # threads and read by the Qt thread, and the one displayed
+        self._latest_state = None
+        self._displayed_state = None
+        self._display_pending = False
+        self.state_received.connect(self._on_state_received)
+        self._display_timer = QTimer()
+        self._display_timer.setSingleShot(True)
+        self._display_timer.setInterval(
+            int(1000 / MissionControlGUI.display_refresh_rate))
+        self._display_timer.timeout.connect(self._refresh_display)
+
+        # Callbacks may run at the same time, none of them touch the widgets
+        self._callback_group = ReentrantCallbackGroup()
 
         # Subscribers
-        self.state_sub = self.node.create_subscription(CanState,
-                                                       "/ros_can/state",
-                                                       self.stateCallback, 10)
+        self.state_sub = self.node.create_subscription(
+            CanState, "/ros_can/state", self.stateCallback, 10,
+            callback_group=self._callback_group)
 
         # Publishers
 
         # Services
-        self.ebs_srv = self.node.create_client(Trigger, "/ros_can/ebs")
-        self.reset_srv = self.node.create_client(Trigger, "/ros_can/reset")
-        self.set_mission_cli = self.node.create_client(SetCanState, "/ros_can/set_mission")
-        self.reset_vehicle_pos_srv = self.node.create_client(Trigger,
-                                                             "/ros_can/reset_vehicle_pos")
-        self.reset_cone_pos_srv = self.node.create_client(Trigger,
-                                                          "/ros_can/reset_cone_pos")
+        self.ebs_srv = self.node.create_client(
+            Trigger, "/ros_can/ebs", callback_group=self._callback_group)
+        self.reset_srv = self.node.create_client(
+            Trigger, "/ros_can/reset", callback_group=self._callback_group)
+        self.set_mission_cli = self.node.create_client(
+            SetCanState, "/ros_can/set_mission", callback_group=self._callback_group)
+        self.reset_vehicle_pos_srv = self.node.create_client(
+            Trigger, "/ros_can/reset_vehicle_pos", callback_group=self._callback_group)
+        self.reset_cone_pos_srv = self.node.create_client(
+            Trigger, "/ros_can/reset_cone_pos", callback_group=self._callback_group)
+
+        # Calls don't wait on the Qt thread, their results are shown as they
+        # arrive, by service in the order first called
+        self._service_caller = ServiceCaller(self.node, MissionControlGUI.service_timeout,
+                                             self._callback_group)
+        self._service_results = {}
+        self.service_result_received.connect(self._show_service_result)
+
+        # Created when trials are run
+        self._trial_runner = None
+        self.trial_done.connect(self._on_trial_done)
+        self.trials_finished.connect(self._on_trials_finished)
 
         # Add widget to the user interface
         context.add_widget(self._widget)
 
-        thread = threading.Thread(target=self.ros_spin, daemon=True)
-        thread.start()
+        # Spin the node in a multithreaded executor of our own, handing it
+        # back to the executor it came from (rqt's) on shutdown
+        self._previous_executor = self.node.executor
+        self._executor = MultiThreadedExecutor(
+            num_threads=MissionControlGUI.executor_threads)
+        self._executor.add_node(self.node)
+        self._spin_thread = threading.Thread(target=self.ros_spin, daemon=True)
+        self._spin_thread.start()
+        profiler.checkpoint('MissionControlGUI', 'ros interfaces')
+        profiler.report('MissionControlGUI', log=self.node.get_logger().info)
 
     def ros_spin(self):
-        rclpy.spin(self.node)
+        try:
+            self._executor.spin()
+        except Exception as e:
+            # The executor is shut down while waiting on shutdown_plugin
+            self.node.get_logger().debug("Executor stopped: " + str(e))
 
     def sendRequest(self, mission_ami_state):
         """Sends a mission request to the simulated ros_can
         The mission request is of message type eufs_msgs/srv/SetCanState
         where only the ami_state field is used.
         """
-        if self.set_mission_cli.wait_for_service(timeout_sec=1):
-            request = SetCanState.Request()
-            request.ami_state = mission_ami_state
-            result = self.set_mission_cli.call_async(request)
-            self.node.get_logger().debug("Mission request sent successfully")
-            self.node.get_logger().debug(result)
-        else:
-            self.node.get_logger().warn(
-                "/ros_can/set_mission service is not available")
+        request = SetCanState.Request()
+        request.ami_state = mission_ami_state
+        self._service_caller.call(self.set_mission_cli, request, self._on_service_done)
 
     def setMission(self):
         """Requests ros_can to set mission"""
-        mission = self._widget.findChild(
-            QComboBox, "MissionSelectMenu").currentText()
+        mission = self._mission_select_menu.currentText()
 
         self.node.get_logger().debug(
             "Sending mission request for " + str(mission))
 
+        self.sendRequest(self._selected_mission())
+
+    def _selected_mission(self):
+        """Returns the AMI state of the mission selected in the menu"""
         # create message to be sent
         mission_msg = CanState()
 
         # find enumerated mission and set
+        mission = self._mission_select_menu.currentText()
         for enum, mission_name in self.missions.items():
             if mission_name == mission:
                 mission_msg.ami_state = enum
                 break
 
-        self.sendRequest(mission_msg.ami_state)
+        return mission_msg.ami_state
 
     def setManualDriving(self):
         self.node.get_logger().debug("Sending manual mission request")
@@ -148,90 +233,160 @@ class MissionControlGUI(Plugin):
         """Requests state_machine reset"""
         self.node.get_logger().debug("Requesting state_machine reset")
 
-        if self.reset_srv.wait_for_service(timeout_sec=1):
-            request = Trigger.Request()
-            result = self.reset_srv.call_async(request)
-            self.node.get_logger().debug("state reset successful")
-            self.node.get_logger().debug(result)
-        else:
-            self.node.get_logger().warn(
-                "/ros_can/reset service is not available")
+        self._service_caller.call(self.reset_srv, Trigger.Request(),
+                                  self._on_service_done)
 
     def resetVehiclePos(self):
         """Requests race car model position reset"""
         self.node.get_logger().debug(
             "Requesting race_car_model position reset")
 
-        if self.reset_vehicle_pos_srv.wait_for_service(timeout_sec=1):
-            request = Trigger.Request()
-            result = self.reset_vehicle_pos_srv.call_async(request)
-            self.node.get_logger().debug("Vehicle position reset successful")
-            self.node.get_logger().debug(result)
-        else:
-            self.node.get_logger().warn(
-                "/ros_can/reset_vehicle_pos service is not available")
+        self._service_caller.call(self.reset_vehicle_pos_srv, Trigger.Request(),
+                                  self._on_service_done)
 
     def resetConePos(self):
         """Requests gazebo_cone_ground_truth to reset cone position"""
         self.node.get_logger().debug(
             "Requesting gazebo_cone_ground_truth cone position reset")
 
-        if self.reset_cone_pos_srv.wait_for_service(timeout_sec=1):
-            request = Trigger.Request()
-            result = self.reset_cone_pos_srv.call_async(request)
-            self.node.get_logger().debug("Cone position reset successful")
-            self.node.get_logger().debug(result)
-        else:
-            self.node.get_logger().warn(
-                "/ros_can/reset_cone_pos service is not available")
+        self._service_caller.call(self.reset_cone_pos_srv, Trigger.Request(),
+                                  self._on_service_done)
 
     def resetSim(self):
         """Requests state machine, vehicle position and cone position reset"""
         self.node.get_logger().debug("Requesting Simulation Reset")
 
-        # Reset State Machine
-        self.resetState()
-
-        # Reset Vehicle Position
-        self.resetVehiclePos()
-
-        # Reset Cone Position
-        self.resetConePos()
+        # The resets are independent, so they are all requested at once
+        self._service_caller.call_all(
+            [(client, Trigger.Request()) for client in (
+                self.reset_srv, self.reset_vehicle_pos_srv, self.reset_cone_pos_srv)],
+            self._on_reset_sim_done)
+
+    def _on_service_done(self, result):
+        # Called in the executor's threads
+        if result.success:
+            self.node.get_logger().debug("%s succeeded in %.1f ms" % (
+                result.service, result.latency * 1000.0))
+        else:
+            self.node.get_logger().warn("%s failed: %s" % (
+                result.service, result.message))
+        self.service_result_received.emit(result)
+
+    def _on_reset_sim_done(self, results):
+        for result in results:
+            self._on_service_done(result)
+        if all(result.success for result in results):
+            self.node.get_logger().debug("Simulation reset in %.1f ms" % (
+                max(result.latency for result in results) * 1000.0))
+
+    def _show_service_result(self, result):
+        if result.success:
+            status = "%.1f ms" % (result.latency * 1000.0)
+        else:
+            status = "failed (%s)" % result.message
+        self._service_results[result.service] = status
+        self._service_status.setText("\n".join(
+            "%s: %s" % item for item in self._service_results.items()))
+
+    def runTrials(self):
+        """Runs the selected mission repeatedly, resetting the simulation
+        before every trial, or stops the trials being run"""
+        if self._trial_runner is not None and self._trial_runner.running:
+            self._trial_runner.stop()
+            self.node.get_logger().info(
+                "Trials stopped, " + summarize(self._trial_runner.results))
+            self._run_trials_button.setText("Run Trials")
+            return
+
+        if self._trial_runner is not None:
+            self._trial_runner.destroy()
+        self._trial_runner = TrialRunner(
+            self.node, self._service_caller,
+            [self.reset_srv, self.reset_vehicle_pos_srv, self.reset_cone_pos_srv],
+            self.set_mission_cli, self._selected_mission(),
+            self._trials_spin_box.value(), self._trial_timeout_spin_box.value(),
+            on_trial_done=self.trial_done.emit, on_finished=self.trials_finished.emit,
+            callback_group=self._callback_group)
+
+        self.node.get_logger().info("Running %d trials of %s" % (
+            self._trial_runner.trials, self._mission_select_menu.currentText()))
+        self._trial_status.setText("Trial 1/%d" % self._trial_runner.trials)
+        self._run_trials_button.setText("Stop Trials")
+        self._trial_runner.start()
+
+    def _on_trial_done(self, result):
+        runner = self._trial_runner
+        if runner is None:
+            return
+        self.node.get_logger().info(format_result(result))
+        self._trial_status.setText("%s\n%s" % (format_result(result),
+                                               summarize(runner.results)))
+
+    def _on_trials_finished(self, results):
+        self.node.get_logger().info(summarize(results))
+        self._run_trials_button.setText("Run Trials")
 
     def requestEBS(self):
         """Requests ros_can to go into EMERGENCY_BRAKE state"""
         self.node.get_logger().debug("Requesting EBS")
 
-        if self.ebs_srv.wait_for_service(timeout_sec=1):
-            request = Trigger.Request()
-            result = self.ebs_srv.call_async(request)
-            self.node.get_logger().debug("EBS successful")
-            self.node.get_logger().debug(result)
-        else:
-            self.node.get_logger().warn(
-                "/ros_can/ebs service is not available")
+        self._service_caller.call(self.ebs_srv, Trigger.Request(),
+                                  self._on_service_done)
 
     def stateCallback(self, msg):
-        """Reads the robot state from the message
-        and displays it within the GUI
+        """Reads the robot state from the message, to be displayed
+        within the GUI
+
+        Runs in the executor's threads, so the widgets are updated in the Qt
+        thread, at most once per display refresh however fast states arrive.
 
         Args:
             msg (eufs_msgs/CanState): state of race car
         """
-        if msg.ami_state == CanState.AMI_MANUAL:
-            self._widget.findChild(QLabel, "StateDisplay").setText(
-                "Manual Driving")
-            self._widget.findChild(QLabel, "MissionDisplay").setText(
-                "MANUAL")
+        self._latest_state = (msg.as_state, msg.ami_state)
+        runner = self._trial_runner
+        if runner is not None:
+            runner.on_state(msg.as_state, msg.ami_state)
+        if not self._display_pending:
+            self._display_pending = True
+            self.state_received.emit()
+
+    def _on_state_received(self):
+        # Wait for the next display refresh, taking the latest state then
+        if not self._display_timer.isActive():
+            self._display_timer.start()
+
+    def _refresh_display(self):
+        self._display_pending = False
+        state = self._latest_state
+        if state is None or state == self._displayed_state:
+            return
+        self._displayed_state = state
+
+        as_state, ami_state = state
+        if ami_state == CanState.AMI_MANUAL:
+            self._state_display.setText("Manual Driving")
+            self._mission_display.setText("MANUAL")
         else:
-            self._widget.findChild(QLabel, "StateDisplay").setText(
-                self.states[msg.as_state])
-            self._widget.findChild(QLabel, "MissionDisplay").setText(
-                self.missions[msg.ami_state])
+            self._state_display.setText(self.states.get(as_state, str(as_state)))
+            self._mission_display.setText(
+                self.missions.get(ami_state, str(ami_state)))
 
     def shutdown_plugin(self):
         """stop all publisher, subscriber and services
         necessary for clean shutdown"""
+        self._display_timer.stop()
+        if self._trial_runner is not None:
+            self._trial_runner.destroy()
+        self._service_caller.destroy()
+
+        # Stop spinning, giving the node back to rqt for the other plugins
+        self._executor.remove_node(self.node)
+        if self._previous_executor is not None:
+            self._previous_executor.add_node(self.node)
+        self._executor.shutdown()
+        self._spin_thread.join(timeout=1.0)
+
         assert (self.node.destroy_client(
             self.set_mission_cli)), "Mission client could not be destroyed"
         assert (self.node.destroy_subscription(
@@ -240,6 +395,10 @@ class MissionControlGUI(Plugin):
             self.ebs_srv)), "EBS client could not be destroyed"
         assert (self.node.destroy_client(
             self.reset_srv)), "State reset client could not be destroyed"
+        assert (self.node.destroy_client(
+            self.reset_vehicle_pos_srv)), "Vehicle position reset client could not be destroyed"
+        assert (self.node.destroy_client(
+            self.reset_cone_pos_srv)), "Cone position reset client could not be destroyed"
         # Note: do not destroy the node in shutdown_plugin as this could
         # cause errors for the Robot Steering GUI. Let ROS 2 clean up nodes
 
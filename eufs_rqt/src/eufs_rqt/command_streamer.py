@@ -0,0 +1,174 @@
+import collections
+import threading
+import time
+
+# Statistics of the streaming loop over the last `CommandStreamer.stats_window`
+# seconds (repeated zero commands are skipped but still count)
+#   rate: commands per second
+#   jitter: mean absolute difference between the interval between two
+#       commands and the period (seconds)
+#   max_late: largest delay of a command after its deadline (seconds)
+#   latency: mean time from an input (e.g. moving a slider) to the first time
+#       its command was published (seconds)
+StreamStats = collections.namedtuple('StreamStats', ['rate', 'jitter', 'max_late', 'latency'])
+
+
+class CommandStreamer:
+    """Publishes the latest command at a fixed rate from its own thread.
+
+    Commands are published on a schedule of absolute deadlines, so the rate
+    doesn't drift or depend on how busy the Qt event loop is. The GUI hands
+    commands over with `set_command`, which replaces a tuple the thread reads
+    (assigning an attribute is atomic), so neither side ever waits on a lock.
+
+    A zero command is only published once, so that other devices can take
+    control of the car while the GUI is idle; `send_stop` publishes it again.
+
+    Commands can be set from any thread (e.g. by an input source), the last
+    one set is published.
+    """
+
+    # Highest rate commands can be streamed at, the rate the race car model
+    # publishes its state at
+    max_rate = 200.0
+    stats_window = 2.0
+
+    def __init__(self, publish, rate=50.0, clock=time.monotonic):
+        """
+        Args:
+            publish (callable): called with (linear, angular) from the
+                streaming thread
+            rate (float): commands per second
+            clock (callable): monotonic time in seconds
+        """
+        self._publish = publish
+        self._clock = clock
+        self._period = 1.0 / self._clip_rate(rate)
+
+        # (linear, angular, time of the input), replaced whenever the input
+        # changes
+        self._command = (0.0, 0.0, clock())
+        self._stop_requests = 0
+        # Only written by the streaming thread
+        self._stops_handled = 0
+        self._zero_sent = False
+        self._published_input = None
+
+        self.stats = StreamStats(0.0, 0.0, 0.0, 0.0)
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def _clip_rate(cls, rate):
+        return min(max(float(rate), 1.0), cls.max_rate)
+
+    @property
+    def rate(self):
+        return 1.0 / self._period
+
+    def set_rate(self, rate):
+        # Picked up by the thread at its next deadline
+        self._period = 1.0 / self._clip_rate(rate)
+
+    def set_command(self, linear, angular, stamp=None):
+        """
+        Args:
+            stamp (float): time of the input, in the time of `clock`, to
+                measure the latency from (now if None)
+        """
+        self._command = (linear, angular, self._clock() if stamp is None else stamp)
+
+    def send_stop(self):
+        """Publishes a zero command even if one was already sent"""
+        self._command = (0.0, 0.0, self._clock())
+        self._stop_requests += 1
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        intervals = collections.deque()
+        lateness = collections.deque()
+        latencies = collections.deque()
+        last_published = None
+        last_stats = self._clock()
+        deadline = self._clock()
+
+        while True:
+            timeout = deadline - self._clock()
+            if self._stop.wait(timeout) if timeout > 0 else self._stop.is_set():
+                return
+
+            now = self._clock()
+            input_stamp = self._publish_command()
+            if input_stamp is not None:
+                latencies.append((now, now - input_stamp))
+
+            period = self._period
+            if last_published is not None:
+                intervals.append((now, now - last_published, period))
+                lateness.append(now - deadline)
+            last_published = now
+
+            # Keep to the schedule, unless more than a period behind (e.g. the
+            # rate was lowered or the process was suspended)
+            deadline += period
+            if deadline < now:
+                deadline = now + period
+
+            if now - last_stats >= 1.0:
+                window_start = now - CommandStreamer.stats_window
+                while intervals and intervals[0][0] < window_start:
+                    intervals.popleft()
+                    lateness.popleft()
+                while latencies and latencies[0][0] < window_start:
+                    latencies.popleft()
+                self.stats = self._compute_stats(intervals, lateness, latencies)
+                last_stats = now
+
+    def _publish_command(self):
+        """Returns the time of the input if its command was published for
+        the first time"""
+        command = self._command
+        linear, angular, stamp = command
+        stop_requests = self._stop_requests
+        if stop_requests != self._stops_handled:
+            self._stops_handled = stop_requests
+            self._zero_sent = False
+
+        # Only send the zero command once so other devices can take control
+        if linear == 0 and angular == 0:
+            if self._zero_sent:
+                return None
+            self._zero_sent = True
+        else:
+            self._zero_sent = False
+        self._publish(linear, angular)
+
+        if command is self._published_input:
+            return None
+        self._published_input = command
+        return stamp
+
+    @staticmethod
+    def _compute_stats(intervals, lateness, latencies):
+        if not intervals:
+            return StreamStats(0.0, 0.0, 0.0, 0.0)
+        total = sum(interval for _, interval, _ in intervals)
+        jitter = sum(abs(interval - period) for _, interval, period in intervals)
+        latency = (sum(latency for _, latency in latencies) / len(latencies)
+                   if latencies else 0.0)
+        return StreamStats(len(intervals) / total if total > 0 else 0.0,
+                           jitter / len(intervals), max(lateness), latency)
@@ -0,0 +1,206 @@
+import csv
+import importlib
+import select
+import threading
+import time
+
+
+class InputSource:
+    """Drives the Robot Steering GUI instead of its sliders.
+
+    A source runs in its own thread and calls `on_command(linear, angular,
+    stamp)` with every new command, `stamp` being the time.monotonic() time of
+    the input, so the latency from the input to the published command can be
+    measured. Sources with `normalized` set give values in [-1, 1], which the
+    GUI scales to the ranges of its sliders, others give the command itself.
+    `on_finished()` is called if the source ends by itself.
+    """
+
+    normalized = False
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, on_command, on_finished=None):
+        """Opens the source, raising an exception if it can't be used, and
+        starts its thread"""
+        if self._thread is not None:
+            return
+        self._open()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run_thread, args=(on_command, on_finished), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _run_thread(self, on_command, on_finished):
+        try:
+            self._run(on_command)
+        finally:
+            self._close()
+        if not self._stop.is_set() and on_finished is not None:
+            on_finished()
+
+    def _open(self):
+        pass
+
+    def _run(self, on_command):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+
+class ScriptedInput(InputSource):
+    """Replays a csv time series of commands.
+
+    Every row is `t, linear, steering`: the time (seconds from the start of
+    the script) at which the command starts, the acceleration (m/s^2) or
+    speed (m/s) depending on the car's command mode, and the steering angle
+    (radians). A header row is allowed. Commands are applied on a schedule
+    from the start, so every replay sends the same commands at the same times.
+    """
+
+    def __init__(self, path):
+        super(ScriptedInput, self).__init__()
+        self.path = path
+        self.rows = []
+
+    def _open(self):
+        rows = []
+        with open(self.path, 'r') as f:
+            for line_number, row in enumerate(csv.reader(f), start=1):
+                if not row or row[0].strip().startswith('#'):
+                    continue
+                try:
+                    t, linear, steering = (float(value) for value in row[:3])
+                except ValueError:
+                    if line_number == 1:
+                        # Header
+                        continue
+                    raise ValueError(
+                        "%s:%d: expected 't, linear, steering', got %s" % (
+                            self.path, line_number, ','.join(row)))
+                rows.append((t, linear, steering))
+        if not rows:
+            raise ValueError("%s has no commands" % self.path)
+        if any(rows[i + 1][0] < rows[i][0] for i in range(len(rows) - 1)):
+            raise ValueError("%s: times must not decrease" % self.path)
+        self.rows = rows
+
+    def _run(self, on_command):
+        start = time.monotonic()
+        for t, linear, steering in self.rows:
+            deadline = start + t
+            timeout = deadline - time.monotonic()
+            if timeout > 0 and self._stop.wait(timeout) or self._stop.is_set():
+                return
+            on_command(linear, steering, deadline)
+
+
+class JoystickInput(InputSource):
+    """Reads a joystick or gamepad through evdev.
+
+    Uses the first device with both axes if `device` (e.g. /dev/input/event5)
+    is empty. Pushing the linear axis forward (to its minimum, as on most
+    gamepads) increases the linear command and pushing the steering axis left
+    steers left. Needs the evdev Python package (python3-evdev) and read
+    access to the device.
+    """
+
+    normalized = True
+
+    def __init__(self, device='', linear_axis='ABS_Y', steering_axis='ABS_X',
+                 deadzone=0.05):
+        super(JoystickInput, self).__init__()
+        self.device_path = device
+        self.linear_axis = linear_axis
+        self.steering_axis = steering_axis
+        self.deadzone = deadzone
+        self._device = None
+
+    def _open(self):
+        try:
+            self._evdev = importlib.import_module('evdev')
+        except ImportError:
+            raise RuntimeError("joystick input needs the evdev Python package "
+                               "(python3-evdev)")
+        ecodes = self._evdev.ecodes
+        self._linear_code = ecodes.ecodes[self.linear_axis]
+        self._steering_code = ecodes.ecodes[self.steering_axis]
+
+        paths = [self.device_path] if self.device_path else self._evdev.list_devices()
+        for path in paths:
+            device = self._evdev.InputDevice(path)
+            axes = [code for code, _ in device.capabilities().get(ecodes.EV_ABS, [])]
+            if self._linear_code in axes and self._steering_code in axes:
+                self._device = device
+                break
+            device.close()
+        if self._device is None:
+            raise RuntimeError("no joystick with axes %s and %s found%s" % (
+                self.linear_axis, self.steering_axis,
+                " at " + self.device_path if self.device_path else ""))
+
+        self._ranges = {code: self._device.absinfo(code)
+                        for code in (self._linear_code, self._steering_code)}
+
+    def _normalize(self, code, value):
+        absinfo = self._ranges[code]
+        if absinfo.max == absinfo.min:
+            return 0.0
+        normalized = 2.0 * (value - absinfo.min) / (absinfo.max - absinfo.min) - 1.0
+        normalized = min(max(normalized, -1.0), 1.0)
+        return 0.0 if abs(normalized) < self.deadzone else normalized
+
+    def _run(self, on_command):
+        ecodes = self._evdev.ecodes
+        values = {code: self._normalize(code, absinfo.value)
+                  for code, absinfo in self._ranges.items()}
+
+        def send(stamp):
+            on_command(-values[self._linear_code], -values[self._steering_code], stamp)
+
+        # Start from where the sticks are
+        send(time.monotonic())
+        changed = False
+        stamp = None
+
+        while not self._stop.is_set():
+            # Wake up regularly to check whether to stop
+            readable, _, _ = select.select([self._device.fd], [], [], 0.1)
+            if not readable:
+                continue
+            try:
+                events = list(self._device.read())
+            except BlockingIOError:
+                continue
+            except OSError:
+                # Unplugged
+                return
+
+            for event in events:
+                if event.type == ecodes.EV_ABS and event.code in values:
+                    values[event.code] = self._normalize(event.code, event.value)
+                    if not changed:
+                        # Event times are wall clock times, the latency is
+                        # measured from when the kernel saw the input
+                        stamp = time.monotonic() - (time.time() - event.timestamp())
+                    changed = True
+                elif event.type == ecodes.EV_SYN and event.code == ecodes.SYN_REPORT \
+                        and changed:
+                    send(stamp)
+                    changed = False
+
+    def _close(self):
+        if self._device is not None:
+            self._device.close()
+            self._device = None
@@ -0,0 +1,172 @@
+import collections
+import threading
+import time
+
+# Outcome of a service call
+#   service: name of the service
+#   success: whether the service answered and reported success
+#   latency: round trip time, seconds from sending the request to the
+#       response (or from the call to giving up if it was never sent)
+#   message: the message of the response, or why the call failed
+ServiceResult = collections.namedtuple('ServiceResult',
+                                       ['service', 'success', 'latency', 'message'])
+
+
+class ServiceCaller:
+    """Calls ROS 2 services without blocking the caller.
+
+    `call` returns straight away: if the service isn't available yet the
+    request is sent once it is, and `on_done` is called with a ServiceResult
+    when the response arrives, the service doesn't become available in time
+    or no response arrives in time. Independent calls given to `call_all` are
+    in flight at the same time.
+
+    Waiting and timeouts are handled by a timer of the node, so `on_done` is
+    called from the threads of the executor spinning the node, never from the
+    caller's.
+    """
+
+    # How often services that aren't available yet and timeouts are checked
+    # (seconds)
+    poll_period = 0.05
+
+    def __init__(self, node, timeout=1.0, callback_group=None, clock=time.monotonic):
+        """
+        Args:
+            node (rclpy.node.Node): node of the clients
+            timeout (float): seconds to wait for a service to become available
+                and, once the request is sent, for its response
+            callback_group: callback group of the polling timer
+            clock (callable): monotonic time in seconds
+        """
+        self._node = node
+        self.timeout = timeout
+        self._clock = clock
+
+        # Calls waiting for their service or response
+        self._lock = threading.Lock()
+        self._calls = []
+
+        self._timer = node.create_timer(ServiceCaller.poll_period, self._poll,
+                                        callback_group=callback_group)
+        self._timer.cancel()
+
+    def call(self, client, request, on_done=None):
+        """Calls the service of `client` with `request`.
+
+        Args:
+            on_done (callable): called with the ServiceResult of the call
+        """
+        call = _Call(client, request, on_done, self._clock())
+        with self._lock:
+            self._calls.append(call)
+            if self._timer.is_canceled():
+                self._timer.reset()
+                # The executor may be waiting without the timer
+                if self._node.executor is not None:
+                    self._node.executor.wake()
+        # Send it now if we can rather than at the next poll
+        self._send_if_ready(call)
+
+    def call_all(self, calls, on_done=None):
+        """Calls several services at once.
+
+        Args:
+            calls (list): (client, request) pairs
+            on_done (callable): called with the list of ServiceResults, in the
+                order of `calls`, once all of them are done
+        """
+        results = [None] * len(calls)
+        remaining = [len(calls)]
+        lock = threading.Lock()
+
+        def on_call_done(index, result):
+            with lock:
+                results[index] = result
+                remaining[0] -= 1
+                done = remaining[0] == 0
+            if done and on_done is not None:
+                on_done(results)
+
+        if not calls and on_done is not None:
+            on_done(results)
+        for index, (client, request) in enumerate(calls):
+            self.call(client, request,
+                      lambda result, index=index: on_call_done(index, result))
+
+    def cancel_all(self):
+        """Abandons the calls in flight without calling their `on_done`"""
+        with self._lock:
+            calls, self._calls = self._calls, []
+            self._timer.cancel()
+        for call in calls:
+            call.finished = True
+            if call.future is not None:
+                call.future.cancel()
+
+    def destroy(self):
+        self.cancel_all()
+        self._node.destroy_timer(self._timer)
+
+    def _send_if_ready(self, call):
+        with self._lock:
+            if call.future is not None or call.finished or \
+                    not call.client.service_is_ready():
+                return
+            call.sent = self._clock()
+            call.future = call.client.call_async(call.request)
+        call.future.add_done_callback(lambda future: self._on_response(call, future))
+
+    def _on_response(self, call, future):
+        if future.cancelled():
+            # Cancelled on timeout, already reported
+            return
+        exception = future.exception()
+        if exception is not None:
+            self._finish(call, False, str(exception))
+            return
+        response = future.result()
+        self._finish(call, getattr(response, 'success', True),
+                     getattr(response, 'message', ''))
+
+    def _poll(self):
+        now = self._clock()
+        with self._lock:
+            calls = list(self._calls)
+        for call in calls:
+            if call.future is None:
+                if now - call.start > self.timeout:
+                    self._finish(call, False, "service is not available")
+                else:
+                    self._send_if_ready(call)
+            elif now - call.sent > self.timeout:
+                if self._finish(call, False, "no response"):
+                    call.future.cancel()
+
+    def _finish(self, call, success, message):
+        """Returns whether the call was finished by this, rather than before"""
+        with self._lock:
+            if call.finished:
+                return False
+            call.finished = True
+            self._calls.remove(call)
+            if not self._calls:
+                self._timer.cancel()
+        if call.on_done is not None:
+            start = call.start if call.sent is None else call.sent
+            call.on_done(ServiceResult(call.client.srv_name, success,
+                                       self._clock() - start, message))
+        return True
+
+
+class _Call:
+
+    def __init__(self, client, request, on_done, start):
+        self.client = client
+        self.request = request
+        self.on_done = on_done
+        # Time of the call and of sending the request
+        self.start = start
+        self.sent = None
+        self.future = None
+        self.finished = False
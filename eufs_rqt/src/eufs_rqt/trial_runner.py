@@ -0,0 +1,322 @@
+import argparse
+import collections
+import csv
+import threading
+import time
+
+from eufs_msgs.msg import CanState
+from eufs_msgs.srv import SetCanState
+from std_srvs.srv import Trigger
+
+from .service_caller import ServiceCaller
+
+# Result of a trial
+#   trial: number of the trial, from 1
+#   outcome: 'finished' (AS_FINISHED was reached), 'emergency'
+#       (AS_EMERGENCY_BRAKE was reached), 'timeout' or 'failed' (the
+#       simulation could not be reset or the mission set)
+#   duration: seconds from the mission being set to the end of the trial
+#   driving_time: seconds spent in AS_DRIVING (0 if it was never reached)
+#   reset_latency: seconds taken by the resets of the simulation
+#   message: why the trial failed, empty otherwise
+TrialResult = collections.namedtuple('TrialResult', ['trial', 'outcome', 'duration',
+                                                     'driving_time', 'reset_latency', 'message'])
+
+
+class TrialRunner:
+    """Runs a mission over and over, resetting the simulation between runs.
+
+    Every trial resets the state machine, the vehicle and the cones (at the
+    same time), sets the mission and then waits until the car reaches
+    AS_FINISHED or AS_EMERGENCY_BRAKE, or the timeout passes. The next trial
+    starts as soon as one ends, so hundreds of trials can be run in one
+    simulation.
+
+    The runner is driven by the callbacks of a node, so it never blocks: the
+    owner of the node forwards every /ros_can/state message to `on_state` and
+    spins the node. `on_trial_done(result)` and `on_finished(results)` are
+    called from the threads of the executor.
+    """
+
+    # How often the timeout of a trial is checked (seconds)
+    poll_period = 0.1
+
+    def __init__(self, node, service_caller, reset_clients, set_mission_client, mission,
+                 trials=1, timeout=300.0, on_trial_done=None, on_finished=None,
+                 callback_group=None, clock=time.monotonic):
+        """
+        Args:
+            node (rclpy.node.Node): node of the clients
+            service_caller (ServiceCaller): calls the services
+            reset_clients (list): Trigger clients of /ros_can/reset,
+                /ros_can/reset_vehicle_pos and /ros_can/reset_cone_pos
+            set_mission_client: SetCanState client of /ros_can/set_mission
+            mission (int): AMI state of the mission (a CanState.AMI_* value)
+            trials (int): number of trials
+            timeout (float): seconds a trial may take after the mission is set
+        """
+        self._node = node
+        self._service_caller = service_caller
+        self._reset_clients = reset_clients
+        self._set_mission_client = set_mission_client
+        self.mission = mission
+        self.trials = trials
+        self.timeout = timeout
+        self._on_trial_done = on_trial_done
+        self._on_finished = on_finished
+        self._clock = clock
+
+        self.results = []
+        # One of 'idle', 'resetting', 'setting_mission', 'starting' (waiting
+        # for the state machine to take the mission), 'running', 'driving'
+        # and 'ending' (reporting the result)
+        self.phase = 'idle'
+        self._lock = threading.Lock()
+        # Number of the current trial, callbacks of previous trials are ignored
+        self._trial = 0
+        self._reset_latency = 0.0
+        self._mission_set = None
+        self._driving_start = None
+
+        self._timer = node.create_timer(TrialRunner.poll_period, self._check_timeout,
+                                        callback_group=callback_group)
+        self._timer.cancel()
+
+    @property
+    def running(self):
+        return self.phase != 'idle'
+
+    @property
+    def trial(self):
+        return self._trial
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self.results = []
+            self._trial = 0
+            self._timer.reset()
+        self._start_trial()
+
+    def stop(self):
+        """Abandons the current trial, without calling `on_finished`"""
+        with self._lock:
+            self.phase = 'idle'
+            self._timer.cancel()
+
+    def destroy(self):
+        self.stop()
+        self._node.destroy_timer(self._timer)
+
+    def on_state(self, as_state, ami_state):
+        """Takes a state of /ros_can/state"""
+        with self._lock:
+            if self.phase not in ('starting', 'running', 'driving') or \
+                    ami_state != self.mission:
+                return
+
+            # States published before the reset may still arrive, so the
+            # trial only counts once the state machine is on its way again
+            if self.phase == 'starting':
+                if as_state in (CanState.AS_READY, CanState.AS_DRIVING):
+                    self.phase = 'running'
+                else:
+                    return
+
+            if as_state == CanState.AS_FINISHED:
+                result = self._end_trial('finished')
+            elif as_state == CanState.AS_EMERGENCY_BRAKE:
+                result = self._end_trial('emergency')
+            else:
+                if as_state == CanState.AS_DRIVING and self._driving_start is None:
+                    self._driving_start = self._clock()
+                    self.phase = 'driving'
+                return
+        self._report(result)
+
+    def _start_trial(self):
+        with self._lock:
+            if not self.running and self._trial > 0:
+                return
+            self._trial += 1
+            self.phase = 'resetting'
+            self._mission_set = None
+            self._driving_start = None
+            trial = self._trial
+
+        self._service_caller.call_all(
+            [(client, Trigger.Request()) for client in self._reset_clients],
+            lambda results: self._on_reset_done(trial, results))
+
+    def _on_reset_done(self, trial, results):
+        with self._lock:
+            if trial != self._trial or self.phase != 'resetting':
+                return
+            self._reset_latency = max([result.latency for result in results], default=0.0)
+            failures = [result for result in results if not result.success]
+            if failures:
+                result = self._end_trial('failed', "; ".join(
+                    "%s: %s" % (failure.service, failure.message) for failure in failures))
+            else:
+                self.phase = 'setting_mission'
+                result = None
+        if result is not None:
+            self._report(result)
+            return
+
+        request = SetCanState.Request()
+        request.ami_state = self.mission
+        self._service_caller.call(self._set_mission_client, request,
+                                  lambda result: self._on_mission_set(trial, result))
+
+    def _on_mission_set(self, trial, result):
+        with self._lock:
+            if trial != self._trial or self.phase != 'setting_mission':
+                return
+            if not result.success:
+                result = self._end_trial('failed', "%s: %s" % (result.service, result.message
+                                                               or "mission was not set"))
+            else:
+                self._mission_set = self._clock()
+                self.phase = 'starting'
+                result = None
+        if result is not None:
+            self._report(result)
+
+    def _check_timeout(self):
+        with self._lock:
+            if self._mission_set is None or self.phase not in ('starting', 'running', 'driving') \
+                    or self._clock() - self._mission_set < self.timeout:
+                return
+            result = self._end_trial('timeout')
+        self._report(result)
+
+    def _end_trial(self, outcome, message=''):
+        """Records the result of the current trial, with the lock held"""
+        now = self._clock()
+        duration = now - self._mission_set if self._mission_set is not None else 0.0
+        driving_time = now - self._driving_start if self._driving_start is not None else 0.0
+        result = TrialResult(self._trial, outcome, duration, driving_time,
+                             self._reset_latency, message)
+        self.results.append(result)
+        self._mission_set = None
+        self._driving_start = None
+        if self.phase != 'idle':
+            self.phase = 'ending'
+        return result
+
+    def _report(self, result):
+        """Reports a result and moves on to the next trial, without the lock"""
+        if self._on_trial_done is not None:
+            self._on_trial_done(result)
+
+        with self._lock:
+            stopped = self.phase == 'idle'
+            finished = not stopped and self._trial >= self.trials
+            if finished:
+                self.phase = 'idle'
+                self._timer.cancel()
+        if stopped:
+            return
+        if finished:
+            if self._on_finished is not None:
+                self._on_finished(list(self.results))
+            return
+        self._start_trial()
+
+
+def summarize(results):
+    """Describes the outcomes and durations of a list of TrialResults"""
+    outcomes = collections.Counter(result.outcome for result in results)
+    summary = "%d trials: %s" % (len(results), ", ".join(
+        "%d %s" % (count, outcome) for outcome, count in sorted(outcomes.items())))
+    durations = [result.duration for result in results if result.outcome == 'finished']
+    if durations:
+        summary += " (finished in %.2f s mean, %.2f s min, %.2f s max)" % (
+            sum(durations) / len(durations), min(durations), max(durations))
+    return summary
+
+
+def format_result(result):
+    text = "Trial %d: %s after %.2f s (driving %.2f s, reset %.1f ms)" % (
+        result.trial, result.outcome, result.duration, result.driving_time,
+        result.reset_latency * 1000.0)
+    if result.message:
+        text += ": " + result.message
+    return text
+
+
+def write_results(results, path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(TrialResult._fields)
+        writer.writerows(results)
+
+
+def main(args=None):
+    """Runs trials from the command line, against a running simulation"""
+    parser = argparse.ArgumentParser(
+        description="Runs a mission repeatedly, resetting the simulation between trials, "
+                    "and logs how long each trial took.")
+    parser.add_argument('mission',
+                        help="mission to run, e.g. ACCELERATION, SKIDPAD, AUTOCROSS or "
+                             "TRACK_DRIVE (the name of a CanState AMI state)")
+    parser.add_argument('-n', '--trials', type=int, default=10, help="number of trials")
+    parser.add_argument('-t', '--timeout', type=float, default=300.0,
+                        help="seconds a trial may take after its mission is set")
+    parser.add_argument('--service-timeout', type=float, default=1.0,
+                        help="seconds to wait for a service to respond")
+    parser.add_argument('-o', '--output', help="csv file to write the results to")
+    parsed_args = parser.parse_args(args)
+
+    import rclpy
+    from rclpy.callback_groups import ReentrantCallbackGroup
+    from rclpy.executors import MultiThreadedExecutor
+    from rclpy.task import Future
+
+    mission = getattr(CanState, 'AMI_' + parsed_args.mission.upper(), None)
+    if mission is None:
+        parser.error("unknown mission " + parsed_args.mission)
+
+    rclpy.init()
+    node = rclpy.create_node('eufs_trial_runner')
+    logger = node.get_logger()
+    callback_group = ReentrantCallbackGroup()
+
+    reset_clients = [node.create_client(Trigger, name, callback_group=callback_group)
+                     for name in ("/ros_can/reset", "/ros_can/reset_vehicle_pos",
+                                  "/ros_can/reset_cone_pos")]
+    set_mission_client = node.create_client(SetCanState, "/ros_can/set_mission",
+                                            callback_group=callback_group)
+    service_caller = ServiceCaller(node, parsed_args.service_timeout, callback_group)
+
+    done = Future()
+    runner = TrialRunner(
+        node, service_caller, reset_clients, set_mission_client, mission,
+        parsed_args.trials, parsed_args.timeout,
+        on_trial_done=lambda result: logger.info(format_result(result)),
+        on_finished=done.set_result, callback_group=callback_group)
+    node.create_subscription(CanState, "/ros_can/state",
+                             lambda msg: runner.on_state(msg.as_state, msg.ami_state), 10,
+                             callback_group=callback_group)
+
+    executor = MultiThreadedExecutor()
+    executor.add_node(node)
+    runner.start()
+    try:
+        executor.spin_until_future_complete(done)
+    except KeyboardInterrupt:
+        runner.stop()
+
+    results = runner.results
+    logger.info(summarize(results))
+    if parsed_args.output:
+        write_results(results, parsed_args.output)
+        logger.info("Results written to " + parsed_args.output)
+
+    runner.destroy()
+    service_caller.destroy()
+    node.destroy_node()
+    rclpy.try_shutdown()
+    return 0 if results and all(result.outcome == 'finished' for result in results) else 1
@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+
+import pytest
+
+from eufs_rqt.command_streamer import CommandStreamer
+from eufs_rqt.input_sources import JoystickInput, ScriptedInput
+
+try:
+    import evdev
+except ImportError:
+    evdev = None
+
+needs_uinput = pytest.mark.skipif(evdev is None or not os.access('/dev/uinput', os.W_OK),
+                                  reason="needs evdev and write access to /dev/uinput")
+
+
+@pytest.fixture
+def joystick():
+    """Virtual gamepad with centred sticks"""
+    ecodes = evdev.ecodes
+    axis = evdev.AbsInfo(value=0, min=-32768, max=32767, fuzz=0, flat=0, resolution=0)
+    device = evdev.UInput({ecodes.EV_ABS: [(ecodes.ABS_X, axis), (ecodes.ABS_Y, axis)]},
+                          name='eufs_rqt test joystick')
+    yield device
+    device.close()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@needs_uinput
+def test_joystick_commands_reach_streamer(joystick):
+    published = []
+    streamer = CommandStreamer(lambda linear, angular: published.append((linear, angular)),
+                               rate=200.0)
+    source = JoystickInput(joystick.device.path)
+    source.start(streamer.set_command)
+    streamer.start()
+    try:
+        # Sticks at rest
+        assert wait_for(lambda: published)
+        assert published[0] == (0.0, 0.0)
+
+        # Full forward and half left, sent together at the report
+        ecodes = evdev.ecodes
+        joystick.write(ecodes.EV_ABS, ecodes.ABS_Y, -32768)
+        joystick.write(ecodes.EV_ABS, ecodes.ABS_X, -16384)
+        joystick.syn()
+        assert wait_for(lambda: published[-1] != (0.0, 0.0))
+        assert published[-1] == pytest.approx((1.0, 0.5), abs=1e-3)
+
+        # Back inside the deadzone
+        joystick.write(ecodes.EV_ABS, ecodes.ABS_Y, 500)
+        joystick.write(ecodes.EV_ABS, ecodes.ABS_X, -500)
+        joystick.syn()
+        assert wait_for(lambda: published[-1] == (0.0, 0.0))
+    finally:
+        source.stop()
+        streamer.stop()
+
+
+def write_script(tmp_path, text):
+    path = tmp_path / 'script.csv'
+    path.write_text(text)
+    return str(path)
+
+
+def test_script_commands_follow_schedule(tmp_path):
+    path = write_script(tmp_path, "t,linear,steering\n"
+                                  "# Straight off\n"
+                                  "0.0,1.0,0.0\n"
+                                  "\n"
+                                  "0.05,1.0,0.2\n"
+                                  "0.15,-0.5,-0.1\n")
+    commands = []
+    finished = threading.Event()
+    source = ScriptedInput(path)
+    start = time.monotonic()
+    source.start(lambda linear, steering, stamp: commands.append(
+        (linear, steering, stamp, time.monotonic())), finished.set)
+    assert finished.wait(2.0)
+    source.stop()
+
+    assert [(linear, steering) for linear, steering, _, _ in commands] == [
+        (1.0, 0.0), (1.0, 0.2), (-0.5, -0.1)]
+    # Every command is stamped with its time in the script, and sent once it's due
+    stamps = [stamp for _, _, stamp, _ in commands]
+    assert stamps[0] >= start
+    assert [stamp - stamps[0] for stamp in stamps] == pytest.approx([0.0, 0.05, 0.15])
+    assert all(sent >= stamp for _, _, stamp, sent in commands)
+
+
+def test_stopped_script_sends_nothing_more(tmp_path):
+    path = write_script(tmp_path, "0.0,1.0,0.0\n10.0,2.0,0.0\n")
+    commands = []
+    finished = threading.Event()
+    source = ScriptedInput(path)
+    source.start(lambda linear, steering, stamp: commands.append(linear), finished.set)
+    deadline = time.monotonic() + 2.0
+    while not commands and time.monotonic() < deadline:
+        time.sleep(0.005)
+    source.stop()
+
+    assert commands == [1.0]
+    assert not finished.is_set()
+
+
+@pytest.mark.parametrize('text, error', [
+    ("", "has no commands"),
+    ("0.0,1.0,0.0\n1.0,fast,0.0\n", ":2: expected 't, linear, steering'"),
+    ("1.0,1.0,0.0\n0.5,1.0,0.0\n", "times must not decrease"),
+])
+def test_invalid_script(tmp_path, text, error):
+    with pytest.raises(ValueError, match=error):
+        ScriptedInput(write_script(tmp_path, text)).start(lambda *command: None)
@@ -0,0 +1,277 @@
+import collections
+
+import pytest
+
+from eufs_rqt.service_caller import ServiceCaller, ServiceResult
+
+Response = collections.namedtuple('Response', ['success', 'message'])
+
+
+class StubFuture:
+    """The parts of rclpy.task.Future the caller uses, completed by the test"""
+
+    def __init__(self):
+        self._done = False
+        self._cancelled = False
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+
+    def add_done_callback(self, callback):
+        if self._done:
+            callback(self)
+        else:
+            self._callbacks.append(callback)
+
+    def cancel(self):
+        if not self._done:
+            self._cancelled = True
+            self._complete()
+
+    def cancelled(self):
+        return self._cancelled
+
+    def done(self):
+        return self._done
+
+    def result(self):
+        return self._result
+
+    def exception(self):
+        return self._exception
+
+    def set_result(self, result):
+        self._result = result
+        self._complete()
+
+    def set_exception(self, exception):
+        self._exception = exception
+        self._complete()
+
+    def _complete(self):
+        self._done = True
+        for callback in self._callbacks:
+            callback(self)
+
+
+class StubClient:
+
+    def __init__(self, srv_name, ready=True):
+        self.srv_name = srv_name
+        self.ready = ready
+        self.futures = []
+
+    def service_is_ready(self):
+        return self.ready
+
+    def call_async(self, request):
+        future = StubFuture()
+        self.futures.append(future)
+        return future
+
+
+class FakeTimer:
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.canceled = False
+
+    def cancel(self):
+        self.canceled = True
+
+    def reset(self):
+        self.canceled = False
+
+    def is_canceled(self):
+        return self.canceled
+
+
+class FakeNode:
+    """Hands out timers that only fire when the test calls them"""
+
+    executor = None
+
+    def __init__(self):
+        self.timers = []
+
+    def create_timer(self, period, callback, callback_group=None):
+        timer = FakeTimer(callback)
+        self.timers.append(timer)
+        return timer
+
+    def destroy_timer(self, timer):
+        self.timers.remove(timer)
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def node():
+    return FakeNode()
+
+
+@pytest.fixture
+def caller(node, clock):
+    return ServiceCaller(node, timeout=1.0, clock=clock)
+
+
+def poll(node):
+    node.timers[0].callback()
+
+
+def test_response(node, clock, caller):
+    client = StubClient("/ros_can/reset")
+    results = []
+    caller.call(client, object(), results.append)
+    assert len(client.futures) == 1
+    assert not node.timers[0].is_canceled()
+
+    clock.now += 0.2
+    client.futures[0].set_result(Response(True, "reset"))
+    assert results == [ServiceResult("/ros_can/reset", True, pytest.approx(0.2), "reset")]
+    assert node.timers[0].is_canceled()
+
+
+def test_failed_response(clock, caller):
+    client = StubClient("/ros_can/set_mission")
+    results = []
+    caller.call(client, object(), results.append)
+    client.futures[0].set_result(Response(False, "mission already set"))
+    assert results == [ServiceResult("/ros_can/set_mission", False, 0.0,
+                                     "mission already set")]
+
+
+def test_response_without_success(caller):
+    client = StubClient("/ros_can/ebs")
+    results = []
+    caller.call(client, object(), results.append)
+    client.futures[0].set_result(object())
+    assert results == [ServiceResult("/ros_can/ebs", True, 0.0, '')]
+
+
+def test_exception(clock, caller):
+    client = StubClient("/ros_can/reset")
+    results = []
+    caller.call(client, object(), results.append)
+    clock.now += 0.1
+    client.futures[0].set_exception(RuntimeError("service crashed"))
+    assert results == [ServiceResult("/ros_can/reset", False, pytest.approx(0.1),
+                                     "service crashed")]
+
+
+def test_no_response(node, clock, caller):
+    client = StubClient("/ros_can/reset")
+    results = []
+    caller.call(client, object(), results.append)
+    future = client.futures[0]
+
+    clock.now += 0.5
+    poll(node)
+    assert results == []
+
+    clock.now += 0.6
+    poll(node)
+    assert results == [ServiceResult("/ros_can/reset", False, pytest.approx(1.1),
+                                     "no response")]
+    assert future.cancelled()
+    assert node.timers[0].is_canceled()
+
+    # A late response isn't reported again
+    future.set_result(Response(True, ""))
+    assert len(results) == 1
+
+
+def test_service_becomes_available(node, clock, caller):
+    client = StubClient("/ros_can/reset", ready=False)
+    results = []
+    caller.call(client, object(), results.append)
+    assert client.futures == []
+
+    clock.now += 0.5
+    poll(node)
+    assert client.futures == []
+
+    client.ready = True
+    clock.now += 0.3
+    poll(node)
+    assert len(client.futures) == 1
+
+    # The latency is measured from sending the request
+    clock.now += 0.1
+    client.futures[0].set_result(Response(True, ""))
+    assert results == [ServiceResult("/ros_can/reset", True, pytest.approx(0.1), "")]
+
+
+def test_service_becomes_unavailable(node, clock, caller):
+    client = StubClient("/ros_can/reset")
+    results = []
+    caller.call(client, object(), results.append)
+    client.futures[0].set_result(Response(True, ""))
+
+    client.ready = False
+    caller.call(client, object(), results.append)
+    clock.now += 0.9
+    poll(node)
+    assert len(results) == 1
+
+    # The latency is measured from the call, as nothing was sent
+    clock.now += 0.2
+    poll(node)
+    assert len(client.futures) == 1
+    assert results[1] == ServiceResult("/ros_can/reset", False, pytest.approx(1.1),
+                                       "service is not available")
+    assert node.timers[0].is_canceled()
+
+
+def test_call_all(node, clock, caller):
+    clients = [StubClient("/ros_can/reset"), StubClient("/ros_can/reset_vehicle_pos"),
+               StubClient("/ros_can/reset_cone_pos", ready=False)]
+    done = []
+    caller.call_all([(client, object()) for client in clients], done.append)
+
+    # The available services are called at once
+    assert [len(client.futures) for client in clients] == [1, 1, 0]
+    clients[1].futures[0].set_result(Response(True, ""))
+    clock.now += 0.1
+    clients[0].futures[0].set_result(Response(False, "busy"))
+    assert done == []
+
+    clock.now += 1.0
+    poll(node)
+    assert len(done) == 1
+    assert [(result.service, result.success) for result in done[0]] == [
+        ("/ros_can/reset", False), ("/ros_can/reset_vehicle_pos", True),
+        ("/ros_can/reset_cone_pos", False)]
+
+
+def test_call_all_without_calls(caller):
+    done = []
+    caller.call_all([], done.append)
+    assert done == [[]]
+
+
+def test_cancel_all(node, caller):
+    clients = [StubClient("/ros_can/reset"), StubClient("/ros_can/reset_cone_pos", ready=False)]
+    results = []
+    for client in clients:
+        caller.call(client, object(), results.append)
+    caller.cancel_all()
+
+    assert clients[0].futures[0].cancelled()
+    assert node.timers[0].is_canceled()
+    clients[1].ready = True
+    poll(node)
+    assert clients[1].futures == []
+    assert results == []
@@ -0,0 +1,171 @@
+import pytest
+
+pytest.importorskip('eufs_msgs')
+pytest.importorskip('std_srvs')
+
+from eufs_msgs.msg import CanState  # noqa: E402
+
+from eufs_rqt.service_caller import ServiceResult  # noqa: E402
+from eufs_rqt.trial_runner import TrialRunner  # noqa: E402
+
+RESETS = ["/ros_can/reset", "/ros_can/reset_vehicle_pos", "/ros_can/reset_cone_pos"]
+SET_MISSION = "/ros_can/set_mission"
+MISSION = CanState.AMI_ACCELERATION
+
+
+class FakeTimer:
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.canceled = False
+
+    def cancel(self):
+        self.canceled = True
+
+    def reset(self):
+        self.canceled = False
+
+    def is_canceled(self):
+        return self.canceled
+
+
+class FakeNode:
+    """Hands out timers that only fire when the test calls them"""
+
+    def __init__(self):
+        self.timers = []
+
+    def create_timer(self, period, callback, callback_group=None):
+        timer = FakeTimer(callback)
+        self.timers.append(timer)
+        return timer
+
+    def destroy_timer(self, timer):
+        self.timers.remove(timer)
+
+
+class FakeClient:
+
+    def __init__(self, srv_name):
+        self.srv_name = srv_name
+
+
+class FakeServiceCaller:
+    """Answers every call straight away, with the outcome set for its service"""
+
+    latency = 0.01
+
+    def __init__(self, failures=None):
+        # Messages of the services that fail, by name
+        self.failures = failures or {}
+        self.calls = []
+
+    def call(self, client, request, on_done=None):
+        self.calls.append((client.srv_name, request))
+        failure = self.failures.get(client.srv_name)
+        on_done(ServiceResult(client.srv_name, failure is None, self.latency, failure or ''))
+
+    def call_all(self, calls, on_done=None):
+        results = []
+        for client, request in calls:
+            self.call(client, request, results.append)
+        on_done(results)
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def make_runner(clock, service_caller, trials, timeout=300.0):
+    """Returns the runner, its node and the lists its callbacks fill in"""
+    node = FakeNode()
+    done, finished = [], []
+    runner = TrialRunner(node, service_caller, [FakeClient(name) for name in RESETS],
+                         FakeClient(SET_MISSION), MISSION, trials, timeout,
+                         on_trial_done=done.append, on_finished=finished.append,
+                         clock=clock)
+    return runner, node, done, finished
+
+
+def test_trials_succeed(clock):
+    service_caller = FakeServiceCaller()
+    runner, node, done, finished = make_runner(clock, service_caller, trials=2)
+    runner.start()
+    assert runner.phase == 'starting'
+    assert [name for name, _ in service_caller.calls] == RESETS + [SET_MISSION]
+    assert service_caller.calls[-1][1].ami_state == MISSION
+
+    for trial in (1, 2):
+        # A state from before the reset doesn't end the trial
+        runner.on_state(CanState.AS_FINISHED, MISSION)
+        assert runner.phase == 'starting'
+        runner.on_state(CanState.AS_READY, MISSION)
+        clock.now += 1.0
+        runner.on_state(CanState.AS_DRIVING, MISSION)
+        assert runner.phase == 'driving'
+        clock.now += 2.0
+        # Only states of the mission count
+        runner.on_state(CanState.AS_FINISHED, CanState.AMI_SKIDPAD)
+        assert runner.phase == 'driving'
+        runner.on_state(CanState.AS_FINISHED, MISSION)
+
+        assert len(done) == trial
+        result = done[-1]
+        assert result.trial == trial
+        assert result.outcome == 'finished'
+        assert result.duration == pytest.approx(3.0)
+        assert result.driving_time == pytest.approx(2.0)
+        assert result.reset_latency == pytest.approx(FakeServiceCaller.latency)
+        assert result.message == ''
+
+    assert finished == [done]
+    assert not runner.running
+    assert node.timers[0].is_canceled()
+    assert len(service_caller.calls) == 2 * (len(RESETS) + 1)
+
+
+def test_trial_times_out(clock):
+    runner, node, done, finished = make_runner(clock, FakeServiceCaller(), trials=1,
+                                               timeout=5.0)
+    runner.start()
+    check_timeout = node.timers[0].callback
+    runner.on_state(CanState.AS_READY, MISSION)
+
+    clock.now += 4.0
+    check_timeout()
+    assert done == []
+    assert runner.phase == 'running'
+
+    clock.now += 2.0
+    check_timeout()
+    assert len(done) == 1
+    assert done[0].outcome == 'timeout'
+    assert done[0].duration == pytest.approx(6.0)
+    assert done[0].driving_time == 0.0
+    assert finished == [done]
+    assert not runner.running
+
+
+def test_reset_fails(clock):
+    service_caller = FakeServiceCaller({"/ros_can/reset_cone_pos": "no cones"})
+    runner, node, done, finished = make_runner(clock, service_caller, trials=2)
+    runner.start()
+
+    # Every trial fails without the mission being set
+    assert [result.outcome for result in done] == ['failed', 'failed']
+    assert [result.trial for result in done] == [1, 2]
+    assert all(result.message == "/ros_can/reset_cone_pos: no cones" for result in done)
+    assert all(result.duration == 0.0 for result in done)
+    assert SET_MISSION not in [name for name, _ in service_caller.calls]
+    assert finished == [done]
+    assert not runner.running
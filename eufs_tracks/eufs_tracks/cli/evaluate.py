@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+import json
+import os
+from ament_index_python.packages import get_package_share_directory
+from eufscli import VerbExtension
+
+from eufs_tracks.lap_evaluator import LapEvaluator, read_poses
+
+
+class EUFSTracksEvaluate(VerbExtension):
+    '''
+    Scores logged runs against a track: lap times, progress, cones hit and time off track
+    '''
+
+    def configure(self, parser):
+        parser.add_argument(
+            'track', help="track csv file, or name of a track in the eufs_tracks shared directory")
+        parser.add_argument(
+            'runs', nargs='+', help="csv files of the poses of the car, with time,x,y,yaw columns")
+        parser.add_argument(
+            '--car-length', type=float, help="length of the car's footprint (default: 2.085)")
+        parser.add_argument(
+            '--car-width', type=float, help="width of the car's footprint (default: 1.4)")
+        parser.add_argument(
+            '-o', '--output', help="write the full results to a json file")
+
+    def main(self, args):
+        track = args.track
+        # Check if file is in current directory
+        if not os.path.exists(track):
+            TRACKS_SHARE = get_package_share_directory("eufs_tracks")
+            track = os.path.join(TRACKS_SHARE, 'csv', track + ".csv")
+
+        config = {key: value for key, value in {
+            'car_length': args.car_length,
+            'car_width': args.car_width,
+        }.items() if value is not None}
+
+        evaluator = LapEvaluator(track, config)
+        results = []
+        for run in args.runs:
+            evaluator.reset()
+            evaluator.update_many(*read_poses(run))
+            result = evaluator.result()
+            result['run'] = run
+            results.append(result)
+
+            lap_times = ", ".join(f"{lap_time:.2f}s" for lap_time in result['lap_times'])
+            print(f"{run}: laps [{lap_times}], {result['progress']:.1f} m driven, "
+                  f"{len(result['cone_hits'])} cones hit, "
+                  f"{len(result['off_track_events'])} off track "
+                  f"({result['time_off_track']:.2f}s)")
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
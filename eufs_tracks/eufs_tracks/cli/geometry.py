@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+import os
+from ament_index_python.packages import get_package_share_directory
+from eufscli import VerbExtension
+
+from eufs_tracks.track_geometry import TrackGeometry
+
+
+class EUFSTracksGeometry(VerbExtension):
+    '''
+    Precomputes the centreline and spatial indices of tracks into sidecar files
+    '''
+
+    def configure(self, parser):
+        parser.add_argument(
+            'tracks', nargs='+',
+            help="track csv files, or names of tracks in the eufs_tracks shared directory")
+        parser.add_argument(
+            '-s', '--spacing', type=float, default=0.5,
+            help="distance between centreline points in metres (default: 0.5)")
+        parser.add_argument(
+            '-f', '--force', action="store_true",
+            help="recompute the geometry even if the sidecar file is up to date")
+
+    def main(self, args):
+        TRACKS_SHARE = get_package_share_directory("eufs_tracks")
+        for track in args.tracks:
+            # Check if file is in current directory
+            if not os.path.exists(track):
+                track = os.path.join(TRACKS_SHARE, 'csv', track + ".csv")
+
+            try:
+                geometry = TrackGeometry.from_csv(track, args.spacing, cache=not args.force)
+            except ValueError as error:
+                print(error)
+                continue
+            if args.force:
+                for sidecar in TrackGeometry.sidecar_files(track, geometry.source_hash):
+                    if geometry.save(sidecar):
+                        break
+            min_radius = 1 / max(abs(geometry.curvature).max(), 1e-9)
+            print(f"{geometry.name}: {'closed' if geometry.closed else 'open'}, "
+                  f"{geometry.length:.1f} m long, {len(geometry.left)} blue and "
+                  f"{len(geometry.right)} yellow cones, tightest corner radius {min_radius:.1f} m")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import json
+import os
+from ament_index_python.packages import get_package_share_directory
+from eufscli import VerbExtension
+
+from eufs_tracks.track_generator import TrackGenerator
+from eufs_tracks.track_geometry import TrackGeometry
+from eufs_tracks.velocity_profile import VelocityProfile
+
+
+class EUFSTracksGrade(VerbExtension):
+    '''
+    Grades tracks by the lap time of a minimum-time speed profile, without simulating them
+    '''
+
+    def configure(self, parser):
+        parser.add_argument(
+            'tracks', nargs='*',
+            help="track csv files, or names of tracks in the eufs_tracks shared directory")
+        parser.add_argument(
+            '-g', '--generate', type=int, default=0,
+            help="also grade this many random tracks (default: 0)")
+        parser.add_argument(
+            '-l', '--length', type=float, help="target length of the random tracks")
+        parser.add_argument(
+            '-r', '--min-corner-radius', type=float,
+            help="minimum corner radius of the random tracks (default: 3)")
+        parser.add_argument(
+            '-s', '--seed', type=float,
+            help="seed of the first random track, the next ones counting up (default: random)")
+        parser.add_argument(
+            '--robot-name', default="eufs",
+            help="robot in eufs_racecar/robots (default: eufs)")
+        parser.add_argument(
+            '-p', '--vehicle-model-config', default="configDry.yaml",
+            help="vehicle model config file of the robot (default: configDry.yaml)")
+        parser.add_argument(
+            '-n', '--n-points', type=int,
+            help="points the tracks are resampled to (default: 1000)")
+        parser.add_argument(
+            '-o', '--output', help="write the full results to a json file")
+
+    def main(self, args):
+        vehicle_config = os.path.join(get_package_share_directory("eufs_racecar"), 'robots',
+                                      args.robot_name, args.vehicle_model_config)
+        config = {'n_points': args.n_points} if args.n_points is not None else {}
+        profile = VelocityProfile(vehicle_config, config)
+
+        TRACKS_SHARE = get_package_share_directory("eufs_tracks")
+        geometries = []
+        for track in args.tracks:
+            # Check if file is in current directory
+            if not os.path.exists(track):
+                track = os.path.join(TRACKS_SHARE, 'csv', track + ".csv")
+            try:
+                geometries.append(TrackGeometry.from_csv(track))
+            except ValueError as error:
+                print(error)
+        results = profile.grade_geometries(geometries)
+
+        if args.generate:
+            generator = TrackGenerator({key: value for key, value in {
+                'length': args.length,
+                'min_corner_radius': args.min_corner_radius,
+            }.items() if value is not None})
+            paths, names = [], []
+            for i in range(args.generate):
+                if args.seed is not None:
+                    generator.set({'seed': args.seed + i})
+                paths.append(generator.generate_path())
+                names.append(f"seed {generator.config['seed']}" if args.seed is not None
+                             else f"random {i}")
+            results += profile.grade_paths(paths, names)
+
+        for result in sorted(results, key=lambda result: result['average_speed']):
+            print(f"{result['track']}: {result['lap_time']:.2f}s over {result['length']:.1f} m, "
+                  f"average {result['average_speed']:.1f} m/s, "
+                  f"slowest {result['min_speed']:.1f} m/s, "
+                  f"braking {100 * result['braking']:.0f}% of the track")
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import json
+import os
+from ament_index_python.packages import get_package_share_directory
+from eufscli import VerbExtension
+
+from eufs_tracks.lap_simulator import simulate_batch
+
+
+class EUFSTracksSimulate(VerbExtension):
+    '''
+    Drives a controller around tracks without Gazebo
+    '''
+
+    def configure(self, parser):
+        parser.add_argument(
+            'tracks', nargs='+',
+            help="track csv files, or names of tracks in the eufs_tracks shared directory")
+        parser.add_argument(
+            '-c', '--controller',
+            default="eufs_tracks.lap_simulator:MidpointController",
+            help="controller factory as 'module:attribute', called with the track and config "
+                 "(default: eufs_tracks.lap_simulator:MidpointController)")
+        parser.add_argument(
+            '-r', '--robot-name', default="eufs",
+            help="robot in eufs_racecar/robots (default: eufs)")
+        parser.add_argument(
+            '-p', '--vehicle-model-config', default="configDry.yaml",
+            help="vehicle model config file of the robot (default: configDry.yaml)")
+        parser.add_argument(
+            '-m', '--vehicle-model', help="vehicle model class (default: DynamicBicycle)")
+        parser.add_argument(
+            '--command-mode', choices=["acceleration", "velocity"],
+            help="vehicle command mode (default: acceleration)")
+        parser.add_argument(
+            '-l', '--laps', type=int, help="laps to drive (default: 1)")
+        parser.add_argument(
+            '-t', '--max-time', type=float, help="simulated time limit in seconds (default: 120)")
+        parser.add_argument(
+            '--update-rate', type=float, help="vehicle model update rate (default: 1000)")
+        parser.add_argument(
+            '--publish-rate', type=float, help="controller rate (default: 200)")
+        parser.add_argument(
+            '-j', '--jobs', type=int, help="worker processes (default: cpu count)")
+        parser.add_argument(
+            '-b', '--batch-size', type=int,
+            help="tracks every worker drives in lockstep (default: shared evenly between workers)")
+        parser.add_argument(
+            '-o', '--output', help="write the full results to a json file")
+
+    def main(self, args):
+        TRACKS_SHARE = get_package_share_directory("eufs_tracks")
+        track_files = []
+        for track in args.tracks:
+            # Check if file is in current directory
+            if not os.path.exists(track):
+                track = os.path.join(TRACKS_SHARE, 'csv', track + ".csv")
+            track_files.append(track)
+
+        vehicle_config = os.path.join(get_package_share_directory("eufs_racecar"), 'robots',
+                                      args.robot_name, args.vehicle_model_config)
+
+        config = {key: value for key, value in {
+            'vehicle_model': args.vehicle_model,
+            'command_mode': args.command_mode,
+            'laps': args.laps,
+            'max_time': args.max_time,
+            'update_rate': args.update_rate,
+            'publish_rate': args.publish_rate,
+        }.items() if value is not None}
+
+        results = simulate_batch(track_files, args.controller, vehicle_config, config, args.jobs,
+                                 args.batch_size)
+
+        for result in results:
+            lap_times = ", ".join(f"{lap_time:.2f}s" for lap_time in result['lap_times'])
+            print(f"{result['track']}: {result['end_reason']}, laps [{lap_times}], "
+                  f"{len(result['cone_hits'])} cones hit, "
+                  f"{len(result['off_track_events'])} off track, "
+                  f"{result['real_time_factor']:.0f}x real time")
+        wall_time = max(result['wall_time'] for result in results)
+        print(f"{sum(result['sim_time'] for result in results) / wall_time:.0f}x real time "
+              f"over all tracks")
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
@@ -1,2 +1,9 @@
-from .converter import Converter  # noqa: F401
 from .converter_gui import EUFSConverterGUI  # noqa: F401
+
+
+def __getattr__(name):
+    # Converter pulls in numpy and pandas, so it is only imported when used
+    if name == "Converter":
+        from .converter import Converter
+        return Converter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
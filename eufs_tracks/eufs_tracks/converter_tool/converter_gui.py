@@ -1,6 +1,6 @@
 from shutil import copyfile
-from os import listdir, mkdir
-from os.path import isfile, join, exists
+from os import mkdir
+from os.path import join, exists
 
 from ament_index_python.packages import get_package_share_directory
 
@@ -9,11 +9,13 @@ from python_qt_binding import loadUi
 from python_qt_binding.QtWidgets import QWidget, QComboBox, QPushButton
 from python_qt_binding.QtWidgets import QLabel, QLineEdit, QApplication
 
-from eufs_tracks.converter_tool import Converter
+from eufs_tracks.track_index import get_track_index
+from eufs_profiling import profiler
 
 
 class EUFSConverterGUI(Plugin):
     def __init__(self, context):
+        profiler.start('EUFSConverterGUI')
         super(EUFSConverterGUI, self).__init__(context)
 
         # Give QObjects reasonable names
@@ -32,6 +34,7 @@ class EUFSConverterGUI(Plugin):
         # UI file which should be in the "resource" folder of this package
         main_ui_file = join(self.TRACKS, 'resource', 'conversion_tool.ui')
         loadUi(main_ui_file, self._widget)
+        profiler.checkpoint('EUFSConverterGUI', 'load ui')
 
         # Show _widget.windowTitle on left-top of each plugin (when
         # it's set in _widget). This is useful when you open multiple
@@ -71,8 +74,11 @@ class EUFSConverterGUI(Plugin):
         # Fix scaling issue
         self.fix_scaling()
 
+        profiler.checkpoint('EUFSConverterGUI', 'track index and scaling')
+
         # Add widget to the user interface
         context.add_widget(self._widget)
+        profiler.report('EUFSConverterGUI', log=self.logger.info)
 
     def fix_scaling(self):
         # Looping over all widgest to fix scaling issue via manual scaling
@@ -167,8 +173,11 @@ class EUFSConverterGUI(Plugin):
         elif from_type == "csv":
             filename = join(self.TRACKS, 'csv/' + filename)
 
-        # Convert it
-        Converter.convert(from_type, to_type, filename)
+        # Convert it, the converter (and with it numpy and pandas) is only
+        # imported the first time it is needed
+        converter = profiler.import_module(
+            'EUFSConverterGUI', 'eufs_tracks.converter_tool.converter', log=self.logger.info)
+        converter.Converter.convert(from_type, to_type, filename)
         self.logger.info("Converted from: " + from_type + " to: " + to_type + " for: " + filename)
 
     def update_converter_dropdown(self):
@@ -177,21 +186,11 @@ class EUFSConverterGUI(Plugin):
         all_files = []
 
         if from_type == "launch":
-            # Get tracks from eufs_tracks package
-            relevant_path = join(self.TRACKS, 'launch')
-            launch_files = [f for f in listdir(relevant_path) if isfile(join(relevant_path, f))]
-
-            # Remove "blacklisted" files (ones that don't define tracks)
-            blacklist_filepath = join(self.TRACKS, 'launch/blacklist.txt')
-            blacklist_ = open(blacklist_filepath, "r")
-            blacklist = [f.strip() for f in blacklist_]
-            all_files = [f for f in launch_files if f not in blacklist]
+            # Get tracks from eufs_tracks package, without "blacklisted" files
+            # (ones that don't define tracks)
+            all_files = get_track_index(self.TRACKS).launch_files()
         elif from_type == "csv":
-            relevant_path = join(self.TRACKS, 'csv')
-            all_files = [
-                f for f in listdir(relevant_path)
-                if isfile(join(relevant_path, f)) and f[-3:] == "csv"
-            ]
+            all_files = get_track_index(self.TRACKS).csv_files()
 
         # Remove old files from selector
         the_selector = self.FILE_FOR_CONVERSION_BOX
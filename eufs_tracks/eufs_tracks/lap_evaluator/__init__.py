@@ -0,0 +1,2 @@
+from .lap_evaluator import LapEvaluator, evaluate  # noqa: F401
+from .lap_evaluator import read_poses, poses_from_car_states  # noqa: F401
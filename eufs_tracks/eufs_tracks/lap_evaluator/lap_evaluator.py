@@ -0,0 +1,400 @@
+import csv
+import math
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from ..lap_simulator.track import Track
+from ..track_geometry import TrackGeometry
+
+
+class LapEvaluator:
+    """
+    Scores a run on a track from the poses of the car, as they arrive.
+
+    Poses are given to `update` one at a time (e.g. from a CarState
+    subscriber while the simulation runs) or to `update_many` as arrays (e.g.
+    a whole log). Either way they are processed in chunks of poses spanning
+    at most `chunk_distance` of driving, with every step of a chunk done in
+    NumPy for all its poses at once. `update` collects `buffer_size` poses
+    before processing them, `flush` (or `result`) processes them straight
+    away.
+
+    Every pose is projected onto the centreline of the track's TrackGeometry,
+    searching only the stretch of centreline the car can have reached since
+    the last chunk. The arc length found is unwrapped over laps and only
+    counts when it increases, so the car can't jump to the other side of a
+    hairpin or lose laps by reversing.
+
+    The metrics follow the lap simulator: laps are timed from the first
+    crossing of the start line (the big orange cones closest to the car
+    start) to the following ones, and on open tracks (e.g. acceleration) from
+    the start line to the finish line (the big orange cones furthest along the
+    track). A cone counts as hit when it touches the car's rectangular
+    footprint, and the car is off track when its whole footprint is past a
+    boundary.
+    """
+
+    def __init__(self, track, config=None):
+        """
+        Args:
+            track: track csv file, Track or (Track, TrackGeometry)
+            config (dict): overrides of the default config
+        """
+        default_cfg = {
+            # Footprint of the car, wheel to wheel of the eufs car by default
+            'car_length': 2.085,
+            'car_width': 1.4,
+            'cone_radius': 0.114,
+            # Most driving in a chunk of poses (m)
+            'chunk_distance': 10.0,
+            # Most poses in a chunk
+            'max_chunk_size': 2000,
+            # Poses `update` collects before processing them
+            'buffer_size': 10,
+            # How far back along the centreline from the last pose and ahead
+            # of the distance driven the next poses are searched for (m)
+            'search_behind': 2.0,
+            'search_ahead': 3.0,
+            # Big orange cones within this distance of each other make up a line
+            'line_cone_distance': 6.0,
+        }
+        self.config = {**default_cfg, **(config or {})}
+
+        if isinstance(track, tuple):
+            self.track, self.geometry = track
+        elif isinstance(track, Track):
+            self.track, self.geometry = track, TrackGeometry.from_track(track)
+        else:
+            self.track, self.geometry = Track.from_csv(track), TrackGeometry.from_csv(track)
+
+        geometry = self.geometry
+        self._starts = geometry.centreline
+        self._segments = np.roll(geometry.centreline, -1, axis=0) - geometry.centreline
+        self._lengths = np.hypot(self._segments[:, 0], self._segments[:, 1])
+        if not geometry.closed:
+            # Open tracks have no segment back to the start
+            self._starts, self._segments = self._starts[:-1], self._segments[:-1]
+            self._lengths = self._lengths[:-1]
+        self._lengths_sq = np.maximum(self._lengths ** 2, 1e-12)
+        self._widths = np.column_stack([geometry.left_width, geometry.right_width])
+        self._step = geometry.length / len(self._lengths)
+
+        # Cones that can be hit, in a k-d tree like the centreline and
+        # boundaries of the geometry
+        self._cone_indices = [index for index, (tag, _, _) in enumerate(self.track.cones)
+                              if tag in Track.CONE_TAGS]
+        self._cones = np.array([self.track.cones[index][1:] for index in self._cone_indices],
+                               dtype=float).reshape(-1, 2)
+        self._cone_tree = cKDTree(self._cones)
+
+        self._setup_lines()
+        self.reset()
+
+    def _setup_lines(self):
+        cfg = self.config
+        lines = []
+        for cone in self.track.cones_of("big_orange"):
+            for line in lines:
+                if any(math.hypot(cone[0] - other[0], cone[1] - other[1])
+                       < cfg['line_cone_distance'] for other in line):
+                    line.append(cone)
+                    break
+            else:
+                lines.append([cone])
+
+        x, y, _ = self.track.car_start
+        centres = [np.mean(line, axis=0) for line in lines]
+        if centres:
+            start = min(centres, key=lambda centre: math.hypot(centre[0] - x, centre[1] - y))
+        else:
+            start = np.array([x, y])
+        self.start_line = float(self._project_global(start)[0])
+
+        self.finish_line = None
+        if not self.geometry.closed:
+            ends = [float(self._project_global(centre)[0]) for centre in centres]
+            ends = [end for end in ends if end > self.start_line + 1.0]
+            self.finish_line = max(ends) if ends else self.geometry.length
+
+    def reset(self):
+        """Forgets the poses seen so far, to score a new run."""
+        self.poses = 0
+        self.crossings = []
+        self.cone_hits = []
+        self.off_track_events = []
+        self.time_off_track = 0.0
+        self._hit = set()
+        self._last = None
+        self._last_s = None
+        self._first_s = None
+        self._max_s = None
+        self._next_line = None
+        self._line_number = None
+        self._off_track = False
+        self._buffer = []
+
+    def _project(self, points, first, count):
+        """
+        Projects points onto `count` centreline segments from segment `first`.
+
+        Segment indices are unwrapped over laps on closed tracks, so `first`
+        may be negative or past the last segment.
+
+        Returns:
+            (unwrapped arc length, offset to the left of the centreline,
+            heading of the centreline, left and right track widths) for every
+            point
+        """
+        n = len(self._lengths)
+        closed = self.geometry.closed
+        if closed:
+            unwrapped = np.arange(first, first + count)
+            segments = unwrapped % n
+        else:
+            # Before the start or past the end, the first or last segment
+            # (extended) is closest
+            begin = min(max(first, 0), n - 1)
+            segments = np.arange(begin, max(min(first + count, n), begin + 1))
+            unwrapped = segments
+
+        start_x, start_y = self._starts[segments].T
+        vector_x, vector_y = self._segments[segments].T
+        offset_x = points[:, 0, None] - start_x
+        offset_y = points[:, 1, None] - start_y
+        t = (offset_x * vector_x + offset_y * vector_y) / self._lengths_sq[segments]
+        # The ends of open tracks extend past their first and last points
+        low = np.zeros(len(segments))
+        high = np.ones(len(segments))
+        if not closed:
+            low[segments == 0] = -math.inf
+            high[segments == n - 1] = math.inf
+        np.clip(t, low, high, out=t)
+        offset_x -= t * vector_x
+        offset_y -= t * vector_y
+        distances_sq = offset_x * offset_x + offset_y * offset_y
+        nearest = np.argmin(distances_sq, axis=1)
+
+        rows = np.arange(len(points))
+        t = t[rows, nearest]
+        segment = segments[nearest]
+        vector_x, vector_y = vector_x[nearest], vector_y[nearest]
+        cross = vector_x * offset_y[rows, nearest] - vector_y * offset_x[rows, nearest]
+        offset = np.copysign(np.sqrt(distances_sq[rows, nearest]), cross)
+        s = (unwrapped[nearest] + t) * self._step
+
+        following = (segment + 1) % len(self._widths)
+        fraction = np.clip(t, 0.0, 1.0)[:, None]
+        widths = (1 - fraction) * self._widths[segment] + fraction * self._widths[following]
+        heading = np.arctan2(vector_y, vector_x)
+        return s, offset, heading, widths[:, 0], widths[:, 1]
+
+    def _project_global(self, point):
+        """Projects a point with no previous position to go by."""
+        _, index = self.geometry.centreline_tree.query(point)
+        window = int(math.ceil(self.config['search_ahead'] / self._step)) + 1
+        projection = self._project(np.array([point], dtype=float), index - window, 2 * window)
+        return [values[0] for values in projection]
+
+    def _line(self, number):
+        """Unwrapped arc length of the start line `number` laps on a closed track."""
+        return self.start_line + number * self.geometry.length
+
+    def _next_line_after(self, s):
+        """The first line ahead of unwrapped arc length `s`."""
+        if self.geometry.closed:
+            # Lines are counted in laps rather than recomputed from the arc
+            # length of the last one, which can round back onto that line
+            self._line_number = math.floor((s - self.start_line) / self.geometry.length) + 1
+            while self._line(self._line_number) <= s:
+                self._line_number += 1
+            return self._line(self._line_number)
+        if s < self.start_line:
+            return self.start_line
+        return self.finish_line if s < self.finish_line else math.inf
+
+    def update(self, time, x, y, yaw):
+        """Takes the next pose of the car, at `time` (s)."""
+        self._buffer.append((time, x, y, yaw))
+        if len(self._buffer) >= self.config['buffer_size']:
+            self.flush()
+
+    def flush(self):
+        """Processes the poses collected by `update`."""
+        if self._buffer:
+            poses, self._buffer = self._buffer, []
+            self.update_many(*zip(*poses))
+
+    def update_many(self, times, xs, ys, yaws):
+        """Takes the next poses of the car, in order of time."""
+        self.flush()
+        times = np.asarray(times, dtype=float)
+        points = np.column_stack([np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)])
+        yaws = np.asarray(yaws, dtype=float)
+        if len(times) == 0:
+            return
+
+        if self._last is None:
+            s, _, _, _, _ = self._project_global(points[0])
+            self._first_s = self._last_s = self._max_s = s
+            self._last = (times[0], points[0])
+            # Timing starts straight away if the car starts just past the
+            # start line
+            line = self._next_line_after(s)
+            if self.geometry.closed and line - s > self.geometry.length / 2:
+                self.crossings.append(float(times[0]))
+            elif not self.geometry.closed and self.start_line <= s < self.finish_line:
+                self.crossings.append(float(times[0]))
+            self._next_line = line
+
+        # Distance driven up to every pose, from the last pose seen
+        steps = np.diff(np.vstack([self._last[1], points]), axis=0)
+        driven = np.cumsum(np.hypot(steps[:, 0], steps[:, 1]))
+        chunks = np.flatnonzero(np.diff(np.floor(driven / self.config['chunk_distance']))) + 1
+        chunks = np.union1d(chunks, np.arange(0, len(times), self.config['max_chunk_size']))
+        bounds = np.append(chunks, len(times))
+        for begin, end in zip(bounds[:-1], bounds[1:]):
+            distance = driven[end - 1] - (driven[begin - 1] if begin > 0 else 0.0)
+            self._update_chunk(times[begin:end], points[begin:end], yaws[begin:end], distance)
+
+    def _update_chunk(self, times, points, yaws, distance):
+        cfg = self.config
+        previous_time, _ = self._last
+        first = int(math.floor((self._last_s - cfg['search_behind']) / self._step))
+        last = int(math.ceil((self._last_s + distance + cfg['search_ahead']) / self._step))
+        s, offset, heading, left_width, right_width = self._project(points, first,
+                                                                    last - first + 1)
+
+        # Laps, from the furthest the car has got
+        furthest = np.maximum.accumulate(np.maximum(s, self._max_s))
+        while self._next_line <= furthest[-1]:
+            index = int(np.searchsorted(furthest, self._next_line))
+            before_s = furthest[index - 1] if index > 0 else self._max_s
+            before_time = times[index - 1] if index > 0 else previous_time
+            fraction = (self._next_line - before_s) / max(furthest[index] - before_s, 1e-12)
+            self.crossings.append(float(before_time + fraction * (times[index] - before_time)))
+            if self.geometry.closed:
+                self._line_number += 1
+                self._next_line = self._line(self._line_number)
+            else:
+                self._next_line = self._next_line_after(self._next_line)
+
+        # Off track, when the whole footprint is past the left or right boundary
+        relative = yaws - heading
+        extent = 0.5 * (cfg['car_length'] * np.abs(np.sin(relative))
+                        + cfg['car_width'] * np.abs(np.cos(relative)))
+        off_track = (offset - extent > left_width) | (-offset - extent > right_width)
+        durations = np.diff(np.append(previous_time, times))
+        self.time_off_track += float(np.sum(durations[off_track]))
+        entered = np.flatnonzero(off_track & ~np.append(self._off_track, off_track[:-1]))
+        for index in entered:
+            self.off_track_events.append({'time': float(times[index]),
+                                          'x': float(points[index, 0]),
+                                          'y': float(points[index, 1])})
+        self._off_track = bool(off_track[-1])
+
+        self._hit_cones(times, points, yaws)
+
+        self.poses += len(times)
+        self._last = (times[-1], points[-1])
+        self._last_s = float(s[-1])
+        self._max_s = float(furthest[-1])
+
+    def _hit_cones(self, times, points, yaws):
+        cfg = self.config
+        half_length = cfg['car_length'] / 2 + cfg['cone_radius']
+        half_width = cfg['car_width'] / 2 + cfg['cone_radius']
+
+        # Cones near any of the poses
+        low, high = points.min(axis=0), points.max(axis=0)
+        centre = (low + high) / 2
+        radius = math.hypot(*(high - low)) / 2 + math.hypot(half_length, half_width)
+        near = sorted(self._cone_indices[row]
+                      for row in self._cone_tree.query_ball_point(centre, radius))
+        near = [index for index in near if index not in self._hit]
+        if not near:
+            return
+
+        cones = np.array([self.track.cones[index][1:] for index in near])
+        dx = cones[None, :, 0] - points[:, None, 0]
+        dy = cones[None, :, 1] - points[:, None, 1]
+        cos_yaw, sin_yaw = np.cos(yaws)[:, None], np.sin(yaws)[:, None]
+        touching = (np.abs(cos_yaw * dx + sin_yaw * dy) <= half_length) & \
+            (np.abs(-sin_yaw * dx + cos_yaw * dy) <= half_width)
+        hit = np.flatnonzero(touching.any(axis=0))
+        first_touch = np.argmax(touching[:, hit], axis=0)
+        for cone, pose in sorted(zip(hit, first_touch), key=lambda pair: pair[1]):
+            index = near[cone]
+            tag, cone_x, cone_y = self.track.cones[index]
+            self._hit.add(index)
+            self.cone_hits.append({'time': float(times[pose]), 'tag': tag,
+                                   'x': cone_x, 'y': cone_y})
+
+    @property
+    def progress(self):
+        """Distance along the centreline driven since the first pose (m)."""
+        self.flush()
+        return 0.0 if self._max_s is None else self._max_s - self._first_s
+
+    @property
+    def lap_times(self):
+        self.flush()
+        return [end - start for start, end in zip(self.crossings, self.crossings[1:])]
+
+    def result(self):
+        """
+        The metrics so far, keyed like the results of the lap simulator.
+
+        `laps_driven` is the progress in laps, None on open tracks.
+        """
+        self.flush()
+        length = self.geometry.length
+        return {
+            'track': self.track.name,
+            'poses': self.poses,
+            'lap_times': self.lap_times,
+            'progress': self.progress,
+            # Only closed tracks have laps
+            'laps_driven': (self.progress / length if length > 0 else 0.0)
+            if self.geometry.closed else None,
+            'cone_hits': list(self.cone_hits),
+            'off_track_events': list(self.off_track_events),
+            'time_off_track': self.time_off_track,
+        }
+
+
+def evaluate(track, times, xs, ys, yaws, config=None):
+    """Scores a whole run, see LapEvaluator."""
+    evaluator = LapEvaluator(track, config)
+    evaluator.update_many(times, xs, ys, yaws)
+    return evaluator.result()
+
+
+def read_poses(path):
+    """
+    Reads the poses of a run from a csv file with `time,x,y,yaw` columns.
+
+    Returns:
+        The times, x, y and yaw as arrays.
+    """
+    with open(path, "r") as f:
+        rows = [(row["time"], row["x"], row["y"], row["yaw"]) for row in csv.DictReader(f)]
+    poses = np.array(rows, dtype=float).reshape(-1, 4)
+    return poses[:, 0], poses[:, 1], poses[:, 2], poses[:, 3]
+
+
+def poses_from_car_states(messages):
+    """
+    Turns eufs_msgs/CarState messages (or anything shaped like them) into poses.
+
+    Returns:
+        The times, x, y and yaw as arrays.
+    """
+    values = np.array([(msg.header.stamp.sec + msg.header.stamp.nanosec * 1e-9,
+                        msg.pose.pose.position.x, msg.pose.pose.position.y,
+                        msg.pose.pose.orientation.x, msg.pose.pose.orientation.y,
+                        msg.pose.pose.orientation.z, msg.pose.pose.orientation.w)
+                       for msg in messages], dtype=float).reshape(-1, 7)
+    qx, qy, qz, qw = values[:, 3], values[:, 4], values[:, 5], values[:, 6]
+    yaws = np.arctan2(2 * (qw * qz + qx * qy), 1 - 2 * (qy * qy + qz * qz))
+    return values[:, 0], values[:, 1], values[:, 2], yaws
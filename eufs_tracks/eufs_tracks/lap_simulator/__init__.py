@@ -0,0 +1,4 @@
+from .track import Track  # noqa: F401
+from .lap_simulator import LapSimulator, BatchLapSimulator, VehicleState  # noqa: F401
+from .lap_simulator import load_controller, simulate_batch  # noqa: F401
+from .controllers import MidpointController, BatchMidpointController  # noqa: F401
@@ -0,0 +1,134 @@
+import math
+
+import numpy as np
+
+from eufs_models import X, Y, YAW, V_X
+
+from .track import NearbyCones
+
+
+class MidpointController:
+    """
+    Example controller for the lap simulator.
+
+    Steers (pure pursuit) towards the midpoint of the closest blue and yellow
+    cones ahead of the car and holds `target_speed`. It needs no knowledge of
+    the track layout, so it works on any track csv file.
+    """
+
+    def __init__(self, track, config=None, target_speed=4.0, lookahead=8.0, wheelbase=1.58,
+                 speed_gain=1.0):
+        self.track = track
+        self.velocity_mode = (config or {}).get('command_mode') == "velocity"
+        self.target_speed = target_speed
+        self.lookahead = lookahead
+        self.wheelbase = wheelbase
+        self.speed_gain = speed_gain
+
+    @staticmethod
+    def batch(tracks, config=None, **kwargs):
+        """The controller of cars on many tracks at once, see BatchMidpointController."""
+        return BatchMidpointController(tracks, config, **kwargs)
+
+    def target(self, state):
+        """Point to steer towards, in the car frame."""
+        cos_yaw, sin_yaw = math.cos(state[YAW]), math.sin(state[YAW])
+        ahead = {"blue": [], "yellow": []}
+        for index in self.track.cones_near(state[X], state[Y], self.lookahead):
+            tag, cone_x, cone_y = self.track.cones[index]
+            if tag not in ahead:
+                continue
+            dx, dy = cone_x - state[X], cone_y - state[Y]
+            forward, left = cos_yaw * dx + sin_yaw * dy, -sin_yaw * dx + cos_yaw * dy
+            if forward > 0.5:
+                ahead[tag].append((forward * forward + left * left, forward, left))
+
+        # Closest two cones of each colour ahead
+        blue = [cone[1:] for cone in sorted(ahead["blue"])[:2]]
+        yellow = [cone[1:] for cone in sorted(ahead["yellow"])[:2]]
+        if blue and yellow:
+            points = [((b[0] + y[0]) / 2, (b[1] + y[1]) / 2) for b, y in zip(blue, yellow)]
+        elif blue:
+            # Only one side visible, keep half a track width away from it
+            points = [(b[0], b[1] - 1.5) for b in blue]
+        elif yellow:
+            points = [(y[0], y[1] + 1.5) for y in yellow]
+        else:
+            return self.lookahead, 0.0
+        return points[-1]
+
+    def __call__(self, time, state):
+        forward, left = self.target(state)
+        steering = math.atan2(2 * self.wheelbase * left, forward ** 2 + left ** 2)
+        if self.velocity_mode:
+            return self.target_speed, steering
+        return self.speed_gain * (self.target_speed - state[V_X]), steering
+
+
+class BatchMidpointController:
+    """
+    MidpointController for many cars at once, a batch controller for BatchLapSimulator.
+
+    Finds the same targets as MidpointController with NumPy across the cars,
+    from the blue and yellow cones near them (see NearbyCones).
+    """
+
+    def __init__(self, tracks, config=None, target_speed=4.0, lookahead=8.0, wheelbase=1.58,
+                 speed_gain=1.0):
+        self.velocity_mode = (config or {}).get('command_mode') == "velocity"
+        self.target_speed = target_speed
+        self.lookahead = lookahead
+        self.wheelbase = wheelbase
+        self.speed_gain = speed_gain
+
+        self._sides = [NearbyCones([track.cones_of(tag) for track in tracks], lookahead)
+                       for tag in ("blue", "yellow")]
+
+    def _closest_ahead(self, side, state):
+        """Car frame positions of the two closest cones ahead and how many there are."""
+        cos_yaw, sin_yaw = np.cos(state[:, YAW, None]), np.sin(state[:, YAW, None])
+        dx, dy = side[:, :, 0] - state[:, X, None], side[:, :, 1] - state[:, Y, None]
+        forward, left = cos_yaw * dx + sin_yaw * dy, cos_yaw * dy - sin_yaw * dx
+        distance_sq = dx * dx + dy * dy
+        ahead = (distance_sq <= self.lookahead ** 2) & (forward > 0.5)
+        key = np.where(ahead, forward * forward + left * left, np.inf)
+
+        closest = np.argpartition(key, 1, axis=1)[:, :2]
+        rows = np.arange(len(state))[:, None]
+        closest = np.take_along_axis(
+            closest, np.argsort(key[rows, closest], axis=1), axis=1)
+        count = np.minimum(ahead.sum(axis=1), 2)
+        return forward[rows, closest], left[rows, closest], count
+
+    def target(self, states, cars):
+        """Points to steer towards, in the frames of the cars."""
+        rows = np.arange(len(states))
+        (blue_forward, blue_left, blue), (yellow_forward, yellow_left, yellow) = (
+            self._closest_ahead(side.near(cars, states[:, X], states[:, Y])[0], states)
+            for side in self._sides)
+
+        forward = np.full(len(states), self.lookahead)
+        left = np.zeros(len(states))
+
+        # Only one side visible, keep half a track width away from it
+        only = (blue > 0) & (yellow == 0)
+        last = np.maximum(blue - 1, 0)
+        forward[only] = blue_forward[rows, last][only]
+        left[only] = blue_left[rows, last][only] - 1.5
+        only = (yellow > 0) & (blue == 0)
+        last = np.maximum(yellow - 1, 0)
+        forward[only] = yellow_forward[rows, last][only]
+        left[only] = yellow_left[rows, last][only] + 1.5
+
+        both = (blue > 0) & (yellow > 0)
+        last = np.maximum(np.minimum(blue, yellow) - 1, 0)
+        forward[both] = ((blue_forward[rows, last] + yellow_forward[rows, last]) / 2)[both]
+        left[both] = ((blue_left[rows, last] + yellow_left[rows, last]) / 2)[both]
+        return forward, left
+
+    def __call__(self, time, states, cars):
+        forward, left = self.target(states, cars)
+        steering = np.arctan2(2 * self.wheelbase * left, forward ** 2 + left ** 2)
+        if self.velocity_mode:
+            return np.full(len(states), self.target_speed), steering
+        return self.speed_gain * (self.target_speed - states[:, V_X]), steering
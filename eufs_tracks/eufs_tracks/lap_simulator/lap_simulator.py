@@ -0,0 +1,612 @@
+import math
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+
+import numpy as np
+
+from eufs_models import STATE_FIELDS, STATE_SIZE, X, Y, YAW, V_X, V_Y, ACC, VEL, DELTA
+from eufs_models import make_model
+
+from .track import NearbyCones, Track
+
+# What a controller is given of the vehicle state, e.g. `state.v_x`
+VehicleState = namedtuple("VehicleState", STATE_FIELDS)
+
+# A timing line through its centre, with the normal the car crosses it along
+TimingLine = namedtuple("TimingLine", ["x", "y", "normal_x", "normal_y", "half_width"])
+
+
+def _setup(vehicle_config, config):
+    """The full config, vehicle model and steering rate limit of a simulator."""
+    default_cfg = {
+        'vehicle_model': "DynamicBicycle",
+        'command_mode': "acceleration",
+        'dt': 0.001,
+        'update_rate': 1000.0,
+        'publish_rate': 200.0,
+        'control_delay': 0.2,
+        'steering_lock_time': 1.0,
+        'laps': 1,
+        'max_time': 120.0,
+        # Footprint of the car, wheel to wheel by default
+        'car_length': None,
+        'car_width': None,
+        'cone_radius': 0.114,
+        # Distance the car has to travel before crossing the start line
+        # again counts as a lap
+        'min_lap_distance': 30.0,
+        # Time between cone hit and off track checks
+        'check_period': 0.01,
+        # The car is off track if there are no cones within this distance
+        'off_track_distance': 10.0,
+        # Give up once the car has been off track for this long
+        'max_off_track_time': 5.0,
+    }
+    config = {**default_cfg, **(config or {})}
+    if config['command_mode'] not in ("acceleration", "velocity"):
+        raise ValueError(
+            f"Invalid command mode: '{config['command_mode']}', "
+            "must be 'acceleration' or 'velocity'")
+
+    model = make_model(config['vehicle_model'], vehicle_config)
+    param = model.get_param()
+    if config['car_length'] is None:
+        config['car_length'] = param.kinematic.l + 2 * param.tire.radius
+    if config['car_width'] is None:
+        config['car_width'] = param.kinematic.axle_width
+    ranges = param.input_ranges.delta
+    max_steering_rate = (ranges.max - ranges.min) / config['steering_lock_time']
+    return config, model, max_steering_rate
+
+
+def timing_lines(track):
+    """
+    The start line of a track and its finish line, None on closed tracks.
+
+    Big orange cones within a few metres of each other make up a line, the
+    one closest to the car start being the start line, crossed along the
+    starting direction. Tracks with a second line are open, they finish at
+    the line furthest from the start line.
+    """
+    x, y, yaw = track.car_start
+    normal = (math.cos(yaw), math.sin(yaw))
+
+    lines = []
+    for cone in track.cones_of("big_orange"):
+        for line in lines:
+            if any(math.hypot(cone[0] - other[0], cone[1] - other[1]) < 6.0
+                   for other in line):
+                line.append(cone)
+                break
+        else:
+            lines.append([cone])
+    if not lines:
+        # No start line, so use the starting position
+        return TimingLine(x, y, *normal, 3.0), None
+
+    def centre(line):
+        return (sum(cone[0] for cone in line) / len(line),
+                sum(cone[1] for cone in line) / len(line))
+
+    def timing_line(line, normal):
+        line_x, line_y = centre(line)
+        half_width = max(abs(-(cone_x - line_x) * normal[1] + (cone_y - line_y) * normal[0])
+                         for cone_x, cone_y in line) + 0.5
+        return TimingLine(line_x, line_y, *normal, half_width)
+
+    start_line = min(lines, key=lambda line: math.hypot(centre(line)[0] - x,
+                                                        centre(line)[1] - y))
+    others = [line for line in lines if line is not start_line]
+    if not others:
+        return timing_line(start_line, normal), None
+
+    start_x, start_y = centre(start_line)
+    finish_line = max(others, key=lambda line: math.hypot(centre(line)[0] - start_x,
+                                                          centre(line)[1] - start_y))
+    # Crossed along the normal of the two cones furthest apart, the way
+    # from the start line
+    finish_x, finish_y = centre(finish_line)
+    finish_normal = normal
+    (ax, ay), (bx, by) = max(((a, b) for a in finish_line for b in finish_line),
+                             key=lambda pair: math.dist(*pair))
+    across = math.hypot(bx - ax, by - ay)
+    if across > 0:
+        finish_normal = ((by - ay) / across, -(bx - ax) / across)
+        if (finish_normal[0] * (finish_x - start_x)
+                + finish_normal[1] * (finish_y - start_y)) < 0:
+            finish_normal = (-finish_normal[0], -finish_normal[1])
+    return timing_line(start_line, normal), timing_line(finish_line, finish_normal)
+
+
+class LapSimulator:
+    """
+    Drives a vehicle model around a track without Gazebo, as fast as Python allows.
+
+    Time advances in fixed steps of `dt` (Gazebo's world step) and follows the
+    timing of `RaceCarModelPlugin`: the vehicle model is only updated once at
+    least `1 / update_rate` has passed since its last update, and the state is
+    only "published" (i.e. the controller called) once at least
+    `1 / publish_rate` has passed since it was last published. Commands are
+    applied after `control_delay`, the steering is rate limited by
+    `steering_lock_time` and the car brakes at -1 m/s^2 if no command has been
+    received for a second, all as in the plugin. The state machine is not
+    simulated, the car is always allowed to drive.
+
+    A controller is a callable taking `(time, state)`, where `state` is a
+    `VehicleState`, and returning `(linear, steering)` (linear being an
+    acceleration or a speed depending on `command_mode`) or None to send no
+    command.
+
+    Laps are timed as at competitions: from the first time the car crosses the
+    start line (the line through the big orange cones, perpendicular to the
+    starting direction) to the following crossings. Tracks with a second line
+    of big orange cones (e.g. acceleration) are open: they are driven once,
+    from the start line to the finish line, the line furthest from the start
+    line, whatever `laps` is. A cone counts as hit when
+    it touches the car's rectangular footprint, and the car goes off track
+    when its footprint is entirely past the line between the nearest blue and
+    yellow cones (an approximation that is good away from hairpins).
+
+    BatchLapSimulator runs many tracks at once, far faster than a
+    LapSimulator each.
+    """
+
+    def __init__(self, track, vehicle_config, config=None):
+        self.track = track if isinstance(track, Track) else Track.from_csv(track)
+        self.config, self.model, self.max_steering_rate = _setup(vehicle_config, config)
+        self.start_line, self.finish_line = timing_lines(self.track)
+
+    @staticmethod
+    def _line_distance(line, x, y):
+        """Signed distance along the normal of a timing line and lateral offset to it."""
+        dx, dy = x - line.x, y - line.y
+        return dx * line.normal_x + dy * line.normal_y, -dx * line.normal_y + dy * line.normal_x
+
+    def _hit_cones(self, state, hit):
+        """Adds the cones touching the car's footprint to `hit`, returns the new ones."""
+        cfg = self.config
+        half_length = cfg['car_length'] / 2 + cfg['cone_radius']
+        half_width = cfg['car_width'] / 2 + cfg['cone_radius']
+        cos_yaw, sin_yaw = math.cos(state[YAW]), math.sin(state[YAW])
+
+        new = []
+        for index in self.track.cones_near(state[X], state[Y], math.hypot(half_length, half_width)):
+            if index in hit:
+                continue
+            _, cone_x, cone_y = self.track.cones[index]
+            dx, dy = cone_x - state[X], cone_y - state[Y]
+            if abs(cos_yaw * dx + sin_yaw * dy) <= half_length and \
+                    abs(-sin_yaw * dx + cos_yaw * dy) <= half_width:
+                hit.add(index)
+                new.append(index)
+        return new
+
+    def _off_track(self, state):
+        track = self.track
+        search = self.config['off_track_distance']
+        blue = track.nearest("blue", state[X], state[Y], search)
+        yellow = track.nearest("yellow", state[X], state[Y], search)
+        if blue is None and yellow is None:
+            return True
+        if blue is None or yellow is None:
+            # Tracks with a single colour of cones (or parts of them)
+            return False
+
+        _, blue_x, blue_y = track.cones[blue]
+        _, yellow_x, yellow_y = track.cones[yellow]
+        width = math.hypot(yellow_x - blue_x, yellow_y - blue_y)
+        if width == 0:
+            return False
+        across = ((state[X] - blue_x) * (yellow_x - blue_x)
+                  + (state[Y] - blue_y) * (yellow_y - blue_y)) / width
+        half_width = self.config['car_width'] / 2
+        return across < -half_width or across > width + half_width
+
+    def run(self, controller):
+        """Simulates until the laps are done or `max_time` is reached, returns the results."""
+        cfg = self.config
+        dt = cfg['dt']
+        update_period = 1.0 / cfg['update_rate']
+        publish_period = 1.0 / cfg['publish_rate']
+        check_period = cfg['check_period']
+        velocity_mode = cfg['command_mode'] == "velocity"
+        # Tolerance for comparing times built from sums of dt
+        eps = 1e-9 * dt
+
+        state = [0.0] * STATE_SIZE
+        state[X], state[Y], state[YAW] = self.track.car_start
+        des_input = [0.0, 0.0, 0.0]
+        act_input = [0.0, 0.0, 0.0]
+        commands = deque()
+
+        sim_time = 0.0
+        last_update = last_published = last_cmd_time = last_check = 0.0
+
+        hit = set()
+        cone_hits = []
+        off_track_events = []
+        was_off_track = False
+        off_track_since = 0.0
+
+        # Open tracks are driven from the start line to the finish line once
+        laps = 1 if self.finish_line is not None else cfg['laps']
+        line_distance, _ = self._line_distance(self.start_line, state[X], state[Y])
+        # Timing starts straight away if the car starts past the start line
+        crossings = [0.0] if line_distance >= 0 else []
+        # Distance travelled since the last crossing, a crossing only counts
+        # once the car has gone round the track
+        lap_distance = cfg['min_lap_distance'] if line_distance < 0 else 0.0
+        end_reason = "timeout"
+
+        wall_start = time.perf_counter()
+        steps = int(round(cfg['max_time'] / dt))
+        for step in range(1, steps + 1):
+            sim_time = step * dt
+            if sim_time - last_update < update_period - eps:
+                continue
+            update_dt = sim_time - last_update
+            last_update = sim_time
+
+            # RaceCarModelPlugin::updateState
+            if commands and sim_time - commands[0][0] >= cfg['control_delay'] - eps:
+                _, des_input[ACC], des_input[VEL], des_input[DELTA] = commands.popleft()
+
+            if velocity_mode:
+                current_speed = math.hypot(state[V_X], state[V_Y])
+                des_input[ACC] = (des_input[VEL] - current_speed) / update_dt
+
+            act_input[ACC] = des_input[ACC] if sim_time - last_cmd_time < 1.0 else -1.0
+            steering_error = des_input[DELTA] - act_input[DELTA]
+            act_input[DELTA] += math.copysign(
+                min(self.max_steering_rate * update_dt, abs(steering_error)), steering_error)
+
+            previous_x, previous_y = state[X], state[Y]
+            self.model.update_single_state(state, act_input, update_dt)
+
+            # Start (or finish) line
+            lap_distance += math.hypot(state[X] - previous_x, state[Y] - previous_y)
+            if lap_distance >= cfg['min_lap_distance']:
+                line = self.finish_line if crossings and self.finish_line else self.start_line
+                previous_distance, _ = self._line_distance(line, previous_x, previous_y)
+                distance, lateral = self._line_distance(line, state[X], state[Y])
+                if previous_distance < 0 <= distance and abs(lateral) <= line.half_width:
+                    crossings.append(sim_time)
+                    lap_distance = 0.0
+                    if len(crossings) > laps:
+                        end_reason = "finished"
+                        break
+
+            # Cone hits and off track
+            if sim_time - last_check >= check_period - eps:
+                last_check = sim_time
+                for index in self._hit_cones(state, hit):
+                    tag, cone_x, cone_y = self.track.cones[index]
+                    cone_hits.append({'time': sim_time, 'tag': tag, 'x': cone_x, 'y': cone_y})
+                off_track = self._off_track(state)
+                if off_track and not was_off_track:
+                    off_track_events.append({'time': sim_time, 'x': state[X], 'y': state[Y]})
+                    off_track_since = sim_time
+                was_off_track = off_track
+                if off_track and sim_time - off_track_since >= cfg['max_off_track_time']:
+                    end_reason = "off_track"
+                    break
+
+            # Publishing, which is when the controller gets to see the state
+            if sim_time - last_published < publish_period - eps:
+                continue
+            last_published = sim_time
+            command = controller(sim_time, VehicleState(*state))
+            if command is not None:
+                linear, steering = command
+                acc, vel = (0.0, linear) if velocity_mode else (linear, 0.0)
+                commands.append((sim_time, acc, vel, steering))
+                last_cmd_time = sim_time
+
+        wall_time = time.perf_counter() - wall_start
+        lap_times = [end - start for start, end in zip(crossings, crossings[1:])]
+        return {
+            'track': self.track.name,
+            'completed': end_reason == "finished",
+            'end_reason': end_reason,
+            'lap_times': lap_times,
+            'sim_time': sim_time,
+            'wall_time': wall_time,
+            'real_time_factor': sim_time / wall_time if wall_time > 0 else math.inf,
+            'cone_hits': cone_hits,
+            'off_track_events': off_track_events,
+            'final_state': dict(zip(STATE_FIELDS, state)),
+        }
+
+
+class BatchLapSimulator:
+    """
+    Drives a car around each of many tracks at once, as LapSimulator does for one.
+
+    The cars are stepped in lockstep: every vehicle model update is a single
+    call of the vectorised `update_state` for all the cars still driving, and
+    the command handling, start line crossings, cone hits and off track
+    checks are NumPy operations across the batch, over the cones near the
+    cars (see NearbyCones). The cost of a step hardly grows with
+    the number of cars, so the more cars in a batch the faster each of them
+    runs, until the controllers dominate.
+
+    `run` takes a controller per car, called as in LapSimulator, or a single
+    batch controller called with `(time, states, cars)` (the (N, STATE_SIZE)
+    states of the cars still driving and their indices) and returning arrays
+    of `linear` and `steering` commands for them. Each car stops when it
+    finishes, has been off track for too long or reaches `max_time`, with the
+    results of LapSimulator.run (its `wall_time` being that of the whole batch).
+    """
+
+    def __init__(self, tracks, vehicle_config, config=None):
+        self.tracks = [track if isinstance(track, Track) else Track.from_csv(track)
+                       for track in tracks]
+        self.config, self.model, self.max_steering_rate = _setup(vehicle_config, config)
+        self.lines = [timing_lines(track) for track in self.tracks]
+
+    def run(self, controllers):
+        """Simulates every car until it is done, returns the results in the order of the tracks."""
+        cfg = self.config
+        dt = cfg['dt']
+        update_period = 1.0 / cfg['update_rate']
+        publish_period = 1.0 / cfg['publish_rate']
+        check_period = cfg['check_period']
+        velocity_mode = cfg['command_mode'] == "velocity"
+        # Tolerance for comparing times built from sums of dt
+        eps = 1e-9 * dt
+        batch_controller = not isinstance(controllers, (list, tuple))
+        half_length = cfg['car_length'] / 2 + cfg['cone_radius']
+        half_width = cfg['car_width'] / 2 + cfg['cone_radius']
+        car_half_width = cfg['car_width'] / 2
+        search_sq = cfg['off_track_distance'] ** 2
+
+        n = len(self.tracks)
+        # Arrays have a row per car still driving, `cars` gives the car of every row
+        cars = np.arange(n)
+        state = np.zeros((n, STATE_SIZE))
+        state[:, [X, Y, YAW]] = [track.car_start for track in self.tracks]
+        des_input = np.zeros((n, 3))
+        act_input = np.zeros((n, 3))
+        last_cmd_time = np.zeros(n)
+        # (time, acc, vel, steering, sent) with an entry per row
+        commands = deque()
+
+        cones = NearbyCones([[cone[1:] for cone in track.cones] for track in self.tracks],
+                            math.hypot(half_length, half_width))
+        blue, yellow = (NearbyCones([track.cones_of(tag) for track in self.tracks],
+                                    cfg['off_track_distance']) for tag in ("blue", "yellow"))
+        hit = np.zeros((n, max(2, max(len(track.cones) for track in self.tracks))), dtype=bool)
+        was_off_track = np.zeros(n, dtype=bool)
+        off_track_since = np.zeros(n)
+        cone_hits = [[] for _ in range(n)]
+        off_track_events = [[] for _ in range(n)]
+
+        # The line every car crosses next, (x, y, normal x, normal y, half width) columns
+        line = np.array([start for start, _ in self.lines])
+        open_track = np.array([finish is not None for _, finish in self.lines])
+        laps = np.where(open_track, 1, cfg['laps'])
+        line_distance = ((state[:, X] - line[:, 0]) * line[:, 2]
+                         + (state[:, Y] - line[:, 1]) * line[:, 3])
+        # Timing starts straight away if the car starts past the start line
+        crossings = [[0.0] if distance >= 0 else [] for distance in line_distance]
+        for car in np.flatnonzero(open_track & (line_distance >= 0)):
+            line[car] = self.lines[car][1]
+        # Distance travelled since the last crossing
+        lap_distance = np.where(line_distance < 0, cfg['min_lap_distance'], 0.0)
+
+        results = [None] * n
+        sim_time = 0.0
+        last_update = last_published = last_check = 0.0
+        wall_start = time.perf_counter()
+
+        def result(row, end_reason):
+            car = cars[row]
+            wall_time = time.perf_counter() - wall_start
+            lap_times = [end - start for start, end in zip(crossings[car], crossings[car][1:])]
+            results[car] = {
+                'track': self.tracks[car].name,
+                'completed': end_reason == "finished",
+                'end_reason': end_reason,
+                'lap_times': lap_times,
+                'sim_time': sim_time,
+                'wall_time': wall_time,
+                'real_time_factor': sim_time / wall_time if wall_time > 0 else math.inf,
+                'cone_hits': cone_hits[car],
+                'off_track_events': off_track_events[car],
+                'final_state': dict(zip(STATE_FIELDS, state[row].tolist())),
+            }
+
+        steps = int(round(cfg['max_time'] / dt))
+        for step in range(1, steps + 1):
+            sim_time = step * dt
+            if sim_time - last_update < update_period - eps:
+                continue
+            update_dt = sim_time - last_update
+            last_update = sim_time
+            done = np.zeros(len(cars), dtype=bool)
+
+            # RaceCarModelPlugin::updateState
+            if commands and sim_time - commands[0][0] >= cfg['control_delay'] - eps:
+                _, acc, vel, steering, sent = commands.popleft()
+                des_input[sent, ACC] = acc[sent]
+                des_input[sent, VEL] = vel[sent]
+                des_input[sent, DELTA] = steering[sent]
+
+            if velocity_mode:
+                current_speed = np.hypot(state[:, V_X], state[:, V_Y])
+                des_input[:, ACC] = (des_input[:, VEL] - current_speed) / update_dt
+
+            act_input[:, ACC] = np.where(sim_time - last_cmd_time < 1.0, des_input[:, ACC], -1.0)
+            steering_error = des_input[:, DELTA] - act_input[:, DELTA]
+            act_input[:, DELTA] += np.copysign(
+                np.minimum(self.max_steering_rate * update_dt, np.abs(steering_error)),
+                steering_error)
+
+            previous_x, previous_y = state[:, X].copy(), state[:, Y].copy()
+            self.model.update_state(state, act_input, update_dt)
+
+            # Start (or finish) lines
+            lap_distance += np.hypot(state[:, X] - previous_x, state[:, Y] - previous_y)
+            line_x, line_y, normal_x, normal_y = line[:, 0], line[:, 1], line[:, 2], line[:, 3]
+            dx, dy = state[:, X] - line_x, state[:, Y] - line_y
+            distance = dx * normal_x + dy * normal_y
+            previous_distance = (previous_x - line_x) * normal_x + (previous_y - line_y) * normal_y
+            crossed = ((lap_distance >= cfg['min_lap_distance']) & (previous_distance < 0)
+                       & (distance >= 0) & (np.abs(dy * normal_x - dx * normal_y) <= line[:, 4]))
+            for row in np.flatnonzero(crossed):
+                car = cars[row]
+                crossings[car].append(sim_time)
+                lap_distance[row] = 0.0
+                if open_track[row]:
+                    line[row] = self.lines[car][1]
+                if len(crossings[car]) > laps[row]:
+                    result(row, "finished")
+                    done[row] = True
+
+            # Cone hits and off track
+            if sim_time - last_check >= check_period - eps:
+                last_check = sim_time
+                rows = np.arange(len(cars))
+                x, y = state[:, X, None], state[:, Y, None]
+                cos_yaw, sin_yaw = np.cos(state[:, YAW, None]), np.sin(state[:, YAW, None])
+                near, near_index = cones.near(cars, state[:, X], state[:, Y])
+                dx, dy = near[:, :, 0] - x, near[:, :, 1] - y
+                touching = ((np.abs(cos_yaw * dx + sin_yaw * dy) <= half_length)
+                            & (np.abs(cos_yaw * dy - sin_yaw * dx) <= half_width)
+                            & ~hit[rows[:, None], near_index] & ~done[:, None])
+                for row, column in zip(*np.nonzero(touching)):
+                    index = near_index[row, column]
+                    hit[row, index] = True
+                    tag, cone_x, cone_y = self.tracks[cars[row]].cones[index]
+                    cone_hits[cars[row]].append(
+                        {'time': sim_time, 'tag': tag, 'x': cone_x, 'y': cone_y})
+
+                nearest = []
+                for side in (blue, yellow):
+                    side = side.near(cars, state[:, X], state[:, Y])[0]
+                    distance_sq = (side[:, :, 0] - x) ** 2 + (side[:, :, 1] - y) ** 2
+                    index = np.argmin(distance_sq, axis=1)
+                    nearest.append((side[rows, index], distance_sq[rows, index] <= search_sq))
+                (blue_xy, has_blue), (yellow_xy, has_yellow) = nearest
+                width_x, width_y = (yellow_xy - blue_xy).T
+                width = np.hypot(width_x, width_y)
+                across = (((state[:, X] - blue_xy[:, 0]) * width_x
+                           + (state[:, Y] - blue_xy[:, 1]) * width_y)
+                          / np.where(width > 0, width, 1.0))
+                # Off track with no cones around, or past the line between the
+                # nearest blue and yellow cones
+                off_track = ~has_blue & ~has_yellow
+                off_track |= (has_blue & has_yellow & (width > 0)
+                              & ((across < -car_half_width) | (across > width + car_half_width)))
+                off_track &= ~done
+
+                entered = off_track & ~was_off_track
+                for row in np.flatnonzero(entered):
+                    off_track_events[cars[row]].append(
+                        {'time': sim_time, 'x': float(state[row, X]), 'y': float(state[row, Y])})
+                off_track_since[entered] = sim_time
+                was_off_track = off_track
+                for row in np.flatnonzero(
+                        off_track & (sim_time - off_track_since >= cfg['max_off_track_time'])):
+                    result(row, "off_track")
+                    done[row] = True
+
+            if done.any():
+                # Only the cars still driving are simulated from now on
+                keep = ~done
+                cars, state, des_input, act_input = cars[keep], state[keep], \
+                    des_input[keep], act_input[keep]
+                last_cmd_time, lap_distance, line = last_cmd_time[keep], lap_distance[keep], \
+                    line[keep]
+                open_track, laps = open_track[keep], laps[keep]
+                hit = hit[keep]
+                was_off_track, off_track_since = was_off_track[keep], off_track_since[keep]
+                commands = deque((command_time, acc[keep], vel[keep], steering[keep], sent[keep])
+                                 for command_time, acc, vel, steering, sent in commands)
+                if not len(cars):
+                    break
+
+            # Publishing, which is when the controllers get to see the states
+            if sim_time - last_published < publish_period - eps:
+                continue
+            last_published = sim_time
+            if batch_controller:
+                linear, steering = controllers(sim_time, state, cars)
+                linear = np.asarray(linear, dtype=float)
+                steering = np.asarray(steering, dtype=float)
+                sent = np.ones(len(cars), dtype=bool)
+            else:
+                linear, steering = np.zeros(len(cars)), np.zeros(len(cars))
+                sent = np.zeros(len(cars), dtype=bool)
+                for row, (car, car_state) in enumerate(zip(cars, state.tolist())):
+                    command = controllers[car](sim_time, VehicleState(*car_state))
+                    if command is not None:
+                        linear[row], steering[row] = command
+                        sent[row] = True
+                if not sent.any():
+                    continue
+            zeros = np.zeros(len(cars))
+            acc, vel = (zeros, linear) if velocity_mode else (linear, zeros)
+            commands.append((sim_time, acc, vel, steering, sent))
+            last_cmd_time[sent] = sim_time
+
+        for row in range(len(cars)):
+            result(row, "timeout")
+        return results
+
+
+def load_controller(spec):
+    """Imports a controller factory given as `module:attribute`."""
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"Controller must be given as 'module:attribute', got '{spec}'")
+    return getattr(import_module(module_name), attribute)
+
+
+def _simulate_tracks(args):
+    track_files, controller_factory, vehicle_config, config = args
+    if isinstance(controller_factory, str):
+        controller_factory = load_controller(controller_factory)
+    if len(track_files) == 1:
+        simulator = LapSimulator(track_files[0], vehicle_config, config)
+        results = [simulator.run(controller_factory(simulator.track, simulator.config))]
+    else:
+        simulator = BatchLapSimulator(track_files, vehicle_config, config)
+        if hasattr(controller_factory, "batch"):
+            controllers = controller_factory.batch(simulator.tracks, simulator.config)
+        else:
+            controllers = [controller_factory(track, simulator.config)
+                           for track in simulator.tracks]
+        results = simulator.run(controllers)
+    for track_file, result in zip(track_files, results):
+        result['track_file'] = track_file
+    return results
+
+
+def simulate_batch(track_files, controller_factory, vehicle_config, config=None, jobs=None,
+                   batch_size=None):
+    """
+    Simulates the tracks in worker processes, at most `jobs` at a time.
+
+    Every worker drives the cars of up to `batch_size` tracks in lockstep with
+    a BatchLapSimulator (by default the tracks are shared evenly between the
+    workers). `controller_factory` is called in the worker with every track
+    and the simulator config and must return its controller, unless it has a
+    `batch` attribute (as MidpointController does), which is then called with
+    all the tracks of the batch and the config to build a batch controller.
+    It has to be picklable (e.g. a module level class or function) or be
+    given as `module:attribute`. Results are returned in the order of
+    `track_files`.
+    """
+    track_files = list(track_files)
+    if batch_size is None:
+        workers = jobs or os.cpu_count() or 1
+        batch_size = max(1, math.ceil(len(track_files) / workers))
+    tasks = [(track_files[start:start + batch_size], controller_factory, vehicle_config, config)
+             for start in range(0, len(track_files), batch_size)]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return [result for results in executor.map(_simulate_tracks, tasks)
+                for result in results]
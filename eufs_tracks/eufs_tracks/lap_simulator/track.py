@@ -0,0 +1,160 @@
+import csv
+import math
+from os.path import basename, splitext
+
+import numpy as np
+
+
+class Track:
+    """
+    Cones of a track csv file, bucketed into a grid for fast neighbourhood queries.
+
+    Reads the csv format written by the converter and TrackGenerator:
+    `tag,x,y,direction,x_variance,y_variance,xy_covariance`. The `car_start`
+    row gives the starting position, with its `direction` as the yaw.
+    """
+
+    CONE_TAGS = ("blue", "yellow", "orange", "big_orange")
+
+    def __init__(self, cones, car_start=(0.0, 0.0, 0.0), name="", cell_size=2.0):
+        # cones: (tag, x, y) tuples
+        self.name = name
+        self.cones = [(tag, float(x), float(y)) for tag, x, y in cones]
+        self.car_start = tuple(float(value) for value in car_start)
+        self.cell_size = cell_size
+
+        # Cells hold (index, x, y) tuples so queries don't need to look the cones up
+        self._grid = {}
+        self._tag_grids = {tag: {} for tag in self.CONE_TAGS}
+        for index, (tag, x, y) in enumerate(self.cones):
+            cell = self._cell(x, y)
+            self._grid.setdefault(cell, []).append((index, x, y))
+            self._tag_grids.setdefault(tag, {}).setdefault(cell, []).append((index, x, y))
+
+        cells = list(self._grid) or [(0, 0)]
+        self._min_cell = (min(c[0] for c in cells), min(c[1] for c in cells))
+        self._max_cell = (max(c[0] for c in cells), max(c[1] for c in cells))
+
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        cones = []
+        car_start = (0.0, 0.0, 0.0)
+        with open(path, "r") as f:
+            for row in csv.DictReader(f):
+                if row["tag"] == "car_start":
+                    car_start = (row["x"], row["y"], row["direction"])
+                else:
+                    cones.append((row["tag"], row["x"], row["y"]))
+        return cls(cones, car_start, name=splitext(basename(path))[0], **kwargs)
+
+    def _cell(self, x, y):
+        return (int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size)))
+
+    def cones_of(self, tag):
+        return [(x, y) for cone_tag, x, y in self.cones if cone_tag == tag]
+
+    def cones_near(self, x, y, radius):
+        """Indices of the cones within `radius` of (x, y)."""
+        (min_x, min_y), (max_x, max_y) = self._cell(x - radius, y - radius), \
+            self._cell(x + radius, y + radius)
+        radius_sq = radius * radius
+        grid = self._grid
+        near = []
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                for index, cone_x, cone_y in grid.get((cell_x, cell_y), ()):
+                    dx, dy = cone_x - x, cone_y - y
+                    if dx * dx + dy * dy <= radius_sq:
+                        near.append(index)
+        return near
+
+    def nearest(self, tag, x, y, max_distance=math.inf):
+        """Index of the closest cone with `tag` to (x, y), or None if there is none."""
+        grid = self._tag_grids.get(tag)
+        if not grid:
+            return None
+
+        centre_x, centre_y = self._cell(x, y)
+        max_ring = max(abs(centre_x - self._min_cell[0]), abs(centre_x - self._max_cell[0]),
+                       abs(centre_y - self._min_cell[1]), abs(centre_y - self._max_cell[1]))
+
+        # Search rings of cells outwards, a cone in ring r is at least
+        # (r - 1) cells away so the search stops once that is further than
+        # the best cone found so far
+        best, best_sq = None, max_distance * max_distance
+        for ring in range(max_ring + 1):
+            if ((ring - 1) * self.cell_size) ** 2 > best_sq:
+                break
+            for cell_x in range(centre_x - ring, centre_x + ring + 1):
+                step = 1 if abs(cell_x - centre_x) == ring else 2 * ring
+                for cell_y in range(centre_y - ring, centre_y + ring + 1, step):
+                    for index, cone_x, cone_y in grid.get((cell_x, cell_y), ()):
+                        dx, dy = cone_x - x, cone_y - y
+                        distance_sq = dx * dx + dy * dy
+                        if distance_sq <= best_sq:
+                            best, best_sq = index, distance_sq
+        return best
+
+
+class NearbyCones:
+    """
+    Cones of the tracks of many cars near the cars, for NumPy queries across
+    the cars.
+
+    Every car gets the cones of its track within `radius + margin` of where
+    it was when they were last gathered, in track order and padded with cones
+    far away to the same number for all the cars. These hold every cone
+    within `radius` of the cars until one of them has moved `margin` away,
+    when they are gathered again, so queries within `radius` are exact while
+    only looking at a handful of cones per car.
+    """
+
+    # Position of the padding cones, far from any track
+    FAR = 1e9
+
+    def __init__(self, cones, radius, margin=5.0):
+        """
+        Args:
+            cones (list): (x, y) cones of the track of every car
+            radius (float): distance from the cars the cones are needed within
+            margin (float): distance the cars move between gatherings of the cones
+        """
+        # At least two columns, so that the two closest cones can always be looked for
+        self._cones = np.full((len(cones), max(2, max(map(len, cones), default=0)), 2), self.FAR)
+        for car, track_cones in enumerate(cones):
+            self._cones[car, :len(track_cones)] = track_cones
+        self.gather_sq = (radius + margin) ** 2
+        self.margin_sq = margin ** 2
+        self._cars = None
+        self._origin = None
+        self._xy = None
+        self._index = None
+
+    def near(self, cars, x, y):
+        """
+        Cones around cars (in increasing order, those still driving) at (x, y)
+
+        Returns:
+            (xy, index): (N, K, 2) positions of K cones around every car and
+            (N, K) their indices in the cones of its track
+        """
+        if self._cars is not None and not np.array_equal(cars, self._cars):
+            rows = np.searchsorted(self._cars, cars)
+            self._origin, self._xy, self._index = \
+                self._origin[rows], self._xy[rows], self._index[rows]
+        self._cars = np.array(cars)
+
+        if (self._origin is None or np.max((x - self._origin[:, 0]) ** 2
+                                           + (y - self._origin[:, 1]) ** 2) > self.margin_sq):
+            cones = self._cones[cars]
+            gathered = ((cones[:, :, 0] - x[:, None]) ** 2
+                        + (cones[:, :, 1] - y[:, None]) ** 2) <= self.gather_sq
+            count = max(2, gathered.sum(axis=1).max())
+            # Gathered cones first, in track order
+            index = np.argsort(~gathered, axis=1, kind='stable')[:, :count]
+            valid = np.take_along_axis(gathered, index, axis=1)
+            self._xy = np.where(valid[:, :, None],
+                                np.take_along_axis(cones, index[:, :, None], axis=1), self.FAR)
+            self._index = index
+            self._origin = np.stack((x, y), axis=1)
+        return self._xy, self._index
@@ -1,2 +1,9 @@
-from .track_generator import TrackGenerator  # noqa: F401
 from .track_generator_gui import EUFSTracksGUI  # noqa: F401
+
+
+def __getattr__(name):
+    # TrackGenerator pulls in numpy, so it is only imported when used
+    if name == "TrackGenerator":
+        from .track_generator import TrackGenerator
+        return TrackGenerator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -40,6 +40,8 @@ class TrackGenerator:
             self.config['resolution'] = int(4 * length * max(1 / min_sep, r / max_sep))
 
         self.rng = random.Random(self.config['seed'])
+        # Path of the last generated track
+        self.path = None
 
     # Path Generation
 
@@ -82,8 +84,8 @@ class TrackGenerator:
         # sample around the unit circle
         z = np.array([cmath.exp(2j * math.pi * t / n_points) for t in range(n_points)])
 
-        waves = np.zeros(n_points, dtype=np.complex)
-        dwaves = np.zeros(n_points, dtype=np.complex)
+        waves = np.zeros(n_points, dtype=complex)
+        dwaves = np.zeros(n_points, dtype=complex)
 
         for frequency in range(2, max_frequency + 1):
             # add new term
@@ -132,8 +134,8 @@ class TrackGenerator:
         # sample around the unit circle
         z = np.array([cmath.exp(2j * math.pi * t / n_points) for t in range(n_points)])
 
-        waves = np.zeros(n_points, dtype=np.complex)
-        dwaves = np.zeros(n_points, dtype=np.complex)
+        waves = np.zeros(n_points, dtype=complex)
+        dwaves = np.zeros(n_points, dtype=complex)
 
         frequency = 1
         amplitude = starting_amplitude
@@ -451,7 +453,14 @@ class TrackGenerator:
         if 'seed' in properties:
             self.rng = random.Random(self.config['seed'])
 
-    def __call__(self):
+    def generate_path(self):
+        """
+        Generates the path through the centre of a random track, starting at the
+        starting line
+
+        Returns:
+        A tuple containing the points, normals, and corner radii along the path
+        """
         margin = self.config['track_width'] / 2 + self.config['margin']
         if 'length' in self.config:
             path = TrackGenerator.generate_path_w_length(
@@ -478,14 +487,18 @@ class TrackGenerator:
         else:
             raise KeyError("missing one of required properties length or max_frequency")
 
-        path = TrackGenerator.pick_starting_point(
+        return TrackGenerator.pick_starting_point(
             *path,
             starting_straight_length=self.config['starting_straight_length'],
             downsample=self.config['starting_straight_downsample']
         )
 
+    def __call__(self):
+        # The path is kept for the velocity profile of the track
+        self.path = self.generate_path()
+
         return TrackGenerator.place_cones(
-            *path, self.config['min_corner_radius'],
+            *self.path, self.config['min_corner_radius'],
             min_cone_spacing=self.config['min_cone_spacing'],
             max_cone_spacing=self.config['max_cone_spacing'],
             track_width=self.config['track_width'],
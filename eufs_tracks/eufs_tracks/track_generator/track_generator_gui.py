@@ -2,13 +2,19 @@ import random
 import math
 
 from qt_gui.plugin import Plugin
-from python_qt_binding.QtCore import QPointF
+from python_qt_binding.QtCore import QPointF, QTimer
 from python_qt_binding.QtWidgets import QWidget, QVBoxLayout, QSpinBox, QDoubleSpinBox
 from python_qt_binding.QtWidgets import QGroupBox, QFormLayout, QPushButton, QSizePolicy
 from python_qt_binding.QtWidgets import QHBoxLayout, QLabel, QFileDialog, QSplitter
 from python_qt_binding.QtGui import QBrush, QPainter, QPen, QColor
 
-from eufs_tracks.track_generator import TrackGenerator
+from eufs_profiling import profiler
+
+
+def track_generator():
+    """The TrackGenerator class, imported (with numpy) on first use."""
+    module = profiler.import_module('EUFSTracksGUI', 'eufs_tracks.track_generator.track_generator')
+    return module.TrackGenerator
 
 
 # ranges include both start and end values
@@ -175,6 +181,7 @@ class TrackControls(QWidget):
 
         def save_track():
             filename = QFileDialog.getSaveFileName(self, "Save File", "track.csv", "CSV (*.csv)")[0]
+            TrackGenerator = track_generator()
             TrackGenerator.write_to_csv(filename, *TrackGenerator(settings)(), overwrite=True)
         save_btn.clicked.connect(save_track)
 
@@ -192,13 +199,18 @@ class TrackDisplay(QWidget):
         super(TrackDisplay, self).__init__()
         self.resize(200, 200)
         self.setMinimumSize(480, 480)
-        self.start_cones, self.left_cones, self.right_cones = TrackGenerator(settings)()
+
+        # The first track is generated once the plugin has been drawn
+        self.start_cones = self.left_cones = self.right_cones = None
+        QTimer.singleShot(0, self.regenerate_path)
 
     def regenerate_path(self):
-        self.start_cones, self.left_cones, self.right_cones = TrackGenerator(settings)()
+        self.start_cones, self.left_cones, self.right_cones = track_generator()(settings)()
         self.repaint(0, 0, -1, -1)
 
     def paintEvent(self, e):
+        if self.start_cones is None:
+            return
 
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
@@ -262,6 +274,7 @@ class MainWindow(QSplitter):
 
 class EUFSTracksGUI(Plugin):
     def __init__(self, context):
+        profiler.start('EUFSTracksGUI')
         super(EUFSTracksGUI, self).__init__(context)
 
         self.setObjectName('EUFSTracksGUI')
@@ -270,4 +283,6 @@ class EUFSTracksGUI(Plugin):
 
         self._widget = MainWindow()
         context.add_widget(self._widget)
+        profiler.checkpoint('EUFSTracksGUI', 'build widgets')
         self.logger.info("EUFSTracksGUI started!")
+        profiler.report('EUFSTracksGUI', log=self.logger.info)
@@ -0,0 +1 @@
+from .track_geometry import TrackGeometry, order_cones  # noqa: F401
@@ -0,0 +1,407 @@
+import hashlib
+import math
+import os
+from os.path import basename, expanduser, join, splitext
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from ..lap_simulator.track import Track
+
+
+def order_cones(points, start, yaw, turn_penalty=2.0, max_jump=5.0):
+    """
+    Orders the cones of one side of a track along it.
+
+    Starting from the cone closest to `start`, in the direction `yaw`, the
+    next cone is always the one closest to the last, with distances to cones
+    off the current direction scaled up by `1 + turn_penalty * (1 - cos(turn))`
+    so that the order doesn't cut across hairpins or double back. Cones that
+    are skipped this way (the next cone being more than `max_jump` times the
+    typical distance between neighbouring cones away) are inserted where they
+    lengthen the boundary the least.
+
+    Returns:
+        The indices of `points` in order along the track.
+    """
+    n = len(points)
+    if n < 3:
+        return np.arange(n)
+    neighbours = np.hypot(points[:, None, 0] - points[None, :, 0],
+                          points[:, None, 1] - points[None, :, 1])
+    np.fill_diagonal(neighbours, math.inf)
+    jump = max_jump * np.median(neighbours.min(axis=1))
+
+    first = int(np.argmin(np.hypot(points[:, 0] - start[0], points[:, 1] - start[1])))
+    order = [first]
+    remaining = np.ones(n, dtype=bool)
+    remaining[first] = False
+    direction = np.array([math.cos(yaw), math.sin(yaw)])
+    while remaining.any():
+        offsets = points - points[order[-1]]
+        distances = np.where(remaining, np.hypot(offsets[:, 0], offsets[:, 1]), math.inf)
+        cos_turn = offsets @ direction / np.maximum(distances, 1e-9)
+        following = int(np.argmin(distances * (1 + turn_penalty * (1 - cos_turn))))
+        if distances[following] > jump and len(order) > 1:
+            break
+        direction = offsets[following] / max(distances[following], 1e-9)
+        order.append(following)
+        remaining[following] = False
+
+    for skipped in np.flatnonzero(remaining):
+        chain = points[order]
+        before = np.hypot(*np.diff(chain, axis=0).T)
+        added = neighbours[skipped, order[:-1]] + neighbours[skipped, order[1:]] - before
+        position = int(np.argmin(added)) + 1
+        # Or at the end of the chain
+        if neighbours[skipped, order[-1]] < added[position - 1]:
+            position = len(order)
+        order.insert(position, skipped)
+    return np.array(order)
+
+
+def _closes(points):
+    """Whether a chain of cones closes into a loop."""
+    gaps = np.hypot(*np.diff(points, axis=0).T)
+    return len(points) > 2 and np.hypot(*(points[-1] - points[0])) <= 2.5 * np.median(gaps)
+
+
+def _boundaries_cross(left, right, closed):
+    """Whether any segment of one boundary crosses a segment of the other."""
+    def segments(polyline):
+        if closed:
+            return polyline, np.roll(polyline, -1, axis=0)
+        return polyline[:-1], polyline[1:]
+
+    def cross(u, v):
+        return u[..., 0] * v[..., 1] - u[..., 1] * v[..., 0]
+
+    (left_start, left_end), (right_start, right_end) = segments(left), segments(right)
+    left_step = (left_end - left_start)[:, None]
+    right_step = (right_end - right_start)[None]
+    offset = right_start[None] - left_start[:, None]
+    denominator = cross(left_step, right_step)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = cross(offset, right_step) / denominator
+        u = cross(offset, left_step) / denominator
+    return bool(np.any((t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)))
+
+
+def _project_to_polyline(points, polyline, closed):
+    """Closest points of `polyline` to each of `points`."""
+    starts = polyline if closed else polyline[:-1]
+    ends = np.roll(polyline, -1, axis=0) if closed else polyline[1:]
+    segments = ends - starts
+    lengths_sq = np.maximum(np.sum(segments ** 2, axis=1), 1e-12)
+    offsets = points[:, None, :] - starts[None, :, :]
+    t = np.clip(np.sum(offsets * segments[None, :, :], axis=2) / lengths_sq, 0.0, 1.0)
+    closest = starts[None, :, :] + t[:, :, None] * segments[None, :, :]
+    nearest = np.argmin(np.sum((points[:, None, :] - closest) ** 2, axis=2), axis=1)
+    return closest[np.arange(len(points)), nearest]
+
+
+def _total_turn(path, closed):
+    """Sum of the absolute changes of direction along a path (rad)."""
+    steps = np.diff(np.vstack([path, path[:1]]) if closed else path, axis=0)
+    headings = np.arctan2(steps[:, 1], steps[:, 0])
+    turns = np.diff(np.append(headings, headings[0]) if closed else headings)
+    return np.sum(np.abs(np.arctan2(np.sin(turns), np.cos(turns))))
+
+
+def _smooth(values, window, closed):
+    if window <= 1:
+        return values
+    pad = window // 2
+    padded = np.pad(values, pad, mode="wrap" if closed else "edge")
+    return np.convolve(padded, np.ones(window) / window, mode="same")[pad:pad + len(values)]
+
+
+def default_cache_dir():
+    """Where geometry is cached for csv files in read only directories."""
+    cache_home = os.environ.get("XDG_CACHE_HOME", join(expanduser("~"), ".cache"))
+    return join(cache_home, "eufs_sim", "track_geometry")
+
+
+class TrackGeometry:
+    """
+    Centreline, arc length, curvature and k-d trees of a track, for queries on the ground truth.
+
+    The blue (left) and yellow (right) cones are ordered along the track,
+    from the cones next to the car start and in its starting direction. The
+    centreline runs through the midpoints between the cones of one side and
+    the other boundary, resampled every `spacing` metres, with arc length 0
+    next to the car start. Tracks whose boundaries close into a loop are
+    treated as closed: arc length then wraps around at `length`. Tracks that
+    cross themselves, like the skidpad, have no single centreline and aren't
+    supported: their boundaries cross each other, which raises a ValueError.
+
+    `from_csv` stores the geometry in a sidecar file next to the csv file
+    (`<track>.geometry.npz`, or in `~/.cache/eufs_sim/track_geometry` if the
+    csv file's directory is read only) and loads it from there as long as the
+    csv file is unchanged.
+    """
+
+    # Bumped whenever what is saved changes, older sidecar files are recomputed
+    VERSION = 3
+
+    ARRAYS = ("left", "right", "centreline", "arc_length", "heading", "curvature",
+              "left_width", "right_width")
+
+    def __init__(self, left, right, centreline, arc_length, heading, curvature, left_width,
+                 right_width, length, closed, spacing, name="", source_hash=""):
+        """
+        Args:
+            left, right: ordered cones of the boundaries, (n, 2) arrays
+            centreline: (m, 2) array of centreline points
+            arc_length: distance along the centreline of each of its points
+            heading: direction of the centreline at each of its points (rad)
+            curvature: curvature of the centreline at each of its points
+                (1/m, positive to the left)
+            left_width, right_width: distance from each centreline point to
+                the left and right boundaries
+            length: length of the centreline, including the segment from its
+                last point back to the first if `closed`
+        """
+        self.name = name
+        self.left = np.asarray(left, dtype=float).reshape(-1, 2)
+        self.right = np.asarray(right, dtype=float).reshape(-1, 2)
+        self.centreline = np.asarray(centreline, dtype=float).reshape(-1, 2)
+        self.arc_length = np.asarray(arc_length, dtype=float)
+        self.heading = np.asarray(heading, dtype=float)
+        self.curvature = np.asarray(curvature, dtype=float)
+        self.left_width = np.asarray(left_width, dtype=float)
+        self.right_width = np.asarray(right_width, dtype=float)
+        self.length = float(length)
+        self.closed = bool(closed)
+        self.spacing = float(spacing)
+        self.source_hash = source_hash
+
+        # Built on load rather than saved, which takes well under a millisecond
+        self.centreline_tree = cKDTree(self.centreline)
+        self.left_tree = cKDTree(self.left)
+        self.right_tree = cKDTree(self.right)
+        self._longest = {"centreline": self._longest_segment(self.centreline),
+                         "left": self._longest_segment(self.left),
+                         "right": self._longest_segment(self.right)}
+
+    @classmethod
+    def from_track(cls, track, spacing=0.5, smoothing=3.0, source_hash=""):
+        """
+        Computes the geometry of a Track.
+
+        Args:
+            spacing (float): distance between centreline points (m)
+            smoothing (float): length of the moving average over the
+                curvature (m)
+        """
+        blue, yellow = track.cones_of("blue"), track.cones_of("yellow")
+        if len(blue) < 2 or len(yellow) < 2:
+            raise ValueError(f"Track '{track.name}' needs at least two blue and two yellow "
+                             "cones to find its centreline")
+        x, y, yaw = track.car_start
+        left = np.array(blue)
+        right = np.array(yellow)
+        left = left[order_cones(left, (x, y), yaw)]
+        right = right[order_cones(right, (x, y), yaw)]
+        closed = _closes(left) and _closes(right)
+        if _boundaries_cross(left, right, closed):
+            raise ValueError(f"Track '{track.name}' crosses itself, which isn't supported")
+
+        # Midpoints between the cones of one side and the other boundary. A
+        # side whose cones were ordered wrong zigzags, so the side giving the
+        # straighter path is used
+        paths = [(side + _project_to_polyline(side, other, closed)) / 2
+                 for side, other in ((left, right), (right, left))]
+        midpoints = min(paths, key=lambda path: _total_turn(path, closed))
+
+        # Resample at (very nearly) `spacing`, dividing the length evenly
+        path = np.vstack([midpoints, midpoints[:1]]) if closed else midpoints
+        distances = np.concatenate([[0.0], np.cumsum(np.hypot(*np.diff(path, axis=0).T))])
+        length = distances[-1]
+        count = max(int(math.ceil(length / spacing)), 2)
+        arc_length = np.linspace(0.0, length, count, endpoint=not closed)
+        centreline = np.column_stack([np.interp(arc_length, distances, path[:, 0]),
+                                      np.interp(arc_length, distances, path[:, 1])])
+        step = length / count if closed else length / (count - 1)
+
+        if closed:
+            forward = np.roll(centreline, -1, axis=0) - np.roll(centreline, 1, axis=0)
+            heading = np.arctan2(forward[:, 1], forward[:, 0])
+            turn = np.roll(heading, -1) - np.roll(heading, 1)
+            curvature = np.arctan2(np.sin(turn), np.cos(turn)) / (2 * step)
+        else:
+            forward = np.gradient(centreline, axis=0)
+            heading = np.arctan2(forward[:, 1], forward[:, 0])
+            curvature = np.gradient(np.unwrap(heading)) / step
+        curvature = _smooth(curvature, int(round(smoothing / step)) | 1, closed)
+
+        left_width, right_width = (
+            np.hypot(*(centreline - _project_to_polyline(centreline, side, closed)).T)
+            for side in (left, right))
+
+        return cls(left, right, centreline, arc_length, heading, curvature, left_width,
+                   right_width, length, closed, spacing, name=track.name, source_hash=source_hash)
+
+    @classmethod
+    def from_csv(cls, path, spacing=0.5, cache=True):
+        """Loads the geometry of a track csv file from its sidecar file, computing it if needed."""
+        with open(path, "rb") as f:
+            source_hash = hashlib.sha1(f.read()).hexdigest()
+        sidecars = cls.sidecar_files(path, source_hash) if cache else []
+        for sidecar in sidecars:
+            geometry = cls.load(sidecar, source_hash)
+            if geometry is not None and geometry.spacing == spacing:
+                return geometry
+
+        geometry = cls.from_track(Track.from_csv(path), spacing, source_hash=source_hash)
+        for sidecar in sidecars:
+            if geometry.save(sidecar):
+                break
+        return geometry
+
+    @staticmethod
+    def sidecar_files(path, source_hash):
+        """Files the geometry of a csv file is cached in, in order of preference."""
+        name = splitext(basename(path))[0]
+        return [splitext(path)[0] + ".geometry.npz",
+                join(default_cache_dir(), f"{name}-{source_hash[:16]}.npz")]
+
+    def save(self, path):
+        """Writes the geometry to an npz file, returns whether it could be written."""
+        arrays = {key: getattr(self, key) for key in TrackGeometry.ARRAYS}
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp_file = f"{path}.{os.getpid()}"
+            with open(tmp_file, "wb") as f:
+                np.savez(f, version=TrackGeometry.VERSION, name=self.name,
+                         source_hash=self.source_hash, length=self.length,
+                         closed=self.closed, spacing=self.spacing, **arrays)
+            os.replace(tmp_file, path)
+        except OSError:
+            return False
+        return True
+
+    @classmethod
+    def load(cls, path, source_hash=None):
+        """
+        Reads a geometry written by `save`.
+
+        Returns None if the file can't be read, was written by another version
+        or (if `source_hash` is given) for a different csv file.
+        """
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != TrackGeometry.VERSION or \
+                        source_hash is not None and str(data["source_hash"]) != source_hash:
+                    return None
+                arrays = {key: data[key] for key in TrackGeometry.ARRAYS}
+                length, closed, spacing = float(data["length"]), bool(data["closed"]), \
+                    float(data["spacing"])
+                name, saved_hash = str(data["name"]), str(data["source_hash"])
+        except (OSError, KeyError, ValueError):
+            return None
+        return cls(length=length, closed=closed, spacing=spacing, name=name,
+                   source_hash=saved_hash, **arrays)
+
+    def _longest_segment(self, polyline):
+        steps = np.diff(np.vstack([polyline, polyline[:1]]) if self.closed else polyline, axis=0)
+        return float(np.hypot(steps[:, 0], steps[:, 1]).max()) if len(steps) else 0.0
+
+    def _closest_segment(self, polyline, tree, longest, x, y):
+        """
+        Closest point to (x, y) on a polyline, with the k-d tree of its points
+        and the length of its longest segment.
+
+        The segment of the closest point has an end within `hypot(distance,
+        longest / 2)` of (x, y), `distance` being that of the closest point of
+        the polyline, so only the segments next to those points (usually
+        among the closest few) are checked.
+
+        Returns:
+            (start index of the segment, fraction along it, signed distance
+            to it, positive on its left)
+        """
+        n = len(polyline)
+        distances, near = tree.query((x, y), k=min(n, 8))
+        if n == 1:
+            return int(near), 0.0, float(distances)
+        radius = math.hypot(distances[0], longest / 2) * (1 + 1e-9)
+        if distances[-1] <= radius and len(near) < n:
+            # More points than the closest few are close enough
+            near = np.asarray(tree.query_ball_point((x, y), radius), dtype=int)
+        else:
+            near = near[distances <= radius]
+        starts = np.concatenate([near - 1, near])
+        starts = np.unique(starts % n if self.closed else starts[(starts >= 0) & (starts < n - 1)])
+
+        a = polyline[starts]
+        steps = polyline[(starts + 1) % n] - a
+        length_sq = np.sum(steps * steps, axis=1)
+        t = np.clip(((x - a[:, 0]) * steps[:, 0] + (y - a[:, 1]) * steps[:, 1])
+                    / np.where(length_sq > 0, length_sq, 1.0), 0.0, 1.0)
+        px, py = x - a[:, 0] - t * steps[:, 0], y - a[:, 1] - t * steps[:, 1]
+        distances = np.hypot(px, py)
+        best = int(np.argmin(distances))
+        return (int(starts[best]), float(t[best]), math.copysign(
+            distances[best], steps[best, 0] * py[best] - steps[best, 1] * px[best]))
+
+    def progress(self, x, y):
+        """
+        Distance along the track of (x, y) and its offset from the centreline.
+
+        The point is projected onto the closest point of the centreline, so
+        where the track passes close to itself (e.g. hairpins) the projection
+        can jump to the other part of the track; it doesn't know where the
+        car has been.
+
+        Returns:
+            (arc length in [0, length), offset to the left of the centreline)
+        """
+        start, t, offset = self._closest_segment(
+            self.centreline, self.centreline_tree, self._longest["centreline"], x, y)
+        end_s = self.arc_length[start + 1] if start + 1 < len(self.arc_length) else self.length
+        s = self.arc_length[start] + t * (end_s - self.arc_length[start])
+        return (s % self.length if self.closed else s), offset
+
+    def nearest_cone(self, x, y):
+        """
+        Closest boundary cone to (x, y).
+
+        Returns:
+            ("left" or "right", index into `left` or `right`, distance)
+        """
+        left_distance, left = self.left_tree.query((x, y))
+        right_distance, right = self.right_tree.query((x, y))
+        if left_distance <= right_distance:
+            return "left", int(left), float(left_distance)
+        return "right", int(right), float(right_distance)
+
+    def nearest_boundary(self, x, y):
+        """
+        Closest boundary to (x, y), i.e. the lines between consecutive cones of a side.
+
+        The distance is to the closest point of the boundaries. The point is
+        on the track side of the boundary if it is in the direction of the
+        centreline from that closest point, which doesn't rely on the cones
+        of the boundary being in order and holds at the corners between
+        segments.
+
+        Returns:
+            ("left" or "right", distance, whether (x, y) is on the track side
+            of that boundary)
+        """
+        best = None
+        for side, polyline, tree in (("left", self.left, self.left_tree),
+                                     ("right", self.right, self.right_tree)):
+            start, t, distance = self._closest_segment(polyline, tree, self._longest[side], x, y)
+            if best is None or abs(distance) < abs(best[2]):
+                best = (side, polyline, distance, start, t)
+
+        side, polyline, distance, start, t = best
+        (ax, ay), (bx, by) = polyline[start], polyline[(start + 1) % len(polyline)]
+        closest_x, closest_y = ax + t * (bx - ax), ay + t * (by - ay)
+        _, centre = self.centreline_tree.query((closest_x, closest_y))
+        centre_x, centre_y = self.centreline[centre]
+        track_side = ((x - closest_x) * (centre_x - closest_x)
+                      + (y - closest_y) * (centre_y - closest_y))
+        return side, abs(distance), track_side >= 0
@@ -0,0 +1,2 @@
+from .track_index import TrackIndex, LaunchFileIndex  # noqa: F401
+from .track_index import get_track_index, get_launch_file_index  # noqa: F401
@@ -0,0 +1,248 @@
+import json
+import os
+from glob import glob, has_magic
+from os.path import join, expanduser, expandvars, isdir
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class DirectoryListing:
+    """
+    Files in a single directory, only re-read when the directory's mtime changes.
+
+    Adding, removing or renaming an entry updates the mtime of the directory
+    it is in, so an unchanged mtime means the listing is still valid.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+        self._files = []
+
+    def files(self):
+        mtime = _mtime(self.path)
+        if mtime != self._mtime:
+            self._mtime = mtime
+            if mtime is None:
+                self._files = []
+            else:
+                with os.scandir(self.path) as entries:
+                    self._files = [entry.name for entry in entries if entry.is_file()]
+        return self._files
+
+
+class TrackIndex:
+    """
+    Cached view of the tracks available in the eufs_tracks share directory.
+
+    Used by the launcher and converter GUIs to fill their drop-down menus.
+    Refreshing an unchanged share directory costs a couple of `stat` calls
+    instead of a listing of every directory and a read of `blacklist.txt`.
+    """
+
+    def __init__(self, tracks_share):
+        self.tracks_share = tracks_share
+        self._launch_dir = DirectoryListing(join(tracks_share, "launch"))
+        self._csv_dir = DirectoryListing(join(tracks_share, "csv"))
+
+        self._blacklist_path = join(tracks_share, "launch", "blacklist.txt")
+        self._blacklist_mtime = None
+        self._blacklist = set()
+
+    def blacklist(self):
+        """Files in the launch directory that don't define tracks."""
+        mtime = _mtime(self._blacklist_path)
+        if mtime != self._blacklist_mtime:
+            self._blacklist_mtime = mtime
+            if mtime is None:
+                self._blacklist = set()
+            else:
+                with open(self._blacklist_path, "r") as f:
+                    self._blacklist = {line.strip() for line in f}
+        return self._blacklist
+
+    def launch_files(self):
+        """Track launch files, e.g. `small_track.launch`."""
+        blacklist = self.blacklist()
+        return [f for f in self._launch_dir.files() if f not in blacklist]
+
+    def csv_files(self):
+        """Track csv files, e.g. `small_track.csv`."""
+        return [f for f in self._csv_dir.files() if f[-3:] == "csv"]
+
+    def track_names(self, base_track=None):
+        """Track names without extension, with `base_track` (if present) first."""
+        launch_files = self.launch_files()
+        names = [f.split(".")[0] for f in launch_files if f != base_track]
+        if base_track in launch_files:
+            names.insert(0, base_track.split(".")[0])
+        return names
+
+
+class LaunchFileIndex:
+    """
+    Cached search for `*.launch.py` files below a directory.
+
+    `directory` follows the launcher's `default_launch_directory` convention:
+    environment variables are expanded and a trailing `**` searches
+    recursively. Files within `install` or `build` directories are ignored.
+
+    Directory listings are cached (in memory and in `cache_file`) against
+    each directory's mtime, so only directories that changed are re-read.
+    If `inotify_simple` is installed the tree is also watched, and checking
+    an unchanged tree does not touch the file system at all.
+    """
+
+    SUFFIX = ".launch.py"
+
+    def __init__(self, directory, cache_file=None):
+        self.pattern = expandvars(directory)
+        self.recursive = self.pattern.rstrip("/").endswith("**")
+        self.root = self.pattern.rstrip("/")[:-2] if self.recursive else self.pattern
+        self.root = self.root.rstrip("/") or "/"
+
+        self.cache_file = cache_file
+        self._dirs = {}
+        self._files = None
+        self._load_cache()
+
+        self._inotify = None
+        self._watches = {}
+        if INotify is not None:
+            try:
+                self._inotify = INotify()
+            except OSError:
+                self._inotify = None
+
+    @staticmethod
+    def _ignored(name):
+        return name.startswith(".") or "install" in name or "build" in name
+
+    def files(self):
+        """Returns every launch file found, refreshing only what changed."""
+        # Anything other than a plain directory or a trailing `**` is left to glob
+        if has_magic(self.root):
+            all_files = glob(join(self.pattern, "*" + self.SUFFIX), recursive=True)
+            return [f for f in all_files if not ("install" in f or "build" in f)]
+
+        if self._files is not None and self._inotify is not None:
+            if not self._inotify.read(timeout=0):
+                return self._files
+
+        self._files = self._scan()
+        self._save_cache()
+        return self._files
+
+    def _scan(self):
+        found = []
+        seen = set()
+        stack = [self.root]
+        while stack:
+            path = stack.pop()
+            seen.add(path)
+            files, subdirs = self._listing(path)
+            found.extend(join(path, f) for f in sorted(files))
+            if self.recursive:
+                stack.extend(join(path, d) for d in sorted(subdirs, reverse=True))
+
+        # Forget directories that are no longer part of the tree
+        for path in set(self._dirs) - seen:
+            del self._dirs[path]
+            if path in self._watches:
+                self._inotify.rm_watch(self._watches.pop(path))
+        return found
+
+    def _listing(self, path):
+        mtime = _mtime(path)
+        cached = self._dirs.get(path)
+        if cached is not None and cached[0] == mtime:
+            self._watch(path)
+            return cached[1], cached[2]
+
+        files, subdirs = [], []
+        if mtime is not None and isdir(path):
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if self._ignored(entry.name):
+                        continue
+                    if entry.is_dir():
+                        subdirs.append(entry.name)
+                    elif entry.name.endswith(self.SUFFIX):
+                        files.append(entry.name)
+        self._dirs[path] = (mtime, files, subdirs)
+        self._watch(path)
+        return files, subdirs
+
+    def _watch(self, path):
+        if self._inotify is None or path in self._watches or not isdir(path):
+            return
+        mask = (flags.CREATE | flags.DELETE | flags.MOVED_FROM | flags.MOVED_TO
+                | flags.DELETE_SELF | flags.MOVE_SELF)
+        try:
+            self._watches[path] = self._inotify.add_watch(path, mask)
+        except OSError:
+            # Out of watches, fall back to checking mtimes on every refresh
+            self._inotify.close()
+            self._inotify = None
+            self._watches = {}
+
+    def _load_cache(self):
+        if self.cache_file is None:
+            return
+        try:
+            with open(self.cache_file, "r") as f:
+                cache = json.load(f).get(self.pattern, {})
+        except (OSError, ValueError):
+            return
+        self._dirs = {path: tuple(entry) for path, entry in cache.items()}
+
+    def _save_cache(self):
+        if self.cache_file is None:
+            return
+        try:
+            with open(self.cache_file, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        cache[self.pattern] = self._dirs
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = f"{self.cache_file}.{os.getpid()}"
+            with open(tmp_file, "w") as f:
+                json.dump(cache, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError:
+            pass
+
+
+def default_cache_file():
+    """Location of the on-disk launch file index cache."""
+    cache_home = os.environ.get("XDG_CACHE_HOME", join(expanduser("~"), ".cache"))
+    return join(cache_home, "eufs_sim", "launch_file_index.json")
+
+
+# Indices are shared by every plugin in the same process
+_track_indices = {}
+_launch_file_indices = {}
+
+
+def get_track_index(tracks_share):
+    if tracks_share not in _track_indices:
+        _track_indices[tracks_share] = TrackIndex(tracks_share)
+    return _track_indices[tracks_share]
+
+
+def get_launch_file_index(directory):
+    if directory not in _launch_file_indices:
+        _launch_file_indices[directory] = LaunchFileIndex(directory, default_cache_file())
+    return _launch_file_indices[directory]
@@ -0,0 +1,2 @@
+from .velocity_profile import VelocityProfile  # noqa: F401
+from .velocity_profile import resample_curvature, path_curvature  # noqa: F401
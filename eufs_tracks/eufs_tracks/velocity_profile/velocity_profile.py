@@ -0,0 +1,248 @@
+import numpy as np
+
+from eufs_models import Param
+
+
+def resample_curvature(arc_length, curvature, length, n_points, closed=True):
+    """
+    Samples the curvature of a path at `n_points` evenly spaced points.
+
+    Args:
+        arc_length (np.ndarray): distance along the path of every curvature
+        curvature (np.ndarray): signed curvature along the path (1/m)
+        length (float): length of the path, back to the start if closed
+        n_points (int): number of points to sample
+        closed (bool): whether the path ends where it starts
+
+    Returns:
+        (curvature, step): the curvature at the points and the distance
+        between them
+    """
+    if closed:
+        step = length / n_points
+        return np.interp(np.arange(n_points) * step, arc_length, curvature, period=length), step
+    step = length / (n_points - 1)
+    return np.interp(np.arange(n_points) * step, arc_length, curvature), step
+
+
+def path_curvature(positions, corner_radii, n_points):
+    """
+    Samples the curvature of a TrackGenerator path at `n_points` evenly spaced
+    points, see `resample_curvature`.
+
+    Args:
+        positions (np.ndarray): complex points along the (closed) path
+        corner_radii (np.ndarray): signed corner radius at every point
+    """
+    segments = np.abs(np.diff(positions, append=positions[:1]))
+    arc_length = np.concatenate(([0.0], np.cumsum(segments[:-1])))
+    with np.errstate(divide='ignore'):
+        curvature = 1 / corner_radii
+    return resample_curvature(arc_length, curvature, segments.sum(), n_points)
+
+
+class VelocityProfile:
+    """
+    Minimum-time speed profile of the car around tracks, from the curvature of
+    their centreline and the tire and aero parameters of a vehicle model
+    config.
+
+    The car is a point mass with the grip of the peak friction coefficient of
+    its tires (`tire.D`) under its weight and the aero downforce. The speed
+    through every point is first capped by the grip needed to take its
+    corner. A forward pass then accelerates the car out of every corner with
+    the grip the corner leaves and at most the acceleration limit of the
+    config, less the aero drag, and a backward pass brakes it into the
+    corners the same way, with the drag helping. Closed tracks are driven as
+    a flying lap, starting both passes at the slowest corner, open tracks
+    from a standing start.
+
+    Tracks are resampled to the same number of points so that many of them
+    can be profiled at once: every step of the two passes is one NumPy
+    operation across the whole batch, and only the walk along the track is a
+    Python loop.
+    """
+
+    def __init__(self, vehicle_config, config=None):
+        """
+        Args:
+            vehicle_config: vehicle model config yaml file, or its Param
+            config (dict): overrides of the default config
+        """
+        default_cfg = {
+            # Points tracks are resampled to
+            'n_points': 1000,
+            # Top speed (m/s), the velocity limit of the vehicle config by default
+            'max_speed': None,
+            # Speed open tracks are started at (m/s)
+            'start_speed': 0.0,
+        }
+        self.config = {**default_cfg, **(config or {})}
+
+        param = vehicle_config if isinstance(vehicle_config, Param) else Param(vehicle_config)
+        self.mass = param.inertia.m
+        self.weight = param.inertia.m * param.inertia.g
+        self.mu = param.tire.D
+        self.c_down = param.aero.c_down
+        self.c_drag = param.aero.c_drag
+        self.max_acceleration = param.input_ranges.acc.max
+        self.max_deceleration = -param.input_ranges.acc.min
+        max_speed = self.config['max_speed']
+        self.max_speed = param.input_ranges.vel.max if max_speed is None else max_speed
+
+    def corner_speed(self, curvature):
+        """Fastest speed through corners of the given curvature (m/s)"""
+        curvature = np.abs(curvature)
+        # m v^2 |k| <= mu (m g + c_down v^2), unbounded once downforce grows faster
+        # than the grip needed
+        excess = self.mass * curvature - self.mu * self.c_down
+        with np.errstate(divide='ignore'):
+            squared = np.where(excess > 0, self.mu * self.weight / excess, np.inf)
+        return np.sqrt(np.minimum(squared, self.max_speed ** 2))
+
+    def _grip(self, squared_speed, curvature):
+        """Longitudinal acceleration the tires can give on top of cornering"""
+        total = self.mu * (self.weight + self.c_down * squared_speed)
+        lateral = self.mass * squared_speed * np.abs(curvature)
+        return np.sqrt(np.maximum(total * total - lateral * lateral, 0.0)) / self.mass
+
+    def _passes(self, curvature, step, start):
+        """
+        Forward and backward passes over a (B, N) batch of curvatures, from
+        squared speeds `start` (or the corner speed if None) at the first point
+
+        Returns:
+            (squared speeds, squared speeds of the forward pass, squared corner speeds)
+        """
+        limit = self.corner_speed(curvature) ** 2
+        n_points = curvature.shape[1]
+        squared = np.empty_like(curvature)
+        squared[:, 0] = limit[:, 0] if start is None else np.minimum(start, limit[:, 0])
+        drag = self.c_drag / self.mass
+
+        for i in range(n_points - 1):
+            u = squared[:, i]
+            acceleration = np.minimum(self._grip(u, curvature[:, i]), self.max_acceleration)
+            acceleration -= drag * u
+            squared[:, i + 1] = np.clip(u + 2 * acceleration * step, 0.0, limit[:, i + 1])
+        forward = squared.copy()
+
+        for i in range(n_points - 1, 0, -1):
+            u = squared[:, i]
+            deceleration = np.minimum(self._grip(u, curvature[:, i]), self.max_deceleration)
+            deceleration += drag * u
+            np.minimum(squared[:, i - 1], u + 2 * deceleration * step, out=squared[:, i - 1])
+        return squared, forward, limit
+
+    def profile(self, curvature, step, closed=True, details=False):
+        """
+        Speed profiles of tracks
+
+        Args:
+            curvature (np.ndarray): curvature at evenly spaced points along the
+                centreline, (N,) for a track or (B, N) for a batch of tracks
+            step (float or np.ndarray): distance between the points of every track
+            closed (bool): whether the tracks are laps, the last point being
+                `step` before the first, or open, the last point ending the track
+            details (bool): also return the fractions of every track spent
+                braking and at the cornering limit
+
+        Returns:
+            (speeds, lap_times) of the shapes of `curvature` and of a curvature
+            per track, and (braking, cornering) fractions of the track length
+            if `details`
+        """
+        curvature = np.asarray(curvature, dtype=float)
+        single = curvature.ndim == 1
+        curvature = np.atleast_2d(curvature)
+        batch, n_points = curvature.shape
+        step = np.broadcast_to(np.asarray(step, dtype=float), (batch,))
+
+        if closed:
+            # Start at the slowest corner, which the car can't take faster on a
+            # flying lap, and end back at it
+            first = np.argmax(np.abs(curvature), axis=1)
+            order = (first[:, None] + np.arange(n_points + 1)) % n_points
+            squared, forward, limit = self._passes(
+                np.take_along_axis(curvature, order, axis=1), step, None)
+        else:
+            start = self.config['start_speed'] ** 2
+            squared, forward, limit = self._passes(curvature, step, start)
+
+        speeds = np.sqrt(squared)
+        lap_times = np.sum(2 * step[:, None]
+                           / np.maximum(speeds[:, 1:] + speeds[:, :-1], 1e-9), axis=1)
+
+        if closed:
+            # Back to the points of the input, without the repeated first point
+            unrotate = (np.arange(n_points) - first[:, None]) % n_points
+            speeds, squared, forward, limit = (np.take_along_axis(array, unrotate, axis=1)
+                                               for array in (speeds, squared, forward, limit))
+
+        result = (speeds[0], lap_times[0]) if single else (speeds, lap_times)
+        if not details:
+            return result
+
+        braking = np.mean(squared < forward * (1 - 1e-9), axis=1)
+        cornering = np.mean((squared >= limit * (1 - 1e-9))
+                            & (limit < self.max_speed ** 2 * (1 - 1e-9)), axis=1)
+        return result + ((braking[0], cornering[0]) if single else (braking, cornering))
+
+    def grade(self, curvature, step, closed=True, names=None):
+        """
+        Grades a batch of tracks by how fast the car can drive them
+
+        Args:
+            curvature, step, closed: tracks as for `profile`
+            names (list): names of the tracks in the results
+
+        Returns:
+            list of dicts of metrics, one per track: length, lap time, average,
+            min and max speeds, tightest corner radius and the fractions of the
+            track spent braking and at the cornering limit. Tracks with lower
+            average speeds are harder.
+        """
+        curvature = np.atleast_2d(np.asarray(curvature, dtype=float))
+        batch, n_points = curvature.shape
+        step = np.broadcast_to(np.asarray(step, dtype=float), (batch,))
+        speeds, lap_times, braking, cornering = self.profile(
+            curvature, step, closed, details=True)
+        lengths = step * (n_points if closed else n_points - 1)
+        names = names if names is not None else [str(i) for i in range(batch)]
+
+        return [{
+            'track': names[i],
+            'length': float(lengths[i]),
+            'lap_time': float(lap_times[i]),
+            'average_speed': float(lengths[i] / lap_times[i]),
+            'min_speed': float(speeds[i].min()),
+            'max_speed': float(speeds[i].max()),
+            'min_corner_radius': float(1 / max(np.abs(curvature[i]).max(), 1e-9)),
+            'braking': float(braking[i]),
+            'cornering': float(cornering[i]),
+        } for i in range(batch)]
+
+    def grade_paths(self, paths, names=None):
+        """
+        Grades tracks from their TrackGenerator paths (TrackGenerator.path or
+        TrackGenerator.generate_path())
+        """
+        curvature, step = zip(*(path_curvature(positions, corner_radii, self.config['n_points'])
+                                for positions, _, corner_radii in paths))
+        return self.grade(np.array(curvature), np.array(step), True, names)
+
+    def grade_geometries(self, geometries):
+        """Grades tracks from their TrackGeometry, open and closed tracks alike"""
+        results = [None] * len(geometries)
+        for closed in (True, False):
+            indices = [i for i, geometry in enumerate(geometries) if geometry.closed == closed]
+            if not indices:
+                continue
+            curvature, step = zip(*(resample_curvature(
+                geometries[i].arc_length, geometries[i].curvature, geometries[i].length,
+                self.config['n_points'], closed) for i in indices))
+            names = [geometries[i].name for i in indices]
+            for i, result in zip(indices, self.grade(np.array(curvature), np.array(step),
+                                                     closed, names)):
+                results[i] = result
+        return results
@@ -82,7 +82,11 @@ setup(
         ],
         'eufs_tracks.verb': [
             'create = eufs_tracks.cli.create:EUFSTracksCreate',
-            'convert = eufs_tracks.cli.convert:EUFSTracksConvert'
+            'convert = eufs_tracks.cli.convert:EUFSTracksConvert',
+            'simulate = eufs_tracks.cli.simulate:EUFSTracksSimulate',
+            'geometry = eufs_tracks.cli.geometry:EUFSTracksGeometry',
+            'evaluate = eufs_tracks.cli.evaluate:EUFSTracksEvaluate',
+            'grade = eufs_tracks.cli.grade:EUFSTracksGrade'
         ]
     }
 )
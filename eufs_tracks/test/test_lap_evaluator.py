@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+from eufs_tracks.lap_evaluator import LapEvaluator
+from eufs_tracks.lap_simulator import Track
+from eufs_tracks.track_geometry import TrackGeometry
+
+CSV = os.path.join(os.path.dirname(__file__), '..', 'csv')
+
+
+def centreline_run(evaluator, laps, speed=5.0, rate=200.0):
+    """Poses following the centreline at `speed` from just before the start line"""
+    geometry = evaluator.geometry
+    times = np.arange(int(laps * geometry.length / speed * rate)) / rate
+    s = evaluator.start_line - 3.0 + speed * times
+    n = len(geometry.centreline)
+    index = s / geometry.length * n
+    first = np.floor(index).astype(int)
+    fraction = (index - first)[:, None]
+    points = ((1 - fraction) * geometry.centreline[first % n]
+              + fraction * geometry.centreline[(first + 1) % n])
+    yaws = np.interp(index % n, np.arange(n), np.unwrap(geometry.heading), period=n)
+    return times, points[:, 0], points[:, 1], yaws
+
+
+@pytest.mark.parametrize('name, laps', [('its_a_mess', 8), ('peanut', 15),
+                                        ('boa_constrictor', 20)])
+def test_many_laps(name, laps):
+    # Lines crossed exactly used to be found again, hanging the evaluator
+    path = os.path.join(CSV, name + '.csv')
+    evaluator = LapEvaluator((Track.from_csv(path), TrackGeometry.from_csv(path, cache=False)))
+    evaluator.update_many(*centreline_run(evaluator, laps))
+
+    lap_times = evaluator.result()['lap_times']
+    assert len(lap_times) == laps - 1
+    assert lap_times == pytest.approx([evaluator.geometry.length / 5.0] * (laps - 1), abs=1e-3)
+
+
+def test_open_track_has_no_laps_driven():
+    path = os.path.join(CSV, 'acceleration.csv')
+    evaluator = LapEvaluator((Track.from_csv(path), TrackGeometry.from_csv(path, cache=False)))
+    # Straight down the track, from before the start line to past the finish line
+    geometry = evaluator.geometry
+    times = np.arange(int((evaluator.finish_line - evaluator.start_line + 6.0) / 5.0 * 200)) / 200
+    s = evaluator.start_line - 3.0 + 5.0 * times
+    yaw = geometry.heading[0]
+    xs = geometry.centreline[0, 0] + s * np.cos(yaw)
+    ys = geometry.centreline[0, 1] + s * np.sin(yaw)
+    evaluator.update_many(times, xs, ys, np.full(len(times), yaw))
+
+    result = evaluator.result()
+    assert result['laps_driven'] is None
+    assert result['lap_times'] == pytest.approx(
+        [(evaluator.finish_line - evaluator.start_line) / 5.0], abs=1e-3)
+    assert not result['cone_hits']
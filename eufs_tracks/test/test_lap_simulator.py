@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from eufs_tracks.lap_simulator import BatchLapSimulator, LapSimulator, MidpointController
+
+CSV = os.path.join(os.path.dirname(__file__), '..', 'csv')
+VEHICLE_CONFIG = os.path.join(os.path.dirname(__file__), '..', '..', 'eufs_racecar', 'robots',
+                              'eufs', 'configDry.yaml')
+
+
+def test_open_track_finishes():
+    # Acceleration is driven from the start line to the finish line 75 m on
+    simulator = LapSimulator(os.path.join(CSV, 'acceleration.csv'), VEHICLE_CONFIG, {'laps': 2})
+    result = simulator.run(MidpointController(simulator.track, simulator.config, 6.0))
+
+    assert result['end_reason'] == "finished"
+    assert len(result['lap_times']) == 1
+    assert 75.0 / 6.0 < result['lap_times'][0] < 75.0 / 5.0
+    assert not result['off_track_events']
+
+
+def test_batch_matches_single_car():
+    names = ['small_track', 'rectangle', 'acceleration']
+    tracks = [os.path.join(CSV, name + '.csv') for name in names]
+    config = {'max_time': 40.0}
+    batch = BatchLapSimulator(tracks, VEHICLE_CONFIG, config)
+    results = batch.run(MidpointController.batch(batch.tracks, batch.config, target_speed=6.0))
+
+    for track, result in zip(tracks, results):
+        simulator = LapSimulator(track, VEHICLE_CONFIG, config)
+        expected = simulator.run(MidpointController(simulator.track, simulator.config, 6.0))
+        assert result['end_reason'] == expected['end_reason']
+        assert result['lap_times'] == pytest.approx(expected['lap_times'])
+        assert len(result['cone_hits']) == len(expected['cone_hits'])
+        assert len(result['off_track_events']) == len(expected['off_track_events'])
@@ -0,0 +1,94 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from eufs_tracks.track_geometry import TrackGeometry
+
+CSV = os.path.join(os.path.dirname(__file__), '..', 'csv')
+
+
+def closest_on_segments(polyline, closed, x, y):
+    """Brute force: (segment, fraction along it, signed distance) to the closest segment"""
+    starts = polyline if closed else polyline[:-1]
+    ends = np.roll(polyline, -1, axis=0) if closed else polyline[1:]
+    steps = ends - starts
+    t = np.clip(((x - starts[:, 0]) * steps[:, 0] + (y - starts[:, 1]) * steps[:, 1])
+                / np.maximum(np.sum(steps ** 2, axis=1), 1e-12), 0.0, 1.0)
+    px, py = x - starts[:, 0] - t * steps[:, 0], y - starts[:, 1] - t * steps[:, 1]
+    distances = np.hypot(px, py)
+    segment = int(np.argmin(distances))
+    side = steps[segment, 0] * py[segment] - steps[segment, 1] * px[segment]
+    return segment, t[segment], np.copysign(distances[segment], side)
+
+
+def points_on_track(geometry, count=300, seed=0):
+    """Points across the track at random places along the centreline"""
+    rng = np.random.default_rng(seed)
+    index = rng.integers(len(geometry.centreline), size=count)
+    across = rng.uniform(-0.8, 0.8, size=count)
+    normal = np.column_stack([-np.sin(geometry.heading[index]), np.cos(geometry.heading[index])])
+    widths = np.where(across > 0, geometry.left_width[index], geometry.right_width[index])
+    return geometry.centreline[index] + (across * widths)[:, None] * normal
+
+
+@pytest.fixture(scope='module', params=['small_track', 'rectangle', 'its_a_mess', 'acceleration'])
+def geometry(request):
+    return TrackGeometry.from_csv(os.path.join(CSV, request.param + '.csv'), cache=False)
+
+
+def test_progress_matches_brute_force(geometry):
+    for x, y in points_on_track(geometry):
+        _, _, offset = closest_on_segments(geometry.centreline, geometry.closed, x, y)
+        s, actual_offset = geometry.progress(x, y)
+        assert actual_offset == pytest.approx(offset, abs=1e-9)
+
+        # The centreline at `s` is the closest point, whichever of two equally
+        # close segments it is on
+        centre_x = np.interp(s, geometry.arc_length, geometry.centreline[:, 0],
+                             period=geometry.length if geometry.closed else None)
+        centre_y = np.interp(s, geometry.arc_length, geometry.centreline[:, 1],
+                             period=geometry.length if geometry.closed else None)
+        assert np.hypot(x - centre_x, y - centre_y) == pytest.approx(abs(offset), abs=1e-9)
+
+
+def test_nearest_boundary_matches_brute_force(geometry):
+    for x, y in points_on_track(geometry):
+        distances = {side: abs(closest_on_segments(polyline, geometry.closed, x, y)[2])
+                     for side, polyline in (('left', geometry.left), ('right', geometry.right))}
+        side, distance, on_track = geometry.nearest_boundary(x, y)
+        assert distance == pytest.approx(min(distances.values()), abs=1e-9)
+        assert distances[side] == pytest.approx(distance, abs=1e-9)
+        assert on_track
+
+
+def test_sidecar_is_recomputed_when_the_csv_changes(tmp_path):
+    path = str(tmp_path / 'small_track.csv')
+    shutil.copy(os.path.join(CSV, 'small_track.csv'), path)
+    sidecar = str(tmp_path / 'small_track.geometry.npz')
+
+    geometry = TrackGeometry.from_csv(path)
+    assert os.path.exists(sidecar)
+    cached = TrackGeometry.load(sidecar, geometry.source_hash)
+    np.testing.assert_array_equal(cached.centreline, geometry.centreline)
+
+    # Move the first blue cone
+    with open(path) as f:
+        lines = f.read().splitlines()
+    row = next(i for i, line in enumerate(lines) if line.startswith('blue,'))
+    tag, x, y, *rest = lines[row].split(',')
+    lines[row] = ','.join([tag, str(float(x) + 0.5), y] + rest)
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+    changed = TrackGeometry.from_csv(path)
+    assert changed.source_hash != geometry.source_hash
+    assert TrackGeometry.load(sidecar, geometry.source_hash) is None
+    assert TrackGeometry.load(sidecar, changed.source_hash) is not None
+    assert float(x) + 0.5 in changed.left[:, 0]
+
+
+def test_self_crossing_track_is_rejected():
+    with pytest.raises(ValueError, match='crosses itself'):
+        TrackGeometry.from_csv(os.path.join(CSV, 'skidpad.csv'), cache=False)
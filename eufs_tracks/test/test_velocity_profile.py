@@ -0,0 +1,79 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from eufs_models import Param
+from eufs_tracks.velocity_profile import VelocityProfile
+
+VEHICLE_CONFIG = os.path.join(os.path.dirname(__file__), '..', '..', 'eufs_racecar', 'robots',
+                              'eufs', 'configDry.yaml')
+
+
+@pytest.fixture
+def profile():
+    return VelocityProfile(VEHICLE_CONFIG)
+
+
+def test_circle():
+    # Without drag the car can hold the cornering limit all the way round
+    param = Param(VEHICLE_CONFIG)
+    param.aero.c_drag = 0.0
+    profile = VelocityProfile(param)
+    radius, n_points = 9.0, 500
+    speeds, lap_time = profile.profile(np.full(n_points, 1 / radius),
+                                       2 * math.pi * radius / n_points)
+
+    # m v^2 / r = mu (m g + c_down v^2)
+    speed = math.sqrt(profile.mu * profile.weight
+                      / (profile.mass / radius - profile.mu * profile.c_down))
+    assert speeds == pytest.approx(speed)
+    assert lap_time == pytest.approx(2 * math.pi * radius / speed)
+
+
+def test_straight():
+    # Without aero the car accelerates at a constant rate up to its top speed
+    param = Param(VEHICLE_CONFIG)
+    param.aero.c_down = param.aero.c_drag = 0.0
+    profile = VelocityProfile(param)
+    length, n_points = 200.0, 4001
+    speeds, lap_time = profile.profile(np.zeros(n_points), length / (n_points - 1), closed=False)
+
+    acceleration = min(profile.mu * profile.weight / profile.mass, profile.max_acceleration)
+    top_speed = profile.max_speed
+    distance = top_speed ** 2 / (2 * acceleration)
+    assert distance < length
+    expected = top_speed / acceleration + (length - distance) / top_speed
+    assert speeds[0] == 0.0
+    assert speeds[-1] == pytest.approx(top_speed)
+    assert lap_time == pytest.approx(expected, rel=1e-3)
+
+
+def test_batch_matches_single_tracks(profile):
+    rng = np.random.default_rng(0)
+    curvature = rng.uniform(-0.2, 0.2, size=(4, 300))
+    step = np.array([0.5, 0.6, 0.7, 0.8])
+    speeds, lap_times = profile.profile(curvature, step)
+    for i in range(len(curvature)):
+        single_speeds, single_time = profile.profile(curvature[i], step[i])
+        np.testing.assert_allclose(speeds[i], single_speeds)
+        assert lap_times[i] == pytest.approx(single_time)
+
+
+def test_grade_generated_paths(profile):
+    # The track generator package imports its Qt GUI
+    track_generator = pytest.importorskip('eufs_tracks.track_generator')
+    generator = track_generator.TrackGenerator({'seed': 1.0})
+    paths = [generator.generate_path() for _ in range(2)]
+    # Generating a track keeps its path
+    start_cones, left_cones, right_cones = generator()
+    assert len(left_cones) and len(right_cones)
+    paths.append(generator.path)
+
+    results = profile.grade_paths(paths, names=['a', 'b', 'c'])
+    assert [result['track'] for result in results] == ['a', 'b', 'c']
+    for result in results:
+        assert result['length'] > 0
+        assert 0 < result['min_speed'] <= result['average_speed'] <= result['max_speed']
+        assert result['lap_time'] == pytest.approx(result['length'] / result['average_speed'])